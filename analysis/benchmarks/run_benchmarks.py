@@ -0,0 +1,452 @@
+"""
+ベンチマークスイート
+
+テクニカル指標、分析、バックテスト、モンテカルロシミュレーション、
+パラメーター最適化、リスク指標、Flask エンドポイントの実行時間を合成データで計測し、結果を JSON で出力します。
+データ取得（yfinance）とバックエンドへの保存はスタブに置き換えるため、
+ネットワークには接続しません。
+
+使い方（analysis ディレクトリで実行）:
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --filter indicators
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json
+
+--compare を指定すると、基準の結果と比べて threshold 倍以上遅くなったケースを表示し、
+終了コード 1 で終了します（コミット間の比較や CI での回帰検出に使用します）。
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import timeit
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import app as app_module  # noqa: E402
+from analyzer import TechnicalAnalyzer  # noqa: E402
+from backtest import Backtester  # noqa: E402
+from compute_pool import ComputePool  # noqa: E402
+from data_fetch import DataFetcher  # noqa: E402
+from incremental_indicators import IndicatorSet  # noqa: E402
+from indicators import TechnicalIndicators  # noqa: E402
+from optimizer import grid_search_space, run_sweep  # noqa: E402
+from panel import build_panel  # noqa: E402
+from portfolio_backtest import PortfolioBacktester  # noqa: E402
+from risk_metrics import compute_panel_risk_metrics, compute_risk_metrics, rolling_risk_metrics  # noqa: E402
+from walk_forward import walk_forward_frame  # noqa: E402
+from synthetic import SIZES, UNIVERSE_SIZES, make_dataset, make_universe  # noqa: E402
+
+# 結果の JSON 形式のバージョン（項目を変更した場合に更新する）
+SCHEMA_VERSION = 1
+
+# (ケース名, パラメーター, 計測する関数)
+Case = Tuple[str, Dict, Callable[[], object]]
+
+
+class _StubResponse:
+    """バックエンドへの保存が成功したことを示すレスポンス"""
+    status_code = 201
+    text = ""
+
+    def json(self) -> Dict:
+        return {"success": True}
+
+
+class _StubBackend:
+    """バックエンドへの通信を行わない BackendClient のスタブ"""
+
+    def post(self, path: str, **kwargs) -> _StubResponse:
+        return _StubResponse()
+
+    get = post
+
+
+@contextmanager
+def stubbed_environment(frames: Dict[str, pd.DataFrame]) -> Iterator[None]:
+    """
+    DataFetcher とバックエンドクライアントを合成データのスタブに置き換えます。
+
+    Args:
+        frames: 銘柄コードから OHLCV データへの辞書
+    """
+    def fetch_stock_data(self, ticker, period="1y", interval="1d"):
+        return frames.get(ticker)
+
+    def fetch_multiple_stocks(self, tickers, period="1y", interval="1d", batch_size=None):
+        return {ticker: frames.get(ticker) for ticker in tickers}
+
+    def fetch_date_range(self, ticker, start_date, end_date, interval="1d"):
+        return frames.get(ticker)
+
+    originals = {
+        name: getattr(DataFetcher, name)
+        for name in ("fetch_stock_data", "fetch_multiple_stocks", "fetch_date_range")
+    }
+    original_client = app_module.get_backend_client
+    DataFetcher.fetch_stock_data = fetch_stock_data
+    DataFetcher.fetch_multiple_stocks = fetch_multiple_stocks
+    DataFetcher.fetch_date_range = fetch_date_range
+    app_module.get_backend_client = lambda *args, **kwargs: _StubBackend()
+    try:
+        yield
+    finally:
+        for name, method in originals.items():
+            setattr(DataFetcher, name, method)
+        app_module.get_backend_client = original_client
+
+
+_pool: Optional[ComputePool] = None
+
+
+def _bench_pool() -> ComputePool:
+    """CPU コア数のワーカーを持つ計算プール（全ケースで共有し、起動時間は計測に含めない）"""
+    global _pool
+    if _pool is None:
+        _pool = ComputePool(max_workers=0)
+    return _pool
+
+
+def indicator_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """TechnicalIndicators の全メソッド（全系列モード）"""
+    ti = TechnicalIndicators
+    for name, df in datasets.items():
+        high, low, close, volume = df["high"], df["low"], df["close"], df["volume"]
+        methods = {
+            "calculate_ma": lambda: ti.calculate_ma(close, 20),
+            "calculate_ema": lambda: ti.calculate_ema(close, 20),
+            "calculate_rsi": lambda: ti.calculate_rsi(close, 14),
+            "calculate_macd": lambda: ti.calculate_macd(close),
+            "calculate_bollinger_bands": lambda: ti.calculate_bollinger_bands(close),
+            "calculate_atr": lambda: ti.calculate_atr(high, low, close),
+            "calculate_stochastic": lambda: ti.calculate_stochastic(high, low, close),
+            "calculate_volume_ma": lambda: ti.calculate_volume_ma(volume),
+            "calculate_obv": lambda: ti.calculate_obv(close, volume),
+        }
+        for method, func in methods.items():
+            yield f"indicators.{method}", {"dataset": name, "bars": len(df)}, func
+
+
+def incremental_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """逐次更新型指標（全バーを1本ずつ取り込む）"""
+    df = datasets["250d"]
+    yield "incremental.indicator_set", {"dataset": "250d", "bars": len(df)}, lambda: IndicatorSet().update_frame(df)
+
+
+def analyzer_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """TechnicalAnalyzer（データ取得はスタブ）"""
+    for name, df in datasets.items():
+        if df.index.freqstr == "min":
+            continue
+        ticker = f"BENCH_{name}.T"
+        yield (
+            "analyzer.analyze_stock",
+            {"dataset": name, "bars": len(df)},
+            lambda ticker=ticker: TechnicalAnalyzer.analyze_stock(ticker),
+        )
+    for num_tickers, frames in universes.items():
+        tickers = list(frames)
+        yield (
+            "analyzer.analyze_multiple_stocks",
+            {"tickers": num_tickers, "bars": 250},
+            lambda tickers=tickers: TechnicalAnalyzer.analyze_multiple_stocks(tickers),
+        )
+        yield (
+            "analyzer.analyze_universe",
+            {"tickers": num_tickers, "bars": 250},
+            lambda tickers=tickers: TechnicalAnalyzer.analyze_universe(tickers),
+        )
+        yield (
+            "analyzer.compute_pool",
+            {"tickers": num_tickers, "bars": 250, "workers": _bench_pool().max_workers},
+            lambda frames=frames: _bench_pool().map_frames("analyze", frames),
+        )
+
+
+def backtest_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """Backtester.run_backtest（データ取得はスタブ）"""
+    for name, df in datasets.items():
+        if df.index.freqstr == "min":
+            continue
+        ticker = f"BENCH_{name}.T"
+        yield (
+            "backtest.run_backtest",
+            {"dataset": name, "bars": len(df)},
+            lambda ticker=ticker: Backtester().run_backtest(ticker),
+        )
+    for num_tickers, frames in universes.items():
+        yield (
+            "backtest.compute_pool",
+            {"tickers": num_tickers, "bars": 250, "workers": _bench_pool().max_workers},
+            lambda frames=frames: _bench_pool().map_frames("backtest", frames),
+        )
+    for num_tickers, frames in universes.items():
+        yield (
+            "backtest.portfolio",
+            {"tickers": num_tickers, "bars": 250},
+            lambda frames=frames: PortfolioBacktester().run(frames),
+        )
+
+
+def monte_carlo_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """モンテカルロシミュレーション"""
+    returns = datasets["250d"]["close"].pct_change().dropna().to_numpy()
+    for num_simulations in (1_000, 10_000, 100_000):
+        yield (
+            "monte_carlo.simulate_returns",
+            {"simulations": num_simulations, "horizon": len(returns)},
+            lambda n=num_simulations: Backtester.simulate_returns(returns, num_simulations=n, seed=0),
+        )
+    yield (
+        "monte_carlo.simulate_returns_block",
+        {"simulations": 10_000, "horizon": len(returns), "block_size": 20},
+        lambda: Backtester.simulate_returns(returns, num_simulations=10_000, seed=0, block_size=20),
+    )
+
+
+def optimizer_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """パラメーター最適化とウォークフォワード検証（既定のグリッド全体）"""
+    combos = grid_search_space()
+    frames = dict(list(universes[min(universes)].items())[:20])
+    pools = [ComputePool(max_workers=1)] + ([_bench_pool()] if _bench_pool().parallel else [])
+    for pool in pools:
+        yield (
+            "optimizer.run_sweep",
+            {"tickers": len(frames), "combinations": len(combos), "workers": pool.max_workers},
+            lambda pool=pool: run_sweep(frames, combos, pool=pool),
+        )
+    df = datasets["10y_daily"]
+    yield (
+        "optimizer.walk_forward",
+        {"dataset": "10y_daily", "bars": len(df), "combinations": len(combos)},
+        lambda: walk_forward_frame(df, combos),
+    )
+
+
+def risk_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """リスク指標（1銘柄・パネル・ローリング）"""
+    close = datasets["10y_daily"]["close"]
+    yield "risk.compute", {"dataset": "10y_daily", "bars": len(close)}, lambda: compute_risk_metrics(close)
+    for num_tickers, frames in universes.items():
+        panel = build_panel(frames, "close")
+        yield (
+            "risk.panel",
+            {"tickers": num_tickers, "bars": len(panel)},
+            lambda panel=panel: compute_panel_risk_metrics(panel),
+        )
+        yield (
+            "risk.rolling_panel",
+            {"tickers": num_tickers, "bars": len(panel), "window": 63},
+            lambda panel=panel: rolling_risk_metrics(panel, window=63),
+        )
+
+
+def flask_cases(datasets: Dict[str, pd.DataFrame], universes: Dict[int, Dict]) -> Iterator[Case]:
+    """Flask エンドポイント（テストクライアント経由、データ取得と保存はスタブ）"""
+    client = app_module.app.test_client()
+    ticker = "BENCH_250d.T"
+
+    def get(path: str) -> Callable[[], object]:
+        def request():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+        return request
+
+    yield "flask.analyze", {"dataset": "250d"}, get(f"/analyze/{ticker}")
+    yield "flask.backtest", {"dataset": "250d"}, get(f"/backtest/{ticker}")
+    yield "flask.monte_carlo", {"dataset": "250d", "simulations": 10_000}, get(
+        f"/monte-carlo/{ticker}?num_simulations=10000&seed=0"
+    )
+    yield "flask.sharpe_ratio", {"dataset": "250d"}, get(f"/sharpe-ratio/{ticker}")
+    yield "flask.max_drawdown", {"dataset": "250d"}, get(f"/max-drawdown/{ticker}")
+
+    tickers = list(universes[UNIVERSE_SIZES[0]])
+
+    def batch():
+        response = client.post("/analyze/batch", json={"tickers": tickers, "save_to_backend": False})
+        assert response.status_code == 200, response.status_code
+
+    yield "flask.analyze_batch", {"tickers": len(tickers), "bars": 250}, batch
+
+
+GROUPS = {
+    "indicators": indicator_cases,
+    "incremental": incremental_cases,
+    "analyzer": analyzer_cases,
+    "backtest": backtest_cases,
+    "monte_carlo": monte_carlo_cases,
+    "optimizer": optimizer_cases,
+    "risk": risk_cases,
+    "flask": flask_cases,
+}
+
+
+def measure(func: Callable[[], object], repeat: int, min_time: float) -> Dict:
+    """
+    関数の1回あたりの実行時間を計測します。
+
+    1回の計測が min_time 秒以上になる実行回数を求めてから、repeat 回計測します。
+
+    Args:
+        func: 計測する関数
+        repeat: 計測回数
+        min_time: 1回の計測の最小時間（秒）
+
+    Returns:
+        実行回数と、1回あたりの最速・中央値・平均の実行時間（秒）を含む辞書
+    """
+    func()  # ウォームアップ（初回のみのキャッシュ構築などを除外する）
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    times = [elapsed / number] + [t / number for t in timer.repeat(repeat=repeat - 1, number=number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+    }
+
+
+def environment() -> Dict:
+    """計測環境（コミット、バージョン、マシン）を返します"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BENCH_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def case_key(result: Dict) -> str:
+    """比較に使うケースの識別子（ケース名とパラメーター）を返します"""
+    return result["name"] + json.dumps(result["params"], sort_keys=True)
+
+
+def run(
+    groups: Optional[List[str]] = None,
+    name_filter: Optional[str] = None,
+    quick: bool = False,
+    repeat: int = 5,
+    min_time: float = 0.2,
+) -> Dict:
+    """
+    ベンチマークを実行します。
+
+    Args:
+        groups: 実行するグループ（省略時は全て）
+        name_filter: ケース名に含まれる文字列で絞り込む
+        quick: 大きなデータセット（1分足、5000銘柄）を省略する
+        repeat: 計測回数
+        min_time: 1回の計測の最小時間（秒）
+
+    Returns:
+        計測環境と各ケースの結果を含む辞書
+    """
+    sizes = [name for name in SIZES if not (quick and name == "1y_1min")]
+    universe_sizes = UNIVERSE_SIZES[:1] if quick else UNIVERSE_SIZES
+    datasets = {name: make_dataset(name) for name in sizes}
+    universes = {n: make_universe(n) for n in universe_sizes}
+
+    frames = dict(universes[max(universe_sizes)])
+    frames.update({f"BENCH_{name}.T": df for name, df in datasets.items()})
+
+    results = []
+    with stubbed_environment(frames):
+        for group in groups or list(GROUPS):
+            for name, params, func in GROUPS[group](datasets, universes):
+                if name_filter and name_filter not in name:
+                    continue
+                timing = measure(func, repeat=repeat, min_time=min_time)
+                results.append({"name": name, "group": group, "params": params, **timing})
+                print(f"{name:<40} {json.dumps(params):<45} {timing['best_s'] * 1e3:>12.3f}ms", file=sys.stderr)
+
+    return {"schema_version": SCHEMA_VERSION, "environment": environment(), "results": results}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """
+    基準の結果と比較し、各ケースの速度比を表示します。
+
+    Args:
+        current: 今回の結果
+        baseline: 基準の結果
+        threshold: 回帰とみなす速度比（今回 / 基準）
+
+    Returns:
+        回帰したケースのリスト
+    """
+    base = {case_key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        previous = base.get(case_key(result))
+        if previous is None:
+            continue
+        ratio = result["best_s"] / previous["best_s"]
+        marker = "  REGRESSION" if ratio >= threshold else ""
+        print(f"{result['name']:<40} {json.dumps(result['params']):<45} {ratio:>7.2f}x{marker}", file=sys.stderr)
+        if ratio >= threshold:
+            regressions.append({"name": result["name"], "params": result["params"], "ratio": ratio})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run analysis engine benchmarks")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--group", action="append", choices=list(GROUPS), help="benchmark group to run")
+    parser.add_argument("--filter", help="only run cases whose name contains this string")
+    parser.add_argument("--quick", action="store_true", help="skip 1-minute and 5000-ticker datasets")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    # 計測中のログ出力を抑える
+    logging.getLogger().setLevel(logging.WARNING)
+
+    report = run(args.group, args.filter, args.quick, args.repeat, args.min_time)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold}x", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
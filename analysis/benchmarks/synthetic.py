@@ -0,0 +1,75 @@
+"""
+ベンチマーク用の合成 OHLCV データ生成モジュール
+
+DataFetcher が返すデータと同じ形式（小文字の列名、日本時間のインデックス）で、
+乱数シードを固定した再現可能な株価データを作成します。
+"""
+
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from data_providers import generate_ohlcv
+
+# データセット名 → (本数, 頻度)
+SIZES: Dict[str, Tuple[int, str]] = {
+    # 約1年分の日足
+    "250d": (250, "B"),
+    # 10年分の日足（約2,520本）
+    "10y_daily": (252 * 10, "B"),
+    # 1年分の1分足（東証: 245営業日 × 300分）
+    "1y_1min": (245 * 300, "min"),
+}
+
+# ユニバースの銘柄数（監視銘柄数と東証全体の規模）
+UNIVERSE_SIZES: List[int] = [180, 5000]
+
+
+def make_ohlcv(periods: int, freq: str = "B", seed: int = 0, start: str = "2015-01-05") -> pd.DataFrame:
+    """
+    幾何ランダムウォークによる OHLCV データを作成します（SyntheticProvider と同じ生成方法）。
+
+    Args:
+        periods: 本数
+        freq: 頻度（pandas の頻度文字列）
+        seed: 乱数シード
+        start: 開始日時
+
+    Returns:
+        open, high, low, close, volume 列を持つ DataFrame
+    """
+    index = pd.date_range(start, periods=periods, freq=freq, tz="Asia/Tokyo", name="Date").as_unit("ns")
+    return generate_ohlcv(index, seed=seed)
+
+
+def make_dataset(name: str, seed: int = 0) -> pd.DataFrame:
+    """
+    SIZES に定義したデータセットを作成します。
+
+    Args:
+        name: データセット名
+        seed: 乱数シード
+
+    Returns:
+        OHLCV データ
+    """
+    periods, freq = SIZES[name]
+    return make_ohlcv(periods, freq, seed=seed)
+
+
+def make_universe(num_tickers: int, periods: int = 250, freq: str = "B") -> Dict[str, pd.DataFrame]:
+    """
+    複数銘柄分の OHLCV データを作成します。
+
+    Args:
+        num_tickers: 銘柄数
+        periods: 1銘柄あたりの本数
+        freq: 頻度
+
+    Returns:
+        銘柄コード（1000.T から連番）から OHLCV データへの辞書
+    """
+    return {
+        f"{1000 + i}.T": make_ohlcv(periods, freq, seed=i)
+        for i in range(num_tickers)
+    }
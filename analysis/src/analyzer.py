@@ -4,15 +4,21 @@
 テクニカル指標に基づいて買い・売り判定を行います。
 """
 
+import numpy as np
 import pandas as pd
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 from enum import Enum
 from datetime import datetime, timedelta
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import copy
 import random
 import os
 from indicators import TechnicalIndicators
+from panel import PanelIndicators, build_panel
+from compute_pool import get_compute_pool
 from data_fetch import DataFetcher
+from single_flight import SingleFlight
 
 # ロギング設定
 logger = logging.getLogger(__name__)
@@ -22,10 +28,17 @@ class Signal(Enum):
     BUY = "BUY"
     SELL = "SELL"
     HOLD = "HOLD"
+    NEUTRAL = "NEUTRAL"  # 指標が計算できない場合（データ不足など）
 
 # Development mode with demo data
 DEMO_MODE = os.getenv("DEMO_MODE", "false").lower() == "true"
 
+# 複数銘柄分析時のデータ取得ワーカー数（レートは DataFetcher のトークンバケットで制御）
+ANALYSIS_IO_WORKERS = int(os.getenv("ANALYSIS_IO_WORKERS", 4))
+
+# 同じ銘柄・期間の同時分析を1回にまとめる（スケジューラーとAPIの重複実行対策）
+_analysis_flight = SingleFlight("analysis")
+
 def generate_demo_analysis(ticker: str) -> Dict:
     """生成デモ分析データ（開発用）"""
     random.seed(hash(ticker) % 2**32)
@@ -68,6 +81,12 @@ class TechnicalAnalyzer:
     MACD_SLOW = 26
     MACD_SIGNAL = 9
 
+    # 総合スコアの重みと判定の閾値
+    MA_WEIGHT = 0.4
+    RSI_WEIGHT = 0.3
+    MACD_WEIGHT = 0.3
+    SIGNAL_THRESHOLD = 0.3
+
     @staticmethod
     def analyze_stock(
         ticker: str,
@@ -76,6 +95,9 @@ class TechnicalAnalyzer:
         """
         銘柄を総合的に分析します。
 
+        同じ (ticker, period) の分析が他のスレッドで実行中の場合は、
+        その完了を待って結果を共有します。
+
         Args:
             ticker: 銘柄コード
             period: 分析対象期間
@@ -88,58 +110,174 @@ class TechnicalAnalyzer:
             if DEMO_MODE:
                 logger.info(f"Using DEMO_MODE for {ticker}")
                 return generate_demo_analysis(ticker)
-            
-            # データを取得
-            fetcher = DataFetcher()
-            df = fetcher.fetch_stock_data(ticker, period=period)
+
+            result = _analysis_flight.do(
+                (ticker, period),
+                lambda: TechnicalAnalyzer._fetch_and_analyze(ticker, period)
+            )
+            # 結果は待機中の呼び出し元と共有されるため、コピーして返す
+            return copy.deepcopy(result)
+
+        except Exception as e:
+            logger.error(f"Error analyzing {ticker}: {str(e)}")
+            return None
+
+    @staticmethod
+    def _fetch_and_analyze(ticker: str, period: str) -> Optional[Dict]:
+        """データを取得して分析します"""
+        fetcher = DataFetcher()
+        df = fetcher.fetch_stock_data(ticker, period=period)
+        return TechnicalAnalyzer.analyze_dataframe(ticker, df)
+
+    @staticmethod
+    def get_single_flight_stats() -> Dict:
+        """
+        同時分析の集約に関する統計情報を返します。
+
+        Returns:
+            呼び出し数、実行数、集約された呼び出し数などを含む辞書
+        """
+        return _analysis_flight.get_stats()
+
+    @staticmethod
+    def analyze_dataframe(ticker: str, df: Optional[pd.DataFrame]) -> Optional[Dict]:
+        """
+        取得済みの株価データから銘柄を分析します。
+
+        Args:
+            ticker: 銘柄コード
+            df: OHLCV データ
+
+        Returns:
+            分析結果を含む辞書
+        """
+        try:
             if df is None or df.empty:
                 logger.warning(f"Failed to fetch data for {ticker}, using demo data")
                 return generate_demo_analysis(ticker)
 
             # テクニカル指標を計算
             indicators = TechnicalAnalyzer._calculate_indicators(df)
-
-            # 各指標に基づいて判定
-            ma_signal = TechnicalAnalyzer._analyze_moving_average(df, indicators)
-            rsi_signal = TechnicalAnalyzer._analyze_rsi(indicators)
-            macd_signal = TechnicalAnalyzer._analyze_macd(indicators)
-
-            # 総合スコアを計算
-            score, composite_signal = TechnicalAnalyzer._calculate_composite_signal(
-                ma_signal, rsi_signal, macd_signal
-            )
-
-            # 現在の価格情報
-            latest_row = df.iloc[-1]
-            current_price = latest_row.get("close", latest_row.get("Close", 0))
-            if len(df) > 1:
-                previous_close = df.iloc[-2].get("close", df.iloc[-2].get("Close", current_price))
-            else:
-                previous_close = current_price
-            change_percent = ((current_price - previous_close) / previous_close) * 100 if previous_close != 0 else 0
-
-            return {
-                "ticker": ticker,
-                "current_price": float(current_price),
-                "change_percent": float(change_percent),
-                "signal": composite_signal.value,
-                "score": float(score),
-                "indicators": indicators,
-                "details": {
-                    "ma_signal": ma_signal.value,
-                    "rsi_signal": rsi_signal.value,
-                    "macd_signal": macd_signal.value,
-                },
-                "timestamp": latest_row.name.isoformat() if hasattr(latest_row, 'name') and hasattr(latest_row.name, 'isoformat') else str(latest_row.name) if hasattr(latest_row, 'name') else None,
-            }
+            return TechnicalAnalyzer._build_result(ticker, df, indicators)
 
         except Exception as e:
             logger.error(f"Error analyzing {ticker}: {str(e)}")
             return None
 
+    @staticmethod
+    def analyze_panel(
+        close: pd.DataFrame,
+        high: pd.DataFrame,
+        low: pd.DataFrame,
+    ) -> Dict[str, Dict]:
+        """
+        日付×銘柄のパネルから全銘柄を一括で分析します。
+
+        指標は全銘柄分を1回のベクトル化された計算で求め、判定のみ銘柄ごとに行います。
+        各銘柄の結果は、同じデータで analyze_dataframe を呼び出した結果と一致します。
+
+        Args:
+            close: 終値のパネル（行: 日付、列: 銘柄）
+            high: 高値のパネル
+            low: 安値のパネル
+
+        Returns:
+            銘柄コードをキーとした分析結果の辞書
+        """
+        latest = PanelIndicators.calculate_latest(
+            close,
+            high,
+            low,
+            ma_periods=TechnicalAnalyzer.MA_PERIODS,
+            rsi_period=TechnicalAnalyzer.RSI_PERIOD,
+            macd_fast=TechnicalAnalyzer.MACD_FAST,
+            macd_slow=TechnicalAnalyzer.MACD_SLOW,
+            macd_signal=TechnicalAnalyzer.MACD_SIGNAL,
+        )
+
+        results = {}
+        for ticker, row in latest.iterrows():
+            try:
+                indicators = {
+                    name: float(value) if not pd.isna(value) else None
+                    for name, value in row.items()
+                }
+                # 判定には直近2本の終値のみを使用する
+                recent = close[ticker].iloc[-2:].to_frame("close")
+                results[ticker] = TechnicalAnalyzer._build_result(ticker, recent, indicators)
+            except Exception as e:
+                logger.error(f"Error analyzing {ticker}: {str(e)}")
+
+        return results
+
+    @staticmethod
+    def analyze_universe(
+        tickers: List[str],
+        period: str = "1y",
+    ) -> Dict[str, Dict]:
+        """
+        銘柄ユニバース全体を一括取得してパネルで分析します。
+
+        Args:
+            tickers: 銘柄コードのリスト
+            period: 分析対象期間
+
+        Returns:
+            銘柄コードをキーとした分析結果の辞書（取得に失敗した銘柄は含まない）
+        """
+        frames = DataFetcher().fetch_multiple_stocks(tickers, period=period)
+        close = build_panel(frames, "close")
+        if close.empty:
+            return {}
+
+        return TechnicalAnalyzer.analyze_panel(
+            close, build_panel(frames, "high"), build_panel(frames, "low")
+        )
+
+    @staticmethod
+    def _build_result(ticker: str, df: pd.DataFrame, indicators: Dict) -> Dict:
+        """指標値から判定を行い、分析結果の辞書を作成します"""
+        # 各指標に基づいて判定
+        ma_signal = TechnicalAnalyzer._analyze_moving_average(df, indicators)
+        rsi_signal = TechnicalAnalyzer._analyze_rsi(indicators)
+        macd_signal = TechnicalAnalyzer._analyze_macd(indicators)
+
+        # 総合スコアを計算
+        score, composite_signal = TechnicalAnalyzer._calculate_composite_signal(
+            ma_signal, rsi_signal, macd_signal
+        )
+
+        # 現在の価格情報
+        latest_row = df.iloc[-1]
+        current_price = latest_row.get("close", latest_row.get("Close", 0))
+        if len(df) > 1:
+            previous_close = df.iloc[-2].get("close", df.iloc[-2].get("Close", current_price))
+        else:
+            previous_close = current_price
+        change_percent = ((current_price - previous_close) / previous_close) * 100 if previous_close != 0 else 0
+
+        return {
+            "ticker": ticker,
+            "current_price": float(current_price),
+            "change_percent": float(change_percent),
+            "signal": composite_signal.value,
+            "score": float(score),
+            "indicators": indicators,
+            "details": {
+                "ma_signal": ma_signal.value,
+                "rsi_signal": rsi_signal.value,
+                "macd_signal": macd_signal.value,
+            },
+            "timestamp": latest_row.name.isoformat() if hasattr(latest_row, 'name') and hasattr(latest_row.name, 'isoformat') else str(latest_row.name) if hasattr(latest_row, 'name') else None,
+        }
+
     @staticmethod
     def _calculate_indicators(df: pd.DataFrame) -> Dict:
-        """テクニカル指標を計算します"""
+        """
+        テクニカル指標を計算します。
+
+        判定には最新値のみを使用するため、各指標は tail モードで末尾1本だけを計算します。
+        """
         try:
             close = df["close"] if "close" in df.columns else df["Close"]
             high = df["high"] if "high" in df.columns else df["High"]
@@ -150,11 +288,11 @@ class TechnicalAnalyzer:
 
             # 移動平均線
             for period in TechnicalAnalyzer.MA_PERIODS:
-                ma_val = TechnicalIndicators.calculate_ma(close, period).iloc[-1]
+                ma_val = TechnicalIndicators.calculate_ma(close, period, tail=1).iloc[-1]
                 indicators[f"ma_{period}"] = float(ma_val) if not pd.isna(ma_val) else None
 
             # RSI
-            rsi = TechnicalIndicators.calculate_rsi(close, TechnicalAnalyzer.RSI_PERIOD)
+            rsi = TechnicalIndicators.calculate_rsi(close, TechnicalAnalyzer.RSI_PERIOD, tail=1)
             indicators["rsi"] = float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else None
 
             # MACD
@@ -163,6 +301,7 @@ class TechnicalAnalyzer:
                 fast=TechnicalAnalyzer.MACD_FAST,
                 slow=TechnicalAnalyzer.MACD_SLOW,
                 signal=TechnicalAnalyzer.MACD_SIGNAL,
+                tail=1,
             )
             macd_val = float(macd_result["macd"].iloc[-1]) if not pd.isna(macd_result["macd"].iloc[-1]) else None
             macd_signal_val = float(macd_result["signal"].iloc[-1]) if not pd.isna(macd_result["signal"].iloc[-1]) else None
@@ -173,7 +312,7 @@ class TechnicalAnalyzer:
             indicators["macd_histogram"] = macd_hist_val
 
             # ボリンジャーバンド
-            bb = TechnicalIndicators.calculate_bollinger_bands(close)
+            bb = TechnicalIndicators.calculate_bollinger_bands(close, tail=1)
             bb_upper_val = float(bb["upper"].iloc[-1]) if not pd.isna(bb["upper"].iloc[-1]) else None
             bb_middle_val = float(bb["middle"].iloc[-1]) if not pd.isna(bb["middle"].iloc[-1]) else None
             bb_lower_val = float(bb["lower"].iloc[-1]) if not pd.isna(bb["lower"].iloc[-1]) else None
@@ -183,7 +322,7 @@ class TechnicalAnalyzer:
             indicators["bb_lower"] = bb_lower_val
 
             # ATR
-            atr = TechnicalIndicators.calculate_atr(high, low, close)
+            atr = TechnicalIndicators.calculate_atr(high, low, close, tail=1)
             atr_val = float(atr.iloc[-1]) if not pd.isna(atr.iloc[-1]) else None
             indicators["atr"] = atr_val
 
@@ -289,33 +428,307 @@ class TechnicalAnalyzer:
 
         # 各シグナルのスコアを計算
         score = (
-            signal_scores[ma_signal] * 0.4
-            + signal_scores[rsi_signal] * 0.3
-            + signal_scores[macd_signal] * 0.3
+            signal_scores[ma_signal] * TechnicalAnalyzer.MA_WEIGHT
+            + signal_scores[rsi_signal] * TechnicalAnalyzer.RSI_WEIGHT
+            + signal_scores[macd_signal] * TechnicalAnalyzer.MACD_WEIGHT
         )
 
         # スコアから最終判定を決定
-        if score > 0.3:
+        if score > TechnicalAnalyzer.SIGNAL_THRESHOLD:
             return score, Signal.BUY
-        elif score < -0.3:
+        elif score < -TechnicalAnalyzer.SIGNAL_THRESHOLD:
             return score, Signal.SELL
         else:
             return score, Signal.HOLD
 
+    @staticmethod
+    def compute_signal_series(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        全期間の各時点における判定を一括で計算します。
+
+        各時点の値はその時点までのデータのみから計算されるため（先読みなし）、
+        df.iloc[:i + 1] に対して analyze_dataframe を呼び出した判定と一致します。
+
+        Args:
+            df: OHLCV データ
+
+        Returns:
+            各時点の ma_signal / rsi_signal / macd_signal（+1: 買い、-1: 売り、0: 中立）、
+            score、signal（+1: BUY、-1: SELL、0: HOLD）を列に持つ DataFrame
+        """
+        close = df["close"] if "close" in df.columns else df["Close"]
+        ma_score, rsi_score, macd_score, score, signal = TechnicalAnalyzer._signal_components(close)
+
+        return pd.DataFrame(
+            {
+                "ma_signal": ma_score,
+                "rsi_signal": rsi_score,
+                "macd_signal": macd_score,
+                "score": score,
+                "signal": signal,
+            },
+            index=df.index,
+        )
+
+    @staticmethod
+    def compute_signal_panel(close: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+        """
+        日付×銘柄の終値パネルから、全銘柄の各時点の判定を一括で計算します。
+
+        各列は、その銘柄の終値に対して compute_signal_series を呼び出した score / signal 列と一致します
+        （日付が揃っていない銘柄の扱いは build_panel を参照）。
+
+        Args:
+            close: 終値のパネル（行: 日付、列: 銘柄）
+
+        Returns:
+            score（総合スコア）と signal（+1: BUY、-1: SELL、0: HOLD）のパネルを含む辞書
+        """
+        score, signal = TechnicalAnalyzer._signal_components(close)[3:]
+        return {
+            "score": pd.DataFrame(score, index=close.index, columns=close.columns),
+            "signal": pd.DataFrame(signal, index=close.index, columns=close.columns),
+        }
+
+    @staticmethod
+    def _signal_components(close: Union[pd.Series, pd.DataFrame]) -> Tuple[np.ndarray, ...]:
+        """
+        終値（1銘柄の Series または日付×銘柄の DataFrame）から判定の配列を計算します。
+
+        Returns:
+            (ma_signal, rsi_signal, macd_signal, score, signal) の配列
+        """
+        # 移動平均線：短期 > 中期 > 長期 で買い、逆で売り（MAが未計算・0の場合は中立）
+        ma_score = TechnicalAnalyzer._ma_scores(*(
+            TechnicalIndicators.calculate_ma(close, period).to_numpy()
+            for period in TechnicalAnalyzer.MA_PERIODS[:3]
+        ))
+
+        # RSI：売られすぎで買い、買われすぎで売り
+        rsi_score = TechnicalAnalyzer._rsi_scores(
+            TechnicalIndicators.calculate_rsi(close, TechnicalAnalyzer.RSI_PERIOD).to_numpy(),
+            TechnicalAnalyzer.RSI_OVERSOLD,
+            TechnicalAnalyzer.RSI_OVERBOUGHT,
+        )
+
+        # MACD：ヒストグラムの符号とシグナルラインとの位置関係
+        macd_result = TechnicalIndicators.calculate_macd(
+            close,
+            fast=TechnicalAnalyzer.MACD_FAST,
+            slow=TechnicalAnalyzer.MACD_SLOW,
+            signal=TechnicalAnalyzer.MACD_SIGNAL,
+        )
+        macd_score = TechnicalAnalyzer._macd_scores(
+            macd_result["macd"].to_numpy(),
+            macd_result["signal"].to_numpy(),
+            macd_result["histogram"].to_numpy(),
+        )
+
+        # 総合スコア（_calculate_composite_signal と同じ演算順序）
+        score = (
+            ma_score * TechnicalAnalyzer.MA_WEIGHT
+            + rsi_score * TechnicalAnalyzer.RSI_WEIGHT
+            + macd_score * TechnicalAnalyzer.MACD_WEIGHT
+        )
+        signal = np.where(
+            score > TechnicalAnalyzer.SIGNAL_THRESHOLD,
+            1,
+            np.where(score < -TechnicalAnalyzer.SIGNAL_THRESHOLD, -1, 0),
+        )
+
+        return ma_score, rsi_score, macd_score, score, signal
+
+    @staticmethod
+    def _ma_scores(short_ma: np.ndarray, mid_ma: np.ndarray, long_ma: np.ndarray) -> np.ndarray:
+        """移動平均線の判定を配列で計算します（+1: 買い、-1: 売り、0: 中立）"""
+        with np.errstate(invalid="ignore"):
+            ma_valid = (
+                ~np.isnan(short_ma) & ~np.isnan(mid_ma) & ~np.isnan(long_ma)
+                & (short_ma != 0) & (mid_ma != 0) & (long_ma != 0)
+            )
+            ma_up = (short_ma > mid_ma) & (mid_ma > long_ma)
+            ma_down = (short_ma < mid_ma) & (mid_ma < long_ma)
+        return np.where(ma_valid & ma_up, 1.0, np.where(ma_valid & ma_down, -1.0, 0.0))
+
+    @staticmethod
+    def _rsi_scores(rsi: np.ndarray, oversold: float, overbought: float) -> np.ndarray:
+        """RSI の判定を配列で計算します（+1: 買い、-1: 売り、0: 中立）"""
+        with np.errstate(invalid="ignore"):
+            return np.where(rsi < oversold, 1.0, np.where(rsi > overbought, -1.0, 0.0))
+
+    @staticmethod
+    def _macd_scores(macd: np.ndarray, macd_signal: np.ndarray, histogram: np.ndarray) -> np.ndarray:
+        """MACD の判定を配列で計算します（+1: 買い、-1: 売り、0: 中立）"""
+        with np.errstate(invalid="ignore"):
+            return np.where(
+                (histogram > 0) & (macd > macd_signal),
+                1.0,
+                np.where((histogram < 0) & (macd < macd_signal), -1.0, 0.0),
+            )
+
     @staticmethod
     def analyze_multiple_stocks(
         tickers: list,
         period: str = "1y",
+        max_workers: Optional[int] = None,
     ) -> Dict[str, Dict]:
-        """複数銘柄を分析します"""
+        """
+        複数銘柄を分析します。
+
+        データ取得と指標計算をパイプライン化して実行します（iter_analyze_stocks を参照）。
+
+        Args:
+            tickers: 銘柄コードのリスト
+            period: 分析対象期間
+            max_workers: データ取得ワーカー数（省略時は環境変数 ANALYSIS_IO_WORKERS）
+
+        Returns:
+            銘柄コードをキーとした分析結果の辞書（入力順、失敗した銘柄は含まない）
+        """
         results = {}
 
-        for ticker in tickers:
-            result = TechnicalAnalyzer.analyze_stock(ticker, period=period)
+        for ticker, result in TechnicalAnalyzer.iter_analyze_stocks(
+            tickers, period=period, max_workers=max_workers
+        ):
             if result:
                 results[ticker] = result
 
-        return results
+        return {ticker: results[ticker] for ticker in tickers if ticker in results}
+
+    @staticmethod
+    def iter_analyze_stocks(
+        tickers: List[str],
+        period: str = "1y",
+        max_workers: Optional[int] = None,
+    ) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        複数銘柄を分析し、完了した順に結果を返します。
+
+        データ取得は最大 max_workers 個のスレッドで並行に行い、
+        取得が完了した銘柄から指標計算を行います。
+        これにより、ネットワーク待ちと pandas の計算が重なって実行されます。
+        yfinance へのリクエストレートは DataFetcher の共有トークンバケットで制御されます。
+
+        CPU 計算プール（compute_pool を参照）が有効な場合、指標計算は取得済みの銘柄を
+        チャンクにまとめてワーカープロセスで並列に行い、無効な場合は呼び出し側のスレッドで行います。
+        いずれの場合も各銘柄の結果は analyze_dataframe と一致します。
+
+        同じ (ticker, period) の分析が他の呼び出し（analyze_stock や別の一括分析）で
+        実行中の場合は、取得・計算を行わずにその完了を待って結果を共有します。
+
+        Args:
+            tickers: 銘柄コードのリスト
+            period: 分析対象期間
+            max_workers: データ取得ワーカー数（省略時は環境変数 ANALYSIS_IO_WORKERS）
+
+        Yields:
+            (銘柄コード, 分析結果) のタプル（分析に失敗した場合、結果は None）
+        """
+        if DEMO_MODE:
+            for ticker in tickers:
+                yield ticker, TechnicalAnalyzer.analyze_stock(ticker, period=period)
+            return
+
+        max_workers = max(1, max_workers or ANALYSIS_IO_WORKERS)
+        fetcher = DataFetcher()
+        pool = get_compute_pool()
+        pending_tickers = iter(tickers)
+        in_flight = {}
+        # 計算プールに投入済みのチャンク（Future → 銘柄コードのリスト）と、投入待ちの取得済みデータ
+        computing = {}
+        ready = {}
+        # この呼び出しが担当する銘柄の集約用 Future と、他の呼び出しの結果を待っている取得枠
+        owned = {}
+        shared = set()
+
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        def fill() -> None:
+            """取得中・計算待ちの銘柄が上限に達するまで次の銘柄の取得を投入します"""
+            # 取得済みで未計算のデータがメモリに溜まり過ぎないよう、投入数を制限する
+            while len(in_flight) < max_workers * 2 and len(computing) <= pool.max_workers * 2:
+                ticker = next(pending_tickers, None)
+                if ticker is None:
+                    return
+                flight, owner = _analysis_flight.begin((ticker, period))
+                if owner:
+                    owned[ticker] = flight
+                    in_flight[executor.submit(fetcher.fetch_stock_data, ticker, period)] = ticker
+                else:
+                    future = executor.submit(_analysis_flight.wait, (ticker, period), flight)
+                    shared.add(future)
+                    in_flight[future] = ticker
+
+        def settle(ticker: str, result: Optional[Dict] = None, error: Optional[Exception] = None) -> Optional[Dict]:
+            """担当する銘柄の結果を待機中の呼び出し元に通知し、呼び出し元に返すコピーを作成します"""
+            flight = owned.pop(ticker, None)
+            if flight is not None:
+                _analysis_flight.finish((ticker, period), flight, result=result, error=error)
+            return copy.deepcopy(result)
+
+        def flush() -> None:
+            """取得済みのデータを1チャンクとして計算プールに投入します"""
+            chunk = dict(ready)
+            ready.clear()
+            computing[pool.submit("analyze", chunk)] = list(chunk)
+
+        try:
+            fill()
+
+            while in_flight or computing or ready:
+                # チャンクが埋まったとき、取得が終わったとき、空いているワーカーがあるときに投入する
+                if ready and (
+                    len(ready) >= pool.chunk_size or not in_flight or len(computing) < pool.max_workers
+                ):
+                    flush()
+
+                done, _ = wait(list(in_flight) + list(computing), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in computing:
+                        chunk_tickers = computing.pop(future)
+                        fill()
+                        try:
+                            chunk_results = future.result()
+                        except Exception as e:
+                            logger.error(f"Error analyzing {len(chunk_tickers)} tickers in compute pool: {str(e)}")
+                            for ticker in chunk_tickers:
+                                settle(ticker, error=e)
+                                yield ticker, None
+                            continue
+                        for ticker, result in chunk_results:
+                            yield ticker, settle(ticker, result)
+                        continue
+
+                    ticker = in_flight.pop(future)
+                    fill()
+
+                    if future in shared:
+                        shared.discard(future)
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            logger.error(f"Error analyzing {ticker}: {str(e)}")
+                            result = None
+                        yield ticker, copy.deepcopy(result)
+                        continue
+
+                    try:
+                        df = future.result()
+                    except Exception as e:
+                        logger.error(f"Error analyzing {ticker}: {str(e)}")
+                        settle(ticker, error=e)
+                        yield ticker, None
+                        continue
+
+                    if pool.parallel:
+                        ready[ticker] = df
+                    else:
+                        yield ticker, settle(ticker, TechnicalAnalyzer.analyze_dataframe(ticker, df))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            # 途中で打ち切られた場合も、待機中の呼び出し元が取り残されないようにする
+            for ticker in list(owned):
+                settle(ticker, error=RuntimeError(f"Analysis of {ticker} was cancelled"))
 
     @staticmethod
     def get_signal_confidence(score: float) -> str:
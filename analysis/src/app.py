@@ -5,16 +5,37 @@ Flask Webアプリケーション
 """
 
 import os
+import json
 import logging
-from flask import Flask, request, jsonify
+import pandas as pd
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from dotenv import load_dotenv
 from analyzer import TechnicalAnalyzer
+from backend_client import get_backend_client
 from backtest import Backtester
+from compute_pool import get_compute_pool
+from frame_cache import get_frame_cache
+from jobs import Job, get_job_manager
+from data_fetch import DataFetcher
+from optimizer import DEFAULT_TRAIN_FRACTION, grid_search_space, random_search_space, run_sweep
+from panel import build_panel
+from portfolio_backtest import PortfolioBacktester
+from risk_metrics import (
+    RISK_FREE_RATE,
+    compute_panel_risk_metrics,
+    get_risk_metrics_cache,
+    rolling_risk_metrics,
+    ticker_risk_metrics,
+)
+from walk_forward import WALK_FORWARD_TEST_BARS, WALK_FORWARD_TRAIN_BARS, run_walk_forward
+from rate_limiter import get_rate_limiter
+from result_writer import BatchResultWriter
+from symbol_index import get_symbol_index
 import requests
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 # 環境変数を読み込み
 load_dotenv()
@@ -30,7 +51,11 @@ CORS(app)
 # 設定
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:3000")
 PYTHON_SERVICE_PORT = int(os.getenv("PYTHON_SERVICE_PORT", 5000))
-MAX_SAVE_WORKERS = int(os.getenv("MAX_SAVE_WORKERS", 10))  # 並列保存の最大ワーカー数
+MONTE_CARLO_MAX_SIMULATIONS = int(os.getenv("MONTE_CARLO_MAX_SIMULATIONS", 1000000))  # 1リクエストあたりの上限
+MONTE_CARLO_MAX_HORIZON = int(os.getenv("MONTE_CARLO_MAX_HORIZON", 2520))  # シミュレーションする日数の上限（10年分）
+MONTE_CARLO_MAX_PERCENTILES = int(os.getenv("MONTE_CARLO_MAX_PERCENTILES", 20))  # 日ごとのパーセンタイルの個数の上限
+OPTIMIZER_MAX_COMBINATIONS = int(os.getenv("OPTIMIZER_MAX_COMBINATIONS", 20000))  # 1リクエストあたりの組み合わせ数の上限
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", 16))  # 一括分析で指定できるデータ取得並列数の上限
 
 def handle_errors(f):
     """共通のエラーハンドリングデコレータ"""
@@ -50,6 +75,27 @@ def health_check():
     """
     return jsonify({"status": "ok", "service": "analysis_engine"}), 200
 
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    """
+    株価データキャッシュ、同時リクエスト集約、銘柄索引、レート制限、CPU 計算プール、リスク指標キャッシュの統計を返します。
+    """
+    return jsonify({
+        "frame_cache": get_frame_cache().get_stats(),
+        "analysis_single_flight": TechnicalAnalyzer.get_single_flight_stats(),
+        "symbol_index": get_symbol_index(BACKEND_URL).get_stats(),
+        "rate_limiter": get_rate_limiter().get_stats(),
+        "compute_pool": get_compute_pool().get_stats(),
+        "risk_metrics": get_risk_metrics_cache().get_stats()
+    }), 200
+
+@app.route("/backend/stats", methods=["GET"])
+def backend_stats():
+    """
+    バックエンド通信のリクエスト数、エラー数、レイテンシを返します。
+    """
+    return jsonify(get_backend_client(BACKEND_URL).get_stats()), 200
+
 @app.route("/analyze/<ticker>", methods=["GET"])
 @handle_errors
 def analyze_stock(ticker: str):
@@ -75,8 +121,8 @@ def analyze_stock(ticker: str):
 
     # 【新規追加】バックエンドに分析結果を保存
     try:
-        save_response = requests.post(
-            f"{BACKEND_URL}/api/analysis/save",
+        save_response = get_backend_client(BACKEND_URL).post(
+            "/api/analysis/save",
             json={
                 "ticker": ticker,
                 "analysis": result
@@ -102,11 +148,15 @@ def analyze_batch():
         {
             "stockIds": [1, 2, 3],  # または "tickers": ["1234.T", "5678.T"]
             "period": "1y",
-            "save_to_backend": true  # オプション: バックエンドに自動保存
+            "save_to_backend": true,  # オプション: バックエンドに自動保存
+            "concurrency": 4,  # オプション: データ取得の並列数（1〜ANALYSIS_MAX_CONCURRENCY）
+            "async": false,  # オプション: true の場合はジョブIDを即座に返す
+            "stream": false  # オプション: true の場合は完了した銘柄から NDJSON で返す
         }
 
     Returns:
-        分析結果のJSON辞書
+        分析結果のJSON辞書（async の場合はジョブIDと状態URL、202、
+        stream の場合は1行1銘柄の NDJSON と最終行のサマリー）
     """
     data = request.get_json()
     
@@ -115,72 +165,44 @@ def analyze_batch():
     if not tickers and "stockIds" in data:
         stock_ids = data.get("stockIds", [])
         try:
-            stocks_response = requests.get(
-                f"{BACKEND_URL}/api/stocks",
-                timeout=10
-            )
-            if stocks_response.status_code == 200:
-                all_stocks = stocks_response.json().get("data", [])
-                tickers = [
-                    stock["symbol"] for stock in all_stocks
-                    if stock["id"] in stock_ids
-                ]
-                logger.info(f"✅ stockIds を tickers に変換しました: {tickers}")
+            # キャッシュ済みの索引で変換（索引にない ID のみバックエンドに問い合わせる）
+            tickers = list(get_symbol_index(BACKEND_URL).resolve(stock_ids).values())
+            logger.info(f"✅ stockIds を tickers に変換しました: {tickers}")
         except Exception as fetch_error:
             logger.error(f"❌ バックエンドから株式情報を取得できません: {str(fetch_error)}")
             return jsonify({"error": "Failed to fetch stock information"}), 500
     
     period = data.get("period", "1y")
     save_to_backend = data.get("save_to_backend", True)
+    concurrency = data.get("concurrency")
 
     if not tickers:
         return jsonify({"error": "No tickers provided"}), 400
+    if concurrency is not None and (
+        isinstance(concurrency, bool)
+        or not isinstance(concurrency, int)
+        or not 1 <= concurrency <= ANALYSIS_MAX_CONCURRENCY
+    ):
+        return jsonify({"error": f"concurrency must be an integer between 1 and {ANALYSIS_MAX_CONCURRENCY}"}), 400
+
+    if data.get("stream"):
+        return Response(
+            stream_batch_analysis(tickers, period, concurrency, save_to_backend),
+            mimetype="application/x-ndjson",
+            headers={"X-Accel-Buffering": "no", "Cache-Control": "no-cache"}
+        )
 
-    logger.info(f"Batch analysis started for {len(tickers)} tickers")
+    if data.get("async"):
+        job = get_job_manager().submit(
+            "analyze_batch",
+            tickers,
+            lambda job: run_batch_analysis(
+                tickers, period, concurrency, save_to_backend, on_result=job.record
+            )[1],
+        )
+        return job_accepted(job)
 
-    # 複数銘柄を分析
-    results = TechnicalAnalyzer.analyze_multiple_stocks(tickers, period=period)
-
-    # バックエンドに結果を並列保存（パフォーマンス改善）
-    saved_count = 0
-    if save_to_backend:
-        def save_single_result(ticker, result):
-            """単一の分析結果を保存"""
-            try:
-                save_response = requests.post(
-                    f"{BACKEND_URL}/api/analysis/save",
-                    json={
-                        "ticker": ticker,
-                        "analysis": result
-                    },
-                    timeout=10
-                )
-                if save_response.status_code == 201:
-                    logger.info(f"Saved analysis for {ticker} to backend")
-                    return True
-                else:
-                    logger.warning(f"Failed to save {ticker}: {save_response.status_code}")
-                    return False
-            except Exception as save_error:
-                logger.error(f"Error saving {ticker} to backend: {str(save_error)}")
-                return False
-        
-        # ThreadPoolExecutorで並列保存（環境変数で設定可能）
-        with ThreadPoolExecutor(max_workers=MAX_SAVE_WORKERS) as executor:
-            future_to_ticker = {
-                executor.submit(save_single_result, ticker, result): ticker 
-                for ticker, result in results.items()
-            }
-            
-            for future in as_completed(future_to_ticker):
-                ticker = future_to_ticker[future]
-                try:
-                    if future.result():
-                        saved_count += 1
-                except Exception as exc:
-                    logger.error(f"{ticker} generated an exception: {exc}")
-
-    logger.info(f"Batch analysis completed: {len(results)} analyzed, {saved_count} saved")
+    results, _ = run_batch_analysis(tickers, period, concurrency, save_to_backend)
 
     # デバッグ: 返される結果の形式を確認
     logger.info(f"📊 結果は dict 形式です。キー: {list(results.keys())[:5]}...")
@@ -188,6 +210,130 @@ def analyze_batch():
 
     return jsonify(results), 200
 
+def iter_batch_analysis(
+    tickers: List[str],
+    period: str,
+    concurrency: Optional[int],
+    save_to_backend: bool,
+    summary: Dict,
+) -> Iterator[Tuple[str, Optional[Dict]]]:
+    """
+    複数銘柄をパイプラインで分析し、完了した銘柄から順にバックエンドへバッチ保存します。
+
+    結果は保持せず、完了した順に返します。
+
+    Args:
+        tickers: 銘柄コードのリスト
+        period: 分析対象期間
+        concurrency: データ取得の並列数
+        save_to_backend: バックエンドに保存するかどうか
+        summary: 終了時に分析件数・失敗銘柄・保存件数を書き込む辞書
+
+    Yields:
+        (銘柄コード, 分析結果) のタプル（分析に失敗した場合、結果は None）
+    """
+    logger.info(f"Batch analysis started for {len(tickers)} tickers")
+
+    analyzed_count = 0
+    failed_tickers = []
+    writer = BatchResultWriter(get_backend_client(BACKEND_URL)) if save_to_backend else None
+    try:
+        for ticker, result in TechnicalAnalyzer.iter_analyze_stocks(
+            tickers, period=period, max_workers=concurrency
+        ):
+            if result:
+                analyzed_count += 1
+                if writer is not None:
+                    writer.add(ticker, result)
+            else:
+                failed_tickers.append(ticker)
+            yield ticker, result
+    finally:
+        saved_count = writer.close()["saved"] if writer is not None else 0
+        summary.update({
+            "analyzed_count": analyzed_count,
+            "failed_count": len(failed_tickers),
+            "failed_tickers": failed_tickers,
+            "saved_count": saved_count,
+        })
+        logger.info(f"Batch analysis completed: {analyzed_count} analyzed, {saved_count} saved")
+
+def run_batch_analysis(
+    tickers: List[str],
+    period: str,
+    concurrency: Optional[int],
+    save_to_backend: bool,
+    on_result: Optional[Callable[[str, Optional[Dict]], None]] = None,
+) -> Tuple[Dict[str, Dict], Dict]:
+    """
+    複数銘柄を分析し、全銘柄の結果をまとめて返します（iter_batch_analysis を参照）。
+
+    Args:
+        tickers: 銘柄コードのリスト
+        period: 分析対象期間
+        concurrency: データ取得の並列数
+        save_to_backend: バックエンドに保存するかどうか
+        on_result: 銘柄ごとの分析完了時に呼び出す関数（失敗時は結果が None）
+
+    Returns:
+        (入力順の分析結果, 分析件数と保存件数のサマリー)
+    """
+    results = {}
+    summary: Dict = {}
+    for ticker, result in iter_batch_analysis(tickers, period, concurrency, save_to_backend, summary):
+        if on_result is not None:
+            on_result(ticker, result)
+        if result:
+            results[ticker] = result
+
+    # 結果は入力順で返す
+    return {ticker: results[ticker] for ticker in tickers if ticker in results}, summary
+
+def stream_batch_analysis(
+    tickers: List[str],
+    period: str,
+    concurrency: Optional[int],
+    save_to_backend: bool,
+) -> Iterator[str]:
+    """
+    複数銘柄を分析し、完了した銘柄から1行1件の NDJSON として返します。
+
+    各行は {"type": "result", "ticker", "analysis"} または {"type": "error", "ticker"}、
+    最終行は件数と失敗銘柄を含む {"type": "summary", ...} です。
+
+    Args:
+        tickers: 銘柄コードのリスト
+        period: 分析対象期間
+        concurrency: データ取得の並列数
+        save_to_backend: バックエンドに保存するかどうか
+
+    Yields:
+        改行で終わる JSON 文字列
+    """
+    summary: Dict = {}
+    processed = 0
+    try:
+        for ticker, result in iter_batch_analysis(tickers, period, concurrency, save_to_backend, summary):
+            processed += 1
+            if result:
+                line = {"type": "result", "ticker": ticker, "analysis": result}
+            else:
+                line = {"type": "error", "ticker": ticker, "error": "Failed to analyze stock"}
+            yield json.dumps({**line, "processed": processed, "total": len(tickers)}, default=str) + "\n"
+    except Exception as e:
+        # ストリーム開始後はステータスコードを変更できないため、最終行でエラーを通知する
+        logger.error(f"Error in streaming batch analysis: {str(e)}")
+        summary["error"] = str(e)
+
+    yield json.dumps({
+        "type": "summary",
+        "status": "failed" if "error" in summary else "completed",
+        "total": len(tickers),
+        "processed": processed,
+        **summary,
+        "timestamp": datetime.now().isoformat()
+    }) + "\n"
+
 @app.route("/backtest/<ticker>", methods=["GET"])
 @handle_errors
 def backtest_stock(ticker: str):
@@ -213,11 +359,431 @@ def backtest_stock(ticker: str):
 
     return jsonify(result.to_dict()), 200
 
+@app.route("/backtest/batch", methods=["POST"])
+@handle_errors
+def backtest_batch():
+    """
+    複数銘柄のバックテストを実行します（CPU 計算プールが有効な場合は並列に実行します）。
+
+    Request body:
+        {
+            "tickers": ["1234.T", "5678.T"],
+            "period": "1y"
+        }
+
+    Returns:
+        銘柄コードをキーとしたバックテスト結果のJSON（失敗した銘柄は null）
+    """
+    data = request.get_json()
+    tickers = data.get("tickers", [])
+    period = data.get("period", "1y")
+
+    if not tickers:
+        return jsonify({"error": "No tickers provided"}), 400
+
+    results = Backtester().run_multiple_backtests(tickers, period=period)
+
+    return jsonify({
+        ticker: result.to_dict() if result is not None else None
+        for ticker, result in results.items()
+    }), 200
+
+@app.route("/backtest/portfolio", methods=["POST"])
+@handle_errors
+def backtest_portfolio():
+    """
+    複数銘柄で初期資本を共有するポートフォリオバックテストを実行します。
+
+    Request body:
+        {
+            "tickers": ["1234.T", "5678.T"],
+            "period": "1y",
+            "initial_capital": 1000000,  # オプション
+            "sizing": "equal",  # または "atr"
+            "max_positions": 20,  # オプション: 同時に保有する銘柄数の上限
+            "commission_rate": 0.0005,  # オプション
+            "slippage_rate": 0.0005,  # オプション
+            "lot_size": 0,  # オプション: 売買単位（0 の場合は端株を許容する）
+            "risk_per_trade": 0.01,  # オプション: sizing が "atr" の場合の1銘柄あたりのリスク
+            "atr_multiplier": 2.0,  # オプション: sizing が "atr" の場合の損切り幅の ATR 倍率
+            "include_curve": true,  # オプション: false の場合は資産推移を返さない
+            "async": false  # オプション: true の場合はジョブIDを即座に返す
+        }
+
+    Returns:
+        資産推移と銘柄ごとの損益の内訳を含むバックテスト結果のJSON（async の場合はジョブIDと状態URL、202）
+    """
+    data = request.get_json()
+    tickers = data.get("tickers", [])
+    period = data.get("period", "1y")
+    include_curve = bool(data.get("include_curve", True))
+
+    if not tickers:
+        return jsonify({"error": "No tickers provided"}), 400
+
+    options = {
+        key: data[key]
+        for key in (
+            "sizing", "max_positions", "commission_rate", "slippage_rate",
+            "lot_size", "risk_per_trade", "atr_multiplier",
+        )
+        if key in data
+    }
+    try:
+        backtester = PortfolioBacktester(initial_capital=float(data.get("initial_capital", 1000000.0)), **options)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    def run() -> Dict:
+        """データを取得してポートフォリオバックテストを実行します"""
+        result = backtester.run(DataFetcher().fetch_multiple_stocks(tickers, period=period))
+        if result is None:
+            raise ValueError("Insufficient data for portfolio backtest")
+        return {"period": period, **result.to_dict(include_curve=include_curve)}
+
+    if data.get("async"):
+        job = get_job_manager().submit("portfolio_backtest", tickers, lambda job: run())
+        return job_accepted(job)
+
+    try:
+        return jsonify(run()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route("/monte-carlo/<ticker>", methods=["GET"])
+@handle_errors
+def monte_carlo_simulation(ticker: str):
+    """
+    モンテカルロシミュレーションを実行します。
+
+    Args:
+        ticker: 銘柄コード
+
+    Query parameters:
+        period: 期間（デフォルト: 1y）
+        num_simulations: シミュレーション回数（デフォルト: 1000）
+        horizon: シミュレーションする日数（MONTE_CARLO_MAX_HORIZON まで）
+        seed: 乱数シード
+        block_size: ブロックブートストラップのブロック長（horizon を上限とする）
+        percentiles: 日ごとの資産推移を求めるパーセンタイル（例: 5,50,95、MONTE_CARLO_MAX_PERCENTILES 個まで）
+
+    Returns:
+        シミュレーション結果のJSON
+    """
+    period = request.args.get("period", "1y")
+    num_simulations = request.args.get("num_simulations", 1000, type=int)
+    horizon = request.args.get("horizon", type=int)
+    seed = request.args.get("seed", type=int)
+    block_size = request.args.get("block_size", type=int)
+    percentiles = request.args.get("percentiles")
+
+    if num_simulations < 1 or num_simulations > MONTE_CARLO_MAX_SIMULATIONS:
+        return jsonify({
+            "error": f"num_simulations must be between 1 and {MONTE_CARLO_MAX_SIMULATIONS}",
+            "ticker": ticker
+        }), 400
+    if horizon is not None and not 1 <= horizon <= MONTE_CARLO_MAX_HORIZON:
+        return jsonify({
+            "error": f"horizon must be between 1 and {MONTE_CARLO_MAX_HORIZON}",
+            "ticker": ticker
+        }), 400
+    if block_size is not None and block_size < 1:
+        return jsonify({"error": "block_size must be positive", "ticker": ticker}), 400
+
+    path_percentiles = None
+    if percentiles:
+        try:
+            path_percentiles = [float(q) for q in percentiles.split(",")]
+        except ValueError:
+            path_percentiles = []
+        if not path_percentiles or not all(0 <= q <= 100 for q in path_percentiles):
+            return jsonify({
+                "error": "percentiles must be comma-separated numbers between 0 and 100",
+                "ticker": ticker
+            }), 400
+        if len(path_percentiles) > MONTE_CARLO_MAX_PERCENTILES:
+            return jsonify({
+                "error": f"At most {MONTE_CARLO_MAX_PERCENTILES} percentiles can be requested",
+                "ticker": ticker
+            }), 400
+
+    result = Backtester.monte_carlo_simulation(
+        ticker,
+        num_simulations=num_simulations,
+        period=period,
+        horizon=horizon,
+        seed=seed,
+        block_size=block_size,
+        path_percentiles=path_percentiles,
+    )
+
+    if result is None:
+        return jsonify({
+            "error": "Failed to run Monte Carlo simulation",
+            "ticker": ticker
+        }), 400
+
+    return jsonify({"ticker": ticker, "period": period, **result}), 200
+
+@app.route("/optimize", methods=["POST"])
+@handle_errors
+def optimize_parameters():
+    """
+    判定パラメーターの組み合わせを評価し、アウトオブサンプルの成績で順位付けした表を返します。
+
+    Request body:
+        {
+            "tickers": ["1234.T", "5678.T"],
+            "period": "2y",
+            "search": "grid",  # または "random"
+            "samples": 500,  # random の場合の組み合わせ数
+            "seed": 0,  # random の場合の乱数シード
+            "grid": {"threshold": [0.2, 0.3]},  # オプション: 候補値の上書き
+            "train_fraction": 0.7,  # インサンプル期間の割合
+            "sort_by": "oos_mean_return",
+            "top": 20,
+            "async": false  # オプション: true の場合はジョブIDを即座に返す
+        }
+
+    Returns:
+        組み合わせ数・評価銘柄数と順位付けした結果のJSON（async の場合はジョブIDと状態URL、202）
+    """
+    data = request.get_json()
+    tickers = data.get("tickers", [])
+    period = data.get("period", "2y")
+    sort_by = data.get("sort_by", "oos_mean_return")
+
+    if not tickers:
+        return jsonify({"error": "No tickers provided"}), 400
+    try:
+        train_fraction = float(data.get("train_fraction", DEFAULT_TRAIN_FRACTION))
+        top = int(data.get("top", 20))
+    except (TypeError, ValueError):
+        return jsonify({"error": "train_fraction must be a number and top an integer"}), 400
+    if top < 1:
+        return jsonify({"error": "top must be positive"}), 400
+    if sort_by not in {f"{prefix}_{metric}" for prefix in ("is", "oos") for metric in ("trades", "winning_rate", "mean_return")}:
+        return jsonify({"error": f"Unknown sort_by: {sort_by}"}), 400
+    if not 0 < train_fraction < 1:
+        return jsonify({"error": "train_fraction must be between 0 and 1"}), 400
+
+    try:
+        combos = search_space(data, default="grid")
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if not combos or len(combos) > OPTIMIZER_MAX_COMBINATIONS:
+        return jsonify({
+            "error": f"Number of combinations must be between 1 and {OPTIMIZER_MAX_COMBINATIONS}",
+            "combinations": len(combos)
+        }), 400
+
+    def run() -> Dict:
+        """データを取得して全組み合わせを評価します"""
+        frames = DataFetcher().fetch_multiple_stocks(tickers, period=period)
+        table = run_sweep(frames, combos, train_fraction=train_fraction, sort_by=sort_by, top=top)
+        return {
+            "combinations": len(combos),
+            "tickers": sum(1 for df in frames.values() if df is not None),
+            "period": period,
+            "train_fraction": train_fraction,
+            "sort_by": sort_by,
+            "results": table.to_dict(orient="records"),
+        }
+
+    if data.get("async"):
+        job = get_job_manager().submit("optimize", tickers, lambda job: run())
+        return job_accepted(job)
+
+    try:
+        return jsonify(run()), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def search_space(data: Dict, default: str) -> Optional[List[Dict]]:
+    """
+    リクエストの search / grid / samples / seed から候補の組み合わせを作成します。
+
+    Args:
+        data: リクエストボディ
+        default: search を省略した場合の探索方法（"grid"、"random"、"none"）
+
+    Returns:
+        組み合わせの辞書のリスト（"none" の場合は None: 現在の設定値のみを使用）
+
+    Raises:
+        ValueError: search が不明な場合、グリッドや samples / seed が不正な場合、
+            組み合わせ数が OPTIMIZER_MAX_COMBINATIONS を超える場合
+    """
+    search = data.get("search", default)
+    if search == "random":
+        samples = int(data.get("samples", 500))
+        if not 1 <= samples <= OPTIMIZER_MAX_COMBINATIONS:
+            raise ValueError(f"samples must be between 1 and {OPTIMIZER_MAX_COMBINATIONS}")
+        seed = data.get("seed")
+        return random_search_space(data.get("grid"), samples=samples, seed=int(seed) if seed is not None else None)
+    if search == "grid":
+        return grid_search_space(data.get("grid"), max_combinations=OPTIMIZER_MAX_COMBINATIONS)
+    if search == "none":
+        return None
+    raise ValueError(f"Unknown search: {search} (expected 'grid', 'random' or 'none')")
+
+@app.route("/walk-forward", methods=["POST"])
+@handle_errors
+def walk_forward():
+    """
+    ウォークフォワード検証を実行します。
+
+    学習期間と検証期間の窓をずらしながら、学習期間で最も成績の良い組み合わせを
+    直後の検証期間で評価します（search を省略した場合は現在の設定値のみを評価します）。
+
+    Request body:
+        {
+            "tickers": ["1234.T", "5678.T"],
+            "period": "10y",
+            "train_bars": 504,
+            "test_bars": 126,
+            "step": 126,  # オプション: 窓をずらす本数（省略時は test_bars）
+            "anchored": false,  # オプション: true の場合は学習期間の開始位置を固定
+            "search": "none",  # または "grid"、"random"（/optimize と同じ grid / samples / seed を指定可能）
+            "include_folds": true,  # オプション: false の場合は集計のみ返す
+            "async": false  # オプション: true の場合はジョブIDを即座に返す
+        }
+
+    Returns:
+        銘柄ごとのフォールドの結果と集計、全銘柄の集計のJSON（async の場合はジョブIDと状態URL、202）
+    """
+    data = request.get_json()
+    tickers = data.get("tickers", [])
+    period = data.get("period", "10y")
+    anchored = bool(data.get("anchored", False))
+    include_folds = data.get("include_folds", True)
+
+    if not tickers:
+        return jsonify({"error": "No tickers provided"}), 400
+    try:
+        train_bars = int(data.get("train_bars", WALK_FORWARD_TRAIN_BARS))
+        test_bars = int(data.get("test_bars", WALK_FORWARD_TEST_BARS))
+        step = int(data["step"]) if data.get("step") is not None else None
+    except (TypeError, ValueError):
+        return jsonify({"error": "train_bars, test_bars and step must be integers"}), 400
+    if train_bars < 1 or test_bars < 1 or (step is not None and step < test_bars):
+        return jsonify({"error": "train_bars and test_bars must be positive and step at least test_bars"}), 400
+
+    try:
+        combos = search_space(data, default="none")
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    if combos is not None and (not combos or len(combos) > OPTIMIZER_MAX_COMBINATIONS):
+        return jsonify({
+            "error": f"Number of combinations must be between 1 and {OPTIMIZER_MAX_COMBINATIONS}",
+            "combinations": len(combos)
+        }), 400
+
+    def run() -> Dict:
+        """データを取得してウォークフォワード検証を実行します"""
+        frames = DataFetcher().fetch_multiple_stocks(tickers, period=period)
+        result = run_walk_forward(
+            frames,
+            combos,
+            train_bars=train_bars,
+            test_bars=test_bars,
+            step=step,
+            anchored=anchored,
+        )
+        if not include_folds:
+            result["tickers"] = {ticker: entry["summary"] for ticker, entry in result["tickers"].items()}
+        return {
+            "period": period,
+            "train_bars": train_bars,
+            "test_bars": test_bars,
+            "combinations": len(combos) if combos else 1,
+            **result,
+        }
+
+    if data.get("async"):
+        job = get_job_manager().submit("walk_forward", tickers, lambda job: run())
+        return job_accepted(job)
+
+    return jsonify(run()), 200
+
+@app.route("/risk-metrics/<ticker>", methods=["GET"])
+@handle_errors
+def get_risk_metrics(ticker: str):
+    """
+    リスク指標（シャープレシオ、ソルティノレシオ、カルマーレシオ、最大ドローダウンと期間、
+    ボラティリティ、VaR / CVaR）をまとめて計算します。
+
+    Args:
+        ticker: 銘柄コード
+
+    Query parameters:
+        period: 期間（デフォルト: 1y）
+        risk_free_rate: リスクフリーレート（年率、デフォルト: RISK_FREE_RATE）
+
+    Returns:
+        リスク指標のJSON
+    """
+    period = request.args.get("period", "1y")
+    risk_free_rate = request.args.get("risk_free_rate", RISK_FREE_RATE, type=float)
+
+    metrics = ticker_risk_metrics(ticker, period=period, risk_free_rate=risk_free_rate)
+
+    if metrics is None:
+        return jsonify({
+            "error": "Failed to calculate risk metrics",
+            "ticker": ticker
+        }), 400
+
+    return jsonify({"ticker": ticker, "period": period, **metrics}), 200
+
+@app.route("/risk-metrics/batch", methods=["POST"])
+@handle_errors
+def get_risk_metrics_batch():
+    """
+    複数銘柄のリスク指標を日付×銘柄のパネルでまとめて計算します。
+
+    Request body:
+        {
+            "tickers": ["1234.T", "5678.T"],
+            "period": "1y",
+            "risk_free_rate": 0.02,  # オプション
+            "rolling_window": 63  # オプション: 指定した場合は直近の窓による各指標の最新値も返す
+        }
+
+    Returns:
+        銘柄コードをキーとしたリスク指標のJSON（データを取得できない銘柄は null）
+    """
+    data = request.get_json()
+    tickers = data.get("tickers", [])
+    period = data.get("period", "1y")
+    risk_free_rate = float(data.get("risk_free_rate", RISK_FREE_RATE))
+    rolling_window = data.get("rolling_window")
+
+    if not tickers:
+        return jsonify({"error": "No tickers provided"}), 400
+    if rolling_window is not None and int(rolling_window) < 2:
+        return jsonify({"error": "rolling_window must be at least 2"}), 400
+
+    close = build_panel(DataFetcher().fetch_multiple_stocks(tickers, period=period), "close")
+    results: Dict[str, Optional[Dict]] = {ticker: None for ticker in tickers}
+    if close.empty:
+        return jsonify(results), 200
+
+    table = compute_panel_risk_metrics(close, risk_free_rate=risk_free_rate)
+    if rolling_window is not None:
+        rolling = rolling_risk_metrics(close, int(rolling_window), risk_free_rate=risk_free_rate)
+        latest = pd.DataFrame({name: frame.iloc[-1] for name, frame in rolling.items()})
+        table = table.join(latest.add_prefix("rolling_"))
+
+    table = table.astype(object).where(table.notna(), None)
+    results.update(table.to_dict(orient="index"))
+    return jsonify(results), 200
+
 @app.route("/sharpe-ratio/<ticker>", methods=["GET"])
 @handle_errors
 def get_sharpe_ratio(ticker: str):
     """
-    シャープレシオを計算します。
+    シャープレシオを計算します（/risk-metrics と同じキャッシュ済みの計算結果を参照します）。
 
     Args:
         ticker: 銘柄コード
@@ -227,9 +793,9 @@ def get_sharpe_ratio(ticker: str):
     """
     period = request.args.get("period", "1y")
 
-    sharpe_ratio = Backtester.calculate_sharpe_ratio(ticker, period=period)
+    metrics = ticker_risk_metrics(ticker, period=period)
 
-    if sharpe_ratio is None:
+    if metrics is None or metrics["sharpe_ratio"] is None:
         return jsonify({
             "error": "Failed to calculate Sharpe ratio",
             "ticker": ticker
@@ -237,7 +803,7 @@ def get_sharpe_ratio(ticker: str):
 
     return jsonify({
         "ticker": ticker,
-        "sharpe_ratio": sharpe_ratio,
+        "sharpe_ratio": metrics["sharpe_ratio"],
         "period": period
     }), 200
 
@@ -245,19 +811,19 @@ def get_sharpe_ratio(ticker: str):
 @handle_errors
 def get_max_drawdown(ticker: str):
     """
-    最大ドローダウンを計算します。
+    最大ドローダウンを計算します（/risk-metrics と同じキャッシュ済みの計算結果を参照します）。
 
     Args:
         ticker: 銘柄コード
 
     Returns:
-        最大ドローダウンのJSON
+        最大ドローダウン（%）と、その期間（本数）・開始日・底の日付のJSON
     """
     period = request.args.get("period", "1y")
 
-    max_drawdown = Backtester.calculate_max_drawdown(ticker, period=period)
+    metrics = ticker_risk_metrics(ticker, period=period)
 
-    if max_drawdown is None:
+    if metrics is None or metrics["max_drawdown"] is None:
         return jsonify({
             "error": "Failed to calculate max drawdown",
             "ticker": ticker
@@ -265,7 +831,10 @@ def get_max_drawdown(ticker: str):
 
     return jsonify({
         "ticker": ticker,
-        "max_drawdown": max_drawdown,
+        "max_drawdown": metrics["max_drawdown"],
+        "max_drawdown_duration": metrics["max_drawdown_duration"],
+        "max_drawdown_peak": metrics.get("max_drawdown_peak"),
+        "max_drawdown_trough": metrics.get("max_drawdown_trough"),
         "period": period
     }), 200
 
@@ -277,25 +846,67 @@ def notify_analysis():
 
     Request body:
         {
-            "tickers": ["1234", "5678"]
+            "tickers": ["1234", "5678"],
+            "concurrency": 4,  # オプション: データ取得の並列数
+            "async": false  # オプション: true の場合はジョブIDを即座に返す
         }
 
     Returns:
-        通知結果のJSON
+        通知結果のJSON（async の場合はジョブIDと状態URL、202）
     """
     data = request.get_json()
     tickers = data.get("tickers", [])
+    concurrency = data.get("concurrency")
 
     if not tickers:
         return jsonify({"error": "No tickers provided"}), 400
 
-    # 複数銘柄を分析
-    results = TechnicalAnalyzer.analyze_multiple_stocks(tickers, period="1y")
+    if data.get("async"):
+        job = get_job_manager().submit(
+            "notify_analysis",
+            tickers,
+            lambda job: run_notify_analysis(tickers, concurrency, on_result=job.record),
+        )
+        return job_accepted(job)
+
+    summary = run_notify_analysis(tickers, concurrency)
+
+    return jsonify({
+        "status": "success",
+        **summary,
+        "timestamp": datetime.now().isoformat()
+    }), 200
+
+def run_notify_analysis(
+    tickers: List[str],
+    concurrency: Optional[int],
+    on_result: Optional[Callable[[str, Optional[Dict]], None]] = None,
+) -> Dict:
+    """
+    複数銘柄をパイプラインで分析し、結果をバックエンドに通知します。
+
+    Args:
+        tickers: 銘柄コードのリスト
+        concurrency: データ取得の並列数
+        on_result: 銘柄ごとの分析完了時に呼び出す関数（失敗時は結果が None）
+
+    Returns:
+        分析件数を含むサマリー
+    """
+    results = {}
+    for ticker, result in TechnicalAnalyzer.iter_analyze_stocks(
+        tickers, period="1y", max_workers=concurrency
+    ):
+        if on_result is not None:
+            on_result(ticker, result)
+        if result:
+            results[ticker] = result
+    results = {ticker: results[ticker] for ticker in tickers if ticker in results}
 
     # バックエンドに通知
     try:
-        response = requests.post(
-            f"{BACKEND_URL}/api/analysis/batch",
+        response = get_backend_client(BACKEND_URL).post(
+            "/api/analysis/batch",
             json={"results": results},
             timeout=30
         )
@@ -303,11 +914,40 @@ def notify_analysis():
     except requests.RequestException as e:
         logger.warning(f"Failed to notify backend: {str(e)}")
 
+    return {"analyzed_count": len(results)}
+
+def job_accepted(job: Job):
+    """ジョブ受付のレスポンス（202）を返します"""
     return jsonify({
-        "status": "success",
-        "analyzed_count": len(results),
-        "timestamp": datetime.now().isoformat()
-    }), 200
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}"
+    }), 202
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id: str):
+    """
+    非同期ジョブの状態を返します。
+
+    Args:
+        job_id: ジョブID
+
+    Query parameters:
+        since: 完了順でこの位置以降の途中結果を含める（0以上の整数）
+            （前回の next_cursor を渡すと新しく完了した銘柄の結果のみ返す）
+
+    Returns:
+        ジョブの状態・進捗（・途中結果）のJSON
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "job_id": job_id}), 404
+
+    since = request.args.get("since")
+    try:
+        return jsonify(job.to_dict(since=int(since) if since is not None else None)), 200
+    except ValueError:
+        return jsonify({"error": "since must be a non-negative integer", "job_id": job_id}), 400
 
 @app.errorhandler(404)
 def not_found(error):
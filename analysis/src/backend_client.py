@@ -0,0 +1,189 @@
+"""
+バックエンド HTTP クライアントモジュール
+
+バックエンド（および分析エンジン自身）への HTTP 通信を、接続プール付きの
+共有 requests セッションで行います。キープアライブで接続を使い回すため、
+呼び出しごとの TCP 接続確立が不要になります。
+
+- 冪等なメソッド（GET など）のみ、接続エラーと 502/503/504 を自動で再試行します
+- 呼び出しごとのタイムアウトを指定できます（省略時は BACKEND_TIMEOUT）
+- エンドポイントごとのリクエスト数、エラー数、レイテンシを記録します
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:3000")
+BACKEND_POOL_SIZE = int(os.getenv("BACKEND_POOL_SIZE", 10))  # 同一ホストへの最大同時接続数
+BACKEND_TIMEOUT = float(os.getenv("BACKEND_TIMEOUT", 10))  # デフォルトのタイムアウト（秒）
+BACKEND_RETRIES = int(os.getenv("BACKEND_RETRIES", 3))  # 冪等なリクエストの再試行回数
+BACKEND_RETRY_BACKOFF = float(os.getenv("BACKEND_RETRY_BACKOFF", 0.5))  # 再試行の初期待機時間（秒）
+
+# 再試行する冪等なメソッドとステータス
+_IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+_RETRY_STATUSES = (502, 503, 504)
+
+
+class BackendClient:
+    """接続プール付きの共有 HTTP クライアント"""
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = BACKEND_POOL_SIZE,
+        timeout: float = BACKEND_TIMEOUT,
+        retries: int = BACKEND_RETRIES,
+        backoff: float = BACKEND_RETRY_BACKOFF,
+    ):
+        """
+        クライアントを初期化します。
+
+        Args:
+            base_url: ベース URL（例: http://localhost:3000）
+            pool_size: 接続プールのサイズ（並列に保存するワーカー数以上を推奨）
+            timeout: デフォルトのタイムアウト（秒）
+            retries: 冪等なリクエストの再試行回数
+            backoff: 再試行の初期待機時間（秒、再試行ごとに2倍）
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=_RETRY_STATUSES,
+            allowed_methods=_IDEMPOTENT_METHODS,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, float]] = {}
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        リクエストを送信します。
+
+        Args:
+            method: HTTP メソッド
+            path: ベース URL からのパス（または絶対 URL）
+            timeout: タイムアウト（秒、省略時はクライアントのデフォルト）
+            **kwargs: requests に渡す引数（json, params など）
+
+        Returns:
+            レスポンス
+
+        Raises:
+            requests.RequestException: 通信に失敗した場合（再試行後）
+        """
+        url = path if "://" in path else f"{self.base_url}/{path.lstrip('/')}"
+        endpoint = f"{method.upper()} {urlsplit(url).path}"
+
+        start = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, url, timeout=timeout if timeout is not None else self.timeout, **kwargs
+            )
+        except requests.RequestException:
+            self._record(endpoint, time.perf_counter() - start, error=True)
+            raise
+
+        self._record(endpoint, time.perf_counter() - start, error=response.status_code >= 500)
+        return response
+
+    def get(self, path: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """GET リクエストを送信します（失敗時は自動で再試行されます）"""
+        return self.request("GET", path, timeout=timeout, **kwargs)
+
+    def post(self, path: str, timeout: Optional[float] = None, **kwargs: Any) -> requests.Response:
+        """POST リクエストを送信します（冪等でないため再試行されません）"""
+        return self.request("POST", path, timeout=timeout, **kwargs)
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            エンドポイントごとのリクエスト数、エラー数、平均・最大レイテンシ（ミリ秒）を含む辞書
+        """
+        with self._lock:
+            endpoints = {
+                endpoint: {
+                    "requests": int(m["requests"]),
+                    "errors": int(m["errors"]),
+                    "avg_latency_ms": m["total_latency"] / m["requests"] * 1000,
+                    "max_latency_ms": m["max_latency"] * 1000,
+                }
+                for endpoint, m in self._metrics.items()
+            }
+        return {
+            "base_url": self.base_url,
+            "requests": sum(m["requests"] for m in endpoints.values()),
+            "errors": sum(m["errors"] for m in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+    def close(self) -> None:
+        """接続プールを閉じます"""
+        self.session.close()
+
+    def _record(self, endpoint: str, latency: float, error: bool) -> None:
+        """エンドポイントのメトリクスを更新します"""
+        with self._lock:
+            m = self._metrics.setdefault(
+                endpoint, {"requests": 0, "errors": 0, "total_latency": 0.0, "max_latency": 0.0}
+            )
+            m["requests"] += 1
+            m["errors"] += int(error)
+            m["total_latency"] += latency
+            m["max_latency"] = max(m["max_latency"], latency)
+        if error:
+            logger.debug(f"Backend request failed: {endpoint} ({latency * 1000:.0f}ms)")
+
+
+_clients: Dict[str, BackendClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_backend_client(base_url: Optional[str] = None) -> BackendClient:
+    """
+    プロセス共有の BackendClient を返します。
+
+    同じベース URL に対しては同一インスタンス（同じ接続プール）を返します。
+
+    Args:
+        base_url: ベース URL（省略時は環境変数 BACKEND_URL）
+
+    Returns:
+        BackendClient
+    """
+    base_url = (base_url or BACKEND_URL).rstrip("/")
+    with _clients_lock:
+        if base_url not in _clients:
+            _clients[base_url] = BackendClient(base_url)
+            logger.info(f"Backend client initialized for {base_url} (pool={BACKEND_POOL_SIZE})")
+        return _clients[base_url]
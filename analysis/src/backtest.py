@@ -4,16 +4,29 @@
 過去データを使用して分析アルゴリズムの精度を検証します。
 """
 
+import os
+import numpy as np
 import pandas as pd
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
-from analyzer import TechnicalAnalyzer, Signal
+from analyzer import TechnicalAnalyzer
+from compute_pool import get_compute_pool
 from data_fetch import DataFetcher
+from risk_metrics import RISK_FREE_RATE, compute_risk_metrics, ticker_risk_metrics
 
 # ロギング設定
 logger = logging.getLogger(__name__)
 
+# 指標が揃うまで売買しない期間（最長の移動平均の期間）
+WARMUP_BARS = 50
+
+# モンテカルロシミュレーションで1チャンクあたりに生成する要素数（パス数 × 日数）
+MONTE_CARLO_CHUNK_ELEMENTS = int(os.getenv("MONTE_CARLO_CHUNK_ELEMENTS", 4000000))
+
+# 日ごとのパーセンタイル計算に使用するパス数の上限（パス数 × 日数は MONTE_CARLO_CHUNK_ELEMENTS 以下に抑える）
+MONTE_CARLO_PATH_SAMPLES = int(os.getenv("MONTE_CARLO_PATH_SAMPLES", 10000))
+
 class BacktestResult:
     """バックテスト結果を保持するクラス"""
 
@@ -22,6 +35,7 @@ class BacktestResult:
         self.winning_trades = 0
         self.losing_trades = 0
         self.total_return = 0.0
+        self.compound_return = 0.0
         self.winning_rate = 0.0
         self.max_drawdown = 0.0
         self.trades = []
@@ -39,6 +53,7 @@ class BacktestResult:
             "losing_trades": self.losing_trades,
             "winning_rate": self.winning_rate,
             "total_return": self.total_return,
+            "compound_return": self.compound_return,
             "max_drawdown": self.max_drawdown,
         }
 
@@ -75,64 +90,18 @@ class Backtester:
             バックテスト結果
         """
         try:
-            # データを取得
+            # データを取得（全期間を1回だけ取得する）
+            fetcher = DataFetcher()
             if start_date and end_date:
-                df = DataFetcher.get_date_range_data(ticker, start_date, end_date)
+                df = fetcher.fetch_date_range(ticker, start_date, end_date)
             else:
-                df = DataFetcher.get_stock_data(ticker, period=period)
+                df = fetcher.fetch_stock_data(ticker, period=period)
 
-            if df is None or df.empty or len(df) < 50:
+            result = self.run_backtest_on_data(df)
+            if result is None:
                 logger.warning(f"Insufficient data for backtest: {ticker}")
                 return None
 
-            result = BacktestResult()
-            position = None  # 保有ポジション（"long"または"short"）
-            entry_price = 0.0
-
-            # 過去データをループして分析
-            for i in range(50, len(df)):
-                # 現在までのデータでスナップショットを作成
-                historical_df = df.iloc[:i].copy()
-
-                # 分析を実行
-                analysis_result = TechnicalAnalyzer.analyze_stock(ticker, period="1y")
-                if not analysis_result:
-                    continue
-
-                signal = Signal(analysis_result["signal"])
-                current_price = df.iloc[i]["close"]
-
-                # 売買シグナルを処理
-                if signal == Signal.BUY and position is None:
-                    # 買いシグナル：ポジション確立
-                    position = "long"
-                    entry_price = current_price
-                    result.total_trades += 1
-
-                elif signal == Signal.SELL and position == "long":
-                    # 売りシグナル：ポジション解除
-                    profit = current_price - entry_price
-                    profit_percent = (profit / entry_price) * 100
-
-                    if profit > 0:
-                        result.winning_trades += 1
-                    else:
-                        result.losing_trades += 1
-
-                    result.total_return += profit_percent
-                    result.trades.append({
-                        "entry_price": entry_price,
-                        "exit_price": current_price,
-                        "profit": profit,
-                        "profit_percent": profit_percent,
-                    })
-
-                    position = None
-                    entry_price = 0.0
-
-            # メトリクスを計算
-            result.calculate_metrics()
-
             logger.info(
                 f"Backtest completed for {ticker}: "
                 f"Winning rate: {result.winning_rate:.2f}%, "
@@ -145,6 +114,74 @@ class Backtester:
             logger.error(f"Error running backtest for {ticker}: {str(e)}")
             return None
 
+    def run_backtest_on_data(self, df: Optional[pd.DataFrame]) -> Optional[BacktestResult]:
+        """
+        取得済みの株価データでバックテストを実行します。
+
+        全指標と判定を全期間について1回だけ計算し（先読みなし）、
+        売買はベクトル演算で1パスでシミュレーションします。
+        各営業日 i の終値で、前営業日 i-1 までのデータによる判定に従って売買します。
+
+        Args:
+            df: OHLCV データ
+
+        Returns:
+            バックテスト結果（データが不足している場合は None）
+        """
+        if df is None or df.empty or len(df) < WARMUP_BARS:
+            return None
+
+        close = df["close"] if "close" in df.columns else df["Close"]
+        signals = TechnicalAnalyzer.compute_signal_series(df)["signal"].to_numpy()
+
+        # 営業日 i の売買は i-1 時点の判定で行う（ウォームアップ期間は売買しない）
+        executed = np.zeros(len(df))
+        executed[WARMUP_BARS:] = signals[WARMUP_BARS - 1:-1]
+
+        # BUY で保有開始、SELL で解消：直近の BUY/SELL 判定を前方補完すると保有状態になる
+        position = pd.Series(np.where(executed == 0, np.nan, executed)).ffill().fillna(-1).to_numpy() > 0
+        previous = np.concatenate(([False], position[:-1]))
+        entries = np.flatnonzero(position & ~previous)
+        exits = np.flatnonzero(~position & previous)
+
+        prices = close.to_numpy(dtype=float)
+        entry_prices = prices[entries[:len(exits)]]
+        exit_prices = prices[exits]
+        profits = exit_prices - entry_prices
+        profit_percents = (profits / entry_prices) * 100
+
+        result = BacktestResult()
+        result.total_trades = len(entries)
+        result.winning_trades = int((profits > 0).sum())
+        result.losing_trades = int((profits <= 0).sum())
+        result.total_return = float(profit_percents.sum())
+        # 各取引の資金をすべて次の取引に回した場合の累積リターン
+        result.compound_return = float(np.expm1(np.log1p(profits / entry_prices).sum()) * 100)
+        result.trades = [
+            {
+                "entry_date": str(close.index[entry]),
+                "exit_date": str(close.index[exit_]),
+                "entry_price": float(entry_price),
+                "exit_price": float(exit_price),
+                "profit": float(profit),
+                "profit_percent": float(profit_percent),
+            }
+            for entry, exit_, entry_price, exit_price, profit, profit_percent in zip(
+                entries, exits, entry_prices, exit_prices, profits, profit_percents
+            )
+        ]
+
+        # 保有中の日のみ値動きを反映した資産推移から最大ドローダウンを計算
+        returns = np.zeros(len(prices))
+        returns[1:] = np.where(position[:-1], prices[1:] / prices[:-1] - 1, 0.0)
+        equity = self.initial_capital * np.cumprod(1 + returns[WARMUP_BARS - 1:])
+        result.max_drawdown = compute_risk_metrics(equity)["max_drawdown"] or 0.0
+
+        # メトリクスを計算
+        result.calculate_metrics()
+
+        return result
+
     def run_multiple_backtests(
         self,
         tickers: List[str],
@@ -153,6 +190,9 @@ class Backtester:
         """
         複数銘柄のバックテストを実行します。
 
+        CPU 計算プール（compute_pool を参照）が有効な場合は、全銘柄のデータを一括取得し、
+        銘柄のチャンクごとにワーカープロセスで並列に実行します（結果は1銘柄ずつ実行した場合と一致します）。
+
         Args:
             tickers: 銘柄コードのリスト
             period: 期間
@@ -160,18 +200,58 @@ class Backtester:
         Returns:
             銘柄コードをキーとしたバックテスト結果の辞書
         """
-        results = {}
+        pool = get_compute_pool()
+        if not pool.parallel:
+            results = {}
+
+            for ticker in tickers:
+                results[ticker] = self.run_backtest(ticker, period=period)
+
+            return results
+
+        frames = DataFetcher().fetch_multiple_stocks(tickers, period=period)
+        results = pool.map_frames(
+            "backtest",
+            {ticker: df for ticker, df in frames.items() if df is not None},
+            initial_capital=self.initial_capital,
+        )
+        return {ticker: results.get(ticker) for ticker in tickers}
+
+    def run_portfolio_backtest(
+        self,
+        tickers: List[str],
+        period: str = "1y",
+        **options,
+    ):
+        """
+        複数銘柄で初期資本を共有するポートフォリオバックテストを実行します。
 
-        for ticker in tickers:
-            results[ticker] = self.run_backtest(ticker, period=period)
+        run_multiple_backtests は銘柄ごとに独立した売買を評価しますが、
+        こちらは1つの現金残高から数量を決めて発注します（portfolio_backtest を参照）。
 
-        return results
+        Args:
+            tickers: 銘柄コードのリスト
+            period: 期間
+            **options: PortfolioBacktester の設定（sizing、max_positions、commission_rate など）
+
+        Returns:
+            ポートフォリオバックテスト結果（データが不足している場合は None）
+        """
+        from portfolio_backtest import PortfolioBacktester
+
+        frames = DataFetcher().fetch_multiple_stocks(tickers, period=period)
+        return PortfolioBacktester(initial_capital=self.initial_capital, **options).run(frames)
 
     @staticmethod
     def monte_carlo_simulation(
         ticker: str,
         num_simulations: int = 1000,
         period: str = "1y",
+        horizon: Optional[int] = None,
+        seed: Optional[int] = None,
+        block_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        path_percentiles: Optional[List[float]] = None,
     ) -> Optional[Dict]:
         """
         モンテカルロシミュレーションを実行します。
@@ -180,55 +260,169 @@ class Backtester:
             ticker: 銘柄コード
             num_simulations: シミュレーション回数
             period: 期間
+            horizon: シミュレーションする日数（省略時はリターンの本数）
+            seed: 乱数シード（指定すると結果が再現可能になる）
+            block_size: ブロックブートストラップのブロック長（省略時は日次リターンを独立に抽出）
+            chunk_size: 1回に生成するパス数（省略時はメモリ使用量から自動決定）
+            path_percentiles: 日ごとの資産推移を求めるパーセンタイル（例: [5, 50, 95]）
 
         Returns:
             シミュレーション結果
         """
         try:
-            df = DataFetcher.get_stock_data(ticker, period=period)
+            df = DataFetcher().fetch_stock_data(ticker, period=period)
             if df is None or df.empty:
                 return None
 
             # リターンを計算
             close = df["close"]
-            returns = close.pct_change().dropna()
+            returns = close.pct_change().dropna().to_numpy()
+
+            return Backtester.simulate_returns(
+                returns,
+                num_simulations=num_simulations,
+                horizon=horizon,
+                seed=seed,
+                block_size=block_size,
+                chunk_size=chunk_size,
+                path_percentiles=path_percentiles,
+            )
 
-            results = []
+        except Exception as e:
+            logger.error(f"Error running Monte Carlo simulation for {ticker}: {str(e)}")
+            return None
 
-            for _ in range(num_simulations):
-                # ランダムなリターンを生成
-                sampled_returns = returns.sample(n=len(returns), replace=True)
+    @staticmethod
+    def simulate_returns(
+        returns: np.ndarray,
+        num_simulations: int = 1000,
+        horizon: Optional[int] = None,
+        seed: Optional[int] = None,
+        block_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+        path_percentiles: Optional[List[float]] = None,
+        initial_capital: float = 1000000.0,
+    ) -> Dict:
+        """
+        日次リターンのブートストラップで最終資産の分布をシミュレーションします。
 
-                # キャピタルの最終値を計算
-                final_capital = 1000000.0
-                for ret in sampled_returns:
-                    final_capital *= (1 + ret)
+        (パス数 × 日数) のインデックス行列を一度に生成し、対数リターンの和から
+        最終資産を求めます。パスは chunk_size 単位で生成するため、
+        100万パスでもメモリ使用量は一定に保たれます。
 
-                results.append(final_capital)
+        Args:
+            returns: 日次リターン（単純リターン）の配列
+            num_simulations: シミュレーション回数
+            horizon: シミュレーションする日数（省略時はリターンの本数）
+            seed: 乱数シード
+            block_size: ブロックブートストラップのブロック長（系列の自己相関を保持する、horizon を上限とする）
+            chunk_size: 1回に生成するパス数
+            path_percentiles: 日ごとの資産推移を求めるパーセンタイル（先頭 MONTE_CARLO_PATH_SAMPLES 本、
+                ただし日数との積が MONTE_CARLO_CHUNK_ELEMENTS を超えない本数のパスから計算）
+            initial_capital: 初期資本
 
-            results_df = pd.DataFrame({"final_capital": results})
+        Returns:
+            最終資産の統計値（平均、標準偏差、パーセンタイル等）を含む辞書
+        """
+        returns = np.asarray(returns, dtype=float)
+        returns = returns[~np.isnan(returns)]
+        if len(returns) == 0:
+            raise ValueError("No returns to resample")
+
+        log_returns = np.log1p(returns)
+        n = len(log_returns)
+        horizon = horizon or n
+        if block_size and block_size > 1:
+            block_size = min(block_size, horizon)
+        if chunk_size is None:
+            # 1パスあたりに生成するインデックス数（ブロックの場合は horizon をブロック長の倍数に切り上げた数）
+            per_path = -(-horizon // block_size) * block_size if block_size and block_size > 1 else horizon
+            chunk_size = max(1, MONTE_CARLO_CHUNK_ELEMENTS // per_path)
+
+        # 日ごとのパーセンタイル用に保持するパスは1チャンク分の要素数に収まるよう、日数が長いほど減らす
+        path_samples = 0
+        if path_percentiles:
+            path_samples = min(num_simulations, MONTE_CARLO_PATH_SAMPLES, max(1, MONTE_CARLO_CHUNK_ELEMENTS // horizon))
+        sampled_paths = np.empty((path_samples, horizon))
+        sampled_count = 0
+
+        rng = np.random.default_rng(seed)
+        terminal_log = np.empty(num_simulations)
+
+        for start in range(0, num_simulations, chunk_size):
+            size = min(chunk_size, num_simulations - start)
+            indices = Backtester._bootstrap_indices(rng, size, horizon, n, block_size)
+            chunk = log_returns[indices]
+
+            if sampled_count < path_samples:
+                # パスは独立に生成されるため、先頭のパスは全体からの無作為標本になる
+                take = min(size, path_samples - sampled_count)
+                paths = np.cumsum(chunk[:take], axis=1, out=sampled_paths[sampled_count:sampled_count + take])
+                sampled_count += take
+                terminal_log[start:start + size] = np.concatenate(
+                    (paths[:, -1], chunk[take:].sum(axis=1))
+                )
+            else:
+                terminal_log[start:start + size] = chunk.sum(axis=1)
+
+        final_capital = initial_capital * np.exp(terminal_log)
+
+        result = {
+            "mean": float(final_capital.mean()),
+            "std": float(final_capital.std(ddof=1)) if num_simulations > 1 else 0.0,
+            "min": float(final_capital.min()),
+            "max": float(final_capital.max()),
+            "median": float(np.median(final_capital)),
+            "percentile_5": float(np.percentile(final_capital, 5)),
+            "percentile_95": float(np.percentile(final_capital, 95)),
+            "probability_of_loss": float((final_capital < initial_capital).mean()),
+            "num_simulations": num_simulations,
+            "horizon": horizon,
+            "block_size": block_size,
+            "seed": seed,
+        }
 
-            return {
-                "mean": float(results_df["final_capital"].mean()),
-                "std": float(results_df["final_capital"].std()),
-                "min": float(results_df["final_capital"].min()),
-                "max": float(results_df["final_capital"].max()),
-                "percentile_5": float(results_df["final_capital"].quantile(0.05)),
-                "percentile_95": float(results_df["final_capital"].quantile(0.95)),
+        if path_percentiles:
+            # exp は単調増加のため対数のまま順位を求め、結果の行だけを資産額に戻す
+            rows = np.percentile(sampled_paths, path_percentiles, axis=0, overwrite_input=True)
+            result["path_samples"] = path_samples
+            result["path_percentiles"] = {
+                str(q): (initial_capital * np.exp(row)).tolist() for q, row in zip(path_percentiles, rows)
             }
 
-        except Exception as e:
-            logger.error(f"Error running Monte Carlo simulation for {ticker}: {str(e)}")
-            return None
+        return result
+
+    @staticmethod
+    def _bootstrap_indices(
+        rng: np.random.Generator,
+        size: int,
+        horizon: int,
+        n: int,
+        block_size: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        ブートストラップ用のインデックス行列 (size × horizon) を生成します。
+
+        block_size を指定した場合は、ランダムな開始位置から連続する block_size 本を
+        1ブロックとして抽出する循環ブロックブートストラップになります。
+        """
+        if not block_size or block_size <= 1:
+            return rng.integers(0, n, size=(size, horizon))
+
+        block_size = min(block_size, horizon)
+        num_blocks = -(-horizon // block_size)
+        starts = rng.integers(0, n, size=(size, num_blocks))
+        indices = (starts[:, :, None] + np.arange(block_size)) % n
+        return indices.reshape(size, num_blocks * block_size)[:, :horizon]
 
     @staticmethod
     def calculate_sharpe_ratio(
         ticker: str,
         period: str = "1y",
-        risk_free_rate: float = 0.02,
+        risk_free_rate: float = RISK_FREE_RATE,
     ) -> Optional[float]:
         """
-        シャープレシオを計算します。
+        シャープレシオを計算します（risk_metrics.ticker_risk_metrics の結果を参照します）。
 
         Args:
             ticker: 銘柄コード
@@ -239,21 +433,8 @@ class Backtester:
             シャープレシオ
         """
         try:
-            df = DataFetcher.get_stock_data(ticker, period=period)
-            if df is None or df.empty:
-                return None
-
-            close = df["close"]
-            returns = close.pct_change().dropna()
-
-            # 平均リターンと標準偏差を計算
-            mean_return = returns.mean() * 252  # 年率化
-            std_return = returns.std() * (252 ** 0.5)  # 年率化
-
-            # シャープレシオを計算
-            sharpe_ratio = (mean_return - risk_free_rate) / std_return
-
-            return float(sharpe_ratio)
+            metrics = ticker_risk_metrics(ticker, period=period, risk_free_rate=risk_free_rate)
+            return metrics["sharpe_ratio"] if metrics is not None else None
 
         except Exception as e:
             logger.error(f"Error calculating Sharpe ratio for {ticker}: {str(e)}")
@@ -262,7 +443,7 @@ class Backtester:
     @staticmethod
     def calculate_max_drawdown(ticker: str, period: str = "1y") -> Optional[float]:
         """
-        最大ドローダウンを計算します。
+        最大ドローダウンを計算します（risk_metrics.ticker_risk_metrics の結果を参照します）。
 
         Args:
             ticker: 銘柄コード
@@ -272,22 +453,8 @@ class Backtester:
             最大ドローダウン（%）
         """
         try:
-            df = DataFetcher.get_stock_data(ticker, period=period)
-            if df is None or df.empty:
-                return None
-
-            close = df["close"]
-
-            # 累積最大値を計算
-            cumulative_max = close.cummax()
-
-            # ドローダウンを計算
-            drawdown = (close - cumulative_max) / cumulative_max
-
-            # 最大ドローダウンを計算
-            max_drawdown = drawdown.min() * 100
-
-            return float(max_drawdown)
+            metrics = ticker_risk_metrics(ticker, period=period)
+            return metrics["max_drawdown"] if metrics is not None else None
 
         except Exception as e:
             logger.error(f"Error calculating max drawdown for {ticker}: {str(e)}")
@@ -0,0 +1,411 @@
+"""
+CPU 計算用プロセスプール
+
+テクニカル分析とバックテストの CPU 負荷の高い pandas の計算を、
+複数のワーカープロセスで並列に実行します。
+
+株価データは銘柄のチャンクごとに1つの共有メモリブロックへ書き込み、
+ワーカーには共有メモリ名と各銘柄のオフセットのみを渡します
+（DataFrame を pickle して送りません）。ワーカーは計算結果（辞書など）のみを返します。
+ワーカー数が1以下の場合は、呼び出し元のプロセスで1銘柄ずつ計算します（従来の動作）。
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+ANALYSIS_CPU_WORKERS = int(os.getenv("ANALYSIS_CPU_WORKERS", 1))  # CPU 計算のワーカープロセス数（0 で CPU コア数、1 で無効）
+ANALYSIS_CPU_CHUNK_SIZE = int(os.getenv("ANALYSIS_CPU_CHUNK_SIZE", 16))  # 1タスクあたりの最大銘柄数
+
+# 共有メモリに格納する列（DataFetcher が返す列）
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+# 共有メモリ1ブロックの先頭に置くバイト数（ブロックサイズ 0 を避ける）
+_HEADER_BYTES = 8
+
+
+def is_shareable(df: Optional[pd.DataFrame]) -> bool:
+    """
+    共有メモリ経由でワーカーに渡せるデータかどうかを返します。
+
+    日時インデックスを持ち、COLUMNS の全列が実数型である空でない DataFrame のみ対象です。
+    それ以外（None、空、列の不足など）は呼び出し元のプロセスで計算します。
+    """
+    if df is None or df.empty or not isinstance(df.index, pd.DatetimeIndex):
+        return False
+    if not all(column in df.columns for column in COLUMNS):
+        return False
+    return all(
+        pd.api.types.is_numeric_dtype(df[column]) and not pd.api.types.is_complex_dtype(df[column])
+        for column in COLUMNS
+    )
+
+
+class SharedFrames:
+    """複数銘柄の OHLCV データを1つの共有メモリブロックに格納したもの"""
+
+    def __init__(self, shm: SharedMemory, spec: Dict):
+        """
+        Args:
+            shm: 共有メモリブロック
+            spec: ワーカーに渡すデータの配置情報（unpack_frames を参照）
+        """
+        self.shm = shm
+        self.spec = spec
+
+    @classmethod
+    def pack(cls, frames: Dict[str, pd.DataFrame]) -> "SharedFrames":
+        """
+        DataFrame を共有メモリに書き込みます。
+
+        ブロックは全銘柄を連結した時刻（int64）の配列と、(本数 × 列数) の値（float64）の
+        配列で構成されます。元の dtype・時刻の単位・タイムゾーンは配置情報に記録し、
+        復元時に戻します。
+
+        Args:
+            frames: 銘柄コードから OHLCV データへの辞書（is_shareable を満たすこと）
+
+        Returns:
+            共有メモリと配置情報
+        """
+        total = sum(len(df) for df in frames.values())
+        values_offset = _HEADER_BYTES + total * 8
+        shm = SharedMemory(create=True, size=values_offset + total * len(COLUMNS) * 8)
+
+        try:
+            timestamps = np.ndarray((total,), dtype=np.int64, buffer=shm.buf, offset=_HEADER_BYTES)
+            values = np.ndarray((total, len(COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=values_offset)
+
+            entries = []
+            start = 0
+            for ticker, df in frames.items():
+                stop = start + len(df)
+                timestamps[start:stop] = df.index.asi8
+                values[start:stop] = df[list(COLUMNS)].to_numpy(dtype=np.float64)
+                entries.append({
+                    "ticker": ticker,
+                    "start": start,
+                    "stop": stop,
+                    "unit": df.index.unit,
+                    "tz": str(df.index.tz) if df.index.tz is not None else None,
+                    "index_name": df.index.name,
+                    "dtypes": [df[column].dtype.str for column in COLUMNS],
+                })
+                start = stop
+            del timestamps, values
+        except Exception:
+            shm.close()
+            shm.unlink()
+            raise
+
+        return cls(shm, {
+            "name": shm.name,
+            "total": total,
+            "values_offset": values_offset,
+            "entries": entries,
+        })
+
+    @property
+    def nbytes(self) -> int:
+        """共有メモリブロックのサイズ（バイト）"""
+        return self.shm.size
+
+    def release(self) -> None:
+        """共有メモリを解放します"""
+        try:
+            self.shm.close()
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def unpack_frames(spec: Dict) -> Dict[str, pd.DataFrame]:
+    """
+    共有メモリから DataFrame を復元します。
+
+    各銘柄の値は復元時にコピーするため、返した DataFrame は共有メモリの解放後も使用できます。
+
+    Args:
+        spec: SharedFrames.pack で作成した配置情報
+
+    Returns:
+        銘柄コードから OHLCV データへの辞書
+    """
+    shm = SharedMemory(name=spec["name"])
+    try:
+        total = spec["total"]
+        timestamps = np.ndarray((total,), dtype=np.int64, buffer=shm.buf, offset=_HEADER_BYTES)
+        values = np.ndarray((total, len(COLUMNS)), dtype=np.float64, buffer=shm.buf, offset=spec["values_offset"])
+
+        frames = {}
+        for entry in spec["entries"]:
+            start, stop = entry["start"], entry["stop"]
+            index = pd.DatetimeIndex(
+                timestamps[start:stop].copy().view(f"M8[{entry['unit']}]"), name=entry["index_name"]
+            )
+            if entry["tz"] is not None:
+                index = index.tz_localize("UTC").tz_convert(entry["tz"])
+
+            frames[entry["ticker"]] = pd.DataFrame(
+                {
+                    column: values[start:stop, i].astype(np.dtype(dtype), copy=True)
+                    for i, (column, dtype) in enumerate(zip(COLUMNS, entry["dtypes"]))
+                },
+                index=index,
+            )
+        # 共有メモリを閉じる前にバッファへの参照を解放する
+        del timestamps, values
+        return frames
+    finally:
+        shm.close()
+
+
+def _analyze_frame(ticker: str, df: pd.DataFrame) -> Optional[Dict]:
+    """1銘柄を分析します（TechnicalAnalyzer.analyze_dataframe と同じ結果）"""
+    from analyzer import TechnicalAnalyzer
+
+    return TechnicalAnalyzer.analyze_dataframe(ticker, df)
+
+
+def _backtest_frame(ticker: str, df: pd.DataFrame, initial_capital: float = 1000000.0) -> Any:
+    """1銘柄のバックテストを実行します（Backtester.run_backtest_on_data と同じ結果）"""
+    from backtest import Backtester
+
+    return Backtester(initial_capital=initial_capital).run_backtest_on_data(df)
+
+
+def _sweep_frame(ticker: str, df: pd.DataFrame, combos: List[Dict], train_fraction: float) -> Any:
+    """1銘柄についてパラメーターの全組み合わせを評価します（optimizer.evaluate_frame を参照）"""
+    from optimizer import evaluate_frame
+
+    return evaluate_frame(df, combos, train_fraction=train_fraction)
+
+
+def _walk_forward_frame(key: Tuple[str, int, int], df: pd.DataFrame, **options) -> Any:
+    """1銘柄（の組み合わせのブロック）のウォークフォワード検証を実行します（walk_forward を参照）"""
+    from walk_forward import walk_forward_frame
+
+    _, part, parts = key
+    return walk_forward_frame(df, part=part, parts=parts, **options)
+
+
+# タスク名 → 1銘柄分の計算関数（ワーカーには関数ではなくタスク名を渡す）
+TASKS = {
+    "analyze": _analyze_frame,
+    "backtest": _backtest_frame,
+    "sweep": _sweep_frame,
+    "walk_forward": _walk_forward_frame,
+}
+
+
+def _run_frames(task: str, frames: Iterable[Tuple[str, pd.DataFrame]], options: Dict) -> List[Tuple[str, Any]]:
+    """銘柄ごとにタスクを実行します（失敗した銘柄の結果は None）"""
+    func = TASKS[task]
+    results = []
+    for ticker, df in frames:
+        try:
+            results.append((ticker, func(ticker, df, **options)))
+        except Exception as e:
+            logger.error(f"Error running {task} for {ticker}: {str(e)}")
+            results.append((ticker, None))
+    return results
+
+
+def _run_shared_chunk(task: str, spec: Dict, options: Dict) -> List[Tuple[str, Any]]:
+    """ワーカープロセスで共有メモリのチャンクを計算します"""
+    return _run_frames(task, unpack_frames(spec).items(), options)
+
+
+class ComputePool:
+    """銘柄単位の CPU 計算をワーカープロセスに分散するプール"""
+
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: Optional[int] = None):
+        """
+        プールを初期化します（ワーカープロセスは最初のタスク投入時に起動します）。
+
+        Args:
+            max_workers: ワーカープロセス数（省略時は環境変数 ANALYSIS_CPU_WORKERS、0 で CPU コア数）
+            chunk_size: 1タスクあたりの最大銘柄数（省略時は環境変数 ANALYSIS_CPU_CHUNK_SIZE）
+        """
+        workers = ANALYSIS_CPU_WORKERS if max_workers is None else max_workers
+        self.max_workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size or ANALYSIS_CPU_CHUNK_SIZE)
+
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._active_blocks = 0
+        self._stats = {
+            "chunks": 0,
+            "shared_tickers": 0,
+            "inline_tickers": 0,
+            "shared_bytes": 0,
+            "worker_failures": 0,
+        }
+
+    @property
+    def parallel(self) -> bool:
+        """ワーカープロセスで計算するかどうか"""
+        return self.max_workers > 1
+
+    def _get_executor(self, restart: bool = False) -> ProcessPoolExecutor:
+        """ワーカープロセスのプールを返します（restart=True の場合は作り直します）"""
+        with self._lock:
+            if restart and self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._executor is None:
+                # Flask のスレッドから fork すると状態を引き継いでしまうため spawn で起動する
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=get_context("spawn")
+                )
+                logger.info(f"Compute pool started ({self.max_workers} workers)")
+            return self._executor
+
+    def submit(self, task: str, frames: Dict[str, Optional[pd.DataFrame]], **options) -> Future:
+        """
+        1チャンク分の計算を投入します。
+
+        共有メモリで渡せるデータはワーカーで計算し、それ以外
+        （None や列が不足したデータなど）は呼び出し元のプロセスで計算します。
+
+        Args:
+            task: タスク名（TASKS のキー）
+            frames: 銘柄コードから OHLCV データへの辞書
+            **options: タスクに渡す追加の引数（backtest の initial_capital など）
+
+        Returns:
+            (銘柄コード, 結果) のリストを返す Future（計算に失敗した銘柄の結果は None）
+        """
+        if task not in TASKS:
+            raise ValueError(f"Unknown compute task: {task}")
+
+        shared = {ticker: df for ticker, df in frames.items() if self.parallel and is_shareable(df)}
+        inline = [(ticker, df) for ticker, df in frames.items() if ticker not in shared]
+
+        with self._lock:
+            self._stats["shared_tickers"] += len(shared)
+            self._stats["inline_tickers"] += len(inline)
+
+        if not shared:
+            future: Future = Future()
+            future.set_result(_run_frames(task, inline, options))
+            return future
+
+        block = SharedFrames.pack(shared)
+        try:
+            try:
+                inner = self._get_executor().submit(_run_shared_chunk, task, block.spec, options)
+            except BrokenProcessPool:
+                logger.warning("Compute pool is broken, restarting workers")
+                inner = self._get_executor(restart=True).submit(_run_shared_chunk, task, block.spec, options)
+        except Exception:
+            block.release()
+            raise
+
+        with self._lock:
+            self._active_blocks += 1
+            self._stats["chunks"] += 1
+            self._stats["shared_bytes"] += block.nbytes
+
+        inline_results = _run_frames(task, inline, options)
+        outer: Future = Future()
+
+        def on_done(done: Future) -> None:
+            """共有メモリを解放し、ワーカーの結果と呼び出し元で計算した結果をまとめます"""
+            block.release()
+            with self._lock:
+                self._active_blocks -= 1
+            try:
+                outer.set_result(done.result() + inline_results)
+            except Exception as e:
+                with self._lock:
+                    self._stats["worker_failures"] += 1
+                outer.set_exception(e)
+
+        inner.add_done_callback(on_done)
+        return outer
+
+    def map_frames(self, task: str, frames: Dict[str, Optional[pd.DataFrame]], **options) -> Dict[str, Any]:
+        """
+        全銘柄の計算を銘柄のチャンクに分けて並列に実行します。
+
+        ワーカー全体に行き渡るよう、チャンクの大きさは chunk_size と
+        (銘柄数 / ワーカー数) の小さい方にします。
+
+        Args:
+            task: タスク名（TASKS のキー）
+            frames: 銘柄コードから OHLCV データへの辞書
+            **options: タスクに渡す追加の引数
+
+        Returns:
+            入力順の 銘柄コード → 結果 の辞書（計算に失敗した銘柄の結果は None）
+        """
+        items = list(frames.items())
+        size = max(1, min(self.chunk_size, -(-len(items) // self.max_workers)))
+        chunks = [dict(items[i:i + size]) for i in range(0, len(items), size)]
+        futures = [(self.submit(task, chunk, **options), chunk) for chunk in chunks]
+
+        results: Dict[str, Any] = {}
+        for future, chunk in futures:
+            try:
+                results.update(future.result())
+            except Exception as e:
+                logger.error(f"Error running {task} for {len(chunk)} tickers in compute pool: {str(e)}")
+        return {ticker: results.get(ticker) for ticker in frames}
+
+    def get_stats(self) -> Dict:
+        """
+        プールの統計情報を返します。
+
+        Returns:
+            ワーカー数、投入したチャンク数、共有メモリで渡した銘柄数とバイト数などを含む辞書
+        """
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "chunk_size": self.chunk_size,
+                "parallel": self.parallel,
+                "started": self._executor is not None,
+                "active_blocks": self._active_blocks,
+                **self._stats,
+            }
+
+    def shutdown(self) -> None:
+        """ワーカープロセスを停止します"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool: Optional[ComputePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_compute_pool() -> ComputePool:
+    """
+    プロセス共有の ComputePool を返します。
+
+    Returns:
+        環境変数 ANALYSIS_CPU_WORKERS / ANALYSIS_CPU_CHUNK_SIZE で設定された ComputePool
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ComputePool()
+            logger.info(
+                f"Compute pool initialized ({_pool.max_workers} workers, chunk size {_pool.chunk_size})"
+            )
+        return _pool
@@ -1,16 +1,23 @@
 """Stock data fetching module with retry logic and rate limiting."""
 
-import yfinance as yf
 import pandas as pd
 import logging
-from typing import Optional, List, Dict
+import os
+from typing import Any, Callable, Optional, List, Dict, Tuple
 from datetime import datetime, timedelta
 import pytz
 import time
 from functools import wraps
+from data_providers import DataProvider, DataUnavailableError, get_data_provider, period_length
+from frame_cache import FrameCache, get_frame_cache
+from price_store import PriceStore, get_price_store
+from rate_limiter import TokenBucketRateLimiter, get_rate_limiter, is_rate_limit_error
 
 logger = logging.getLogger(__name__)
 
+# 一括取得時のチャンクサイズ（1以下で1銘柄ずつ取得）
+FETCH_BATCH_SIZE = int(os.getenv("FETCH_BATCH_SIZE", 50))
+
 
 def retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120):
     """
@@ -28,12 +35,15 @@ def retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120):
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
+                except DataUnavailableError:
+                    # 取得元にデータが存在しない場合は再試行しない
+                    raise
                 except Exception as e:
                     last_exception = e
                     error_msg = str(e)
                     
                     # 429エラーの場合は、遅延を大幅に増加させる
-                    if '429' in error_msg or 'Too Many Requests' in error_msg:
+                    if is_rate_limit_error(e):
                         delay = min(delay * 3, max_delay)
                         logger.warning(
                             f"Rate limited (429) on {func.__name__}: {error_msg[:100]}. "
@@ -49,7 +59,7 @@ def retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120):
                     if attempt < max_retries - 1:
                         time.sleep(delay)
                         # 429以外のエラーは通常の指数バックオフ
-                        if '429' not in error_msg:
+                        if not is_rate_limit_error(e):
                             delay = min(delay * 2, max_delay)
                     else:
                         logger.error(
@@ -66,16 +76,71 @@ def retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120):
 class DataFetcher:
     """Fetches Japanese stock price data from yfinance."""
     
-    def __init__(self):
-        """Initialize DataFetcher."""
+    def __init__(
+        self,
+        price_store: Optional[PriceStore] = None,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        frame_cache: Optional[FrameCache] = None,
+        provider: Optional[DataProvider] = None
+    ):
+        """
+        Initialize DataFetcher.
+        
+        Args:
+            price_store: 永続キャッシュ（省略時は環境変数 PRICE_STORE_DIR から取得、
+                未設定の場合やネットワークを使わないプロバイダーの場合は毎回全期間を取得）
+            rate_limiter: レート制限（省略時はプロセス共有のトークンバケット）
+            frame_cache: インメモリキャッシュ（省略時はプロセス共有の FrameCache）
+            provider: 株価データの取得元（省略時は環境変数 DATA_PROVIDER で選択したプロバイダー）
+        """
         self.jst = pytz.timezone('Asia/Tokyo')
-        # レート制限対応：各リクエスト前に遅延を設定
-        self.rate_limit_delay = 1.5  # 秒
-        # 異なるティッカー間の遅延（レート制限回避）
-        self.min_delay_between_requests = 3.0  # 秒
-        logger.info("DataFetcher initialized with rate limiting enabled")
+        # レート制限対応：全リクエストがプロセス共有のトークンバケットを通過する
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter()
+        self.price_store = price_store if price_store is not None else get_price_store()
+        self.frame_cache = frame_cache if frame_cache is not None else get_frame_cache()
+        self.provider = provider if provider is not None else get_data_provider()
+        if not self.provider.remote:
+            # ローカルファイル・合成データは取得元自体が保存済みのデータであり、period も
+            # 取得元の最終バーを基準に切り出されるため、現在時刻で切り出す永続キャッシュは使わない
+            self.price_store = None
+        logger.info(f"DataFetcher initialized ({self.provider.name} provider)")
+    
+    def _throttled(
+        self,
+        request: Callable[[], Any],
+        tokens: float = 1.0,
+        errors: Optional[Dict[str, Exception]] = None
+    ) -> Any:
+        """
+        レート制限を通過してから yfinance へのリクエストを実行します。
+        
+        429を受けた場合はトークンバケットに通知してレートを下げます。
+        ネットワークを使わないプロバイダーの場合はレート制限を適用しません。
+        
+        Args:
+            request: yfinance を呼び出す関数
+            tokens: 消費するトークン数（一括取得では銘柄数）
+            errors: 一括取得で request が格納する銘柄ごとの例外（429が含まれる場合もレートを下げる）
+        
+        Returns:
+            request の戻り値
+        """
+        if not self.provider.remote:
+            return request()
+        
+        self.rate_limiter.acquire(tokens)
+        try:
+            result = request()
+        except Exception as e:
+            if is_rate_limit_error(e):
+                self.rate_limiter.on_rate_limited()
+            raise
+        if errors and any(is_rate_limit_error(e) for e in errors.values()):
+            self.rate_limiter.on_rate_limited()
+        else:
+            self.rate_limiter.on_success()
+        return result
     
-    @retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120)
     def fetch_stock_data(
         self,
         ticker: str,
@@ -85,6 +150,11 @@ class DataFetcher:
         """
         Fetch stock price data from yfinance.
         
+        同じ (ticker, period, interval) のデータがインメモリキャッシュにあればそれを返し、
+        同時に同じキーを要求するリクエストは1回の取得にまとめます。
+        永続キャッシュが有効で、要求期間が保存済みデータでカバーされている場合は、
+        最終保存バー以降の差分のみを取得してマージします。
+        
         Args:
             ticker: Stock ticker symbol (e.g., '9984.T' for SoftBank)
             period: Data period ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y')
@@ -93,20 +163,141 @@ class DataFetcher:
         Returns:
             DataFrame with OHLCV data, or None if fetch fails
         
+        Raises:
+            Exception: If fetch fails after all retries
+        """
+        return self.frame_cache.get_or_load(
+            (ticker, period, interval),
+            lambda: self._fetch_uncached(ticker, period, interval)
+        )
+    
+    def _fetch_uncached(self, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        """インメモリキャッシュを経由せずにデータを取得します"""
+        if self.price_store is None:
+            return self._download_history(ticker, interval=interval, period=period)
+        
+        request = self._plan_request(ticker, period, interval)
+        if 'start' in request:
+            logger.info(f"Fetching delta for {ticker} since {request['start']} (interval={interval})")
+            df = self._download_history(
+                ticker, interval=interval, start=request['start'], allow_empty=True
+            )
+        else:
+            df = self._download_history(ticker, interval=interval, period=period)
+        
+        return self._store_and_slice(ticker, period, interval, df, request)
+    
+    def fetch_date_range(
+        self,
+        ticker: str,
+        start_date: str,
+        end_date: str,
+        interval: str = '1d'
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fetch stock price data for a date range.
+        
+        Args:
+            ticker: Stock ticker symbol
+            start_date: 開始日付（YYYY-MM-DD形式）
+            end_date: 終了日付（YYYY-MM-DD形式、当日を含む）
+            interval: Data interval
+        
+        Returns:
+            DataFrame with OHLCV data
+        
+        Raises:
+            Exception: If fetch fails after all retries
+        """
+        # yfinance の end は当日を含まないため1日後を指定する
+        end = (datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+        return self._download_history(ticker, interval=interval, start=start_date, end=end)
+    
+    def _plan_request(self, ticker: str, period: str, interval: str) -> Dict[str, str]:
+        """
+        永続キャッシュの状態から取得方法を決定します。
+        
+        Returns:
+            差分取得の場合は {'start': 'YYYY-MM-DD'}、全期間取得の場合は {'period': period}
+        """
+        if self.price_store is not None:
+            delta_start = self._incremental_start(ticker, interval, self._period_start(period))
+            if delta_start is not None:
+                return {'start': delta_start}
+        return {'period': period}
+    
+    def _store_and_slice(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        df: pd.DataFrame,
+        request: Dict[str, str]
+    ) -> pd.DataFrame:
+        """
+        取得したデータを永続キャッシュにマージし、要求期間分を切り出して返します。
+        
+        Raises:
+            ValueError: マージ後のデータが空の場合
+        """
+        period_start = self._period_start(period)
+        if 'start' in request:
+            covered_since = None
+        else:
+            covered_since = period_start.isoformat() if period_start is not None else "max"
+        
+        merged = self.price_store.merge(ticker, interval, df, covered_since=covered_since)
+        if merged is None or merged.empty:
+            raise ValueError(f"Empty data for {ticker}")
+        
+        if period_start is not None:
+            merged = merged[merged.index >= self._align_tz(period_start, merged.index)]
+        return merged
+    
+    @retry_with_backoff(max_retries=5, initial_delay=2, max_delay=120)
+    def _download_history(
+        self,
+        ticker: str,
+        interval: str = '1d',
+        period: Optional[str] = None,
+        start: Optional[str] = None,
+        allow_empty: bool = False,
+        end: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Download price history from the configured provider.
+        
+        Args:
+            ticker: Stock ticker symbol
+            interval: Data interval
+            period: Data period（start と排他）
+            start: 取得開始日（YYYY-MM-DD形式、差分取得時に使用）
+            allow_empty: True の場合、空データをエラーとして扱わない
+            end: 取得終了日（YYYY-MM-DD形式、当日は含まない）
+        
+        Returns:
+            DataFrame with lowercase OHLCV columns
+        
         Raises:
             Exception: If fetch fails after all retries
         """
         try:
-            logger.info(f"Fetching data for {ticker} (period={period}, interval={interval})...")
-            time.sleep(self.rate_limit_delay)
-            
-            # yfinanceがデフォルトでcurl_cffiセッションを使用
-            # セッションを指定しないことで、最新のAPIメカニズムに対応
-            stock = yf.Ticker(ticker)
-            df = stock.history(period=period, interval=interval)
+            logger.info(
+                f"Fetching data for {ticker} "
+                f"({'start=' + start if start else 'period=' + str(period)}, interval={interval})..."
+            )
+            df = self._throttled(
+                lambda: self.provider.history(ticker, interval=interval, period=period, start=start, end=end)
+            )
             
             if df.empty:
+                if allow_empty:
+                    logger.info(f"No new bars for {ticker}")
+                    return df
                 logger.warning(f"No data received for {ticker}")
+                if not self.provider.remote:
+                    # ローカルの取得元は再試行しても結果が変わらない
+                    raise DataUnavailableError(f"Empty data for {ticker}")
                 raise ValueError(f"Empty data for {ticker}")
             
             # Normalize column names to lowercase
@@ -119,50 +310,116 @@ class DataFetcher:
             logger.error(f"Failed to fetch data for {ticker}: {str(e)}")
             raise
     
+    def _period_start(self, period: str) -> Optional[datetime]:
+        """
+        period 指定から取得開始日時を算出します。
+        
+        Args:
+            period: Data period（'max' の場合は None）
+        
+        Returns:
+            JST の開始日時、または全期間の場合は None
+        """
+        now = datetime.now(self.jst)
+        if period == 'max':
+            return None
+        if period == 'ytd':
+            return now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        
+        return now - period_length(period)
+    
+    def _incremental_start(
+        self,
+        ticker: str,
+        interval: str,
+        period_start: Optional[datetime]
+    ) -> Optional[str]:
+        """
+        差分取得の開始日を決定します。
+        
+        保存済みデータが要求期間の先頭からカバーしている場合のみ、
+        最終保存バーの日付から取得を再開します（最終バーは未確定の可能性が
+        あるため再取得して上書きします）。
+        
+        Returns:
+            差分取得の開始日（YYYY-MM-DD形式）、全期間の再取得が必要な場合は None
+        """
+        meta = self.price_store.load_meta(ticker, interval)
+        covered_since = meta.get("covered_since")
+        if not covered_since:
+            return None
+        
+        if covered_since != "max":
+            if period_start is None:
+                return None
+            if datetime.fromisoformat(covered_since) > period_start:
+                return None
+        
+        last_ts = self.price_store.last_timestamp(ticker, interval)
+        if last_ts is None:
+            return None
+        return last_ts.strftime('%Y-%m-%d')
+    
+    @staticmethod
+    def _align_tz(ts: datetime, index: pd.DatetimeIndex) -> pd.Timestamp:
+        """インデックスのタイムゾーンに合わせて比較用のタイムスタンプを返します"""
+        ts = pd.Timestamp(ts)
+        if index.tz is None:
+            return ts.tz_localize(None)
+        return ts.tz_convert(index.tz)
+    
     def fetch_multiple_stocks(
         self,
         tickers: List[str],
         period: str = '1y',
-        interval: str = '1d'
+        interval: str = '1d',
+        batch_size: Optional[int] = None
     ) -> Dict[str, Optional[pd.DataFrame]]:
         """
         Fetch data for multiple stocks with rate limiting.
         
         複数のティッカーからデータを取得し、レート制限に対応しながら
-        リトライを実行します。ティッカー間には最小遅延を設定します。
+        リトライを実行します。
+        
+        batch_size が2以上の場合は、ティッカーをチャンクに分けて
+        プロバイダーの一括取得で取得し、チャンク内で取得に失敗した銘柄と結果に
+        含まれなかった銘柄のみ個別取得（リトライ付き）にフォールバックします。
+        batch_size が1以下の場合は1銘柄ずつ取得します。
+        いずれの場合もリクエストレートは共有トークンバケットで制御されます。
         
         Args:
             tickers: List of stock ticker symbols
             period: Data period
             interval: Data interval
+            batch_size: 一括取得のチャンクサイズ（省略時は環境変数 FETCH_BATCH_SIZE）
         
         Returns:
             Dictionary mapping ticker to DataFrame
         """
-        results = {}
-        successful_count = 0
-        failed_count = 0
+        if batch_size is None:
+            batch_size = FETCH_BATCH_SIZE
         
         logger.info(f"Starting batch fetch for {len(tickers)} stocks...")
         
-        for i, ticker in enumerate(tickers):
-            try:
-                logger.info(f"[{i+1}/{len(tickers)}] Fetching {ticker}...")
-                df = self.fetch_stock_data(ticker, period, interval)
-                results[ticker] = df
-                successful_count += 1
-                
-                # ティッカー間に遅延を挿入してレート制限を回避
-                if i < len(tickers) - 1:
-                    logger.debug(
-                        f"Waiting {self.min_delay_between_requests}s before next ticker..."
-                    )
-                    time.sleep(self.min_delay_between_requests)
-                    
-            except Exception as e:
-                logger.error(f"Failed to fetch {ticker} after all retries: {str(e)}")
-                results[ticker] = None
-                failed_count += 1
+        # インメモリキャッシュにある銘柄はリクエストしない
+        cached = {}
+        for ticker in dict.fromkeys(tickers):
+            df = self.frame_cache.get((ticker, period, interval))
+            if df is not None:
+                cached[ticker] = df
+        pending = [ticker for ticker in tickers if ticker not in cached]
+        
+        if not pending:
+            fetched = {}
+        elif batch_size > 1:
+            fetched = self._fetch_in_chunks(pending, period, interval, batch_size)
+        else:
+            fetched = self._fetch_one_by_one(pending, period, interval)
+        
+        results = {ticker: cached.get(ticker, fetched.get(ticker)) for ticker in tickers}
+        
+        successful_count = sum(1 for df in results.values() if df is not None)
+        failed_count = len(tickers) - successful_count
         
         # 完了統計をログ出力
         logger.info(
@@ -172,6 +429,134 @@ class DataFetcher:
         
         return results
     
+    def _fetch_one_by_one(
+        self,
+        tickers: List[str],
+        period: str,
+        interval: str
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """インメモリキャッシュにない銘柄をティッカーごとに個別リクエストで取得します"""
+        results = {}
+        
+        for i, ticker in enumerate(tickers):
+            try:
+                logger.info(f"[{i+1}/{len(tickers)}] Fetching {ticker}...")
+                # インメモリキャッシュは fetch_multiple_stocks で確認済みのため、再度参照しない
+                results[ticker] = self.frame_cache.load(
+                    (ticker, period, interval),
+                    lambda: self._fetch_uncached(ticker, period, interval)
+                )
+            except Exception as e:
+                logger.error(f"Failed to fetch {ticker} after all retries: {str(e)}")
+                results[ticker] = None
+        
+        return results
+    
+    def _fetch_in_chunks(
+        self,
+        tickers: List[str],
+        period: str,
+        interval: str,
+        batch_size: int
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        ティッカーをチャンクに分けて一括リクエストで取得します。
+        
+        永続キャッシュが有効な場合は、同じ取得方法（全期間 or 同一日付からの差分）
+        の銘柄ごとにグループ化してからチャンクに分割します。
+        """
+        results: Dict[str, Optional[pd.DataFrame]] = {}
+        
+        if self.provider.remote:
+            # チャンクのトークンはまとめて取得し、リクエストは連続で送られるため、
+            # チャンクサイズをバケット容量（YF_RATE_BURST）以下にして連続リクエスト数の上限を守る
+            batch_size = max(1, min(batch_size, int(self.rate_limiter.burst)))
+        
+        # 取得方法ごとにグループ化
+        groups: Dict[tuple, List[str]] = {}
+        for ticker in dict.fromkeys(tickers):
+            request = self._plan_request(ticker, period, interval)
+            groups.setdefault(tuple(sorted(request.items())), []).append(ticker)
+        
+        chunks = [
+            (dict(key), members[i:i + batch_size])
+            for key, members in groups.items()
+            for i in range(0, len(members), batch_size)
+        ]
+        
+        missing: List[str] = []
+        for n, (request, chunk) in enumerate(chunks):
+            logger.info(f"[chunk {n+1}/{len(chunks)}] Fetching {len(chunk)} tickers ({request})...")
+            try:
+                frames, errors = self._download_batch(chunk, interval=interval, **request)
+            except Exception as e:
+                # 失敗したチャンクでは「新しいバーがない」と区別できないため、全銘柄を個別取得する
+                logger.error(f"Chunk download failed, falling back to per-ticker fetch: {str(e)}")
+                missing.extend(chunk)
+                continue
+            if errors:
+                logger.warning(
+                    f"Chunk download failed for {len(errors)} tickers, falling back to per-ticker fetch: "
+                    f"{list(errors)}"
+                )
+            
+            for ticker in chunk:
+                if ticker in errors:
+                    # 取得に失敗した銘柄を「新しいバーがない」として保存済みデータで返さない
+                    missing.append(ticker)
+                    continue
+                df = frames.get(ticker)
+                if df is None and 'start' not in request:
+                    missing.append(ticker)
+                    continue
+                if df is None:
+                    # 差分取得で新しいバーがない銘柄は保存済みデータのみを返す
+                    df = pd.DataFrame()
+                try:
+                    if self.price_store is not None:
+                        df = self._store_and_slice(ticker, period, interval, df, request)
+                    self.frame_cache.put((ticker, period, interval), df)
+                    results[ticker] = df
+                except Exception as e:
+                    logger.error(f"Failed to store {ticker}: {str(e)}")
+                    missing.append(ticker)
+        
+        if missing:
+            logger.info(f"Falling back to per-ticker fetch for {len(missing)} tickers: {missing}")
+            results.update(self._fetch_one_by_one(missing, period, interval))
+        
+        return {ticker: results.get(ticker) for ticker in tickers}
+    
+    @retry_with_backoff(max_retries=3, initial_delay=2, max_delay=120)
+    def _download_batch(
+        self,
+        tickers: List[str],
+        interval: str = '1d',
+        period: Optional[str] = None,
+        start: Optional[str] = None
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Exception]]:
+        """
+        複数ティッカーをプロバイダーの一括取得で取得します。
+        
+        Args:
+            tickers: Stock ticker symbols
+            interval: Data interval
+            period: Data period（start と排他）
+            start: 取得開始日（YYYY-MM-DD形式）
+        
+        Returns:
+            (ティッカーから小文字列名の OHLCV DataFrame への辞書, 取得に失敗したティッカーから例外への辞書)
+            のタプル（データがなかった銘柄はどちらにも含まれない）
+        """
+        errors: Dict[str, Exception] = {}
+        # 一括取得は内部で銘柄ごとにリクエストするため、銘柄数分のトークンを消費する
+        frames = self._throttled(
+            lambda: self.provider.download(tickers, interval=interval, period=period, start=start, errors=errors),
+            tokens=len(tickers),
+            errors=errors
+        )
+        return frames, errors
+    
     def fetch_latest_price(self, ticker: str) -> Optional[float]:
         """
         Fetch the latest price for a stock.
@@ -207,11 +592,7 @@ class DataFetcher:
         """
         try:
             logger.info(f"Fetching info for {ticker}...")
-            time.sleep(self.rate_limit_delay)
-            
-            # yfinanceがデフォルトでcurl_cffiセッションを使用
-            stock = yf.Ticker(ticker)
-            info = stock.info
+            info = self._throttled(lambda: self.provider.info(ticker))
             
             if not info:
                 logger.warning(f"No info received for {ticker}")
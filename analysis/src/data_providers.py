@@ -0,0 +1,458 @@
+"""
+株価データプロバイダーモジュール
+
+DataFetcher が株価データを取得する取得元を差し替え可能にします。
+環境変数 DATA_PROVIDER で選択します。
+
+- yfinance: Yahoo Finance から取得します（デフォルト）
+- local: DATA_DIR 以下の CSV / Parquet ファイルから読み込みます
+  （事前に配置したデータでのネットワークなしの実行や、記録済みデータの再生に使用）
+- synthetic: 銘柄コードから決まる乱数シードで OHLCV データを生成します
+  （本番規模の負荷試験・ベンチマークに使用）
+
+どのプロバイダーも、列名を小文字にした OHLCV の DataFrame を返します。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import pytz
+import yfinance as yf
+
+from market_hours import now_jst
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+DATA_PROVIDER = os.getenv("DATA_PROVIDER", "yfinance")  # yfinance / local / synthetic
+DATA_DIR = os.getenv("DATA_DIR", "data/market")  # local プロバイダーの読み込み元
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", 0))  # synthetic プロバイダーの乱数シード
+
+JST = pytz.timezone("Asia/Tokyo")
+
+# yfinance の period 指定（例: '5d', '3mo', '1y'）を解析するパターン
+_PERIOD_PATTERN = re.compile(r"^(\d+)(d|wk|mo|y)$")
+
+
+class DataUnavailableError(LookupError):
+    """取得元にデータが存在しない（再試行しても取得できない）ことを示す例外"""
+
+
+def period_length(period: str) -> Optional[timedelta]:
+    """
+    period 指定（'5d', '3mo', '1y' など）の長さを返します。
+
+    Args:
+        period: Data period
+
+    Returns:
+        期間の長さ（'max' の場合は None）
+
+    Raises:
+        ValueError: 解析できない period の場合（'ytd' は呼び出し元で扱うこと）
+    """
+    if period == "max":
+        return None
+    match = _PERIOD_PATTERN.match(period)
+    if not match:
+        raise ValueError(f"Unsupported period: {period}")
+
+    amount, unit = int(match.group(1)), match.group(2)
+    days_per_unit = {"d": 1, "wk": 7, "mo": 30, "y": 365}
+    return timedelta(days=amount * days_per_unit[unit])
+
+
+def _window_start(period: Optional[str], end: pd.Timestamp) -> Optional[pd.Timestamp]:
+    """end を基準とした period の開始日時を返します（全期間の場合は None）"""
+    if not period or period == "max":
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    return end - period_length(period)
+
+
+class DataProvider(ABC):
+    """株価データプロバイダーの基底クラス（サブクラスは history を実装する）"""
+
+    # プロバイダー名（DATA_PROVIDER の値）
+    name = ""
+    # ネットワーク越しに取得するか（True の場合、DataFetcher がレート制限と再試行を適用する）
+    remote = False
+
+    @abstractmethod
+    def history(
+        self,
+        ticker: str,
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        1銘柄の株価データを取得します。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+            period: 期間（start と排他）
+            start: 開始日（YYYY-MM-DD形式、この日を含む）
+            end: 終了日（YYYY-MM-DD形式、この日を含まない）
+
+        Returns:
+            OHLCV データ（データがない場合は空の DataFrame）
+        """
+
+    def download(
+        self,
+        tickers: List[str],
+        interval: str = "1d",
+        period: Optional[str] = None,
+        start: Optional[str] = None,
+        errors: Optional[Dict[str, Exception]] = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        複数銘柄の株価データを取得します（デフォルトは1銘柄ずつ history を呼び出します）。
+
+        Args:
+            tickers: 銘柄コード
+            interval: データ間隔
+            period: 期間（start と排他）
+            start: 開始日（YYYY-MM-DD形式）
+            errors: 指定した場合、取得に失敗した銘柄の例外を格納し、残りの銘柄の取得を続ける
+                （省略時は最初の例外をそのまま送出する）
+
+        Returns:
+            銘柄コードから OHLCV データへの辞書（データがない銘柄・失敗した銘柄は含まない）
+        """
+        frames = {}
+        for ticker in tickers:
+            try:
+                df = self.history(ticker, interval=interval, period=period, start=start)
+            except DataUnavailableError:
+                continue
+            except Exception as e:
+                if errors is None:
+                    raise
+                errors[ticker] = e
+                continue
+            if not df.empty:
+                frames[ticker] = df
+        return frames
+
+    def info(self, ticker: str) -> Dict:
+        """
+        銘柄情報（会社名、業種など）を取得します。
+
+        Args:
+            ticker: 銘柄コード
+
+        Returns:
+            銘柄情報の辞書
+        """
+        return {"symbol": ticker}
+
+
+class YFinanceProvider(DataProvider):
+    """
+    Yahoo Finance（yfinance）から取得するプロバイダー
+
+    一括取得は yf.download を使わず、1銘柄ずつ yf.Ticker.history を呼び出します
+    （yf.download(threads=False) と同じリクエストですが、yf.download は銘柄ごとの例外を
+    ログに出力するだけで、429 などで失敗した銘柄とデータのない銘柄を区別できないため）。
+    """
+
+    name = "yfinance"
+    remote = True
+
+    def history(self, ticker, interval="1d", period=None, start=None, end=None):
+        # yfinanceがデフォルトでcurl_cffiセッションを使用
+        # セッションを指定しないことで、最新のAPIメカニズムに対応
+        stock = yf.Ticker(ticker)
+        if start:
+            df = stock.history(start=start, end=end, interval=interval)
+        else:
+            df = stock.history(period=period, interval=interval)
+        df.columns = df.columns.str.lower()
+        return df
+
+    def info(self, ticker):
+        return yf.Ticker(ticker).info
+
+
+class LocalFileProvider(DataProvider):
+    """
+    ローカルの CSV / Parquet ファイルから読み込むプロバイダー
+
+    <base_dir>/<interval>/<ticker>.{parquet,csv}、なければ <base_dir>/<ticker>.{parquet,csv}
+    を読み込みます（1列目または Date / Datetime 列を日時インデックスとして扱います）。
+    period はファイル内の最終バーを基準に切り出すため、過去に記録したデータも
+    記録時点と同じ範囲で再生できます。
+    銘柄情報は <base_dir>/info/<ticker>.json があれば読み込みます。
+    """
+
+    name = "local"
+
+    # 読み込んだファイルを保持する件数（同じファイルの再読み込みを避けるため）
+    _CACHE_FILES = 64
+
+    def __init__(self, base_dir: str = DATA_DIR):
+        """
+        Args:
+            base_dir: データファイルのディレクトリ
+        """
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}
+
+    def _find(self, ticker: str, interval: str) -> Optional[str]:
+        """銘柄・間隔に対応するファイルのパスを返します"""
+        for directory in (os.path.join(self.base_dir, interval), self.base_dir):
+            for ext in (".parquet", ".csv"):
+                path = os.path.join(directory, ticker + ext)
+                if os.path.exists(path):
+                    return path
+        return None
+
+    def _read(self, path: str) -> pd.DataFrame:
+        """ファイルを読み込みます（更新時刻が変わっていなければ前回の結果を返します）"""
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            cached = self._cache.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        if path.endswith(".parquet"):
+            # Parquet の読み込みには pyarrow などのエンジンが必要
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path)
+        if not isinstance(df.index, pd.DatetimeIndex):
+            date_column = next((c for c in df.columns if str(c).lower() in ("date", "datetime")), df.columns[0])
+            df = df.set_index(date_column)
+        try:
+            index = pd.DatetimeIndex(pd.to_datetime(df.index))
+        except (TypeError, ValueError):
+            # オフセットが混在する場合は UTC に揃えて解析する
+            index = pd.DatetimeIndex(pd.to_datetime(df.index, utc=True))
+        # タイムゾーンのない日時は日本時間とみなす
+        index = index.tz_localize(JST) if index.tz is None else index.tz_convert(JST)
+        df.index = index.rename("Date")
+        df.columns = [str(c).lower() for c in df.columns]
+        df = df.sort_index()
+
+        with self._lock:
+            if len(self._cache) >= self._CACHE_FILES:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[path] = (mtime, df)
+        return df
+
+    def history(self, ticker, interval="1d", period=None, start=None, end=None):
+        path = self._find(ticker, interval)
+        if path is None:
+            raise DataUnavailableError(f"No local data for {ticker} ({interval}) in {self.base_dir}")
+
+        df = self._read(path)
+        if df.empty:
+            return df.copy()
+        if start:
+            df = df[df.index >= pd.Timestamp(start, tz=JST)]
+            if end:
+                df = df[df.index < pd.Timestamp(end, tz=JST)]
+        else:
+            window_start = _window_start(period, df.index[-1])
+            if window_start is not None:
+                df = df[df.index > window_start]
+        return df.copy()
+
+    def info(self, ticker):
+        path = os.path.join(self.base_dir, "info", ticker + ".json")
+        if not os.path.exists(path):
+            return super().info(ticker)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def generate_ohlcv(
+    index: pd.DatetimeIndex,
+    seed: int = 0,
+    start_price: float = 1000.0,
+    drift: float = 0.0002,
+    volatility: float = 0.015,
+) -> pd.DataFrame:
+    """
+    幾何ランダムウォークによる OHLCV データを生成します。
+
+    列ごとに独立した乱数列を使うため、同じシードでインデックスを後ろに伸ばしても
+    既存のバーの値は変わりません。
+
+    Args:
+        index: 日時インデックス
+        seed: 乱数シード
+        start_price: 初期価格
+        drift: 1本あたりの対数リターンの平均
+        volatility: 1本あたりの対数リターンの標準偏差
+
+    Returns:
+        open, high, low, close, volume 列を持つ DataFrame
+    """
+    periods = len(index)
+    close_rng, open_rng, high_rng, low_rng, volume_rng = (
+        np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(5)
+    )
+    close = start_price * np.exp(np.cumsum(close_rng.normal(drift, volatility, periods)))
+    open_ = close * np.exp(open_rng.normal(0, volatility / 5, periods))
+    high = np.maximum(open_, close) * (1 + high_rng.uniform(0, 0.01, periods))
+    low = np.minimum(open_, close) * (1 - low_rng.uniform(0, 0.01, periods))
+    volume = volume_rng.integers(1_000, 1_000_000, periods).astype(float)
+
+    return pd.DataFrame(
+        {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+        index=index,
+    )
+
+
+class SyntheticProvider(DataProvider):
+    """
+    合成データを生成するプロバイダー
+
+    銘柄ごとの系列は (seed, 銘柄コード) から決まり、同じ銘柄は何度取得しても
+    同じ価格になります。日足以上の系列は固定の起点（EPOCH）から生成するため、
+    日付が変わっても過去のバーの価格は変わりません（end_date から最長 max_years 年分を
+    period / start で切り出します）。
+    分足は東証の取引時間内のバーのみを日ごとに生成し、各日の始まりは前営業日の日足の終値に揃えます。
+    end_date を省略した場合は、現在時刻より後のバーは含めません。
+    """
+
+    name = "synthetic"
+
+    # 日足以上の系列を生成する起点
+    EPOCH = pd.Timestamp("2000-01-03")
+
+    # 日足以上の間隔と pandas の頻度の対応
+    _FREQS = {"1d": "B", "5d": "5B", "1wk": "W-FRI", "1mo": "MS", "3mo": "QS"}
+
+    # 東証の取引時間（前場・後場）
+    _SESSIONS = [("09:00", "11:30"), ("12:30", "15:30")]
+
+    def __init__(
+        self,
+        seed: int = SYNTHETIC_SEED,
+        end_date: Optional[str] = None,
+        max_years: int = 10,
+        clock: Callable[[], datetime] = now_jst,
+    ):
+        """
+        Args:
+            seed: 乱数シード
+            end_date: 最終バーの日付（YYYY-MM-DD形式、省略時は当日の現在時刻まで）
+            max_years: 生成する最長の年数
+            clock: 現在時刻を返す関数
+        """
+        self.seed = seed
+        self.end_date = end_date
+        self.max_years = max_years
+        self.clock = clock
+
+    def _series(self, ticker: str, interval: str, end: pd.Timestamp) -> pd.DataFrame:
+        """日足以上の系列を起点から end まで生成します"""
+        index = pd.date_range(self.EPOCH, end, freq=self._FREQS[interval]).tz_localize(JST).as_unit("ns")
+        return generate_ohlcv(index, seed=zlib.crc32(f"{self.seed}:{ticker}:{interval}".encode()))
+
+    def _intraday(self, ticker: str, interval: str, end: pd.Timestamp) -> pd.DataFrame:
+        """分足を日ごとに生成します（直近60日分）"""
+        minutes = int(interval[:-1]) if interval.endswith("m") else int(interval[:-1]) * 60
+        daily = self._series(ticker, "1d", end)["close"]
+
+        # 分足は系列が長くなるため、直近60日分のみ生成する（yfinance の取得上限と同程度）
+        frames = []
+        for day in pd.bdate_range(end - pd.Timedelta(days=60), end):
+            bars = [
+                pd.date_range(f"{day.date()} {open_}", f"{day.date()} {close}", freq=f"{minutes}min", inclusive="left")
+                for open_, close in self._SESSIONS
+            ]
+            index = pd.DatetimeIndex(np.concatenate([b.to_numpy() for b in bars])).tz_localize(JST).as_unit("ns")
+            previous = daily.index.searchsorted(index[0].normalize())
+            start_price = daily.iloc[previous - 1] if previous > 0 else 1000.0
+            seed = zlib.crc32(f"{self.seed}:{ticker}:{interval}:{day.date()}".encode())
+            frames.append(generate_ohlcv(index, seed=seed, start_price=start_price))
+        return pd.concat(frames)
+
+    def history(self, ticker, interval="1d", period=None, start=None, end=None):
+        now = pd.Timestamp(self.clock()).tz_convert(JST)
+        last_day = pd.Timestamp(self.end_date) if self.end_date else now.tz_localize(None).normalize()
+
+        if interval in self._FREQS:
+            df = self._series(ticker, interval, last_day)
+            df = df[df.index >= (last_day - pd.DateOffset(years=self.max_years)).tz_localize(JST)]
+        else:
+            df = self._intraday(ticker, interval, last_day)
+            if not self.end_date:
+                df = df[df.index <= now]
+        df.index.name = "Date"
+
+        if start:
+            df = df[df.index >= pd.Timestamp(start, tz=JST)]
+            if end:
+                df = df[df.index < pd.Timestamp(end, tz=JST)]
+        elif not df.empty:
+            window_start = _window_start(period, df.index[-1])
+            if window_start is not None:
+                df = df[df.index > window_start]
+        return df
+
+    def info(self, ticker):
+        return {"symbol": ticker, "shortName": f"Synthetic {ticker}", "currency": "JPY"}
+
+
+_PROVIDERS = {
+    YFinanceProvider.name: YFinanceProvider,
+    LocalFileProvider.name: LocalFileProvider,
+    SyntheticProvider.name: SyntheticProvider,
+}
+
+_provider: Optional[DataProvider] = None
+_provider_lock = threading.Lock()
+
+
+def create_provider(name: str) -> DataProvider:
+    """
+    名前からプロバイダーを作成します。
+
+    Args:
+        name: プロバイダー名（yfinance / local / synthetic）
+
+    Returns:
+        環境変数の設定で初期化したプロバイダー
+
+    Raises:
+        ValueError: 未知のプロバイダー名の場合
+    """
+    cls = _PROVIDERS.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown data provider: {name} (expected one of {', '.join(_PROVIDERS)})")
+    return cls()
+
+
+def get_data_provider() -> DataProvider:
+    """
+    プロセス共有のプロバイダーを返します。
+
+    Returns:
+        環境変数 DATA_PROVIDER で選択したプロバイダー
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = create_provider(DATA_PROVIDER)
+            logger.info(f"Data provider: {_provider.name}")
+        return _provider
@@ -0,0 +1,261 @@
+"""
+取得済み株価データのインメモリキャッシュモジュール
+
+(ticker, period, interval) をキーに、取得した DataFrame をプロセス内で共有します。
+/analyze、/backtest、/sharpe-ratio などのエンドポイントが同じ銘柄のデータを
+個別に取得しないようにするためのものです。
+
+- LRU 方式で、メモリ使用量の上限を超えるとサイズを考慮して古いものから削除します
+- 有効期限は東証の取引時間に合わせます（取引中は短く、取引時間外は次の寄り付きまで）
+- 同じキーへの同時リクエストは SingleFlight で1回の取得にまとめます（キャッシュ無効時も同様）
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+from market_hours import is_session_open, next_session_open, now_jst
+from single_flight import SingleFlight
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+FRAME_CACHE_MAX_MB = float(os.getenv("FRAME_CACHE_MAX_MB", 256))  # 0 でキャッシュ無効
+FRAME_CACHE_SESSION_TTL = int(os.getenv("FRAME_CACHE_SESSION_TTL", 300))  # 取引時間中の有効期限（秒）
+FRAME_CACHE_SETTLE_MINUTES = int(os.getenv("FRAME_CACHE_SETTLE_MINUTES", 30))  # 引け後に確定値を待つ時間（分）
+
+
+def market_cache_expiry(now: datetime) -> datetime:
+    """
+    東証の取引時間に合わせたキャッシュの有効期限を返します。
+
+    取引時間中（および引け後の確定値反映を待つ間）はデータが更新されるため
+    FRAME_CACHE_SESSION_TTL 秒、それ以外は次のセッション開始まで有効とします。
+
+    Args:
+        now: キャッシュに格納する時刻
+
+    Returns:
+        有効期限
+    """
+    grace = timedelta(minutes=FRAME_CACHE_SETTLE_MINUTES)
+    if is_session_open(now, grace=grace):
+        return now + timedelta(seconds=FRAME_CACHE_SESSION_TTL)
+    return next_session_open(now)
+
+
+class FrameCache:
+    """スレッドセーフな DataFrame 用 LRU キャッシュ"""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        expiry: Callable[[datetime], datetime] = market_cache_expiry,
+        clock: Callable[[], datetime] = now_jst,
+    ):
+        """
+        キャッシュを初期化します。
+
+        Args:
+            max_bytes: メモリ使用量の上限（バイト、0 以下でキャッシュ無効）
+            expiry: 格納時刻から有効期限を求める関数
+            clock: 現在時刻を返す関数
+        """
+        self.max_bytes = max_bytes
+        self.expiry = expiry
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int, datetime]]" = OrderedDict()
+        self._flight = SingleFlight("frame_cache")
+        self._total_bytes = 0
+
+        # 統計
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @property
+    def enabled(self) -> bool:
+        """キャッシュが有効かどうか"""
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """
+        キャッシュからデータを取得します。
+
+        Args:
+            key: キャッシュキー
+
+        Returns:
+            データのコピー（存在しないか期限切れの場合は None）
+        """
+        with self._lock:
+            df = self._lookup(key)
+            if df is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return df.copy()
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        """
+        データをキャッシュに格納します。
+
+        Args:
+            key: キャッシュキー
+            df: 格納する DataFrame
+        """
+        if not self.enabled or df is None:
+            return
+
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            logger.debug(f"Frame too large to cache: {key} ({size} bytes)")
+            return
+
+        expires_at = self.expiry(self.clock())
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (df.copy(), size, expires_at)
+            self._total_bytes += size
+
+            # 上限を超えた分を古い順に削除
+            while self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        キャッシュにあれば返し、なければ loader で取得して格納します。
+
+        同じキーに対して取得中のリクエストがある場合は、その完了を待って結果を共有します。
+        loader が例外を送出した場合は、待機中の全ての呼び出し元に同じ例外が送出されます。
+        キャッシュが無効な場合も、同時リクエストの集約は行います。
+
+        Args:
+            key: キャッシュキー
+            loader: データを取得する関数
+
+        Returns:
+            データのコピー
+        """
+        with self._lock:
+            df = self._lookup(key)
+            if df is not None:
+                self._hits += 1
+                return df.copy()
+            self._misses += 1
+
+        return self.load(key, loader)
+
+    def load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """
+        loader で取得して格納します（get でミスした後に使用し、ヒット・ミスは数えません）。
+
+        同じキーに対して取得中のリクエストがある場合は、その完了を待って結果を共有します。
+
+        Args:
+            key: キャッシュキー
+            loader: データを取得する関数
+
+        Returns:
+            データのコピー
+        """
+        def load() -> pd.DataFrame:
+            # 直前に完了した取得の結果が格納されていればそれを使う
+            with self._lock:
+                cached = self._lookup(key)
+            if cached is not None:
+                return cached
+            df = loader()
+            self.put(key, df)
+            return df
+
+        df = self._flight.do(key, load)
+        return df.copy() if df is not None else None
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        キャッシュを削除します。
+
+        Args:
+            key: 削除するキー（省略時は全て削除）
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._total_bytes = 0
+            else:
+                self._remove(key)
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            ヒット数、ミス数、まとめられたリクエスト数、削除数、使用メモリ量を含む辞書
+        """
+        flight = self._flight.get_stats()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "coalesced": flight["suppressed"],
+                "coalesce_timeouts": flight["timeouts"],
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _lookup(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """有効なエントリを返し、LRU の順序を更新します（ロック取得済みで呼び出すこと）"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        df, _, expires_at = entry
+        if self.clock() >= expires_at:
+            self._remove(key)
+            self._expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return df
+
+    def _remove(self, key: Hashable) -> None:
+        """エントリを削除します（ロック取得済みで呼び出すこと）"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry[1]
+
+
+_cache: Optional[FrameCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_frame_cache() -> FrameCache:
+    """
+    プロセス共有のフレームキャッシュを返します。
+
+    Returns:
+        環境変数 FRAME_CACHE_MAX_MB で上限を設定した FrameCache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FrameCache(max_bytes=int(FRAME_CACHE_MAX_MB * 1024 * 1024))
+            logger.info(f"Frame cache initialized (max {FRAME_CACHE_MAX_MB}MB)")
+        return _cache
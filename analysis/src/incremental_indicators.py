@@ -0,0 +1,693 @@
+"""
+逐次更新型テクニカル指標モジュール
+
+indicators.py の各指標を、1本の新しいバーごとに O(1) で更新できる
+状態付きクラスとして実装します。全系列を pandas で再計算する代わりに、
+前回までの状態に最新バーを追加するだけで最新値が得られます。
+
+- 各クラスの値は TechnicalIndicators の全系列モードの末尾と一致します
+- 状態は to_state() で JSON にシリアライズ可能な辞書として取り出し、
+  restore_indicator() / from_state() で復元できます
+  （PriceStore.save_indicator_state で株価データの横に保存する想定です）
+- 未確定バーの上書きには対応しません。確定したバーのみを順に渡してください
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+import pandas as pd
+
+NAN = float("nan")
+
+
+def _encode(value: float) -> Optional[float]:
+    """NaN を None に変換します（JSON 互換にするため）"""
+    return None if value is None or math.isnan(value) else float(value)
+
+
+def _decode(value: Optional[float]) -> float:
+    """None を NaN に変換します"""
+    return NAN if value is None else float(value)
+
+
+class _RollingWindow:
+    """
+    固定長ウィンドウの平均・標準偏差を O(1) で更新する補助クラス
+
+    桁落ちを抑えるため、合計は基準値 shift からの差分で保持し、
+    ウィンドウ長ごとに合計を再計算して誤差の蓄積を防ぎます（償却 O(1)）。
+    NaN を含むウィンドウの平均は、pandas の rolling と同様に NaN になります。
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values: deque = deque(maxlen=period)
+        self._resync()
+
+    def push(self, value: float) -> None:
+        """値を追加し、ウィンドウから外れた値を取り除きます"""
+        if len(self.values) == self.period:
+            self._remove(self.values[0])
+        self.values.append(value)
+        if math.isnan(value):
+            self._nan_count += 1
+        else:
+            self._zero_count += value == 0
+            diff = value - self._shift
+            self._sum += diff
+            self._sumsq += diff * diff
+
+        self._pushes += 1
+        if self._pushes >= self.period:
+            self._resync()
+
+    def mean(self) -> float:
+        """ウィンドウの平均（ウィンドウが満たない場合は NaN）"""
+        if len(self.values) < self.period or self._nan_count:
+            return NAN
+        if self._zero_count == self.period:
+            # 全て 0 の場合は丸め誤差を残さず 0 を返す（RSI の損失 0 判定のため）
+            return 0.0
+        return self._shift + self._sum / self.period
+
+    def std(self) -> float:
+        """ウィンドウの標本標準偏差（ddof=1、ウィンドウが満たない場合は NaN）"""
+        n = self.period
+        if len(self.values) < n or self._nan_count or n < 2:
+            return NAN
+        variance = (self._sumsq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    def dump(self) -> List[Optional[float]]:
+        """ウィンドウ内の値を JSON 互換のリストで返します"""
+        return [_encode(v) for v in self.values]
+
+    def load(self, values: Iterable[Optional[float]]) -> None:
+        """dump() の結果からウィンドウを復元します"""
+        self.values = deque((_decode(v) for v in values), maxlen=self.period)
+        self._resync()
+
+    def _remove(self, value: float) -> None:
+        if math.isnan(value):
+            self._nan_count -= 1
+        else:
+            self._zero_count -= value == 0
+            diff = value - self._shift
+            self._sum -= diff
+            self._sumsq -= diff * diff
+
+    def _resync(self) -> None:
+        """ウィンドウ内の値から合計を再計算します"""
+        finite = [v for v in self.values if not math.isnan(v)]
+        self._shift = math.fsum(finite) / len(finite) if finite else 0.0
+        self._sum = math.fsum(v - self._shift for v in finite)
+        self._sumsq = math.fsum((v - self._shift) ** 2 for v in finite)
+        self._nan_count = len(self.values) - len(finite)
+        self._zero_count = sum(1 for v in finite if v == 0)
+        self._pushes = 0
+
+
+class IncrementalIndicator(ABC):
+    """逐次更新型指標の基底クラス（サブクラスは _dump / _load で内部状態を入出力する）"""
+
+    def __init__(self, **params: Any):
+        self.params = params
+
+    def to_state(self) -> Dict:
+        """
+        状態を JSON にシリアライズ可能な辞書として返します。
+
+        Returns:
+            指標の種類、パラメーター、内部状態を含む辞書
+        """
+        return {"type": type(self).__name__, "params": dict(self.params), "data": self._dump()}
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "IncrementalIndicator":
+        """
+        to_state() の結果から指標を復元します。
+
+        Args:
+            state: to_state() で取得した辞書
+
+        Returns:
+            復元した指標
+        """
+        if state.get("type") != cls.__name__:
+            raise ValueError(f"State is for {state.get('type')}, not {cls.__name__}")
+        indicator = cls(**state["params"])
+        indicator._load(state["data"])
+        return indicator
+
+    @abstractmethod
+    def _dump(self) -> Dict:
+        """内部状態を JSON にシリアライズ可能な辞書として返します"""
+
+    @abstractmethod
+    def _load(self, data: Dict) -> None:
+        """_dump() の結果から内部状態を復元します"""
+
+
+class IncrementalMA(IncrementalIndicator):
+    """移動平均線（calculate_ma と同じ値）"""
+
+    def __init__(self, period: int):
+        super().__init__(period=period)
+        self._window = _RollingWindow(period)
+
+    @property
+    def value(self) -> float:
+        return self._window.mean()
+
+    def update(self, price: float) -> float:
+        """
+        新しいバーを追加します。
+
+        Args:
+            price: 終値
+
+        Returns:
+            移動平均線の最新値（期間に満たない場合は NaN）
+        """
+        self._window.push(float(price))
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {"window": self._window.dump()}
+
+    def _load(self, data: Dict) -> None:
+        self._window.load(data["window"])
+
+
+class IncrementalEMA(IncrementalIndicator):
+    """指数移動平均（calculate_ema と同じ値）"""
+
+    def __init__(self, period: int):
+        super().__init__(period=period)
+        self._alpha = 2.0 / (period + 1)
+        self.value = NAN
+
+    def update(self, price: float) -> float:
+        """
+        新しいバーを追加します。
+
+        Args:
+            price: 終値
+
+        Returns:
+            指数移動平均の最新値
+        """
+        price = float(price)
+        if math.isnan(self.value):
+            self.value = price
+        elif not math.isnan(price):
+            self.value += self._alpha * (price - self.value)
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {"value": _encode(self.value)}
+
+    def _load(self, data: Dict) -> None:
+        self.value = _decode(data["value"])
+
+
+class IncrementalRSI(IncrementalIndicator):
+    """RSI（calculate_rsi と同じ単純平均方式）"""
+
+    def __init__(self, period: int = 14):
+        super().__init__(period=period)
+        self._prev_close = NAN
+        self._gains = _RollingWindow(period)
+        self._losses = _RollingWindow(period)
+
+    @property
+    def value(self) -> float:
+        avg_gain, avg_loss = self._gains.mean(), self._losses.mean()
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return NAN
+        if avg_loss == 0:
+            # pandas と同様に、損失がなければ 100、値動きがなければ NaN
+            return 100.0 if avg_gain > 0 else NAN
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def update(self, price: float) -> float:
+        """
+        新しいバーを追加します。
+
+        Args:
+            price: 終値
+
+        Returns:
+            RSI の最新値（0-100、期間に満たない場合は NaN）
+        """
+        price = float(price)
+        # 初日は前日比がないため、上昇分・下降分ともに 0 として扱う（全系列モードと同じ）
+        delta = price - self._prev_close if not math.isnan(self._prev_close) else 0.0
+        self._gains.push(delta if delta > 0 else 0.0)
+        self._losses.push(-delta if delta < 0 else 0.0)
+        self._prev_close = price
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {
+            "prev_close": _encode(self._prev_close),
+            "gains": self._gains.dump(),
+            "losses": self._losses.dump(),
+        }
+
+    def _load(self, data: Dict) -> None:
+        self._prev_close = _decode(data["prev_close"])
+        self._gains.load(data["gains"])
+        self._losses.load(data["losses"])
+
+
+class IncrementalMACD(IncrementalIndicator):
+    """MACD（calculate_macd と同じ値）"""
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__(fast=fast, slow=slow, signal=signal)
+        self._fast = IncrementalEMA(fast)
+        self._slow = IncrementalEMA(slow)
+        self._signal = IncrementalEMA(signal)
+
+    @property
+    def value(self) -> Dict[str, float]:
+        macd = self._fast.value - self._slow.value
+        return {"macd": macd, "signal": self._signal.value, "histogram": macd - self._signal.value}
+
+    def update(self, price: float) -> Dict[str, float]:
+        """
+        新しいバーを追加します。
+
+        Args:
+            price: 終値
+
+        Returns:
+            MACD、シグナル、ヒストグラムの最新値を含む辞書
+        """
+        macd = self._fast.update(price) - self._slow.update(price)
+        self._signal.update(macd)
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {
+            "fast": _encode(self._fast.value),
+            "slow": _encode(self._slow.value),
+            "signal": _encode(self._signal.value),
+        }
+
+    def _load(self, data: Dict) -> None:
+        self._fast.value = _decode(data["fast"])
+        self._slow.value = _decode(data["slow"])
+        self._signal.value = _decode(data["signal"])
+
+
+class IncrementalBollingerBands(IncrementalIndicator):
+    """ボリンジャーバンド（calculate_bollinger_bands と同じ値、移動合計で計算）"""
+
+    def __init__(self, period: int = 20, std_dev: float = 2.0):
+        super().__init__(period=period, std_dev=std_dev)
+        self._window = _RollingWindow(period)
+
+    @property
+    def value(self) -> Dict[str, float]:
+        middle = self._window.mean()
+        width = self._window.std() * self.params["std_dev"]
+        return {"upper": middle + width, "middle": middle, "lower": middle - width}
+
+    def update(self, price: float) -> Dict[str, float]:
+        """
+        新しいバーを追加します。
+
+        Args:
+            price: 終値
+
+        Returns:
+            上部バンド、中部バンド、下部バンドの最新値を含む辞書
+        """
+        self._window.push(float(price))
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {"window": self._window.dump()}
+
+    def _load(self, data: Dict) -> None:
+        self._window.load(data["window"])
+
+
+class IncrementalATR(IncrementalIndicator):
+    """ATR（calculate_atr と同じ値）"""
+
+    def __init__(self, period: int = 14):
+        super().__init__(period=period)
+        self._prev_close = NAN
+        self._window = _RollingWindow(period)
+
+    @property
+    def value(self) -> float:
+        return self._window.mean()
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        新しいバーを追加します。
+
+        Args:
+            high: 高値
+            low: 安値
+            close: 終値
+
+        Returns:
+            ATR の最新値（期間に満たない場合は NaN）
+        """
+        high, low, close = float(high), float(low), float(close)
+        true_range = high - low
+        if not math.isnan(self._prev_close):
+            # fmax と同様に、前日終値がない初日は高値-安値のみを使う
+            true_range = max(true_range, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._window.push(true_range)
+        self._prev_close = close
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {"prev_close": _encode(self._prev_close), "window": self._window.dump()}
+
+    def _load(self, data: Dict) -> None:
+        self._prev_close = _decode(data["prev_close"])
+        self._window.load(data["window"])
+
+
+class IncrementalStochastic(IncrementalIndicator):
+    """
+    ストキャスティクス（calculate_stochastic と同じ値）
+
+    期間内の最高値・最安値は単調デックで保持し、償却 O(1) で更新します。
+    """
+
+    # %D の平滑化期間（calculate_stochastic と同じ）
+    D_PERIOD = 3
+
+    def __init__(self, period: int = 14):
+        super().__init__(period=period)
+        self._count = 0
+        # (バー番号, 値) を値の降順・昇順に保持するデック
+        self._highs: deque = deque()
+        self._lows: deque = deque()
+        self._k = NAN
+        self._k_window = _RollingWindow(self.D_PERIOD)
+
+    @property
+    def value(self) -> Dict[str, float]:
+        return {"k_percent": self._k, "d_percent": self._k_window.mean()}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """
+        新しいバーを追加します。
+
+        Args:
+            high: 高値
+            low: 安値
+            close: 終値
+
+        Returns:
+            %K、%D の最新値を含む辞書
+        """
+        high, low, close = float(high), float(low), float(close)
+        index = self._count
+        self._count += 1
+
+        while self._highs and self._highs[-1][1] <= high:
+            self._highs.pop()
+        self._highs.append((index, high))
+        while self._lows and self._lows[-1][1] >= low:
+            self._lows.pop()
+        self._lows.append((index, low))
+
+        oldest = index - self.params["period"] + 1
+        while self._highs[0][0] < oldest:
+            self._highs.popleft()
+        while self._lows[0][0] < oldest:
+            self._lows.popleft()
+
+        if oldest < 0:
+            self._k = NAN
+        else:
+            highest, lowest = self._highs[0][1], self._lows[0][1]
+            numerator, denominator = close - lowest, highest - lowest
+            if denominator != 0:
+                self._k = numerator / denominator * 100
+            else:
+                # pandas の 0 除算と同じ結果にする
+                self._k = NAN if numerator == 0 else math.copysign(math.inf, numerator)
+        self._k_window.push(self._k)
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {
+            "count": self._count,
+            "highs": [list(item) for item in self._highs],
+            "lows": [list(item) for item in self._lows],
+            "k": _encode(self._k),
+            "k_window": self._k_window.dump(),
+        }
+
+    def _load(self, data: Dict) -> None:
+        self._count = data["count"]
+        self._highs = deque(tuple(item) for item in data["highs"])
+        self._lows = deque(tuple(item) for item in data["lows"])
+        self._k = _decode(data["k"])
+        self._k_window.load(data["k_window"])
+
+
+class IncrementalOBV(IncrementalIndicator):
+    """OBV（calculate_obv と同じ値）"""
+
+    def __init__(self):
+        super().__init__()
+        self._prev_close = NAN
+        self.value = 0.0
+
+    def update(self, close: float, volume: float) -> float:
+        """
+        新しいバーを追加します。
+
+        Args:
+            close: 終値
+            volume: 出来高
+
+        Returns:
+            OBV の最新値
+        """
+        close = float(close)
+        if not math.isnan(self._prev_close) and close != self._prev_close:
+            self.value += float(volume) if close > self._prev_close else -float(volume)
+        self._prev_close = close
+        return self.value
+
+    def _dump(self) -> Dict:
+        return {"prev_close": _encode(self._prev_close), "value": self.value}
+
+    def _load(self, data: Dict) -> None:
+        self._prev_close = _decode(data["prev_close"])
+        self.value = float(data["value"])
+
+
+_INDICATOR_TYPES: Dict[str, Type[IncrementalIndicator]] = {
+    cls.__name__: cls
+    for cls in (
+        IncrementalMA,
+        IncrementalEMA,
+        IncrementalRSI,
+        IncrementalMACD,
+        IncrementalBollingerBands,
+        IncrementalATR,
+        IncrementalStochastic,
+        IncrementalOBV,
+    )
+}
+
+
+def restore_indicator(state: Dict) -> IncrementalIndicator:
+    """
+    to_state() の結果から、種類に応じた指標を復元します。
+
+    Args:
+        state: to_state() で取得した辞書
+
+    Returns:
+        復元した指標
+    """
+    cls = _INDICATOR_TYPES.get(state.get("type"))
+    if cls is None:
+        raise ValueError(f"Unknown indicator type: {state.get('type')}")
+    return cls.from_state(state)
+
+
+class IndicatorSet:
+    """
+    1銘柄分の逐次更新型指標のセット
+
+    TechnicalAnalyzer._calculate_indicators と同じキーの最新値に加えて、
+    ストキャスティクスと OBV の最新値を保持します。
+    最後に取り込んだバーのタイムスタンプを記録し、update_frame では
+    それより新しいバーのみを取り込みます。
+    """
+
+    def __init__(
+        self,
+        ma_periods: Iterable[int] = (5, 20, 50),
+        rsi_period: int = 14,
+        macd_fast: int = 12,
+        macd_slow: int = 26,
+        macd_signal: int = 9,
+    ):
+        """
+        指標のセットを初期化します。
+
+        Args:
+            ma_periods: 移動平均線の期間
+            rsi_period: RSI の期間
+            macd_fast: MACD の短期 EMA 期間
+            macd_slow: MACD の長期 EMA 期間
+            macd_signal: MACD のシグナルライン期間
+        """
+        self.last_timestamp: Optional[pd.Timestamp] = None
+        self.ma = {period: IncrementalMA(period) for period in ma_periods}
+        self.rsi = IncrementalRSI(rsi_period)
+        self.macd = IncrementalMACD(macd_fast, macd_slow, macd_signal)
+        self.bollinger = IncrementalBollingerBands()
+        self.atr = IncrementalATR()
+        self.stochastic = IncrementalStochastic()
+        self.obv = IncrementalOBV()
+
+    def update(
+        self,
+        high: float,
+        low: float,
+        close: float,
+        volume: float = 0.0,
+        timestamp: Optional[pd.Timestamp] = None,
+    ) -> Dict[str, Optional[float]]:
+        """
+        新しいバーを全指標に追加します。
+
+        Args:
+            high: 高値
+            low: 安値
+            close: 終値
+            volume: 出来高
+            timestamp: バーのタイムスタンプ（update_frame での重複排除に使用）
+
+        Returns:
+            各指標の最新値の辞書（値がない指標は None）
+        """
+        for indicator in self.ma.values():
+            indicator.update(close)
+        self.rsi.update(close)
+        self.macd.update(close)
+        self.bollinger.update(close)
+        self.atr.update(high, low, close)
+        self.stochastic.update(high, low, close)
+        self.obv.update(close, volume)
+        if timestamp is not None:
+            self.last_timestamp = pd.Timestamp(timestamp)
+        return self.values()
+
+    def update_frame(self, df: pd.DataFrame) -> Dict[str, Optional[float]]:
+        """
+        DataFrame のうち、前回取り込んだバーより新しいバーを順に追加します。
+
+        Args:
+            df: OHLCV データ（列名は大文字・小文字どちらでも可）
+
+        Returns:
+            各指標の最新値の辞書
+        """
+        if self.last_timestamp is not None and len(df):
+            last = self.last_timestamp
+            if df.index.tz is not None and last.tz is None:
+                last = last.tz_localize(df.index.tz)
+            elif df.index.tz is None and last.tz is not None:
+                last = last.tz_localize(None)
+            df = df[df.index > last]
+
+        columns = {c.lower(): c for c in df.columns}
+        high = df[columns["high"]].to_numpy(dtype=float)
+        low = df[columns["low"]].to_numpy(dtype=float)
+        close = df[columns["close"]].to_numpy(dtype=float)
+        volume = df[columns["volume"]].to_numpy(dtype=float) if "volume" in columns else [0.0] * len(df)
+
+        for i in range(len(df)):
+            self.update(high[i], low[i], close[i], volume[i])
+        if len(df):
+            self.last_timestamp = df.index[-1]
+        return self.values()
+
+    def values(self) -> Dict[str, Optional[float]]:
+        """
+        各指標の最新値を返します。
+
+        Returns:
+            ma_<期間>、rsi、macd、macd_signal、macd_histogram、bb_upper、bb_middle、
+            bb_lower、atr、stoch_k、stoch_d、obv をキーとする辞書
+        """
+        values = {f"ma_{period}": _encode(indicator.value) for period, indicator in self.ma.items()}
+        macd = self.macd.value
+        bollinger = self.bollinger.value
+        stochastic = self.stochastic.value
+        values.update({
+            "rsi": _encode(self.rsi.value),
+            "macd": _encode(macd["macd"]),
+            "macd_signal": _encode(macd["signal"]),
+            "macd_histogram": _encode(macd["histogram"]),
+            "bb_upper": _encode(bollinger["upper"]),
+            "bb_middle": _encode(bollinger["middle"]),
+            "bb_lower": _encode(bollinger["lower"]),
+            "atr": _encode(self.atr.value),
+            "stoch_k": _encode(stochastic["k_percent"]),
+            "stoch_d": _encode(stochastic["d_percent"]),
+            "obv": _encode(self.obv.value),
+        })
+        return values
+
+    def to_state(self) -> Dict:
+        """
+        全指標の状態を JSON にシリアライズ可能な辞書として返します。
+
+        Returns:
+            最終タイムスタンプと各指標の状態を含む辞書
+        """
+        return {
+            "last_timestamp": self.last_timestamp.isoformat() if self.last_timestamp is not None else None,
+            "ma": [indicator.to_state() for indicator in self.ma.values()],
+            "rsi": self.rsi.to_state(),
+            "macd": self.macd.to_state(),
+            "bollinger": self.bollinger.to_state(),
+            "atr": self.atr.to_state(),
+            "stochastic": self.stochastic.to_state(),
+            "obv": self.obv.to_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "IndicatorSet":
+        """
+        to_state() の結果から指標のセットを復元します。
+
+        Args:
+            state: to_state() で取得した辞書
+
+        Returns:
+            復元した指標のセット
+        """
+        indicator_set = cls(ma_periods=())
+        last_timestamp = state.get("last_timestamp")
+        indicator_set.last_timestamp = pd.Timestamp(last_timestamp) if last_timestamp else None
+        indicator_set.ma = {s["params"]["period"]: IncrementalMA.from_state(s) for s in state["ma"]}
+        indicator_set.rsi = IncrementalRSI.from_state(state["rsi"])
+        indicator_set.macd = IncrementalMACD.from_state(state["macd"])
+        indicator_set.bollinger = IncrementalBollingerBands.from_state(state["bollinger"])
+        indicator_set.atr = IncrementalATR.from_state(state["atr"])
+        indicator_set.stochastic = IncrementalStochastic.from_state(state["stochastic"])
+        indicator_set.obv = IncrementalOBV.from_state(state["obv"])
+        return indicator_set
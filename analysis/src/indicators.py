@@ -2,55 +2,83 @@
 テクニカル指標計算モジュール
 
 移動平均線（MA）、RSI、MACDなどのテクニカル指標を計算します。
+
+各メソッドは tail を指定すると、末尾 tail 本の値のみを計算に必要な
+最小限の末尾データから求めます（全系列モードと同じ値を返します）。
+多数の銘柄の最新値だけを評価する場合に使用します。
 """
 
 import numpy as np
 import pandas as pd
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+
+
+def _trailing(series: pd.Series, length: int) -> pd.Series:
+    """末尾 length 本のデータを返します（足りない場合は全体を返します）"""
+    return series.iloc[-length:] if length < len(series) else series
+
+
+def _tail(series: pd.Series, tail: Optional[int]) -> pd.Series:
+    """tail が指定されている場合は末尾 tail 本を返します"""
+    return series.iloc[-tail:] if tail else series
+
 
 class TechnicalIndicators:
     """テクニカル指標計算クラス"""
 
     @staticmethod
-    def calculate_ma(prices: pd.Series, period: int) -> pd.Series:
+    def calculate_ma(prices: pd.Series, period: int, tail: Optional[int] = None) -> pd.Series:
         """
         移動平均線（Moving Average）を計算します。
 
         Args:
             prices: 終値のSeries
             period: 計算期間（日数）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             移動平均線の値
         """
-        return prices.rolling(window=period).mean()
+        if tail:
+            prices = _trailing(prices, period + tail - 1)
+        return _tail(prices.rolling(window=period).mean(), tail)
 
     @staticmethod
-    def calculate_ema(prices: pd.Series, period: int) -> pd.Series:
+    def calculate_ema(prices: pd.Series, period: int, tail: Optional[int] = None) -> pd.Series:
         """
         指数移動平均（Exponential Moving Average）を計算します。
 
+        EMA は全履歴に依存するため、tail 指定時も全系列から計算し末尾のみを返します。
+
         Args:
             prices: 終値のSeries
             period: 計算期間（日数）
+            tail: 末尾の何本を返すか（省略時は全系列）
 
         Returns:
             指数移動平均の値
         """
-        return prices.ewm(span=period, adjust=False).mean()
+        return _tail(prices.ewm(span=period, adjust=False).mean(), tail)
 
     @staticmethod
-    def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+    def calculate_rsi(
+        prices: pd.Series, period: int = 14, tail: Optional[int] = None
+    ) -> pd.Series:
         """
         相対力指数（RSI: Relative Strength Index）を計算します。
 
         Args:
             prices: 終値のSeries
             period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             RSI値（0-100）
         """
+        if tail:
+            # 前日比の計算に1本余分に必要
+            prices = _trailing(prices, period + tail)
+
         # 前日比の計算
         delta = prices.diff()
 
@@ -68,20 +96,27 @@ class TechnicalIndicators:
         # RSIを計算
         rsi = 100 - (100 / (1 + rs))
 
-        return rsi
+        return _tail(rsi, tail)
 
     @staticmethod
     def calculate_macd(
-        prices: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9
+        prices: pd.Series,
+        fast: int = 12,
+        slow: int = 26,
+        signal: int = 9,
+        tail: Optional[int] = None,
     ) -> Dict[str, pd.Series]:
         """
         MACD（Moving Average Convergence Divergence）を計算します。
 
+        EMA ベースのため、tail 指定時も全系列から計算し末尾のみを返します。
+
         Args:
             prices: 終値のSeries
             fast: 短期EMA期間（デフォルト: 12）
             slow: 長期EMA期間（デフォルト: 26）
             signal: シグナルライン期間（デフォルト: 9）
+            tail: 末尾の何本を返すか（省略時は全系列）
 
         Returns:
             MACD、シグナル、ヒストグラムを含む辞書
@@ -100,14 +135,17 @@ class TechnicalIndicators:
         histogram = macd - signal_line
 
         return {
-            "macd": macd,
-            "signal": signal_line,
-            "histogram": histogram,
+            "macd": _tail(macd, tail),
+            "signal": _tail(signal_line, tail),
+            "histogram": _tail(histogram, tail),
         }
 
     @staticmethod
     def calculate_bollinger_bands(
-        prices: pd.Series, period: int = 20, std_dev: float = 2.0
+        prices: pd.Series,
+        period: int = 20,
+        std_dev: float = 2.0,
+        tail: Optional[int] = None,
     ) -> Dict[str, pd.Series]:
         """
         ボリンジャーバンドを計算します。
@@ -116,10 +154,14 @@ class TechnicalIndicators:
             prices: 終値のSeries
             period: 計算期間（デフォルト: 20日）
             std_dev: 標準偏差の倍数（デフォルト: 2.0）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             上部バンド、中部バンド、下部バンドを含む辞書
         """
+        if tail:
+            prices = _trailing(prices, period + tail - 1)
+
         # 移動平均を計算
         sma = TechnicalIndicators.calculate_ma(prices, period)
 
@@ -131,14 +173,18 @@ class TechnicalIndicators:
         lower_band = sma - (std * std_dev)
 
         return {
-            "upper": upper_band,
-            "middle": sma,
-            "lower": lower_band,
+            "upper": _tail(upper_band, tail),
+            "middle": _tail(sma, tail),
+            "lower": _tail(lower_band, tail),
         }
 
     @staticmethod
     def calculate_atr(
-        high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14
+        high: pd.Series,
+        low: pd.Series,
+        close: pd.Series,
+        period: int = 14,
+        tail: Optional[int] = None,
     ) -> pd.Series:
         """
         平均真実変動幅（ATR: Average True Range）を計算します。
@@ -148,25 +194,37 @@ class TechnicalIndicators:
             low: 安値のSeries
             close: 終値のSeries
             period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             ATR値
         """
+        if tail:
+            # 前日終値の参照に1本余分に必要
+            length = period + tail
+            high, low, close = _trailing(high, length), _trailing(low, length), _trailing(close, length)
+
         # 真実変動幅を計算
+        prev_close = close.shift()
         tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
+        tr2 = (high - prev_close).abs()
+        tr3 = (low - prev_close).abs()
 
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        # 一時的な DataFrame を作らず要素ごとの最大値を取る（fmax は NaN を無視する）
+        tr = np.fmax(np.fmax(tr1, tr2), tr3)
 
         # ATRを計算
         atr = tr.rolling(window=period).mean()
 
-        return atr
+        return _tail(atr, tail)
 
     @staticmethod
     def calculate_stochastic(
-        high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14
+        high: pd.Series,
+        low: pd.Series,
+        close: pd.Series,
+        period: int = 14,
+        tail: Optional[int] = None,
     ) -> Dict[str, pd.Series]:
         """
         ストキャスティクスを計算します。
@@ -176,10 +234,16 @@ class TechnicalIndicators:
             low: 安値のSeries
             close: 終値のSeries
             period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             %K、%Dを含む辞書
         """
+        if tail:
+            # %D は %K の3本平均のため、%K を2本余分に計算する
+            length = period + tail + 1
+            high, low, close = _trailing(high, length), _trailing(low, length), _trailing(close, length)
+
         # 最高値・最安値を計算
         lowest_low = low.rolling(window=period).min()
         highest_high = high.rolling(window=period).max()
@@ -191,44 +255,48 @@ class TechnicalIndicators:
         d_percent = k_percent.rolling(window=3).mean()
 
         return {
-            "k_percent": k_percent,
-            "d_percent": d_percent,
+            "k_percent": _tail(k_percent, tail),
+            "d_percent": _tail(d_percent, tail),
         }
 
     @staticmethod
-    def calculate_volume_ma(volume: pd.Series, period: int = 20) -> pd.Series:
+    def calculate_volume_ma(
+        volume: pd.Series, period: int = 20, tail: Optional[int] = None
+    ) -> pd.Series:
         """
         出来高の移動平均を計算します。
 
         Args:
             volume: 出来高のSeries
             period: 計算期間（デフォルト: 20日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
 
         Returns:
             出来高の移動平均
         """
-        return volume.rolling(window=period).mean()
+        return TechnicalIndicators.calculate_ma(volume, period, tail=tail)
 
     @staticmethod
-    def calculate_obv(close: pd.Series, volume: pd.Series) -> pd.Series:
+    def calculate_obv(
+        close: pd.Series, volume: pd.Series, tail: Optional[int] = None
+    ) -> pd.Series:
         """
         オンバランスボリューム（OBV）を計算します。
 
+        OBV は累積値のため、tail 指定時も全系列から計算し末尾のみを返します。
+
         Args:
             close: 終値のSeries
             volume: 出来高のSeries
+            tail: 末尾の何本を返すか（省略時は全系列）
 
         Returns:
             OBV値
         """
-        obv = np.zeros(len(close))
-
-        for i in range(1, len(close)):
-            if close.iloc[i] > close.iloc[i - 1]:
-                obv[i] = obv[i - 1] + volume.iloc[i]
-            elif close.iloc[i] < close.iloc[i - 1]:
-                obv[i] = obv[i - 1] - volume.iloc[i]
-            else:
-                obv[i] = obv[i - 1]
+        # 前日比の符号（上昇: +1、下落: -1、変化なし・初日: 0）× 出来高の累積和
+        direction = np.sign(close.diff().to_numpy())
+        signed_volume = np.where(np.isnan(direction), 0.0, direction) * volume.to_numpy()
+        signed_volume[:1] = 0.0
+        obv = np.cumsum(signed_volume)
 
-        return pd.Series(obv, index=close.index)
+        return _tail(pd.Series(obv, index=close.index), tail)
@@ -0,0 +1,377 @@
+"""
+日中スキャンモジュール
+
+東証の取引時間中（前場 09:00-11:30、後場 12:30-15:30）に分足を定期的に取得し、
+逐次更新型の指標でシグナルを更新して、変化したシグナルのみをバックエンドに送信します。
+
+- 銘柄ごとの直近バーは固定長のリングバッファに保持するため、
+  セッション中に銘柄数×バッファ長以上のメモリは使用しません
+- 指標は IndicatorSet で確定済みのバーを1本ずつ取り込みます
+  （形成中の最新バーは確定するまで取り込みません）
+- replay() で記録済みのバー（PriceStore に保存された分足など）を
+  時系列順に流し、オフラインでシグナルの変化を再現できます
+"""
+
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from analyzer import TechnicalAnalyzer
+from backend_client import get_backend_client
+from data_fetch import DataFetcher
+from frame_cache import FrameCache
+from incremental_indicators import IndicatorSet
+from market_hours import JST, is_session_open, next_session_open, now_jst
+from price_store import PriceStore, get_price_store
+from result_writer import BatchResultWriter
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+INTRADAY_INTERVAL = os.getenv("INTRADAY_INTERVAL", "5m")  # 分足の間隔（1m, 5m など）
+INTRADAY_POLL_SECONDS = float(os.getenv("INTRADAY_POLL_SECONDS", 60))  # 取得間隔（秒）
+INTRADAY_BUFFER_BARS = int(os.getenv("INTRADAY_BUFFER_BARS", 500))  # 銘柄ごとに保持するバー数
+INTRADAY_WARMUP_PERIOD = os.getenv("INTRADAY_WARMUP_PERIOD", "5d")  # 初回取得時の期間（指標の初期化用）
+
+# 2回目以降の取得期間（取り込み済みのバーは除外されるため当日分のみ取得する）
+_POLL_PERIOD = "1d"
+
+# リングバッファの列
+_FIELDS = ("open", "high", "low", "close", "volume")
+
+
+def interval_to_timedelta(interval: str) -> pd.Timedelta:
+    """
+    yfinance の間隔指定（1m, 5m, 1h など）を Timedelta に変換します。
+
+    Args:
+        interval: データ間隔
+
+    Returns:
+        1本のバーの長さ
+    """
+    if interval.endswith("m") and not interval.endswith("mo"):
+        return pd.Timedelta(minutes=int(interval[:-1]))
+    return pd.Timedelta(interval)
+
+
+class BarRingBuffer:
+    """1銘柄分の直近バーを保持する固定長のリングバッファ"""
+
+    def __init__(self, capacity: int):
+        """
+        バッファを初期化します（メモリは初期化時に確保し、以降は増えません）。
+
+        Args:
+            capacity: 保持するバー数
+        """
+        self.capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype="i8")
+        self._values = np.zeros((capacity, len(_FIELDS)), dtype="f8")
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def last_timestamp(self) -> Optional[pd.Timestamp]:
+        """最後に追加したバーのタイムスタンプ（UTC、空の場合は None）"""
+        if not self._count:
+            return None
+        return pd.Timestamp(int(self._timestamps[self._next - 1]), tz="UTC")
+
+    def append(self, timestamp: pd.Timestamp, values: List[float]) -> None:
+        """
+        バーを追加します（容量を超えた場合は最も古いバーを上書きします）。
+
+        Args:
+            timestamp: バーのタイムスタンプ（タイムゾーン付き）
+            values: open, high, low, close, volume の値
+        """
+        self._timestamps[self._next] = timestamp.as_unit("ns").value
+        self._values[self._next] = values
+        self._next = (self._next + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def to_frame(self, last: Optional[int] = None) -> pd.DataFrame:
+        """
+        保持しているバーを古い順の DataFrame で返します。
+
+        Args:
+            last: 末尾の何本を返すか（省略時は全て）
+
+        Returns:
+            open, high, low, close, volume 列を持つ DataFrame（日本時間のインデックス）
+        """
+        count = min(last, self._count) if last else self._count
+        order = (np.arange(self._next - count, self._next)) % self.capacity
+        index = pd.DatetimeIndex(pd.to_datetime(self._timestamps[order], utc=True)).tz_convert(JST)
+        return pd.DataFrame(self._values[order], index=index, columns=list(_FIELDS))
+
+
+class _TickerState:
+    """1銘柄分のスキャン状態"""
+
+    def __init__(self, buffer_bars: int):
+        self.bars = BarRingBuffer(buffer_bars)
+        self.indicators = IndicatorSet()
+        self.signal: Optional[str] = None
+
+
+class IntradayScanner:
+    """分足による日中シグナルスキャナー"""
+
+    def __init__(
+        self,
+        fetcher: Optional[DataFetcher] = None,
+        interval: str = INTRADAY_INTERVAL,
+        buffer_bars: int = INTRADAY_BUFFER_BARS,
+        poll_seconds: float = INTRADAY_POLL_SECONDS,
+        sink: Optional[Callable[[List[Dict]], None]] = None,
+    ):
+        """
+        スキャナーを初期化します。
+
+        Args:
+            fetcher: データ取得に使う DataFetcher（省略時はインメモリキャッシュを使わない
+                DataFetcher。キャッシュの有効期限より短い間隔で最新バーを取得するため）
+            interval: 分足の間隔
+            buffer_bars: 銘柄ごとに保持するバー数
+            poll_seconds: 取得間隔（秒）
+            sink: 変化したシグナルの送信先（省略時は BatchResultWriter でバックエンドに保存）
+        """
+        self.fetcher = fetcher if fetcher is not None else DataFetcher(frame_cache=FrameCache(max_bytes=0))
+        self.interval = interval
+        self.buffer_bars = buffer_bars
+        self.poll_seconds = poll_seconds
+        self.sink = sink if sink is not None else push_to_backend
+        self._bar_length = interval_to_timedelta(interval)
+        self._states: Dict[str, _TickerState] = {}
+        self._lock = threading.Lock()
+
+        # 統計
+        self._scans = 0
+        self._bars = 0
+        self._changes = 0
+        self._last_scan_seconds: Optional[float] = None
+
+    def process(self, ticker: str, df: Optional[pd.DataFrame], now: datetime) -> Optional[Dict]:
+        """
+        取得したバーのうち、未取り込みかつ確定済みのバーを取り込みます。
+
+        Args:
+            ticker: 銘柄コード
+            df: 取得した分足の DataFrame
+            now: 現在時刻（この時刻までに終了したバーを確定済みとみなす）
+
+        Returns:
+            シグナルが変化した場合は分析結果の辞書（変化がない場合は None）
+        """
+        if df is None or df.empty:
+            return None
+
+        with self._lock:
+            state = self._states.get(ticker)
+            if state is None:
+                state = self._states[ticker] = _TickerState(self.buffer_bars)
+
+        index = pd.DatetimeIndex(df.index)
+        index = index.tz_localize(JST) if index.tz is None else index
+        confirmed = (index + self._bar_length) <= pd.Timestamp(now)
+        last = state.bars.last_timestamp
+        if last is not None:
+            confirmed &= index > last
+
+        columns = {str(c).lower(): c for c in df.columns}
+        values = np.column_stack([
+            df[columns[field]].to_numpy(dtype=float) if field in columns else np.zeros(len(df))
+            for field in _FIELDS
+        ])
+        positions = np.flatnonzero(confirmed)
+        for i in positions:
+            _, high, low, close, volume = values[i]
+            state.bars.append(index[i], values[i])
+            state.indicators.update(high, low, close, volume, timestamp=index[i])
+        if not len(positions):
+            return None
+
+        with self._lock:
+            self._bars += len(positions)
+
+        result = TechnicalAnalyzer._build_result(
+            ticker, state.bars.to_frame(last=2), state.indicators.values()
+        )
+        if result["signal"] == state.signal:
+            return None
+
+        result["previous_signal"] = state.signal
+        state.signal = result["signal"]
+        with self._lock:
+            self._changes += 1
+        return result
+
+    def scan(self, tickers: List[str], now: Optional[datetime] = None) -> List[Dict]:
+        """
+        全銘柄の分足を取得してシグナルを更新し、変化したシグナルを送信します。
+
+        Args:
+            tickers: 対象の銘柄コード
+            now: 現在時刻（省略時は現在の日本時間）
+
+        Returns:
+            シグナルが変化した銘柄の分析結果
+        """
+        started = time.monotonic()
+        now = now or now_jst()
+
+        # 初回の銘柄は指標の初期化に十分な期間を取得する
+        new = [ticker for ticker in tickers if ticker not in self._states]
+        known = [ticker for ticker in tickers if ticker in self._states]
+        frames: Dict[str, Optional[pd.DataFrame]] = {}
+        if new:
+            frames.update(self.fetcher.fetch_multiple_stocks(new, period=INTRADAY_WARMUP_PERIOD, interval=self.interval))
+        if known:
+            frames.update(self.fetcher.fetch_multiple_stocks(known, period=_POLL_PERIOD, interval=self.interval))
+
+        changed = []
+        for ticker in tickers:
+            try:
+                result = self.process(ticker, frames.get(ticker), now)
+            except Exception as e:
+                logger.error(f"Intraday update failed for {ticker}: {str(e)}")
+                continue
+            if result is not None:
+                changed.append(result)
+
+        if changed:
+            self.sink(changed)
+
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._scans += 1
+            self._last_scan_seconds = elapsed
+        logger.info(
+            f"Intraday scan completed: {len(tickers)} tickers, "
+            f"{len(changed)} signal changes in {elapsed:.1f}s"
+        )
+        return changed
+
+    def run(self, tickers: List[str], stop_event: Optional[threading.Event] = None) -> None:
+        """
+        取引時間中は poll_seconds ごとにスキャンし、時間外は次のセッション開始まで待機します。
+
+        最後のバーを確定させるため、セッション終了後もバー1本分の時間はスキャンを続けます。
+
+        Args:
+            tickers: 対象の銘柄コード
+            stop_event: 設定されると終了するイベント
+        """
+        stop_event = stop_event or threading.Event()
+        logger.info(f"Intraday scanner started: {len(tickers)} tickers, {self.interval} bars")
+
+        while not stop_event.is_set():
+            now = now_jst()
+            if is_session_open(now, grace=self._bar_length.to_pytimedelta()):
+                try:
+                    self.scan(tickers, now)
+                except Exception as e:
+                    logger.error(f"Intraday scan failed: {str(e)}")
+                wait = self.poll_seconds
+            else:
+                opens_at = next_session_open(now)
+                logger.info(f"Market closed, next intraday scan at {opens_at.isoformat()}")
+                wait = (opens_at - now).total_seconds()
+            stop_event.wait(wait)
+
+        logger.info("Intraday scanner stopped")
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            銘柄数、スキャン回数、取り込んだバー数、シグナル変化数などを含む辞書
+        """
+        with self._lock:
+            return {
+                "tickers": len(self._states),
+                "interval": self.interval,
+                "buffer_bars": self.buffer_bars,
+                "scans": self._scans,
+                "bars_ingested": self._bars,
+                "signal_changes": self._changes,
+                "last_scan_seconds": self._last_scan_seconds,
+            }
+
+
+def push_to_backend(results: List[Dict], base_url: Optional[str] = None) -> None:
+    """
+    変化したシグナルをバックエンドの一括保存 API に送信します。
+
+    Args:
+        results: 分析結果のリスト
+        base_url: バックエンドのベース URL（省略時は環境変数 BACKEND_URL）
+    """
+    with BatchResultWriter(get_backend_client(base_url)) as writer:
+        for result in results:
+            writer.add(result["ticker"], result)
+
+
+def load_recorded_bars(
+    tickers: List[str],
+    interval: str = INTRADAY_INTERVAL,
+    store: Optional[PriceStore] = None,
+) -> Dict[str, pd.DataFrame]:
+    """
+    PriceStore に記録された分足を読み込みます。
+
+    Args:
+        tickers: 対象の銘柄コード
+        interval: 分足の間隔
+        store: 読み込み元（省略時は環境変数 PRICE_STORE_DIR の PriceStore）
+
+    Returns:
+        銘柄コードから DataFrame への辞書（記録がない銘柄は含まない）
+    """
+    store = store or get_price_store()
+    if store is None:
+        raise ValueError("PRICE_STORE_DIR is not configured")
+    frames = {ticker: store.load(ticker, interval) for ticker in tickers}
+    return {ticker: df for ticker, df in frames.items() if df is not None and not df.empty}
+
+
+def replay(scanner: IntradayScanner, frames: Dict[str, pd.DataFrame]) -> List[Dict]:
+    """
+    記録済みのバーを時系列順に1本ずつスキャナーに流し、シグナルの変化を再現します。
+
+    バックエンドへの送信は行いません。
+
+    Args:
+        scanner: 対象のスキャナー
+        frames: 銘柄コードから分足の DataFrame への辞書
+
+    Returns:
+        シグナルが変化した時点の分析結果（発生順）
+    """
+    events = []
+    for ticker, df in frames.items():
+        index = pd.DatetimeIndex(df.index)
+        index = index.tz_localize(JST) if index.tz is None else index
+        events.extend((ts, ticker, i) for i, ts in enumerate(index))
+    events.sort(key=lambda event: event[0])
+
+    changes = []
+    for ts, ticker, i in events:
+        # バーの終了時刻を現在時刻とし、そのバーのみを確定済みとして渡す
+        result = scanner.process(ticker, frames[ticker].iloc[i:i + 1], ts + scanner._bar_length)
+        if result is not None:
+            changes.append(result)
+    return changes
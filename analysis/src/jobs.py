@@ -0,0 +1,230 @@
+"""
+非同期ジョブ管理モジュール
+
+時間のかかる複数銘柄分析をバックグラウンドのスレッドプールで実行し、
+ジョブIDで進捗と途中結果を参照できるようにします。
+呼び出し元は HTTP リクエストをブロックせずに、/jobs/<id> をポーリングして
+完了した銘柄の結果から順に受け取れます。
+"""
+
+import logging
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))  # 同時に実行するジョブ数
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", 3600))  # 完了したジョブを保持する秒数
+
+
+class JobStatus:
+    """ジョブの状態"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class Job:
+    """バックグラウンドで実行される分析ジョブ"""
+
+    def __init__(self, kind: str, tickers: List[str]):
+        """
+        ジョブを初期化します。
+
+        Args:
+            kind: ジョブの種類（analyze_batch, notify_analysis など）
+            tickers: 対象の銘柄コード
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.tickers = list(tickers)
+        self.status = JobStatus.QUEUED
+        self.error: Optional[str] = None
+        self.summary: Dict[str, Any] = {}
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+        self._lock = threading.Lock()
+        # 完了順の (銘柄コード, 結果) のリスト（結果が None の場合は失敗）
+        self._results: List[tuple] = []
+
+    @property
+    def finished(self) -> bool:
+        """ジョブが終了しているかどうか"""
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def record(self, ticker: str, result: Optional[Dict]) -> None:
+        """
+        銘柄の処理結果を記録します。
+
+        Args:
+            ticker: 銘柄コード
+            result: 分析結果（失敗した場合は None）
+        """
+        with self._lock:
+            self._results.append((ticker, result))
+
+    def results(self) -> Dict[str, Dict]:
+        """
+        成功した銘柄の結果を入力順で返します。
+
+        Returns:
+            銘柄コードから分析結果への辞書
+        """
+        with self._lock:
+            succeeded = {ticker: result for ticker, result in self._results if result}
+        return {ticker: succeeded[ticker] for ticker in self.tickers if ticker in succeeded}
+
+    def to_dict(self, since: Optional[int] = None) -> Dict:
+        """
+        ジョブの状態を辞書形式で返します。
+
+        Args:
+            since: 指定した場合、完了順でこの位置以降の結果を含める
+                （前回のレスポンスの next_cursor を渡すと新しく完了した分のみ取得できる）
+
+        Returns:
+            状態、進捗、（指定時は）途中結果を含む辞書
+
+        Raises:
+            ValueError: since が負の場合
+        """
+        if since is not None and since < 0:
+            raise ValueError("since must be a non-negative integer")
+
+        with self._lock:
+            processed = len(self._results)
+            succeeded = sum(1 for _, result in self._results if result)
+            entries = self._results[since:] if since is not None else None
+
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {
+                "total": len(self.tickers),
+                "processed": processed,
+                "succeeded": succeeded,
+                "failed": processed - succeeded,
+            },
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "summary": self.summary,
+        }
+        if entries is not None:
+            data["results"] = {ticker: result for ticker, result in entries if result}
+            data["failed_tickers"] = [ticker for ticker, result in entries if not result]
+            data["next_cursor"] = since + len(entries)
+        return data
+
+
+class JobManager:
+    """ジョブの投入・実行・参照を管理するクラス"""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, retention_seconds: int = JOB_RETENTION_SECONDS):
+        """
+        JobManager を初期化します。
+
+        Args:
+            max_workers: 同時に実行するジョブ数
+            retention_seconds: 終了したジョブを保持する秒数
+        """
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+
+    def submit(
+        self,
+        kind: str,
+        tickers: List[str],
+        work: Callable[[Job], Optional[Dict]],
+    ) -> Job:
+        """
+        ジョブを投入します。
+
+        Args:
+            kind: ジョブの種類
+            tickers: 対象の銘柄コード
+            work: ジョブ本体（銘柄ごとに job.record を呼び、戻り値はジョブの summary になる）
+
+        Returns:
+            投入したジョブ（すぐに返り、処理はバックグラウンドで実行されます）
+        """
+        job = Job(kind, tickers)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, work)
+        logger.info(f"Job {job.id} submitted: {kind} for {len(job.tickers)} tickers")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        ジョブを取得します。
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            ジョブ（存在しないか保持期限切れの場合は None）
+        """
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _run(self, job: Job, work: Callable[[Job], Optional[Dict]]) -> None:
+        """ジョブを実行し、状態を更新します"""
+        job.status = JobStatus.RUNNING
+        job.started_at = datetime.now()
+        try:
+            job.summary = work(job) or {}
+            status = JobStatus.COMPLETED
+        except Exception as e:
+            job.error = str(e)
+            status = JobStatus.FAILED
+            logger.error(f"Job {job.id} failed: {str(e)}")
+        # 終了時刻を設定してから状態を更新する（保持期限の判定に使用するため）
+        job.finished_at = datetime.now()
+        job.status = status
+        if status == JobStatus.COMPLETED:
+            logger.info(f"Job {job.id} completed: {job.to_dict()['progress']}")
+
+    def _prune(self) -> None:
+        """保持期限を過ぎた終了済みジョブを削除します（ロック取得済みで呼び出すこと）"""
+        now = datetime.now()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished and (now - job.finished_at).total_seconds() > self.retention_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    プロセス共有の JobManager を返します。
+
+    Returns:
+        環境変数 JOB_WORKERS / JOB_RETENTION_SECONDS で設定された JobManager
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+            logger.info(f"Job manager initialized ({JOB_WORKERS} workers)")
+        return _manager
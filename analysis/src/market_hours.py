@@ -0,0 +1,95 @@
+"""
+東京証券取引所の取引時間モジュール
+
+前場（09:00-11:30）・後場（12:30-15:30）の判定と、
+次の取引セッション開始時刻の計算を行います。
+祝日は考慮せず、平日を営業日として扱います。
+"""
+
+from datetime import datetime, time, timedelta
+from typing import List, Optional, Tuple
+
+import pytz
+
+JST = pytz.timezone("Asia/Tokyo")
+
+# 取引セッション（前場・後場）
+SESSIONS: List[Tuple[time, time]] = [
+    (time(9, 0), time(11, 30)),
+    (time(12, 30), time(15, 30)),
+]
+
+
+def now_jst() -> datetime:
+    """現在の日本時間を返します"""
+    return datetime.now(JST)
+
+
+def _to_jst(now: Optional[datetime]) -> datetime:
+    """日時を日本時間に変換します（naive な日時は日本時間とみなします）"""
+    if now is None:
+        return now_jst()
+    if now.tzinfo is None:
+        return JST.localize(now)
+    return now.astimezone(JST)
+
+
+def is_trading_day(now: Optional[datetime] = None) -> bool:
+    """
+    営業日かどうかを判定します。
+
+    Args:
+        now: 判定する日時（省略時は現在時刻）
+
+    Returns:
+        平日の場合は True
+    """
+    return _to_jst(now).weekday() < 5
+
+
+def is_session_open(now: Optional[datetime] = None, grace: timedelta = timedelta(0)) -> bool:
+    """
+    取引セッション中かどうかを判定します。
+
+    Args:
+        now: 判定する日時（省略時は現在時刻）
+        grace: セッション終了後も取引中とみなす猶予時間
+            （引け後に確定値が反映されるまでの時間など）
+
+    Returns:
+        セッション中（または終了後の猶予時間内）の場合は True
+    """
+    now = _to_jst(now)
+    if not is_trading_day(now):
+        return False
+
+    for start, end in SESSIONS:
+        session_start = JST.localize(datetime.combine(now.date(), start))
+        session_end = JST.localize(datetime.combine(now.date(), end)) + grace
+        if session_start <= now < session_end:
+            return True
+    return False
+
+
+def next_session_open(now: Optional[datetime] = None) -> datetime:
+    """
+    次の取引セッションの開始時刻を返します。
+
+    Args:
+        now: 基準となる日時（省略時は現在時刻）
+
+    Returns:
+        基準時刻より後で最初のセッション開始時刻（日本時間）
+    """
+    now = _to_jst(now)
+    day = now.date()
+
+    for _ in range(8):
+        if day.weekday() < 5:
+            for start, _ in SESSIONS:
+                session_start = JST.localize(datetime.combine(day, start))
+                if session_start > now:
+                    return session_start
+        day += timedelta(days=1)
+
+    raise RuntimeError("No trading session found within a week")
@@ -0,0 +1,510 @@
+"""
+パラメーター最適化モジュール
+
+TechnicalAnalyzer の判定パラメーター（移動平均の期間、RSI の閾値、MACD の期間、
+総合スコアの重み、判定の閾値）の組み合わせをグリッドサーチまたはランダムサーチで評価し、
+アウトオブサンプル期間のバックテスト指標で順位付けした表を作成します。
+
+銘柄ごとに、期間ごとの移動平均・EMA・RSI と各指標の判定を1回だけ計算してキャッシュし、
+全組み合わせで共有します。組み合わせごとの総合スコアと売買シミュレーションは、
+組み合わせをまとめた2次元配列で一括して計算します。
+銘柄のチャンクは CPU 計算プール（compute_pool を参照）で並列に評価します。
+"""
+
+import itertools
+import logging
+import math
+import os
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from analyzer import TechnicalAnalyzer
+from backtest import WARMUP_BARS
+from compute_pool import ComputePool, get_compute_pool
+from indicators import TechnicalIndicators
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 1回の配列計算でまとめて評価する組み合わせ数（組み合わせ数 × 本数の配列のメモリ使用量を抑える）
+OPTIMIZER_COMBO_BLOCK = int(os.getenv("OPTIMIZER_COMBO_BLOCK", 256))
+
+# 学習（インサンプル）期間の割合（残りをアウトオブサンプル期間として評価する）
+DEFAULT_TRAIN_FRACTION = 0.7
+
+# 探索するパラメーターの既定のグリッド（4 × 1 × 4 × 4 × 3 × 4 × 4 = 3,072 通り）
+DEFAULT_GRID: Dict[str, List] = {
+    "ma_periods": [(5, 20, 50), (5, 25, 75), (10, 30, 60), (3, 10, 30)],
+    "rsi_period": [14],
+    "rsi_oversold": [20, 25, 30, 35],
+    "rsi_overbought": [65, 70, 75, 80],
+    "macd": [(12, 26, 9), (8, 17, 9), (5, 35, 5)],
+    "weights": [(0.4, 0.3, 0.3), (0.5, 0.25, 0.25), (0.34, 0.33, 0.33), (0.2, 0.4, 0.4)],
+    "threshold": [0.2, 0.3, 0.4, 0.5],
+}
+
+# 銘柄ごとの評価結果の列（インサンプル・アウトオブサンプルの取引数、勝ち数、リターン合計 %）
+_STAT_COLUMNS = ("is_trades", "is_wins", "is_return", "oos_trades", "oos_wins", "oos_return")
+
+
+def default_parameters() -> Dict:
+    """TechnicalAnalyzer の現在の設定値を1つの組み合わせとして返します"""
+    return {
+        "ma_periods": tuple(TechnicalAnalyzer.MA_PERIODS[:3]),
+        "rsi_period": TechnicalAnalyzer.RSI_PERIOD,
+        "rsi_oversold": TechnicalAnalyzer.RSI_OVERSOLD,
+        "rsi_overbought": TechnicalAnalyzer.RSI_OVERBOUGHT,
+        "macd": (TechnicalAnalyzer.MACD_FAST, TechnicalAnalyzer.MACD_SLOW, TechnicalAnalyzer.MACD_SIGNAL),
+        "weights": (TechnicalAnalyzer.MA_WEIGHT, TechnicalAnalyzer.RSI_WEIGHT, TechnicalAnalyzer.MACD_WEIGHT),
+        "threshold": TechnicalAnalyzer.SIGNAL_THRESHOLD,
+    }
+
+
+def _is_valid(params: Dict) -> bool:
+    """意味のある組み合わせかどうか（期間の大小関係と閾値の順序）を返します"""
+    short, mid, long = params["ma_periods"]
+    fast, slow, _ = params["macd"]
+    return short < mid < long and fast < slow and params["rsi_oversold"] < params["rsi_overbought"]
+
+
+# タプルで指定するパラメーターの要素数
+_TUPLE_LENGTHS = {"ma_periods": 3, "macd": 3, "weights": 3}
+
+# ランダムサーチで全組み合わせを列挙してから抽出するグリッドの大きさの上限
+# （これより大きいグリッドはパラメーターごとに候補値を抽出する）
+RANDOM_ENUMERATION_LIMIT = 100000
+
+
+def validate_grid(grid: Optional[Dict[str, List]] = None) -> Dict[str, List]:
+    """
+    グリッドを検証し、DEFAULT_GRID で補完したグリッドを返します。
+
+    Args:
+        grid: パラメーター名から候補値のリストへの辞書
+
+    Returns:
+        全パラメーターの候補値のリスト（タプルで指定するパラメーターはタプルに変換）
+
+    Raises:
+        ValueError: 未知のパラメーター名、リストでない・空の候補値、要素数の異なるタプル、
+            数値でない候補値が含まれる場合
+    """
+    if grid is None:
+        grid = {}
+    if not isinstance(grid, dict):
+        raise ValueError("grid must be an object mapping parameter names to lists of values")
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown grid parameters: {sorted(unknown)} (expected {list(DEFAULT_GRID)})")
+
+    validated = {}
+    for name, default in DEFAULT_GRID.items():
+        values = grid.get(name, default)
+        if not isinstance(values, (list, tuple)) or not values:
+            raise ValueError(f"grid.{name} must be a non-empty list")
+        length = _TUPLE_LENGTHS.get(name)
+        normalized = []
+        for value in values:
+            items = value if length is not None else [value]
+            if length is not None and (not isinstance(value, (list, tuple)) or len(value) != length):
+                raise ValueError(f"grid.{name} values must be lists of {length} numbers")
+            if not all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in items):
+                raise ValueError(f"grid.{name} values must be numbers")
+            normalized.append(tuple(value) if length is not None else value)
+        validated[name] = normalized
+    return validated
+
+
+def grid_size(grid: Optional[Dict[str, List]] = None) -> int:
+    """
+    グリッドの組み合わせ数（大小関係が不正な組み合わせを除く前の数）を、組み合わせを作らずに返します。
+
+    Args:
+        grid: パラメーター名から候補値のリストへの辞書
+
+    Raises:
+        ValueError: グリッドが不正な場合（validate_grid を参照）
+    """
+    return math.prod(len(values) for values in validate_grid(grid).values())
+
+
+def grid_search_space(
+    grid: Optional[Dict[str, List]] = None,
+    max_combinations: Optional[int] = None,
+) -> List[Dict]:
+    """
+    グリッドの全組み合わせを返します。
+
+    Args:
+        grid: パラメーター名から候補値のリストへの辞書（省略したパラメーターは DEFAULT_GRID の値）
+        max_combinations: 組み合わせ数の上限（超える場合は組み合わせを作る前にエラーにする）
+
+    Returns:
+        組み合わせの辞書のリスト（期間や閾値の大小関係が不正なものは除く）
+
+    Raises:
+        ValueError: グリッドが不正な場合、または組み合わせ数が max_combinations を超える場合
+    """
+    grid = validate_grid(grid)
+    size = math.prod(len(values) for values in grid.values())
+    if max_combinations is not None and size > max_combinations:
+        raise ValueError(f"Grid has {size} combinations (maximum {max_combinations})")
+
+    names = list(grid)
+    combos = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        if _is_valid(params):
+            combos.append(params)
+    return combos
+
+
+def random_search_space(
+    grid: Optional[Dict[str, List]] = None,
+    samples: int = 500,
+    seed: Optional[int] = None,
+) -> List[Dict]:
+    """
+    グリッドの組み合わせから重複なしで無作為に抽出します。
+
+    グリッドが RANDOM_ENUMERATION_LIMIT 以下の場合は全組み合わせから抽出し、
+    それより大きい場合は全組み合わせを作らずにパラメーターごとに候補値を抽出します
+    （大小関係が不正な組み合わせと重複は抽出し直します）。
+
+    Args:
+        grid: パラメーター名から候補値のリストへの辞書
+        samples: 抽出する組み合わせ数
+        seed: 乱数シード
+
+    Returns:
+        組み合わせの辞書のリスト（グリッドの組み合わせ数が samples 以下の場合は全組み合わせ）
+
+    Raises:
+        ValueError: グリッドが不正な場合
+    """
+    grid = validate_grid(grid)
+    lengths = [len(values) for values in grid.values()]
+    size = math.prod(lengths)
+    rng = np.random.default_rng(seed)
+
+    if size <= max(RANDOM_ENUMERATION_LIMIT, samples):
+        combos = grid_search_space(grid)
+        if samples >= len(combos):
+            return combos
+        picked = rng.choice(len(combos), size=samples, replace=False)
+        return [combos[i] for i in sorted(picked)]
+
+    names = list(grid)
+    picked: Dict[Tuple[int, ...], Dict] = {}
+    # 不正な組み合わせばかりのグリッドでも終わるよう、抽出回数に上限を設ける
+    for _ in range(100):
+        draws = np.column_stack([rng.integers(0, length, size=samples * 2) for length in lengths])
+        for key in map(tuple, draws):
+            if key in picked:
+                continue
+            params = {name: grid[name][i] for name, i in zip(names, key)}
+            if _is_valid(params):
+                picked[key] = params
+                if len(picked) == samples:
+                    return [picked[key] for key in sorted(picked)]
+    return [picked[key] for key in sorted(picked)]
+
+
+class SeriesCache:
+    """1銘柄の終値から計算した中間系列と指標ごとの判定のキャッシュ"""
+
+    def __init__(self, close: pd.Series):
+        """
+        Args:
+            close: 終値
+        """
+        self.close = close
+        self._cache: Dict[Tuple, object] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: Tuple, compute):
+        """キャッシュから値を返します（ない場合は計算して保存します）"""
+        if key in self._cache:
+            self.hits += 1
+            return self._cache[key]
+        self.misses += 1
+        value = self._cache[key] = compute()
+        return value
+
+    def ma(self, period: int) -> np.ndarray:
+        """単純移動平均（期間ごとに1回だけ計算）"""
+        return self._get(("ma", period), lambda: TechnicalIndicators.calculate_ma(self.close, period).to_numpy())
+
+    def ema(self, span: int) -> pd.Series:
+        """指数移動平均（期間ごとに1回だけ計算）"""
+        return self._get(("ema", span), lambda: TechnicalIndicators.calculate_ema(self.close, span))
+
+    def rsi(self, period: int) -> np.ndarray:
+        """RSI（期間ごとに1回だけ計算）"""
+        return self._get(("rsi", period), lambda: TechnicalIndicators.calculate_rsi(self.close, period).to_numpy())
+
+    def macd(self, fast: int, slow: int, signal: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """MACD、シグナル、ヒストグラム（EMA はスパンごとのキャッシュを共有）"""
+        def compute():
+            macd = self.ema(fast) - self.ema(slow)
+            signal_line = TechnicalIndicators.calculate_ema(macd, signal)
+            return macd.to_numpy(), signal_line.to_numpy(), (macd - signal_line).to_numpy()
+        return self._get(("macd", fast, slow, signal), compute)
+
+    def ma_scores(self, periods: Tuple[int, int, int]) -> np.ndarray:
+        """移動平均線の判定"""
+        return self._get(
+            ("ma_scores", periods),
+            lambda: TechnicalAnalyzer._ma_scores(*(self.ma(period) for period in periods)),
+        )
+
+    def rsi_scores(self, period: int, oversold: float, overbought: float) -> np.ndarray:
+        """RSI の判定"""
+        return self._get(
+            ("rsi_scores", period, oversold, overbought),
+            lambda: TechnicalAnalyzer._rsi_scores(self.rsi(period), oversold, overbought),
+        )
+
+    def macd_scores(self, fast: int, slow: int, signal: int) -> np.ndarray:
+        """MACD の判定"""
+        return self._get(
+            ("macd_scores", fast, slow, signal),
+            lambda: TechnicalAnalyzer._macd_scores(*self.macd(fast, slow, signal)),
+        )
+
+
+def _component_matrix(keys: List[Tuple], compute) -> Tuple[np.ndarray, np.ndarray]:
+    """組み合わせごとのキーを一意なキーの判定配列の行番号に変換します"""
+    unique = list(dict.fromkeys(keys))
+    rows = {key: i for i, key in enumerate(unique)}
+    return np.vstack([compute(key) for key in unique]), np.array([rows[key] for key in keys])
+
+
+def signal_matrix(cache: SeriesCache, combos: List[Dict]) -> np.ndarray:
+    """
+    組み合わせごとの判定を一括で計算します。
+
+    各行は、その組み合わせの設定値で TechnicalAnalyzer.compute_signal_series を
+    計算した signal 列と一致します。
+
+    Args:
+        cache: 銘柄の中間系列のキャッシュ
+        combos: 組み合わせの辞書のリスト
+
+    Returns:
+        (組み合わせ数 × 本数) の判定（+1: BUY、-1: SELL、0: HOLD）
+    """
+    ma, ma_rows = _component_matrix(
+        [tuple(c["ma_periods"]) for c in combos], cache.ma_scores
+    )
+    rsi, rsi_rows = _component_matrix(
+        [(c["rsi_period"], c["rsi_oversold"], c["rsi_overbought"]) for c in combos],
+        lambda key: cache.rsi_scores(*key),
+    )
+    macd, macd_rows = _component_matrix(
+        [tuple(c["macd"]) for c in combos], lambda key: cache.macd_scores(*key)
+    )
+    weights = np.array([c["weights"] for c in combos], dtype=float)
+    threshold = np.array([c["threshold"] for c in combos], dtype=float)[:, None]
+
+    # 総合スコア（compute_signal_series と同じ演算順序）
+    score = (
+        ma[ma_rows] * weights[:, 0:1]
+        + rsi[rsi_rows] * weights[:, 1:2]
+        + macd[macd_rows] * weights[:, 2:3]
+    )
+    return np.where(score > threshold, 1, np.where(score < -threshold, -1, 0)).astype(np.int8)
+
+
+def simulate_window(
+    prices: np.ndarray, signals: np.ndarray, start: int, stop: int, compound: bool = True
+) -> np.ndarray:
+    """
+    組み合わせごとの売買を期間 [start, stop) について一括でシミュレーションします。
+
+    売買のルールは Backtester.run_backtest_on_data と同じです（営業日 i の終値で
+    i-1 時点の判定に従って売買し、期間の開始時点ではポジションを持たない）。
+
+    Args:
+        prices: 終値
+        signals: (組み合わせ数 × 本数) の判定
+        start: 売買を開始する位置（1以上）
+        stop: 売買を終了する位置
+        compound: False の場合は複利リターンの列を計算しない
+
+    Returns:
+        (組み合わせ数 × 4) の 取引数、勝ち数、決済済み取引のリターン合計（%）、
+        決済済み取引のリターンを複利で累積したリターン（%）（compound が False の場合は先頭の3列）
+    """
+    rows = len(signals)
+    executed = signals[:, start - 1:stop - 1]
+    width = executed.shape[1]
+
+    # 直近の BUY/SELL 判定を前方補完すると保有状態になる（判定がない間はポジションなし）
+    last = np.where(executed != 0, np.arange(width), 0)
+    np.maximum.accumulate(last, axis=1, out=last)
+    position = np.take_along_axis(executed, last, axis=1) > 0
+    previous = np.zeros_like(position)
+    previous[:, 1:] = position[:, :-1]
+
+    entry_rows, entry_cols = np.nonzero(position & ~previous)
+    exit_rows, exit_cols = np.nonzero(~position & previous)
+    trades = np.bincount(entry_rows, minlength=rows)
+    closed = np.bincount(exit_rows, minlength=rows)
+
+    # 各組み合わせの先頭から決済済みの数だけのエントリーが、同じ順序のエグジットと対になる
+    first = np.concatenate(([0], np.cumsum(trades)[:-1]))
+    paired = (np.arange(len(entry_rows)) - first[entry_rows]) < closed[entry_rows]
+
+    window = prices[start:stop]
+    entry_prices = window[entry_cols[paired]]
+    profits = window[exit_cols] - entry_prices
+    profit_percents = (profits / entry_prices) * 100
+
+    columns = [
+        trades,
+        np.bincount(exit_rows, weights=profits > 0, minlength=rows),
+        np.bincount(exit_rows, weights=profit_percents, minlength=rows),
+    ]
+    if compound:
+        columns.append(
+            np.expm1(np.bincount(exit_rows, weights=np.log1p(profits / entry_prices), minlength=rows)) * 100
+        )
+    return np.column_stack(columns).astype(float)
+
+
+def evaluate_frame(
+    df: pd.DataFrame,
+    combos: List[Dict],
+    train_fraction: float = DEFAULT_TRAIN_FRACTION,
+    block_size: Optional[int] = None,
+) -> Optional[np.ndarray]:
+    """
+    1銘柄について全組み合わせのインサンプル・アウトオブサンプルの成績を計算します。
+
+    判定は全期間について先読みなしで計算し、先頭 train_fraction の期間（ウォームアップを除く）を
+    インサンプル、残りをアウトオブサンプルとして、それぞれポジションなしの状態から売買します。
+
+    Args:
+        df: OHLCV データ
+        combos: 組み合わせの辞書のリスト
+        train_fraction: インサンプル期間の割合
+        block_size: 一括で計算する組み合わせ数（省略時は環境変数 OPTIMIZER_COMBO_BLOCK）
+
+    Returns:
+        (組み合わせ数 × 6) の成績（列は _STAT_COLUMNS）、データが不足している場合は None
+    """
+    if df is None or df.empty:
+        return None
+    close = df["close"] if "close" in df.columns else df["Close"]
+    split = int(len(close) * train_fraction)
+    if split <= WARMUP_BARS or split >= len(close):
+        return None
+
+    cache = SeriesCache(close)
+    prices = close.to_numpy(dtype=float)
+    block_size = max(1, block_size or OPTIMIZER_COMBO_BLOCK)
+    stats = np.empty((len(combos), len(_STAT_COLUMNS)))
+
+    for start in range(0, len(combos), block_size):
+        block = combos[start:start + block_size]
+        signals = signal_matrix(cache, block)
+        stats[start:start + len(block), :3] = simulate_window(prices, signals, WARMUP_BARS, split, compound=False)
+        stats[start:start + len(block), 3:] = simulate_window(prices, signals, split, len(prices), compound=False)
+
+    return stats
+
+
+def _table(combos: List[Dict], totals: np.ndarray, tickers: int, sort_by: str) -> pd.DataFrame:
+    """集計した成績から順位付けした表を作成します"""
+    table = pd.DataFrame(combos)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for prefix, offset in (("is", 0), ("oos", 3)):
+            trades, wins, returns = totals[:, offset], totals[:, offset + 1], totals[:, offset + 2]
+            table[f"{prefix}_trades"] = trades.astype(int)
+            table[f"{prefix}_winning_rate"] = np.where(trades > 0, wins / trades * 100, 0.0)
+            table[f"{prefix}_mean_return"] = returns / tickers
+
+    table = table.sort_values(sort_by, ascending=False, kind="stable").reset_index(drop=True)
+    table.insert(0, "rank", np.arange(1, len(table) + 1))
+    return table
+
+
+def run_sweep(
+    frames: Dict[str, Optional[pd.DataFrame]],
+    combos: Optional[List[Dict]] = None,
+    train_fraction: float = DEFAULT_TRAIN_FRACTION,
+    sort_by: str = "oos_mean_return",
+    top: Optional[int] = None,
+    pool: Optional[ComputePool] = None,
+) -> pd.DataFrame:
+    """
+    ユニバース全体で全組み合わせを評価し、順位付けした表を返します。
+
+    銘柄はチャンクに分けて CPU 計算プールで評価し、完了したチャンクから順に
+    組み合わせごとの成績を合計します（銘柄ごとの成績は保持しません）。
+
+    Args:
+        frames: 銘柄コードから OHLCV データへの辞書
+        combos: 組み合わせの辞書のリスト（省略時は DEFAULT_GRID の全組み合わせ）
+        train_fraction: インサンプル期間の割合
+        sort_by: 順位付けに使う列（降順）
+        top: 上位何件を返すか（省略時は全件）
+        pool: 計算プール（省略時はプロセス共有のプール）
+
+    Returns:
+        rank、パラメーター、is_/oos_ の trades・winning_rate・mean_return を列に持つ DataFrame
+        （mean_return は評価できた銘柄あたりのリターン合計 % の平均）
+
+    Raises:
+        ValueError: 組み合わせがない場合、評価できる銘柄が1つもない場合
+    """
+    combos = grid_search_space() if combos is None else combos
+    if not combos:
+        raise ValueError("No parameter combinations to evaluate")
+    pool = pool or get_compute_pool()
+
+    items = [(ticker, df) for ticker, df in frames.items() if df is not None and not df.empty]
+    size = max(1, min(pool.chunk_size, -(-len(items) // pool.max_workers)))
+    options = {"combos": combos, "train_fraction": train_fraction}
+
+    totals = np.zeros((len(combos), len(_STAT_COLUMNS)))
+    evaluated = 0
+    pending = {}
+    for start in range(0, len(items), size):
+        chunk = dict(items[start:start + size])
+        pending[pool.submit("sweep", chunk, **options)] = len(chunk)
+
+        # 完了したチャンクから集計し、未集計の結果がメモリに溜まり過ぎないようにする
+        while len(pending) > pool.max_workers * 2:
+            evaluated += _collect(pending, totals, return_when=FIRST_COMPLETED)
+    while pending:
+        evaluated += _collect(pending, totals)
+
+    logger.info(f"Parameter sweep completed: {len(combos)} combinations x {evaluated} tickers")
+    if not evaluated:
+        raise ValueError("No tickers with enough data to evaluate")
+    table = _table(combos, totals, evaluated, sort_by)
+    return table.head(top) if top else table
+
+
+def _collect(pending: Dict, totals: np.ndarray, return_when: str = ALL_COMPLETED) -> int:
+    """完了したチャンクの成績を合計に加え、評価できた銘柄数を返します"""
+    done, _ = wait(pending, return_when=return_when)
+    evaluated = 0
+    for future in done:
+        count = pending.pop(future)
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Error evaluating {count} tickers in parameter sweep: {str(e)}")
+            continue
+        for _, stats in results:
+            if stats is not None:
+                totals += stats
+                evaluated += 1
+    return evaluated
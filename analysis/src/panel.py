@@ -0,0 +1,277 @@
+"""
+パネル（複数銘柄）テクニカル指標計算モジュール
+
+日付×銘柄の2次元データ（DataFrame または NumPy 配列）を受け取り、
+全銘柄の指標を1回のベクトル化された計算で求めます。
+
+計算式は TechnicalIndicators と共通のため、各列の結果は
+単一銘柄の Series に対して TechnicalIndicators を呼び出した結果と一致します。
+"""
+
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from indicators import TechnicalIndicators
+
+# パネルとして受け付ける型（行: 日付、列: 銘柄）
+Panel = Union[pd.DataFrame, np.ndarray]
+
+
+def _as_frame(data: Panel) -> pd.DataFrame:
+    """NumPy 配列を DataFrame に変換します"""
+    if isinstance(data, pd.DataFrame):
+        return data
+    array = np.asarray(data, dtype=float)
+    if array.ndim != 2:
+        raise ValueError(f"Panel must be 2-D (dates x tickers), got {array.ndim}-D")
+    return pd.DataFrame(array)
+
+
+def _restore(result, like: Panel):
+    """入力が NumPy 配列の場合は結果も NumPy 配列で返します"""
+    if isinstance(like, pd.DataFrame):
+        return result
+    if isinstance(result, dict):
+        return {key: value.to_numpy() for key, value in result.items()}
+    return result.to_numpy()
+
+
+def build_panel(frames: Dict[str, pd.DataFrame], field: str = "close") -> pd.DataFrame:
+    """
+    銘柄ごとの OHLCV DataFrame から、指定した列のパネルを作成します。
+
+    日付は全銘柄の和集合で揃え、データのない日は NaN になります。
+    単一銘柄の計算結果と一致させるには、全銘柄が同じ営業日を持つ
+    （東証銘柄同士など）整列済みのデータを使用してください。
+
+    Args:
+        frames: 銘柄コードから OHLCV DataFrame への辞書
+        field: 取り出す列名（小文字）
+
+    Returns:
+        日付×銘柄の DataFrame
+    """
+    columns = {
+        ticker: df[field]
+        for ticker, df in frames.items()
+        if df is not None and not df.empty and field in df.columns
+    }
+    if not columns:
+        return pd.DataFrame()
+    return pd.concat(columns, axis=1).sort_index()
+
+
+class PanelIndicators:
+    """日付×銘柄パネルに対するテクニカル指標計算クラス"""
+
+    @staticmethod
+    def calculate_ma(prices: Panel, period: int, tail: Optional[int] = None) -> Panel:
+        """
+        全銘柄の移動平均線を計算します。
+
+        Args:
+            prices: 終値のパネル
+            period: 計算期間（日数）
+            tail: 末尾の何本を計算するか（省略時は全系列）
+
+        Returns:
+            移動平均線のパネル
+        """
+        return _restore(
+            TechnicalIndicators.calculate_ma(_as_frame(prices), period, tail=tail), prices
+        )
+
+    @staticmethod
+    def calculate_ema(prices: Panel, period: int, tail: Optional[int] = None) -> Panel:
+        """
+        全銘柄の指数移動平均を計算します。
+
+        Args:
+            prices: 終値のパネル
+            period: 計算期間（日数）
+            tail: 末尾の何本を返すか（省略時は全系列）
+
+        Returns:
+            指数移動平均のパネル
+        """
+        return _restore(
+            TechnicalIndicators.calculate_ema(_as_frame(prices), period, tail=tail), prices
+        )
+
+    @staticmethod
+    def calculate_rsi(prices: Panel, period: int = 14, tail: Optional[int] = None) -> Panel:
+        """
+        全銘柄の RSI を計算します。
+
+        Args:
+            prices: 終値のパネル
+            period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
+
+        Returns:
+            RSI値（0-100）のパネル
+        """
+        return _restore(
+            TechnicalIndicators.calculate_rsi(_as_frame(prices), period, tail=tail), prices
+        )
+
+    @staticmethod
+    def calculate_macd(
+        prices: Panel,
+        fast: int = 12,
+        slow: int = 26,
+        signal: int = 9,
+        tail: Optional[int] = None,
+    ) -> Dict[str, Panel]:
+        """
+        全銘柄の MACD を計算します。
+
+        Args:
+            prices: 終値のパネル
+            fast: 短期EMA期間（デフォルト: 12）
+            slow: 長期EMA期間（デフォルト: 26）
+            signal: シグナルライン期間（デフォルト: 9）
+            tail: 末尾の何本を返すか（省略時は全系列）
+
+        Returns:
+            MACD、シグナル、ヒストグラムのパネルを含む辞書
+        """
+        return _restore(
+            TechnicalIndicators.calculate_macd(_as_frame(prices), fast, slow, signal, tail=tail),
+            prices,
+        )
+
+    @staticmethod
+    def calculate_bollinger_bands(
+        prices: Panel,
+        period: int = 20,
+        std_dev: float = 2.0,
+        tail: Optional[int] = None,
+    ) -> Dict[str, Panel]:
+        """
+        全銘柄のボリンジャーバンドを計算します。
+
+        Args:
+            prices: 終値のパネル
+            period: 計算期間（デフォルト: 20日）
+            std_dev: 標準偏差の倍数（デフォルト: 2.0）
+            tail: 末尾の何本を計算するか（省略時は全系列）
+
+        Returns:
+            上部バンド、中部バンド、下部バンドのパネルを含む辞書
+        """
+        return _restore(
+            TechnicalIndicators.calculate_bollinger_bands(
+                _as_frame(prices), period, std_dev, tail=tail
+            ),
+            prices,
+        )
+
+    @staticmethod
+    def calculate_atr(
+        high: Panel,
+        low: Panel,
+        close: Panel,
+        period: int = 14,
+        tail: Optional[int] = None,
+    ) -> Panel:
+        """
+        全銘柄の ATR を計算します。
+
+        Args:
+            high: 高値のパネル
+            low: 安値のパネル
+            close: 終値のパネル
+            period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
+
+        Returns:
+            ATR値のパネル
+        """
+        return _restore(
+            TechnicalIndicators.calculate_atr(
+                _as_frame(high), _as_frame(low), _as_frame(close), period, tail=tail
+            ),
+            close,
+        )
+
+    @staticmethod
+    def calculate_stochastic(
+        high: Panel,
+        low: Panel,
+        close: Panel,
+        period: int = 14,
+        tail: Optional[int] = None,
+    ) -> Dict[str, Panel]:
+        """
+        全銘柄のストキャスティクスを計算します。
+
+        Args:
+            high: 高値のパネル
+            low: 安値のパネル
+            close: 終値のパネル
+            period: 計算期間（デフォルト: 14日）
+            tail: 末尾の何本を計算するか（省略時は全系列）
+
+        Returns:
+            %K、%Dのパネルを含む辞書
+        """
+        return _restore(
+            TechnicalIndicators.calculate_stochastic(
+                _as_frame(high), _as_frame(low), _as_frame(close), period, tail=tail
+            ),
+            close,
+        )
+
+    @staticmethod
+    def calculate_latest(
+        close: pd.DataFrame,
+        high: pd.DataFrame,
+        low: pd.DataFrame,
+        ma_periods: List[int],
+        rsi_period: int = 14,
+        macd_fast: int = 12,
+        macd_slow: int = 26,
+        macd_signal: int = 9,
+    ) -> pd.DataFrame:
+        """
+        全銘柄の最新の指標値を計算します。
+
+        TechnicalAnalyzer の判定に使用する指標を tail モードで計算し、
+        銘柄×指標名の表にまとめます。
+
+        Args:
+            close: 終値のパネル
+            high: 高値のパネル
+            low: 安値のパネル
+            ma_periods: 移動平均の期間のリスト
+            rsi_period: RSIの計算期間
+            macd_fast: MACDの短期EMA期間
+            macd_slow: MACDの長期EMA期間
+            macd_signal: MACDのシグナルライン期間
+
+        Returns:
+            行: 銘柄、列: 指標名（ma_5, rsi, macd など）の DataFrame
+        """
+        latest = {}
+
+        for period in ma_periods:
+            latest[f"ma_{period}"] = PanelIndicators.calculate_ma(close, period, tail=1).iloc[-1]
+
+        latest["rsi"] = PanelIndicators.calculate_rsi(close, rsi_period, tail=1).iloc[-1]
+
+        macd = PanelIndicators.calculate_macd(close, macd_fast, macd_slow, macd_signal, tail=1)
+        latest["macd"] = macd["macd"].iloc[-1]
+        latest["macd_signal"] = macd["signal"].iloc[-1]
+        latest["macd_histogram"] = macd["histogram"].iloc[-1]
+
+        bb = PanelIndicators.calculate_bollinger_bands(close, tail=1)
+        latest["bb_upper"] = bb["upper"].iloc[-1]
+        latest["bb_middle"] = bb["middle"].iloc[-1]
+        latest["bb_lower"] = bb["lower"].iloc[-1]
+
+        latest["atr"] = PanelIndicators.calculate_atr(high, low, close, tail=1).iloc[-1]
+
+        return pd.DataFrame(latest)
@@ -0,0 +1,331 @@
+"""
+ポートフォリオバックテストモジュール
+
+複数銘柄で1つの資金（現金）を共有し、日付×銘柄の判定パネルを1回だけ走査して
+売買をシミュレーションします。
+
+判定（TechnicalAnalyzer.compute_signal_panel）と保有したい状態は全銘柄について
+ベクトル演算で一括計算し、日付のループ内の処理（決済・発注数量の計算・約定）も
+全銘柄の配列演算で行います。現金の残高は前日までの売買に依存するため、
+日付方向のみ逐次に処理します。
+
+売買の規則は Backtester.run_backtest_on_data と同じで、各営業日 i の終値で
+前営業日 i-1 までのデータによる判定に従って売買します。
+"""
+
+import logging
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from analyzer import TechnicalAnalyzer
+from backtest import WARMUP_BARS
+from panel import PanelIndicators, build_panel
+from risk_metrics import compute_risk_metrics
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 同時に保有する銘柄数の上限（等金額の場合は資産をこの数で等分する）
+PORTFOLIO_MAX_POSITIONS = int(os.getenv("PORTFOLIO_MAX_POSITIONS", 20))
+
+# 売買代金に対する手数料率とスリッページ率
+PORTFOLIO_COMMISSION_RATE = float(os.getenv("PORTFOLIO_COMMISSION_RATE", 0.0005))
+PORTFOLIO_SLIPPAGE_RATE = float(os.getenv("PORTFOLIO_SLIPPAGE_RATE", 0.0005))
+
+# 売買単位（株数、0 の場合は端株を許容する）
+PORTFOLIO_LOT_SIZE = int(os.getenv("PORTFOLIO_LOT_SIZE", 0))
+
+# ATR による数量決定：1銘柄あたりのリスク（資産に対する割合）と損切り幅の ATR 倍率
+PORTFOLIO_RISK_PER_TRADE = float(os.getenv("PORTFOLIO_RISK_PER_TRADE", 0.01))
+PORTFOLIO_ATR_MULTIPLIER = float(os.getenv("PORTFOLIO_ATR_MULTIPLIER", 2.0))
+PORTFOLIO_ATR_PERIOD = 14
+
+SIZING_METHODS = ("equal", "atr")
+
+
+class PortfolioResult:
+    """ポートフォリオバックテスト結果を保持するクラス"""
+
+    def __init__(self, initial_capital: float):
+        self.initial_capital = initial_capital
+        self.final_equity = initial_capital
+        self.total_return = 0.0
+        self.max_drawdown = 0.0
+        self.total_trades = 0
+        self.winning_trades = 0
+        self.winning_rate = 0.0
+        self.total_fees = 0.0
+        self.equity_curve = pd.Series(dtype=float)
+        self.cash = pd.Series(dtype=float)
+        self.positions = pd.Series(dtype=int)
+        self.attribution = pd.DataFrame()
+        self.risk: Dict = {}
+
+    def calculate_metrics(self):
+        """資産推移からメトリクス（リスク指標は risk_metrics を参照）を計算します"""
+        if self.equity_curve.empty:
+            return
+        self.final_equity = float(self.equity_curve.iloc[-1])
+        self.total_return = (self.final_equity / self.initial_capital - 1) * 100
+        self.risk = compute_risk_metrics(self.equity_curve)
+        self.max_drawdown = self.risk["max_drawdown"] or 0.0
+        if self.total_trades > 0:
+            self.winning_rate = (self.winning_trades / self.total_trades) * 100
+
+    def to_dict(self, include_curve: bool = True) -> Dict:
+        """
+        辞書形式で結果を返します。
+
+        Args:
+            include_curve: 日ごとの資産推移（日付、資産、現金、保有銘柄数）を含めるかどうか
+        """
+        result = {
+            "initial_capital": self.initial_capital,
+            "final_equity": self.final_equity,
+            "total_return": self.total_return,
+            "max_drawdown": self.max_drawdown,
+            "total_trades": self.total_trades,
+            "winning_trades": self.winning_trades,
+            "winning_rate": self.winning_rate,
+            "total_fees": self.total_fees,
+            "risk": self.risk,
+            "attribution": {
+                ticker: {key: (int(value) if key in ("trades", "wins") else float(value)) for key, value in row.items()}
+                for ticker, row in self.attribution.to_dict(orient="index").items()
+            },
+        }
+        if include_curve:
+            result["equity_curve"] = {
+                "dates": [str(date) for date in self.equity_curve.index],
+                "equity": self.equity_curve.tolist(),
+                "cash": self.cash.tolist(),
+                "positions": self.positions.tolist(),
+            }
+        return result
+
+
+class PortfolioBacktester:
+    """資金を共有する複数銘柄のバックテスター"""
+
+    def __init__(
+        self,
+        initial_capital: float = 1000000.0,
+        sizing: str = "equal",
+        max_positions: int = PORTFOLIO_MAX_POSITIONS,
+        commission_rate: float = PORTFOLIO_COMMISSION_RATE,
+        slippage_rate: float = PORTFOLIO_SLIPPAGE_RATE,
+        lot_size: int = PORTFOLIO_LOT_SIZE,
+        risk_per_trade: float = PORTFOLIO_RISK_PER_TRADE,
+        atr_multiplier: float = PORTFOLIO_ATR_MULTIPLIER,
+    ):
+        """
+        バックテスターを初期化します。
+
+        Args:
+            initial_capital: 初期資本（デフォルト: 100万円）
+            sizing: 数量の決め方（"equal": 資産を max_positions で等分、
+                "atr": 損切り幅 atr_multiplier × ATR で資産の risk_per_trade を失う数量）
+            max_positions: 同時に保有する銘柄数の上限
+            commission_rate: 売買代金に対する手数料率
+            slippage_rate: 約定価格の不利な方向へのずれ（終値に対する割合）
+            lot_size: 売買単位（0 の場合は端株を許容する）
+            risk_per_trade: ATR による数量決定で1銘柄あたりに許容する損失（資産に対する割合）
+            atr_multiplier: ATR による数量決定での損切り幅の ATR 倍率
+        """
+        if sizing not in SIZING_METHODS:
+            raise ValueError(f"sizing must be one of {SIZING_METHODS}")
+        if max_positions < 1:
+            raise ValueError("max_positions must be positive")
+        if commission_rate < 0 or slippage_rate < 0 or lot_size < 0:
+            raise ValueError("commission_rate, slippage_rate and lot_size must not be negative")
+        if sizing == "atr" and (risk_per_trade <= 0 or atr_multiplier <= 0):
+            raise ValueError("risk_per_trade and atr_multiplier must be positive")
+
+        self.initial_capital = initial_capital
+        self.sizing = sizing
+        self.max_positions = max_positions
+        self.commission_rate = commission_rate
+        self.slippage_rate = slippage_rate
+        self.lot_size = lot_size
+        self.risk_per_trade = risk_per_trade
+        self.atr_multiplier = atr_multiplier
+
+    def run(self, frames: Dict[str, Optional[pd.DataFrame]]) -> Optional[PortfolioResult]:
+        """
+        取得済みの株価データでポートフォリオバックテストを実行します。
+
+        日付は全銘柄の和集合で揃えます（build_panel を参照）。終値のない日はその銘柄を売買せず、
+        評価額は直前の終値で計算します。
+
+        Args:
+            frames: 銘柄コードから OHLCV データへの辞書
+
+        Returns:
+            ポートフォリオバックテスト結果（データが不足している場合は None）
+        """
+        close = build_panel(frames, "close")
+        if close.empty or len(close) < WARMUP_BARS:
+            return None
+
+        panels = TechnicalAnalyzer.compute_signal_panel(close)
+        scores = panels["score"].to_numpy()
+        signals = panels["signal"].to_numpy()
+
+        # 営業日 i の売買は i-1 時点の判定で行う（ウォームアップ期間は売買しない）
+        executed = np.zeros(signals.shape)
+        executed[WARMUP_BARS:] = signals[WARMUP_BARS - 1:-1]
+        # 直近の BUY/SELL 判定を前方補完すると保有したい状態になる
+        wanted = pd.DataFrame(np.where(executed == 0, np.nan, executed)).ffill().fillna(-1).to_numpy() > 0
+        previous = np.vstack((np.zeros((1, wanted.shape[1]), dtype=bool), wanted[:-1]))
+        buy_signals = wanted & ~previous
+
+        prices = close.to_numpy(dtype=float)
+        marks = close.ffill().to_numpy(dtype=float)
+        atr = None
+        if self.sizing == "atr":
+            high = build_panel(frames, "high").reindex(index=close.index, columns=close.columns)
+            low = build_panel(frames, "low").reindex(index=close.index, columns=close.columns)
+            atr = PanelIndicators.calculate_atr(
+                high.fillna(close), low.fillna(close), close, PORTFOLIO_ATR_PERIOD
+            ).to_numpy()
+
+        result = self._simulate(prices, marks, wanted, buy_signals, scores, atr)
+        result.equity_curve = pd.Series(result.equity_curve, index=close.index)
+        result.cash = pd.Series(result.cash, index=close.index)
+        result.positions = pd.Series(result.positions, index=close.index)
+        result.attribution.index = close.columns
+        result.calculate_metrics()
+
+        logger.info(
+            f"Portfolio backtest completed: {close.shape[1]} tickers, {result.total_trades} trades, "
+            f"total return {result.total_return:.2f}%, max drawdown {result.max_drawdown:.2f}%"
+        )
+        return result
+
+    def _simulate(
+        self,
+        prices: np.ndarray,
+        marks: np.ndarray,
+        wanted: np.ndarray,
+        buy_signals: np.ndarray,
+        scores: np.ndarray,
+        atr: Optional[np.ndarray],
+    ) -> PortfolioResult:
+        """
+        日付×銘柄の配列で売買をシミュレーションします。
+
+        Args:
+            prices: 終値（売買できない日は NaN）
+            marks: 評価用の終値（前方補完済み）
+            wanted: 各日の終値時点で保有したい状態
+            buy_signals: 保有したい状態に変わった（BUY 判定で約定する）日
+            scores: 総合スコア（発注枠が足りない場合は前日のスコアが高い銘柄を優先する）
+            atr: ATR（数量を ATR で決める場合のみ）
+        """
+        dates, tickers = prices.shape
+        tradable = ~np.isnan(prices)
+        slots = min(self.max_positions, tickers)
+        buy_cost = (1 + self.slippage_rate) * (1 + self.commission_rate)
+        sell_proceeds = (1 - self.slippage_rate) * (1 - self.commission_rate)
+
+        cash = self.initial_capital
+        shares = np.zeros(tickers)
+        cost_basis = np.zeros(tickers)
+        realized = np.zeros(tickers)
+        fees = np.zeros(tickers)
+        trades = np.zeros(tickers, dtype=int)
+        wins = np.zeros(tickers, dtype=int)
+
+        cash_curve = np.full(dates, cash)
+        holdings = np.zeros((dates, tickers))
+
+        # 売買が発生しうる日（保有したい状態が変わる日、または売買できずに繰り越した決済がある日）のみ処理する
+        events = np.zeros(dates, dtype=bool)
+        events[1:] = (wanted[1:] != wanted[:-1]).any(axis=1)
+        pending_exit = False
+        for i in range(WARMUP_BARS, dates):
+            if not (events[i] or pending_exit):
+                cash_curve[i] = cash
+                holdings[i] = shares
+                continue
+
+            held = shares > 0
+
+            # 決済：保有中で保有したい状態でなくなった銘柄を売却する
+            exits = held & ~wanted[i] & tradable[i]
+            if exits.any():
+                gross = shares[exits] * prices[i, exits]
+                proceeds = gross * sell_proceeds
+                cash += proceeds.sum()
+                profit = proceeds - cost_basis[exits]
+                realized[exits] += profit
+                wins[exits] += profit > 0
+                fees[exits] += gross - proceeds
+                shares[exits] = 0.0
+                cost_basis[exits] = 0.0
+                held = shares > 0
+            pending_exit = bool((held & ~wanted[i]).any())
+
+            # 新規：BUY 判定の銘柄を、空いている枠の数まで前日のスコアが高い順に購入する
+            candidates = np.flatnonzero(buy_signals[i] & ~held & tradable[i])
+            free = slots - int(held.sum())
+            if len(candidates) > 0 and free > 0:
+                if len(candidates) > free:
+                    order = np.argsort(-scores[i - 1, candidates], kind="stable")
+                    candidates = candidates[order[:free]]
+                equity = cash + np.dot(shares[held], marks[i, held])
+                price = prices[i, candidates]
+                if self.sizing == "equal":
+                    quantity = (equity / slots) / (price * buy_cost)
+                else:
+                    risk = atr[i - 1, candidates] * self.atr_multiplier
+                    with np.errstate(divide="ignore", invalid="ignore"):
+                        quantity = np.where(risk > 0, equity * self.risk_per_trade / risk, 0.0)
+                    # 1銘柄の金額は等金額の場合の配分を上限とする
+                    quantity = np.minimum(np.nan_to_num(quantity), (equity / slots) / (price * buy_cost))
+
+                # 現金が足りない場合は全銘柄の数量を同じ割合で減らす
+                required = (quantity * price * buy_cost).sum()
+                if required > cash:
+                    quantity *= max(cash, 0.0) / required
+                if self.lot_size > 0:
+                    quantity = np.floor(quantity / self.lot_size) * self.lot_size
+
+                bought = quantity > 0
+                candidates, quantity, price = candidates[bought], quantity[bought], price[bought]
+                cost = quantity * price * buy_cost
+                cash -= cost.sum()
+                shares[candidates] = quantity
+                cost_basis[candidates] = cost
+                fees[candidates] += cost - quantity * price
+                trades[candidates] += 1
+
+            cash_curve[i] = cash
+            holdings[i] = shares
+
+        # 保有株数は売買した日のみ変わるため、資産推移は最後にまとめて評価する
+        values = np.where(holdings > 0, holdings * np.nan_to_num(marks), 0.0)
+        unrealized = np.where(shares > 0, shares * np.nan_to_num(marks[-1]) - cost_basis, 0.0)
+
+        result = PortfolioResult(self.initial_capital)
+        result.equity_curve = cash_curve + values.sum(axis=1)
+        result.cash = cash_curve
+        result.positions = (holdings > 0).sum(axis=1)
+        result.total_trades = int(trades.sum())
+        result.winning_trades = int(wins.sum())
+        result.total_fees = float(fees.sum())
+        pnl = realized + unrealized
+        result.attribution = pd.DataFrame({
+            "trades": trades,
+            "wins": wins,
+            "realized_pnl": realized,
+            "unrealized_pnl": unrealized,
+            "pnl": pnl,
+            "fees": fees,
+            # 初期資本に対する寄与（%）：全銘柄の合計がポートフォリオのリターンになる
+            "contribution": pnl / self.initial_capital * 100,
+        })
+        return result
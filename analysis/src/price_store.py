@@ -0,0 +1,294 @@
+"""
+株価データ永続キャッシュモジュール
+
+(ticker, interval) ごとの OHLCV データをローカルディスクに保存し、
+前回保存時点以降の差分バーのみを取得できるようにします。
+
+データは列指向の NumPy 構造化配列（.npy）として保存し、
+読み込み時はメモリマップで開くため、最終タイムスタンプの確認は
+ファイル全体を読み込まずに行えます。
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+PRICE_STORE_DIR = os.getenv("PRICE_STORE_DIR", "")
+
+# ファイル名に使用できない文字を置換するためのパターン
+_UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]")
+
+# タイムスタンプ列のフィールド名（UTC ナノ秒）
+_TS_FIELD = "__ts__"
+
+
+class PriceStore:
+    """(ticker, interval) 単位の OHLCV ディスクキャッシュ"""
+
+    def __init__(self, base_dir: str):
+        """
+        PriceStore を初期化します。
+
+        Args:
+            base_dir: 保存先ディレクトリ
+        """
+        self.base_dir = base_dir
+        self._lock = threading.Lock()
+        os.makedirs(base_dir, exist_ok=True)
+
+    def _paths(self, ticker: str, interval: str) -> Dict[str, str]:
+        """データファイルとメタデータファイルのパスを返します"""
+        directory = os.path.join(self.base_dir, _UNSAFE_CHARS.sub("_", interval))
+        name = _UNSAFE_CHARS.sub("_", ticker)
+        return {
+            "dir": directory,
+            "data": os.path.join(directory, f"{name}.npy"),
+            "meta": os.path.join(directory, f"{name}.json"),
+            "indicators": os.path.join(directory, f"{name}.indicators.json"),
+        }
+
+    def load_meta(self, ticker: str, interval: str) -> Dict:
+        """
+        メタデータ（タイムゾーン、カバー開始日時など）を読み込みます。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+
+        Returns:
+            メタデータの辞書（未保存の場合は空辞書）
+        """
+        path = self._paths(ticker, interval)["meta"]
+        if not os.path.exists(path):
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupted price store metadata for {ticker} ({interval}): {e}")
+            return {}
+
+    def load(self, ticker: str, interval: str) -> Optional[pd.DataFrame]:
+        """
+        保存済みの OHLCV データを読み込みます。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+
+        Returns:
+            OHLCV データの DataFrame（未保存の場合は None）
+        """
+        paths = self._paths(ticker, interval)
+        if not os.path.exists(paths["data"]):
+            return None
+
+        try:
+            records = np.load(paths["data"], mmap_mode="r")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupted price store data for {ticker} ({interval}): {e}")
+            return None
+
+        meta = self.load_meta(ticker, interval)
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(records[_TS_FIELD]), utc=True))
+        # 保存時にタイムゾーンを持たなかったデータは naive に戻す
+        index = index.tz_convert(meta["tz"]) if meta.get("tz") else index.tz_localize(None)
+        index.name = meta.get("index_name", "Date")
+
+        columns = [name for name in records.dtype.names if name != _TS_FIELD]
+        return pd.DataFrame(
+            {name: np.array(records[name]) for name in columns},
+            index=index,
+        )
+
+    def last_timestamp(self, ticker: str, interval: str) -> Optional[pd.Timestamp]:
+        """
+        保存済みデータの最終タイムスタンプを返します。
+
+        メモリマップで末尾のレコードのみを参照します。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+
+        Returns:
+            最終タイムスタンプ（未保存の場合は None）
+        """
+        paths = self._paths(ticker, interval)
+        if not os.path.exists(paths["data"]):
+            return None
+        records = np.load(paths["data"], mmap_mode="r")
+        if len(records) == 0:
+            return None
+        ts = pd.Timestamp(int(records[_TS_FIELD][-1]), tz="UTC")
+        tz = self.load_meta(ticker, interval).get("tz")
+        return ts.tz_convert(tz) if tz else ts.tz_localize(None)
+
+    def save(
+        self,
+        ticker: str,
+        interval: str,
+        df: pd.DataFrame,
+        covered_since: Optional[str] = None,
+    ) -> None:
+        """
+        OHLCV データを保存します（既存データは置き換えられます）。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+            df: 保存する DataFrame（DatetimeIndex、数値列のみ保存）
+            covered_since: 欠損なく取得済みであることが保証される開始日時
+                （ISO 形式、全期間取得の場合は "max"）
+        """
+        paths = self._paths(ticker, interval)
+        os.makedirs(paths["dir"], exist_ok=True)
+
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        utc_index = index.tz_convert("UTC") if index.tz is not None else index.tz_localize("UTC")
+
+        columns = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c])]
+        dtype = [(_TS_FIELD, "i8")] + [(str(c), df[c].dtype.str) for c in columns]
+        records = np.empty(len(df), dtype=dtype)
+        records[_TS_FIELD] = utc_index.as_unit("ns").asi8
+        for c in columns:
+            records[str(c)] = df[c].to_numpy()
+
+        meta = {
+            "ticker": ticker,
+            "interval": interval,
+            "tz": tz,
+            "index_name": index.name,
+            "covered_since": covered_since,
+            "updated_at": datetime.now().isoformat(),
+        }
+
+        # 書き込み途中のファイルを読まれないよう、一時ファイル経由で置換する
+        tmp_data = paths["data"] + ".tmp"
+        with open(tmp_data, "wb") as f:
+            np.save(f, records)
+        os.replace(tmp_data, paths["data"])
+
+        tmp_meta = paths["meta"] + ".tmp"
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, paths["meta"])
+
+    def load_indicator_state(self, ticker: str, interval: str) -> Optional[Dict]:
+        """
+        保存済みの逐次更新型指標の状態を読み込みます。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+
+        Returns:
+            IndicatorSet.to_state() の辞書（未保存または破損している場合は None）
+        """
+        path = self._paths(ticker, interval)["indicators"]
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Corrupted indicator state for {ticker} ({interval}): {e}")
+            return None
+
+    def save_indicator_state(self, ticker: str, interval: str, state: Dict) -> None:
+        """
+        逐次更新型指標の状態を株価データの横に保存します。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+            state: IndicatorSet.to_state() の辞書
+        """
+        paths = self._paths(ticker, interval)
+        os.makedirs(paths["dir"], exist_ok=True)
+        tmp_path = paths["indicators"] + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, paths["indicators"])
+
+    def merge(
+        self,
+        ticker: str,
+        interval: str,
+        df: pd.DataFrame,
+        covered_since: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        新しく取得したバーを保存済みデータにマージして保存します。
+
+        同一タイムスタンプのバーは新しいデータで上書きされます
+        （取引時間中に取得した未確定バーの更新のため）。
+
+        Args:
+            ticker: 銘柄コード
+            interval: データ間隔
+            df: 新しく取得した DataFrame
+            covered_since: 新しいカバー開始日時（None の場合は既存の値を維持）
+
+        Returns:
+            マージ後の DataFrame
+        """
+        with self._lock:
+            cached = self.load(ticker, interval)
+            if covered_since is None:
+                covered_since = self.load_meta(ticker, interval).get("covered_since")
+
+            if cached is None or cached.empty:
+                merged = df
+            elif df is None or df.empty:
+                merged = cached
+            else:
+                if df.index.tz is not None and cached.index.tz is not None:
+                    cached.index = cached.index.tz_convert(df.index.tz)
+                merged = pd.concat([cached, df])
+                merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+
+            if merged is not None and not merged.empty:
+                self.save(ticker, interval, merged, covered_since=covered_since)
+
+            return merged
+
+
+_stores: Dict[str, PriceStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_price_store(base_dir: Optional[str] = None) -> Optional[PriceStore]:
+    """
+    プロセス共有の PriceStore を返します。
+
+    同じディレクトリに対しては同一インスタンスを返すため、
+    複数の DataFetcher から同時に書き込んでもロックが共有されます。
+
+    Args:
+        base_dir: 保存先ディレクトリ（省略時は環境変数 PRICE_STORE_DIR）
+
+    Returns:
+        PriceStore（保存先が未設定の場合は None）
+    """
+    base_dir = base_dir or PRICE_STORE_DIR
+    if not base_dir:
+        return None
+
+    with _stores_lock:
+        if base_dir not in _stores:
+            _stores[base_dir] = PriceStore(base_dir)
+            logger.info(f"Price store enabled at {base_dir}")
+        return _stores[base_dir]
@@ -0,0 +1,175 @@
+"""
+レート制限モジュール
+
+yfinance へのリクエストレートをプロセス全体で制御するトークンバケットを提供します。
+DataFetcher のインスタンスやスレッドが異なっても同じバケットを共有するため、
+並列取得時にも全体のリクエストレートが設定値を超えません。
+
+429（Too Many Requests）を受けた場合はレートを乗算的に下げ、
+成功が続くと設定値まで加算的に戻します（AIMD）。
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+YF_RATE_LIMIT = float(os.getenv("YF_RATE_LIMIT", 0.5))  # 1秒あたりのリクエスト数
+YF_RATE_BURST = float(os.getenv("YF_RATE_BURST", 3))  # 連続で許可するリクエスト数
+YF_RATE_MIN = float(os.getenv("YF_RATE_MIN", 0.05))  # 429受信時に下げる下限レート
+
+
+class TokenBucketRateLimiter:
+    """スレッドセーフな適応型トークンバケット"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float,
+        min_rate: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        increase_step: Optional[float] = None,
+    ):
+        """
+        トークンバケットを初期化します。
+
+        Args:
+            rate: 1秒あたりに補充するトークン数（最大レート）
+            burst: バケット容量（連続で許可するリクエスト数）
+            min_rate: 429受信時に下げるレートの下限（デフォルト: rate の1/10）
+            decrease_factor: 429受信時にレートに掛ける係数
+            increase_step: 成功時にレートへ加算する量（デフォルト: rate の5%）
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive")
+
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate if min_rate is not None else rate / 10
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step if increase_step is not None else rate * 0.05
+
+        self._lock = threading.Lock()
+        self._tokens = burst
+        self._last_refill = time.monotonic()
+
+        # 統計
+        self._acquired = 0
+        self._total_wait = 0.0
+        self._rate_limited = 0
+
+    def _refill(self, now: float) -> None:
+        """経過時間に応じてトークンを補充します（ロック取得済みで呼び出すこと）"""
+        elapsed = now - self._last_refill
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        トークンを取得します。不足している場合は補充されるまで待機します。
+
+        トークンは先に予約されるため、同時に待機しているスレッドは
+        呼び出し順に補充分を受け取ります。
+
+        Args:
+            tokens: 取得するトークン数（一括リクエストでは銘柄数を指定）
+
+        Returns:
+            待機した秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self._acquired += 1
+            self._total_wait += wait
+
+        if wait > 0:
+            logger.debug(f"Rate limiter waiting {wait:.2f}s (rate={self.rate:.3f}/s)")
+            time.sleep(wait)
+        return wait
+
+    def on_rate_limited(self) -> None:
+        """
+        429を受信したことを通知します。
+
+        レートを下げ、残りのトークンを破棄して直後のバーストを防ぎます。
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._tokens = min(self._tokens, 0.0)
+            self._rate_limited += 1
+
+        logger.warning(f"Rate limited: reducing request rate {previous:.3f}/s -> {self.rate:.3f}/s")
+
+    def on_success(self) -> None:
+        """リクエストの成功を通知し、レートを最大値に向けて戻します"""
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            現在のレート、取得回数、累計待機時間、429受信回数を含む辞書
+        """
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "max_rate": self.max_rate,
+                "burst": self.burst,
+                "acquired": self._acquired,
+                "total_wait_seconds": self._total_wait,
+                "rate_limited": self._rate_limited,
+            }
+
+
+_limiter: Optional[TokenBucketRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> TokenBucketRateLimiter:
+    """
+    プロセス共有の yfinance 用トークンバケットを返します。
+
+    Returns:
+        環境変数 YF_RATE_LIMIT / YF_RATE_BURST / YF_RATE_MIN で設定された TokenBucketRateLimiter
+    """
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = TokenBucketRateLimiter(
+                rate=YF_RATE_LIMIT,
+                burst=YF_RATE_BURST,
+                min_rate=YF_RATE_MIN,
+            )
+            logger.info(
+                f"Rate limiter initialized: {YF_RATE_LIMIT}/s, burst={YF_RATE_BURST}"
+            )
+        return _limiter
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    例外が429（レート制限）によるものかを判定します。
+
+    Args:
+        error: 判定する例外
+
+    Returns:
+        レート制限エラーの場合は True
+    """
+    message = str(error)
+    return "429" in message or "Too Many Requests" in message or "Rate limited" in message
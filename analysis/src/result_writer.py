@@ -0,0 +1,250 @@
+"""
+分析結果の一括保存モジュール
+
+分析結果をバッファリングし、バックエンドの一括保存 API（/api/analysis/save-batch）へ
+まとめて送信します。送信は専用スレッドで行い、共有の BackendClient の接続を使い回すため、
+銘柄数分の HTTP 往復・接続確立が数回のリクエストに削減されます。
+
+一括保存 API が存在しない（404 を返す）バックエンドに対しては、
+同じ接続で銘柄ごとの /api/analysis/save にフォールバックします。
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from backend_client import BackendClient, get_backend_client
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+SAVE_BATCH_SIZE = int(os.getenv("SAVE_BATCH_SIZE", 50))  # 1リクエストで送信する最大件数
+SAVE_FLUSH_INTERVAL = float(os.getenv("SAVE_FLUSH_INTERVAL", 1.0))  # バッファを送信するまでの最大待機時間（秒）
+SAVE_MAX_RETRIES = int(os.getenv("SAVE_MAX_RETRIES", 3))  # 失敗した銘柄の再送回数
+SAVE_TIMEOUT = float(os.getenv("SAVE_TIMEOUT", 30))  # 1リクエストのタイムアウト（秒）
+
+# 再送しても成功しない（リクエスト内容に起因する）ステータス
+_PERMANENT_STATUSES = {400, 404, 409, 422}
+
+# キューの終端を示す番兵
+_CLOSE = object()
+
+
+class BatchResultWriter:
+    """分析結果をバッチでバックエンドに保存するライター"""
+
+    def __init__(
+        self,
+        client: Optional[BackendClient] = None,
+        batch_size: int = SAVE_BATCH_SIZE,
+        flush_interval: float = SAVE_FLUSH_INTERVAL,
+        max_retries: int = SAVE_MAX_RETRIES,
+        timeout: float = SAVE_TIMEOUT,
+        retry_delay: float = 0.5,
+    ):
+        """
+        ライターを初期化し、送信スレッドを開始します。
+
+        Args:
+            client: バックエンドクライアント（省略時はプロセス共有のクライアント）
+            batch_size: 1リクエストで送信する最大件数
+            flush_interval: バッファが batch_size に満たなくても送信するまでの秒数
+            max_retries: 失敗した銘柄の再送回数
+            timeout: 1リクエストのタイムアウト（秒）
+            retry_delay: 再送までの初期待機時間（秒、再送ごとに2倍）
+        """
+        self.client = client if client is not None else get_backend_client()
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.retry_delay = retry_delay
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._batch_supported = True
+        self._saved: List[str] = []
+        self._failed: Dict[str, str] = {}
+        self._requests = 0
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, name="batch-result-writer", daemon=True)
+        self._thread.start()
+
+    def add(self, ticker: str, analysis: Dict) -> None:
+        """
+        分析結果を送信キューに追加します。
+
+        Args:
+            ticker: 銘柄コード
+            analysis: 分析結果
+        """
+        if self._closed:
+            raise RuntimeError("BatchResultWriter is closed")
+        self._queue.put((ticker, analysis))
+
+    def close(self) -> Dict:
+        """
+        残りの結果を送信し、送信スレッドを終了します。
+
+        Returns:
+            保存件数、失敗した銘柄、リクエスト数を含む辞書
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        return self.get_stats()
+
+    def get_stats(self) -> Dict:
+        """
+        送信結果の統計を返します。
+
+        Returns:
+            保存件数、失敗した銘柄とその理由、リクエスト数を含む辞書
+        """
+        return {
+            "saved": len(self._saved),
+            "failed": dict(self._failed),
+            "requests": self._requests,
+        }
+
+    def __enter__(self) -> "BatchResultWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        """キューから結果を取り出し、batch_size 件または flush_interval 経過ごとに送信します"""
+        buffer: List[Tuple[str, Dict]] = []
+        deadline: Optional[float] = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _CLOSE:
+                if buffer:
+                    self._safe_flush(buffer)
+                return
+
+            if item is not None:
+                buffer.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if len(buffer) >= self.batch_size or (buffer and time.monotonic() >= deadline):
+                self._safe_flush(buffer)
+                buffer = []
+                deadline = None
+
+    def _safe_flush(self, items: List[Tuple[str, Dict]]) -> None:
+        """送信時の予期しない例外で送信スレッドが終了しないよう、バッファの結果を失敗として記録します"""
+        try:
+            self._flush(items)
+        except Exception as e:
+            logger.error(f"Unexpected error saving {len(items)} results: {str(e)}")
+            for ticker, _ in items:
+                self._failed[ticker] = str(e)
+
+    def _flush(self, items: List[Tuple[str, Dict]]) -> None:
+        """バッファの結果を送信し、一時的な失敗の銘柄のみ再送します"""
+        pending = items
+        delay = self.retry_delay
+
+        for attempt in range(self.max_retries + 1):
+            if attempt > 0:
+                logger.info(f"Retrying save for {len(pending)} results (attempt {attempt}/{self.max_retries})")
+                time.sleep(delay)
+                delay *= 2
+
+            outcomes = self._send(pending)
+            retry = []
+            for (ticker, analysis), (status, error) in zip(pending, outcomes):
+                if status is not None and 200 <= status < 300:
+                    self._saved.append(ticker)
+                    self._failed.pop(ticker, None)
+                    continue
+                self._failed[ticker] = error or f"HTTP {status}"
+                if status not in _PERMANENT_STATUSES:
+                    retry.append((ticker, analysis))
+
+            if not retry:
+                break
+            pending = retry
+
+        if self._failed:
+            logger.warning(f"Failed to save {len(self._failed)} results: {list(self._failed)[:10]}")
+
+    def _send(self, items: List[Tuple[str, Dict]]) -> List[Tuple[Optional[int], Optional[str]]]:
+        """
+        結果を送信し、銘柄ごとの (ステータス, エラー) を返します。
+
+        通信エラーの場合はステータスを None とします。
+        """
+        if self._batch_supported:
+            outcomes = self._send_batch(items)
+            if outcomes is not None:
+                return outcomes
+        return [self._send_single(ticker, analysis) for ticker, analysis in items]
+
+    def _send_batch(self, items: List[Tuple[str, Dict]]) -> Optional[List[Tuple[Optional[int], Optional[str]]]]:
+        """一括保存 API で送信します（API が存在しない場合は None）"""
+        self._requests += 1
+        try:
+            response = self.client.post(
+                "/api/analysis/save-batch",
+                json={"results": [{"ticker": t, "analysis": a} for t, a in items]},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            logger.error(f"Error saving batch of {len(items)} results: {str(e)}")
+            return [(None, str(e))] * len(items)
+
+        if response.status_code == 404:
+            logger.info("Backend does not support batch save, falling back to per-ticker save")
+            self._batch_supported = False
+            return None
+
+        if response.status_code != 200:
+            logger.warning(f"Batch save failed: {response.status_code}")
+            return [(response.status_code, f"HTTP {response.status_code}")] * len(items)
+
+        try:
+            results = response.json().get("data", {}).get("results", [])
+        except (ValueError, AttributeError) as e:
+            # 不正な応答はバッチ全体の一時的な失敗として再送する
+            logger.warning(f"Invalid batch save response: {str(e)}")
+            return [(None, "Invalid batch response")] * len(items)
+
+        by_ticker = {
+            r.get("ticker"): (r.get("status", 201 if r.get("success") else 500), r.get("error"))
+            for r in results
+        }
+        return [by_ticker.get(ticker, (500, "Missing from batch response")) for ticker, _ in items]
+
+    def _send_single(self, ticker: str, analysis: Dict) -> Tuple[Optional[int], Optional[str]]:
+        """銘柄ごとの保存 API で送信します"""
+        self._requests += 1
+        try:
+            response = self.client.post(
+                "/api/analysis/save",
+                json={"ticker": ticker, "analysis": analysis},
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            logger.error(f"Error saving {ticker} to backend: {str(e)}")
+            return None, str(e)
+
+        if response.status_code != 201:
+            logger.warning(f"Failed to save {ticker}: {response.status_code}")
+        return response.status_code, None
@@ -0,0 +1,435 @@
+"""
+リスク指標計算モジュール
+
+価格または資産推移の系列から、シャープレシオ、ソルティノレシオ、カルマーレシオ、
+最大ドローダウン（期間を含む）、ボラティリティ、ヒストリカル VaR / CVaR を計算します。
+
+日付×銘柄のパネル（DataFrame / NumPy 配列）を受け取り、全銘柄の指標を
+リターンを1回だけ計算したうえでの配列演算でまとめて求めます。
+1銘柄の Series は1列のパネルとして同じ計算を行います。
+
+/sharpe-ratio と /max-drawdown は、銘柄ごとの計算結果をキャッシュ（RiskMetricsCache）から
+参照するため、同じデータに対する指標の計算は1回で済みます。
+"""
+
+import logging
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from data_fetch import DataFetcher
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 年率換算に使用する1年あたりの本数（日足）
+TRADING_DAYS = 252
+
+# 設定
+RISK_FREE_RATE = float(os.getenv("RISK_FREE_RATE", 0.02))  # リスクフリーレート（年率）
+VAR_CONFIDENCE = float(os.getenv("VAR_CONFIDENCE", 0.95))  # VaR / CVaR の信頼水準
+RISK_METRICS_CACHE_SIZE = int(os.getenv("RISK_METRICS_CACHE_SIZE", 1024))  # 0 でキャッシュ無効
+# ローリングの VaR / CVaR / ドローダウンで1チャンクあたりに展開する要素数（窓の本数 × 銘柄数 × 窓の長さ）
+RISK_ROLLING_CHUNK_ELEMENTS = int(os.getenv("RISK_ROLLING_CHUNK_ELEMENTS", 4000000))
+
+# 系列またはパネル（行: 日付、列: 銘柄）
+Values = Union[pd.Series, pd.DataFrame, np.ndarray]
+
+METRICS = (
+    "observations",
+    "total_return",
+    "annual_return",
+    "volatility",
+    "sharpe_ratio",
+    "sortino_ratio",
+    "calmar_ratio",
+    "max_drawdown",
+    "max_drawdown_duration",
+    "value_at_risk",
+    "conditional_value_at_risk",
+)
+
+
+def _as_array(values: Values) -> np.ndarray:
+    """系列・パネルを (日付 × 列) の float 配列に変換します"""
+    array = np.asarray(values, dtype=float)
+    if array.ndim == 1:
+        return array[:, None]
+    if array.ndim != 2:
+        raise ValueError(f"Values must be 1-D or 2-D (dates x tickers), got {array.ndim}-D")
+    return array
+
+
+def _returns(prices: np.ndarray) -> np.ndarray:
+    """単純リターン（前日または当日の値がない場合は NaN）"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return prices[1:] / prices[:-1] - 1
+
+
+def _compute(
+    prices: np.ndarray,
+    risk_free_rate: float,
+    periods_per_year: int,
+    confidence: float,
+) -> Dict[str, np.ndarray]:
+    """
+    (日付 × 列) の配列から列ごとの指標を計算します。
+
+    Returns:
+        指標名から列ごとの値の配列への辞書と、最大ドローダウンの開始・底の位置
+        （_peak / _trough）
+    """
+    returns = _returns(prices)
+    excess = returns - risk_free_rate / periods_per_year
+    valid = ~np.isnan(prices)
+    observations = (~np.isnan(returns)).sum(axis=0)
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+
+        # 期間全体のリターン（最初と最後の有効な値で計算）
+        first = prices[valid.argmax(axis=0), np.arange(prices.shape[1])]
+        last = prices[len(prices) - 1 - valid[::-1].argmax(axis=0), np.arange(prices.shape[1])]
+        total_return = last / first - 1
+        annual_return = (1 + total_return) ** (periods_per_year / observations) - 1
+
+        std = np.nanstd(returns, axis=0, ddof=1)
+        volatility = std * np.sqrt(periods_per_year)
+        mean_excess = np.nanmean(excess, axis=0) * periods_per_year
+        downside = np.sqrt(np.nanmean(np.minimum(excess, 0) ** 2, axis=0)) * np.sqrt(periods_per_year)
+        sharpe = mean_excess / volatility
+        sortino = mean_excess / downside
+
+        # ドローダウン：その時点までの最大値からの下落率（値のない日は直前の最大値を使用）
+        peak = np.fmax.accumulate(prices, axis=0)
+        drawdown = prices / peak - 1
+        max_drawdown = np.nanmin(drawdown, axis=0)
+
+        # 最大ドローダウン期間：高値を更新してから回復するまで（未回復なら末尾まで）の最長の本数
+        positions = np.arange(len(prices))[:, None]
+        underwater = drawdown < 0
+        last_high = np.maximum.accumulate(np.where(underwater, -1, positions), axis=0)
+        duration = np.where(underwater, positions - last_high, 0).max(axis=0, initial=0)
+
+        trough = np.where(np.isnan(max_drawdown), 0, np.nanargmin(np.where(np.isnan(drawdown), np.inf, drawdown), axis=0))
+        peak_position = last_high[trough, np.arange(prices.shape[1])]
+
+        calmar = annual_return / np.abs(max_drawdown)
+        calmar = np.where(max_drawdown < 0, calmar, np.nan)
+
+        # ヒストリカル VaR / CVaR：下位 (1 - confidence) 分位点と、それ以下のリターンの平均
+        value_at_risk = np.nanpercentile(returns, (1 - confidence) * 100, axis=0)
+        tail = np.where(returns <= value_at_risk, returns, np.nan)
+        conditional_value_at_risk = np.nanmean(tail, axis=0)
+
+    return {
+        "observations": observations,
+        "total_return": total_return * 100,
+        "annual_return": annual_return * 100,
+        "volatility": volatility * 100,
+        "sharpe_ratio": sharpe,
+        "sortino_ratio": sortino,
+        "calmar_ratio": calmar,
+        "max_drawdown": max_drawdown * 100,
+        "max_drawdown_duration": duration,
+        "value_at_risk": value_at_risk * 100,
+        "conditional_value_at_risk": conditional_value_at_risk * 100,
+        "_peak": peak_position,
+        "_trough": trough,
+    }
+
+
+def _to_float(value) -> Optional[float]:
+    """NaN・無限大を None に変換します"""
+    value = float(value)
+    return value if np.isfinite(value) else None
+
+
+def compute_risk_metrics(
+    values: Union[pd.Series, np.ndarray],
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS,
+    confidence: float = VAR_CONFIDENCE,
+) -> Dict:
+    """
+    1つの価格または資産推移の系列からリスク指標を計算します。
+
+    Args:
+        values: 価格または資産推移
+        risk_free_rate: リスクフリーレート（年率）
+        periods_per_year: 1年あたりの本数
+        confidence: VaR / CVaR の信頼水準
+
+    Returns:
+        指標の辞書（リターン・ボラティリティ・ドローダウン・VaR / CVaR は %、
+        max_drawdown_duration は本数、計算できない値は None）。
+        Series の場合は最大ドローダウンの開始日と底の日付（max_drawdown_peak / max_drawdown_trough）を含みます
+    """
+    prices = _as_array(values)
+    if prices.shape[1] != 1:
+        raise ValueError("compute_risk_metrics takes a single series; use compute_panel_risk_metrics")
+
+    computed = _compute(prices, risk_free_rate, periods_per_year, confidence)
+    result = {name: _to_float(computed[name][0]) for name in METRICS}
+    result["observations"] = int(computed["observations"][0])
+    result["max_drawdown_duration"] = int(computed["max_drawdown_duration"][0])
+
+    if isinstance(values, pd.Series) and result["max_drawdown"] is not None:
+        peak = max(int(computed["_peak"][0]), 0)
+        result["max_drawdown_peak"] = str(values.index[peak])
+        result["max_drawdown_trough"] = str(values.index[int(computed["_trough"][0])])
+    return result
+
+
+def compute_panel_risk_metrics(
+    values: Union[pd.DataFrame, np.ndarray],
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS,
+    confidence: float = VAR_CONFIDENCE,
+) -> pd.DataFrame:
+    """
+    日付×銘柄のパネルから全銘柄のリスク指標をまとめて計算します。
+
+    各行は、その列に対して compute_risk_metrics を呼び出した結果と一致します。
+
+    Args:
+        values: 価格または資産推移のパネル（build_panel を参照）
+        risk_free_rate: リスクフリーレート（年率）
+        periods_per_year: 1年あたりの本数
+        confidence: VaR / CVaR の信頼水準
+
+    Returns:
+        銘柄を行、指標を列に持つ DataFrame（計算できない値は NaN）
+    """
+    computed = _compute(_as_array(values), risk_free_rate, periods_per_year, confidence)
+    index = values.columns if isinstance(values, pd.DataFrame) else None
+    return pd.DataFrame({name: computed[name] for name in METRICS}, index=index)
+
+
+def rolling_risk_metrics(
+    values: Values,
+    window: int = 63,
+    risk_free_rate: float = RISK_FREE_RATE,
+    periods_per_year: int = TRADING_DAYS,
+    confidence: float = VAR_CONFIDENCE,
+) -> Union[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """
+    直近 window 本のリターンによるリスク指標を各時点について計算します。
+
+    平均・標準偏差・分位点は pandas の rolling で、CVaR と窓内の最大ドローダウンは
+    窓を RISK_ROLLING_CHUNK_ELEMENTS 要素ずつ展開した配列演算で計算します。
+
+    Args:
+        values: 価格または資産推移（系列またはパネル）
+        window: 窓の本数（リターンの本数）
+        risk_free_rate: リスクフリーレート（年率）
+        periods_per_year: 1年あたりの本数
+        confidence: VaR / CVaR の信頼水準
+
+    Returns:
+        系列の場合は日付を行、指標を列に持つ DataFrame。
+        パネルの場合は指標名から日付×銘柄の DataFrame への辞書
+        （窓が揃わない先頭の期間は NaN）
+    """
+    if window < 2:
+        raise ValueError("window must be at least 2")
+
+    prices = _as_array(values)
+    frame = pd.DataFrame(
+        prices,
+        index=values.index if isinstance(values, (pd.Series, pd.DataFrame)) else None,
+        columns=values.columns if isinstance(values, pd.DataFrame) else None,
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = frame / frame.shift(1) - 1
+        excess = returns - risk_free_rate / periods_per_year
+        rolling = returns.rolling(window)
+
+        volatility = rolling.std() * np.sqrt(periods_per_year)
+        mean_excess = excess.rolling(window).mean() * periods_per_year
+        downside = np.sqrt((excess.clip(upper=0) ** 2).rolling(window).mean()) * np.sqrt(periods_per_year)
+        value_at_risk = rolling.quantile(1 - confidence)
+
+        tails = _rolling_tails(prices, returns.to_numpy(), value_at_risk.to_numpy(), window)
+        max_drawdown, conditional_value_at_risk = (
+            pd.DataFrame(tail, index=frame.index, columns=frame.columns) for tail in tails
+        )
+        annual_return = (frame / frame.shift(window)) ** (periods_per_year / window) - 1
+        calmar = (annual_return / max_drawdown.abs()).where(max_drawdown < 0)
+
+    metrics = {
+        "volatility": volatility * 100,
+        "sharpe_ratio": mean_excess / volatility,
+        "sortino_ratio": mean_excess / downside,
+        "calmar_ratio": calmar,
+        "max_drawdown": max_drawdown * 100,
+        "value_at_risk": value_at_risk * 100,
+        "conditional_value_at_risk": conditional_value_at_risk * 100,
+    }
+    metrics = {name: metric.replace([np.inf, -np.inf], np.nan) for name, metric in metrics.items()}
+
+    if prices.shape[1] == 1 and not isinstance(values, pd.DataFrame):
+        return pd.DataFrame({name: metric.iloc[:, 0] for name, metric in metrics.items()})
+    return metrics
+
+
+def _rolling_tails(
+    prices: np.ndarray,
+    returns: np.ndarray,
+    value_at_risk: np.ndarray,
+    window: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """窓内の最大ドローダウンと CVaR を計算します（値は比率）"""
+    length, width = prices.shape
+    max_drawdown = np.full((length, width), np.nan)
+    conditional_value_at_risk = np.full((length, width), np.nan)
+    if length <= window:
+        return max_drawdown, conditional_value_at_risk
+
+    # 時点 t の窓：価格は t-window..t の window+1 本、リターンは t-window+1..t の window 本
+    price_windows = np.lib.stride_tricks.sliding_window_view(prices, window + 1, axis=0)
+    return_windows = np.lib.stride_tricks.sliding_window_view(returns[1:], window, axis=0)
+    step = max(1, RISK_ROLLING_CHUNK_ELEMENTS // (width * (window + 1)))
+
+    with warnings.catch_warnings(), np.errstate(divide="ignore", invalid="ignore"):
+        warnings.simplefilter("ignore", RuntimeWarning)
+        for start in range(0, len(price_windows), step):
+            stop = min(start + step, len(price_windows))
+            chunk = price_windows[start:stop]
+            drawdown = chunk / np.maximum.accumulate(chunk, axis=-1) - 1
+            max_drawdown[window + start:window + stop] = drawdown.min(axis=-1)
+
+            tails = return_windows[start:stop]
+            threshold = value_at_risk[window + start:window + stop, :, None]
+            in_tail = tails <= threshold
+            conditional_value_at_risk[window + start:window + stop] = (
+                np.where(in_tail, tails, 0.0).sum(axis=-1) / in_tail.sum(axis=-1)
+            )
+
+    return max_drawdown, conditional_value_at_risk
+
+
+class RiskMetricsCache:
+    """スレッドセーフなリスク指標の LRU キャッシュ"""
+
+    def __init__(self, max_entries: int):
+        """
+        キャッシュを初期化します。
+
+        Args:
+            max_entries: 保持する計算結果の上限（0 以下でキャッシュ無効）
+        """
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, Dict]]" = OrderedDict()
+
+        # 統計
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        series: pd.Series,
+        risk_free_rate: float = RISK_FREE_RATE,
+    ) -> Dict:
+        """
+        キャッシュ済みの指標を返し、ない場合やデータが更新されている場合は計算して格納します。
+
+        データの同一性は本数・最終日・最終値で判定するため、フレームキャッシュの期限切れで
+        再取得したデータに新しい足が加わった場合は計算し直します。
+
+        Args:
+            key: キャッシュのキー（銘柄コード、期間、リスクフリーレートなど）
+            series: 価格の系列
+            risk_free_rate: リスクフリーレート（年率）
+
+        Returns:
+            compute_risk_metrics の結果
+        """
+        fingerprint = (len(series), series.index[-1], float(series.iloc[-1]))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        metrics = compute_risk_metrics(series, risk_free_rate=risk_free_rate)
+
+        if self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = (fingerprint, metrics)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return metrics
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            エントリ数、ヒット数、ミス数を含む辞書
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+
+_cache: Optional[RiskMetricsCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_risk_metrics_cache() -> RiskMetricsCache:
+    """
+    プロセス共有のリスク指標キャッシュを返します。
+
+    Returns:
+        環境変数 RISK_METRICS_CACHE_SIZE で上限を設定した RiskMetricsCache
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RiskMetricsCache(max_entries=RISK_METRICS_CACHE_SIZE)
+        return _cache
+
+
+def ticker_risk_metrics(
+    ticker: str,
+    period: str = "1y",
+    risk_free_rate: float = RISK_FREE_RATE,
+) -> Optional[Dict]:
+    """
+    銘柄の終値からリスク指標を計算します（キャッシュ済みの場合は再計算しません）。
+
+    Args:
+        ticker: 銘柄コード
+        period: 期間
+        risk_free_rate: リスクフリーレート（年率）
+
+    Returns:
+        compute_risk_metrics の結果（データの取得に失敗した場合やデータがない場合は None）
+    """
+    try:
+        df = DataFetcher().fetch_stock_data(ticker, period=period)
+    except Exception as e:
+        logger.error(f"Error fetching data for risk metrics of {ticker}: {str(e)}")
+        return None
+    if df is None or df.empty:
+        return None
+    return get_risk_metrics_cache().get_or_compute((ticker, period, risk_free_rate), df["close"], risk_free_rate)
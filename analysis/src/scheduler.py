@@ -7,11 +7,13 @@
 import schedule
 import time
 import logging
-from typing import List, Callable
+import threading
+from typing import Dict, List, Callable, Optional
 from datetime import datetime
 import requests
 import os
 from dotenv import load_dotenv
+from backend_client import get_backend_client
 
 # 環境変数を読み込み
 load_dotenv()
@@ -21,8 +23,12 @@ logger = logging.getLogger(__name__)
 
 # 設定
 BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:3000")
+ANALYSIS_ENGINE_URL = os.getenv("ANALYSIS_ENGINE_URL", "http://localhost:5000")  # 分析エンジン（Flask）のURL
 ANALYSIS_INTERVAL = int(os.getenv("ANALYSIS_INTERVAL", 1440))  # デフォルト: 1日
 ANALYSIS_TIME = os.getenv("ANALYSIS_TIME", "15:30")  # 日本市場の取引終了時刻
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 5))  # 分析ジョブの状態確認間隔（秒）
+JOB_POLL_TIMEOUT = float(os.getenv("JOB_POLL_TIMEOUT", 6 * 3600))  # 分析ジョブの完了を待つ最大時間（秒）
+INTRADAY_SCAN = os.getenv("INTRADAY_SCAN", "false").lower() == "true"  # 取引時間中の分足スキャンを有効にするか
 
 class AnalysisScheduler:
     """分析エンジンスケジューラ"""
@@ -127,50 +133,127 @@ def analyze_and_notify(tickers: List[str] = None):
 
         # バックエンドからティッカーリストを取得
         if not tickers:
-            try:
-                response = requests.get(
-                    f"{BACKEND_URL}/api/stocks",
-                    params={"limit": 1000},
-                    timeout=30
-                )
-                response.raise_for_status()
-                stocks = response.json()
-
-                if isinstance(stocks, dict) and "data" in stocks:
-                    # バックエンドは 'symbol' フィールドを返す（例: "4478.T"）
-                    tickers = [s["symbol"] for s in stocks["data"]]
-                elif isinstance(stocks, list):
-                    # フォールバック: 直接リストの場合
-                    tickers = [s["symbol"] for s in stocks]
-                else:
-                    logger.warning("Unexpected response format from backend")
-                    return
-
-            except requests.RequestException as e:
-                logger.error(f"Failed to fetch stocks from backend: {str(e)}")
+            tickers = fetch_tickers()
+            if tickers is None:
                 return
 
         logger.info(f"Analyzing {len(tickers)} stocks")
 
-        # ローカルFlaskサーバーで分析を実行
+        # ローカルFlaskサーバーで分析ジョブを実行し、完了までポーリング
         try:
-            response = requests.post(
-                "http://localhost:5000/notify-analysis",
-                json={"tickers": tickers},
-                timeout=300
-            )
-            response.raise_for_status()
-
+            job = run_analysis_job(tickers)
             logger.info(
-                f"Analysis job completed: {response.json().get('analyzed_count')} stocks analyzed"
+                f"Analysis job completed: {job['summary'].get('analyzed_count')} stocks analyzed"
             )
 
-        except requests.RequestException as e:
+        except (requests.RequestException, RuntimeError) as e:
             logger.error(f"Failed to run analysis: {str(e)}")
 
     except Exception as e:
         logger.error(f"Error in analysis job: {str(e)}")
 
+def fetch_tickers() -> Optional[List[str]]:
+    """
+    バックエンドから分析対象の銘柄コードを取得します。
+
+    Returns:
+        銘柄コードのリスト（取得に失敗した場合は None）
+    """
+    try:
+        response = get_backend_client(BACKEND_URL).get(
+            "/api/stocks",
+            params={"limit": 1000},
+            timeout=30
+        )
+        response.raise_for_status()
+        stocks = response.json()
+
+        if isinstance(stocks, dict) and "data" in stocks:
+            # バックエンドは 'symbol' フィールドを返す（例: "4478.T"）
+            return [s["symbol"] for s in stocks["data"]]
+        elif isinstance(stocks, list):
+            # フォールバック: 直接リストの場合
+            return [s["symbol"] for s in stocks]
+
+        logger.warning("Unexpected response format from backend")
+        return None
+
+    except requests.RequestException as e:
+        logger.error(f"Failed to fetch stocks from backend: {str(e)}")
+        return None
+
+def start_intraday_scan(stop_event: Optional[threading.Event] = None) -> Optional[threading.Thread]:
+    """
+    取引時間中の分足スキャンをバックグラウンドスレッドで開始します。
+
+    Args:
+        stop_event: 設定されるとスキャンを終了するイベント
+
+    Returns:
+        スキャンを実行するスレッド（銘柄の取得に失敗した場合は None）
+    """
+    # 分足スキャンを使わない場合に yfinance などを読み込まないよう、ここでインポートする
+    from intraday import IntradayScanner, push_to_backend
+
+    tickers = fetch_tickers()
+    if not tickers:
+        logger.error("Intraday scan not started: no tickers")
+        return None
+
+    thread = threading.Thread(
+        target=IntradayScanner(sink=lambda results: push_to_backend(results, BACKEND_URL)).run,
+        args=(tickers, stop_event),
+        name="intraday-scan",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+def run_analysis_job(tickers: List[str]) -> Dict:
+    """
+    分析エンジンに非同期の分析ジョブを投入し、完了するまでポーリングします。
+
+    HTTP リクエストは投入と状態確認のみで、分析自体の所要時間には依存しません。
+
+    Args:
+        tickers: 分析対象の銘柄コードリスト
+
+    Returns:
+        完了したジョブの状態
+
+    Raises:
+        requests.RequestException: 分析エンジンとの通信に失敗した場合
+        RuntimeError: ジョブが失敗した場合、または JOB_POLL_TIMEOUT 以内に完了しない場合
+    """
+    client = get_backend_client(ANALYSIS_ENGINE_URL)
+    response = client.post(
+        "/notify-analysis",
+        json={"tickers": tickers, "async": True},
+        timeout=30
+    )
+    response.raise_for_status()
+    job_id = response.json()["job_id"]
+    logger.info(f"Analysis job {job_id} submitted for {len(tickers)} stocks")
+
+    deadline = time.monotonic() + JOB_POLL_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(JOB_POLL_INTERVAL)
+        response = client.get(f"/jobs/{job_id}", timeout=10)
+        response.raise_for_status()
+        job = response.json()
+
+        progress = job["progress"]
+        logger.info(
+            f"Analysis job {job_id}: {job['status']} "
+            f"({progress['processed']}/{progress['total']} processed)"
+        )
+        if job["status"] == "completed":
+            return job
+        if job["status"] == "failed":
+            raise RuntimeError(f"Analysis job {job_id} failed: {job.get('error')}")
+
+    raise RuntimeError(f"Analysis job {job_id} did not finish within {JOB_POLL_TIMEOUT}s")
+
 def retry_failed_analysis(max_retries: int = 3):
     """
     失敗した分析を再試行します。
@@ -183,8 +266,8 @@ def retry_failed_analysis(max_retries: int = 3):
 
         # バックエンドから失敗した分析を取得
         try:
-            response = requests.get(
-                f"{BACKEND_URL}/api/analysis/failed",
+            response = get_backend_client(BACKEND_URL).get(
+                "/api/analysis/failed",
                 timeout=30
             )
             response.raise_for_status()
@@ -199,16 +282,11 @@ def retry_failed_analysis(max_retries: int = 3):
             # 再分析を実行
             for attempt in range(max_retries):
                 try:
-                    response = requests.post(
-                        "http://localhost:5000/notify-analysis",
-                        json={"tickers": tickers},
-                        timeout=300
-                    )
-                    response.raise_for_status()
+                    run_analysis_job(tickers)
                     logger.info(f"Retry job completed on attempt {attempt + 1}")
                     break
 
-                except requests.RequestException as e:
+                except (requests.RequestException, RuntimeError) as e:
                     logger.warning(f"Retry attempt {attempt + 1} failed: {str(e)}")
                     if attempt == max_retries - 1:
                         logger.error(f"Retry job failed after {max_retries} attempts")
@@ -224,8 +302,8 @@ def health_check():
     分析エンジンのヘルスチェックを実行します。
     """
     try:
-        response = requests.get(
-            "http://localhost:5000/health",
+        response = get_backend_client(ANALYSIS_ENGINE_URL).get(
+            "/health",
             timeout=5
         )
         response.raise_for_status()
@@ -264,6 +342,10 @@ if __name__ == "__main__":
         unit="hours"
     )
 
+    # 取引時間中の分足スキャン
+    if INTRADAY_SCAN:
+        start_intraday_scan()
+
     logger.info("Analysis scheduler initialized")
     logger.info(f"Daily analysis scheduled at {ANALYSIS_TIME}")
 
@@ -0,0 +1,171 @@
+"""
+リクエスト集約（single-flight）モジュール
+
+同じキーに対する同時実行中の処理を1回にまとめ、後から来た呼び出し元は
+先行する処理の完了を待って同じ結果（または例外）を受け取ります。
+スケジューラーの定期分析とユーザー操作による一括分析が重なった場合などに、
+同じ銘柄の取得・分析が重複して実行されるのを防ぎます。
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", 300))  # 待機側のタイムアウト（秒、0以下で無制限）
+
+
+class SingleFlight:
+    """キーごとに同時実行を1回にまとめるスレッドセーフなグループ"""
+
+    def __init__(self, name: str = "single_flight", timeout: Optional[float] = SINGLE_FLIGHT_TIMEOUT):
+        """
+        SingleFlight を初期化します。
+
+        Args:
+            name: ログ出力用の名前
+            timeout: 待機側のデフォルトのタイムアウト（秒、None または0以下で無制限）
+        """
+        self.name = name
+        self.timeout = timeout if timeout and timeout > 0 else None
+
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Future] = {}
+
+        # 統計
+        self._calls = 0
+        self._executions = 0
+        self._suppressed = 0
+        self._timeouts = 0
+        self._errors = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        同じキーの処理が実行中であれば完了を待ってその結果を返し、
+        なければ fn を呼び出し元のスレッドで実行します。
+
+        結果は全ての呼び出し元で同じオブジェクトが共有されるため、
+        変更する場合は呼び出し元でコピーしてください。
+
+        Args:
+            key: 集約に使用するキー
+            fn: 実行する処理
+            timeout: 待機側のタイムアウト（秒、省略時はインスタンスのデフォルト）
+
+        Returns:
+            fn の戻り値
+
+        Raises:
+            TimeoutError: 待機側がタイムアウトした場合（先行する処理は継続します）
+            Exception: fn が送出した例外（待機中の全ての呼び出し元に送出されます）
+        """
+        future, owner = self.begin(key)
+        if not owner:
+            return self.wait(key, future, timeout)
+
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, future, error=e)
+            raise
+
+        self.finish(key, future, result=result)
+        return result
+
+    def begin(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        キーの処理を開始するか、実行中の処理に合流します。
+
+        処理を複数の段階に分けて実行する呼び出し元（一括分析のパイプラインなど）向けです。
+        owner が True の場合、呼び出し元は必ず finish で結果または例外を設定してください。
+
+        Args:
+            key: 集約に使用するキー
+
+        Returns:
+            (Future, owner) のタプル（owner が False の場合は wait で結果を待ちます）
+        """
+        with self._lock:
+            self._calls += 1
+            future = self._in_flight.get(key)
+            if future is None:
+                future = Future()
+                self._in_flight[key] = future
+                self._executions += 1
+                return future, True
+            self._suppressed += 1
+            return future, False
+
+    def wait(self, key: Hashable, future: Future, timeout: Optional[float] = None) -> Any:
+        """
+        begin で合流した処理の完了を待って結果を返します。
+
+        Args:
+            key: 集約に使用するキー
+            future: begin が返した Future
+            timeout: 待機側のタイムアウト（秒、省略時はインスタンスのデフォルト）
+
+        Returns:
+            先行する処理の結果
+
+        Raises:
+            TimeoutError: タイムアウトした場合
+            Exception: 先行する処理が送出した例外
+        """
+        timeout = timeout if timeout is not None else self.timeout
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            logger.warning(f"[{self.name}] Timed out after {timeout}s waiting for {key}")
+            raise TimeoutError(f"Timed out waiting for in-flight request: {key}")
+
+    def finish(
+        self,
+        key: Hashable,
+        future: Future,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """
+        begin で開始した処理の結果（または例外）を設定し、待機中の呼び出し元に通知します。
+
+        Args:
+            key: 集約に使用するキー
+            future: begin が返した Future
+            result: 処理結果
+            error: 処理が失敗した場合の例外
+        """
+        with self._lock:
+            if error is not None:
+                self._errors += 1
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            呼び出し数、実行数、集約された呼び出し数、タイムアウト数、エラー数を含む辞書
+        """
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "executions": self._executions,
+                "suppressed": self._suppressed,
+                "timeouts": self._timeouts,
+                "errors": self._errors,
+                "in_flight": len(self._in_flight),
+            }
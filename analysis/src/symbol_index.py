@@ -0,0 +1,219 @@
+"""
+銘柄ID→銘柄コードの索引モジュール
+
+バックエンドの銘柄一覧（/api/stocks）をローカルに辞書としてキャッシュし、
+stockIds から銘柄コードへの変換をリクエストごとの一覧取得なしで行います。
+
+- 一覧は全ページを取得して索引化し、ID の解決は辞書参照で行います
+- 索引が古くなった場合は、呼び出しをブロックせずにバックグラウンドで更新します
+  （1ページ目の ETag が変わっていなければ残りのページは取得しません。
+  1ページ目には総件数が含まれるため、銘柄の追加・削除は ETag の変化で検出されます）
+- 索引にない ID のみ、/api/stocks/<id> で個別に問い合わせます
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import requests
+
+from backend_client import BackendClient, get_backend_client
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 設定
+SYMBOL_INDEX_REFRESH_SECONDS = int(os.getenv("SYMBOL_INDEX_REFRESH_SECONDS", 300))  # 索引を更新するまでの秒数
+
+# /api/stocks の1ページあたりの最大件数
+_PAGE_SIZE = 100
+
+
+class SymbolIndex:
+    """銘柄ID→銘柄コードのキャッシュ付き索引"""
+
+    def __init__(self, client: BackendClient, refresh_seconds: int = SYMBOL_INDEX_REFRESH_SECONDS):
+        """
+        索引を初期化します（一覧の取得は最初の解決時に行います）。
+
+        Args:
+            client: バックエンドクライアント
+            refresh_seconds: 索引を更新するまでの秒数
+        """
+        self.client = client
+        self.refresh_seconds = refresh_seconds
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._by_id: Dict[int, str] = {}
+        self._etag: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._refreshing = False
+
+        # 統計
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._not_modified = 0
+        self._lookups = 0
+
+    def resolve(self, stock_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        銘柄IDを銘柄コードに変換します。
+
+        Args:
+            stock_ids: 銘柄IDのリスト
+
+        Returns:
+            銘柄IDから銘柄コードへの辞書（入力順、見つからない ID は含まない）
+
+        Raises:
+            requests.RequestException: 初回の一覧取得に失敗した場合
+        """
+        stock_ids = list(dict.fromkeys(int(i) for i in stock_ids))
+
+        if self._loaded_at is None:
+            self.refresh()
+        elif self.age_seconds() > self.refresh_seconds:
+            self._refresh_in_background()
+
+        with self._lock:
+            resolved = {i: self._by_id[i] for i in stock_ids if i in self._by_id}
+            unknown = [i for i in stock_ids if i not in resolved]
+            self._hits += len(resolved)
+            self._misses += len(unknown)
+
+        if unknown:
+            resolved.update(self._lookup(unknown))
+
+        return {i: resolved[i] for i in stock_ids if i in resolved}
+
+    def refresh(self) -> bool:
+        """
+        バックエンドから一覧を取得して索引を更新します。
+
+        1ページ目を If-None-Match 付きで取得し、変更がなければ残りのページは取得しません。
+
+        Returns:
+            索引が更新された場合は True（変更がなかった場合は False）
+
+        Raises:
+            requests.RequestException: 一覧の取得に失敗した場合
+        """
+        with self._refresh_lock:
+            headers = {"If-None-Match": self._etag} if self._etag else {}
+            response = self.client.get(
+                "/api/stocks", params={"page": 1, "limit": _PAGE_SIZE}, headers=headers, timeout=10
+            )
+            if response.status_code == 304:
+                with self._lock:
+                    self._loaded_at = time.monotonic()
+                    self._not_modified += 1
+                return False
+            response.raise_for_status()
+
+            body = response.json()
+            stocks = list(body.get("data", []))
+            pages = body.get("pagination", {}).get("pages", 1)
+            for page in range(2, pages + 1):
+                page_response = self.client.get(
+                    "/api/stocks", params={"page": page, "limit": _PAGE_SIZE}, timeout=10
+                )
+                page_response.raise_for_status()
+                stocks.extend(page_response.json().get("data", []))
+
+            by_id = {stock["id"]: stock["symbol"] for stock in stocks}
+            with self._lock:
+                self._by_id = by_id
+                self._etag = response.headers.get("ETag")
+                self._loaded_at = time.monotonic()
+                self._refreshes += 1
+
+        logger.info(f"Symbol index refreshed: {len(by_id)} stocks")
+        return True
+
+    def age_seconds(self) -> Optional[float]:
+        """索引を最後に取得・検証してからの秒数を返します（未取得の場合は None）"""
+        loaded_at = self._loaded_at
+        return time.monotonic() - loaded_at if loaded_at is not None else None
+
+    def get_stats(self) -> Dict:
+        """
+        統計情報を返します。
+
+        Returns:
+            索引の件数、経過秒数、ヒット数、個別問い合わせ数などを含む辞書
+        """
+        with self._lock:
+            return {
+                "size": len(self._by_id),
+                "age_seconds": self.age_seconds(),
+                "refresh_seconds": self.refresh_seconds,
+                "etag": self._etag,
+                "hits": self._hits,
+                "misses": self._misses,
+                "refreshes": self._refreshes,
+                "not_modified": self._not_modified,
+                "targeted_lookups": self._lookups,
+            }
+
+    def _refresh_in_background(self) -> None:
+        """索引の更新をバックグラウンドで開始します（更新中の場合は何もしません）"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run() -> None:
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Background symbol index refresh failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="symbol-index-refresh", daemon=True).start()
+
+    def _lookup(self, stock_ids: List[int]) -> Dict[int, str]:
+        """索引にない銘柄IDを個別に問い合わせ、見つかったものを索引に追加します"""
+        found = {}
+        for stock_id in stock_ids:
+            with self._lock:
+                self._lookups += 1
+            try:
+                response = self.client.get(f"/api/stocks/{stock_id}", timeout=10)
+                if response.status_code == 404:
+                    continue
+                response.raise_for_status()
+                found[stock_id] = response.json()["data"]["symbol"]
+            except (requests.RequestException, KeyError, ValueError) as e:
+                logger.warning(f"Failed to look up stock {stock_id}: {str(e)}")
+
+        if found:
+            with self._lock:
+                self._by_id.update(found)
+        return found
+
+
+_indexes: Dict[str, SymbolIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_symbol_index(base_url: Optional[str] = None) -> SymbolIndex:
+    """
+    プロセス共有の SymbolIndex を返します。
+
+    Args:
+        base_url: バックエンドのベース URL（省略時は環境変数 BACKEND_URL）
+
+    Returns:
+        共有の BackendClient を使用する SymbolIndex
+    """
+    client = get_backend_client(base_url)
+    with _indexes_lock:
+        if client.base_url not in _indexes:
+            _indexes[client.base_url] = SymbolIndex(client)
+        return _indexes[client.base_url]
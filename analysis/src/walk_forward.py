@@ -0,0 +1,306 @@
+"""
+ウォークフォワード検証モジュール
+
+長期の株価データに学習期間と検証期間の窓をずらしながら設定し、
+学習期間で最も成績の良いパラメーターの組み合わせを選んで、直後の検証期間で評価します。
+組み合わせを1つだけ指定した場合は、固定のパラメーターを期間ごとに評価します。
+
+判定は全期間について先読みなしで1回だけ計算し（optimizer.signal_matrix を参照）、
+各フォールドはその判定を窓で切り出して売買をシミュレーションします。
+フォールドごとに指標を計算し直さないため、10年分の日足でもフォールド数に比例した
+コストは売買のシミュレーションのみです。
+銘柄（銘柄数がワーカー数より少ない場合は銘柄内の組み合わせのブロック）は、
+CPU 計算プール（compute_pool を参照）で並列に評価します。
+組み合わせで分担するため、各組み合わせの判定は全体で1回だけ計算されます。
+"""
+
+import logging
+import os
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import WARMUP_BARS
+from compute_pool import ComputePool, get_compute_pool
+from optimizer import (
+    OPTIMIZER_COMBO_BLOCK,
+    SeriesCache,
+    default_parameters,
+    signal_matrix,
+    simulate_window,
+)
+
+# ロギング設定
+logger = logging.getLogger(__name__)
+
+# 学習期間と検証期間の本数（既定: 2年 / 6か月の日足）
+WALK_FORWARD_TRAIN_BARS = int(os.getenv("WALK_FORWARD_TRAIN_BARS", 504))
+WALK_FORWARD_TEST_BARS = int(os.getenv("WALK_FORWARD_TEST_BARS", 126))
+
+
+def make_folds(
+    length: int,
+    train_bars: int = WALK_FORWARD_TRAIN_BARS,
+    test_bars: int = WALK_FORWARD_TEST_BARS,
+    step: Optional[int] = None,
+    anchored: bool = False,
+) -> List[Tuple[int, int, int]]:
+    """
+    学習期間と検証期間の窓を作成します。
+
+    最初の学習期間はウォームアップ（WARMUP_BARS）の直後から始まり、
+    窓は step 本ずつずれます。検証期間が重ならないよう、step は test_bars 以上にします。
+
+    Args:
+        length: データの本数
+        train_bars: 学習期間の本数
+        test_bars: 検証期間の本数
+        step: 窓をずらす本数（省略時は test_bars）
+        anchored: True の場合は学習期間の開始位置を固定し、学習期間を伸ばしていく
+
+    Returns:
+        (学習期間の開始位置, 検証期間の開始位置, 検証期間の終了位置) のリスト
+    """
+    step = step or test_bars
+    if train_bars < 1 or test_bars < 1:
+        raise ValueError("train_bars and test_bars must be positive")
+    if step < test_bars:
+        raise ValueError("step must be at least test_bars so that test windows do not overlap")
+
+    folds = []
+    train_start = WARMUP_BARS
+    test_start = train_start + train_bars
+    while test_start + test_bars <= length:
+        folds.append((train_start, test_start, test_start + test_bars))
+        test_start += step
+        if not anchored:
+            train_start += step
+    return folds
+
+
+def _best_combos(
+    cache: SeriesCache,
+    prices: np.ndarray,
+    combos: List[Dict],
+    folds: List[Tuple[int, int, int]],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """フォールドごとに学習期間のリターン合計が最大の組み合わせを選びます"""
+    # (フォールド数 × 組み合わせ数 × 4) の学習期間の成績
+    train = np.empty((len(folds), len(combos), 4))
+    for start in range(0, len(combos), OPTIMIZER_COMBO_BLOCK):
+        block = combos[start:start + OPTIMIZER_COMBO_BLOCK]
+        signals = signal_matrix(cache, block)
+        for i, (train_start, test_start, _) in enumerate(folds):
+            train[i, start:start + len(block)] = simulate_window(prices, signals, train_start, test_start)
+
+    best = train[:, :, 2].argmax(axis=1)
+    return best, train[np.arange(len(folds)), best]
+
+
+def _combo_slice(count: int, part: int, parts: int) -> Tuple[int, int]:
+    """組み合わせを parts 個の連続したブロックに分けたときの part 番目の範囲を返します"""
+    return count * part // parts, count * (part + 1) // parts
+
+
+def walk_forward_frame(
+    df: Optional[pd.DataFrame],
+    combos: Optional[List[Dict]] = None,
+    train_bars: int = WALK_FORWARD_TRAIN_BARS,
+    test_bars: int = WALK_FORWARD_TEST_BARS,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    part: int = 0,
+    parts: int = 1,
+) -> List[Dict]:
+    """
+    1銘柄のウォークフォワード検証を実行します。
+
+    parts が2以上の場合は、組み合わせを parts 個の連続したブロックに分けた part 番目のみを
+    候補として評価します（merge_parts で各ブロックの結果から全体の最良を選びます）。
+
+    Args:
+        df: OHLCV データ
+        combos: 候補の組み合わせ（省略時は TechnicalAnalyzer の現在の設定値のみ）
+        train_bars: 学習期間の本数
+        test_bars: 検証期間の本数
+        step: 窓をずらす本数（省略時は test_bars）
+        anchored: 学習期間の開始位置を固定するかどうか
+        part: 評価する組み合わせのブロック
+        parts: 組み合わせのブロック数（1銘柄の組み合わせを複数のワーカーで分担する場合に使用）
+
+    Returns:
+        フォールドごとの結果（選ばれたパラメーター、学習期間・検証期間の取引数、勝ち数、勝率、
+        リターン合計 %、複利リターン %）のリスト（データが不足している場合は空）
+    """
+    if df is None or df.empty:
+        return []
+    close = df["close"] if "close" in df.columns else df["Close"]
+    folds = make_folds(len(close), train_bars, test_bars, step, anchored)
+    combos = combos or [default_parameters()]
+    start, stop = _combo_slice(len(combos), part, parts)
+    if not folds or start == stop:
+        return []
+
+    combos = combos[start:stop]
+    cache = SeriesCache(close)
+    prices = close.to_numpy(dtype=float)
+    best, train_stats = _best_combos(cache, prices, combos, folds)
+
+    # 選ばれた組み合わせの判定は、組み合わせごとに1回だけ計算する
+    chosen = sorted(set(best.tolist()))
+    rows = dict(zip(chosen, signal_matrix(cache, [combos[index] for index in chosen])))
+
+    results = []
+    for number, ((train_start, test_start, test_end), index, train) in enumerate(zip(folds, best, train_stats)):
+        test = simulate_window(prices, rows[index][None, :], test_start, test_end)[0]
+        results.append({
+            "fold": number,
+            "train_start": str(close.index[train_start]),
+            "test_start": str(close.index[test_start]),
+            "test_end": str(close.index[test_end - 1]),
+            "params": combos[index],
+            **_window_metrics("train", train),
+            **_window_metrics("test", test),
+        })
+    return results
+
+
+def _window_metrics(prefix: str, stats: np.ndarray) -> Dict:
+    """simulate_window の1行を結果の辞書に変換します"""
+    trades, wins, total_return, compound_return = stats
+    return {
+        f"{prefix}_trades": int(trades),
+        f"{prefix}_wins": int(wins),
+        f"{prefix}_winning_rate": float(wins / trades * 100) if trades > 0 else 0.0,
+        f"{prefix}_return": float(total_return),
+        f"{prefix}_compound_return": float(compound_return),
+    }
+
+
+def merge_parts(parts: List[Optional[List[Dict]]]) -> List[Dict]:
+    """
+    組み合わせのブロックごとの walk_forward_frame の結果から、フォールドごとに
+    学習期間のリターン合計が最大の結果を選びます。
+
+    同じ値の場合は前のブロックの結果を選ぶため、全ての組み合わせをまとめて評価した結果と一致します。
+
+    Args:
+        parts: ブロック順の walk_forward_frame の結果（失敗したブロックは None）
+
+    Returns:
+        フォールド番号順の結果（失敗したブロックがある場合は空）
+    """
+    if any(folds is None for folds in parts):
+        return []
+
+    best: Dict[int, Dict] = {}
+    for folds in parts:
+        for fold in folds:
+            current = best.get(fold["fold"])
+            if current is None or fold["train_return"] > current["train_return"]:
+                best[fold["fold"]] = fold
+    return [best[number] for number in sorted(best)]
+
+
+def summarize_folds(folds: List[Dict]) -> Dict:
+    """
+    フォールドごとの検証期間の結果を集計します。
+
+    Args:
+        folds: walk_forward_frame の結果
+
+    Returns:
+        フォールド数、取引数、勝率、検証期間を連結した複利リターン（%）、
+        プラスだったフォールドの割合、最も多く選ばれたパラメーターを含む辞書
+    """
+    if not folds:
+        return {"folds": 0}
+
+    trades = sum(fold["test_trades"] for fold in folds)
+    wins = sum(fold["test_wins"] for fold in folds)
+    compound = np.expm1(np.log1p(np.array([fold["test_compound_return"] for fold in folds]) / 100).sum())
+    chosen = Counter(tuple(sorted(fold["params"].items())) for fold in folds)
+    params, count = chosen.most_common(1)[0]
+
+    return {
+        "folds": len(folds),
+        "test_trades": trades,
+        "test_winning_rate": wins / trades * 100 if trades > 0 else 0.0,
+        "test_compound_return": float(compound * 100),
+        "mean_fold_return": float(np.mean([fold["test_compound_return"] for fold in folds])),
+        "positive_fold_ratio": float(np.mean([fold["test_compound_return"] > 0 for fold in folds])),
+        "most_chosen_params": dict(params),
+        "most_chosen_ratio": count / len(folds),
+    }
+
+
+def run_walk_forward(
+    frames: Dict[str, Optional[pd.DataFrame]],
+    combos: Optional[List[Dict]] = None,
+    train_bars: int = WALK_FORWARD_TRAIN_BARS,
+    test_bars: int = WALK_FORWARD_TEST_BARS,
+    step: Optional[int] = None,
+    anchored: bool = False,
+    pool: Optional[ComputePool] = None,
+) -> Dict:
+    """
+    複数銘柄のウォークフォワード検証を並列に実行します。
+
+    銘柄数がワーカー数より少ない場合は、各銘柄の組み合わせを連続したブロックに分けて
+    別々のワーカーで評価します（1ブロックは OPTIMIZER_COMBO_BLOCK 件以上）。
+    フォールドではなく組み合わせで分担するため、判定の計算が重複しません。
+
+    Args:
+        frames: 銘柄コードから OHLCV データへの辞書
+        combos: 候補の組み合わせ（省略時は TechnicalAnalyzer の現在の設定値のみ）
+        train_bars: 学習期間の本数
+        test_bars: 検証期間の本数
+        step: 窓をずらす本数（省略時は test_bars）
+        anchored: 学習期間の開始位置を固定するかどうか
+        pool: 計算プール（省略時はプロセス共有のプール）
+
+    Returns:
+        銘柄ごとのフォールドの結果と集計（tickers）、全銘柄の集計（summary）を含む辞書
+    """
+    make_folds(0, train_bars, test_bars, step, anchored)  # 引数の検証のみ
+    pool = pool or get_compute_pool()
+
+    tickers = [ticker for ticker, df in frames.items() if df is not None and not df.empty]
+    parts = 1
+    if tickers:
+        blocks = -(-len(combos or [None]) // OPTIMIZER_COMBO_BLOCK)
+        parts = max(1, min(pool.max_workers // len(tickers), blocks))
+    units = {(ticker, part, parts): frames[ticker] for ticker in tickers for part in range(parts)}
+
+    results = pool.map_frames(
+        "walk_forward",
+        units,
+        combos=combos,
+        train_bars=train_bars,
+        test_bars=test_bars,
+        step=step,
+        anchored=anchored,
+    )
+
+    per_ticker: Dict[str, Dict] = {}
+    for ticker in tickers:
+        folds = merge_parts([results.get((ticker, part, parts)) for part in range(parts)])
+        per_ticker[ticker] = {"folds": folds, "summary": summarize_folds(folds)}
+
+    evaluated = [entry["summary"] for entry in per_ticker.values() if entry["summary"]["folds"] > 0]
+    returns = [summary["test_compound_return"] for summary in evaluated]
+    summary = {
+        "tickers": len(evaluated),
+        "folds": sum(s["folds"] for s in evaluated),
+        "test_trades": sum(s["test_trades"] for s in evaluated),
+        "mean_compound_return": float(np.mean(returns)) if returns else None,
+        "median_compound_return": float(np.median(returns)) if returns else None,
+        "positive_ticker_ratio": float(np.mean([r > 0 for r in returns])) if returns else None,
+    }
+    logger.info(
+        f"Walk-forward completed: {summary['tickers']} tickers, {summary['folds']} folds, "
+        f"{len(combos or [None])} candidate combinations"
+    )
+    return {"tickers": per_ticker, "summary": summary}
@@ -0,0 +1,33 @@
+"""
+pytest 共通設定
+
+分析エンジンのモジュールは src ディレクトリを起点としたインポート
+（例: from indicators import TechnicalIndicators）を使用するため、
+テスト実行時に src をインポートパスに追加します。
+テスト用の OHLCV データを作成する make_ohlcv フィクスチャも定義します。
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from data_providers import generate_ohlcv  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def make_ohlcv():
+    """
+    テスト用の OHLCV データ（日本時間の営業日の日足、小文字の列名）を作成する関数を返します。
+
+    返す関数の引数は seed（乱数シード）、periods（本数、デフォルト: 250）、
+    start（開始日、デフォルト: 2022-01-03）で、同じ引数からは常に同じデータを作成します。
+    """
+    def factory(seed: int, periods: int = 250, start: str = "2022-01-03") -> pd.DataFrame:
+        index = pd.date_range(start, periods=periods, freq="B", tz="Asia/Tokyo", name="Date")
+        return generate_ohlcv(index, seed=seed, drift=0.0)
+
+    return factory
@@ -0,0 +1,149 @@
+"""
+アナライザーのユニットテスト
+
+analyzer.py のテストケースを実装します。
+ネットワークを使用しないよう、DataFetcher はスタブに置き換えます。
+"""
+
+import threading
+import time
+import pytest
+import analyzer
+from analyzer import TechnicalAnalyzer
+
+
+class StubFetcher:
+    """遅延付きの DataFetcher スタブ（同時実行数を記録します）"""
+
+    delays = {}
+    make_ohlcv = None
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def fetch_stock_data(self, ticker, period="1y", interval="1d"):
+        with StubFetcher.lock:
+            StubFetcher.active += 1
+            StubFetcher.max_active = max(StubFetcher.max_active, StubFetcher.active)
+        try:
+            time.sleep(StubFetcher.delays.get(ticker, 0))
+            if ticker == "FAIL.T":
+                raise ValueError("Empty data for FAIL.T")
+            return StubFetcher.make_ohlcv(int(ticker.split(".")[0]))
+        finally:
+            with StubFetcher.lock:
+                StubFetcher.active -= 1
+
+
+class TestAnalyzeMultipleStocks:
+    """パイプライン化した複数銘柄分析のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def stub_fetcher(self, monkeypatch, make_ohlcv):
+        """DataFetcher をスタブ化します"""
+        StubFetcher.delays = {}
+        StubFetcher.make_ohlcv = staticmethod(make_ohlcv)
+        StubFetcher.active = 0
+        StubFetcher.max_active = 0
+        monkeypatch.setattr(analyzer, "DataFetcher", StubFetcher)
+        monkeypatch.setattr(analyzer, "DEMO_MODE", False)
+
+    def test_results_match_serial_analysis(self):
+        """パイプラインの結果が1銘柄ずつの分析結果と一致することを確認"""
+        tickers = [f"{1000 + i}.T" for i in range(6)]
+
+        results = TechnicalAnalyzer.analyze_multiple_stocks(tickers, max_workers=3)
+
+        assert list(results) == tickers
+        for ticker in tickers:
+            assert results[ticker] == TechnicalAnalyzer.analyze_stock(ticker)
+
+    def test_results_stream_in_completion_order(self):
+        """取得が早く完了した銘柄から結果が返されることを確認"""
+        StubFetcher.delays = {"1000.T": 0.2, "1001.T": 0.0}
+
+        order = [t for t, _ in TechnicalAnalyzer.iter_analyze_stocks(["1000.T", "1001.T"], max_workers=2)]
+
+        assert order == ["1001.T", "1000.T"]
+
+    def test_concurrency_is_bounded(self):
+        """同時に実行される取得数が max_workers 以下であることを確認"""
+        tickers = [f"{1000 + i}.T" for i in range(8)]
+        StubFetcher.delays = {t: 0.02 for t in tickers}
+
+        TechnicalAnalyzer.analyze_multiple_stocks(tickers, max_workers=2)
+
+        assert StubFetcher.max_active == 2
+
+    def test_failed_fetch_is_excluded(self):
+        """取得に失敗した銘柄が結果に含まれないことを確認"""
+        results = TechnicalAnalyzer.analyze_multiple_stocks(["1000.T", "FAIL.T"], max_workers=2)
+
+        assert list(results) == ["1000.T"]
+
+    def test_concurrent_analysis_of_same_ticker_is_coalesced(self):
+        """同じ銘柄の同時分析でデータ取得が1回にまとめられることを確認"""
+        StubFetcher.delays = {"1000.T": 0.1}
+        calls = []
+        original = StubFetcher.fetch_stock_data
+
+        def counting_fetch(self, ticker, period="1y", interval="1d"):
+            calls.append(ticker)
+            return original(self, ticker, period, interval)
+
+        StubFetcher.fetch_stock_data = counting_fetch
+        try:
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(TechnicalAnalyzer.analyze_stock("1000.T")))
+                for _ in range(4)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            StubFetcher.fetch_stock_data = original
+
+        assert calls == ["1000.T"]
+        assert len(results) == 4
+        assert all(result == results[0] for result in results)
+        assert len({id(result) for result in results}) == 4
+
+    def test_overlapping_batches_share_fetches(self):
+        """重なって実行された2つの一括分析で、同じ銘柄の取得・計算が1回にまとめられることを確認"""
+        tickers = ["1000.T", "1001.T", "1002.T"]
+        StubFetcher.delays = {t: 0.2 for t in tickers}
+        calls = []
+        original = StubFetcher.fetch_stock_data
+
+        def counting_fetch(self, ticker, period="1y", interval="1d"):
+            calls.append(ticker)
+            return original(self, ticker, period, interval)
+
+        StubFetcher.fetch_stock_data = counting_fetch
+        try:
+            results = []
+
+            def run():
+                results.append(TechnicalAnalyzer.analyze_multiple_stocks(tickers, max_workers=2))
+
+            first = threading.Thread(target=run)
+            first.start()
+            # 1回目の呼び出しが全銘柄の処理を開始してから2回目を開始する
+            deadline = time.monotonic() + 5
+            while analyzer._analysis_flight.get_stats()["in_flight"] < len(tickers) and time.monotonic() < deadline:
+                time.sleep(0.001)
+            second = threading.Thread(target=run)
+            second.start()
+            first.join()
+            second.join()
+        finally:
+            StubFetcher.fetch_stock_data = original
+
+        assert sorted(calls) == tickers
+        assert len(results) == 2
+        assert list(results[0]) == list(results[1]) == tickers
+        assert results[0] == results[1]
+        assert results[0]["1000.T"] is not results[1]["1000.T"]
+        assert analyzer._analysis_flight.get_stats()["in_flight"] == 0
@@ -0,0 +1,107 @@
+"""
+Flask アプリケーションのユニットテスト
+
+app.py のバッチ分析エンドポイントのテストケースを実装します。
+分析処理はスタブに置き換えます。
+"""
+
+import json
+import threading
+
+import pytest
+
+import app as app_module
+
+
+class TestStreamingBatch:
+    """/analyze/batch の NDJSON ストリーミングのテストクラス"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """分析をスタブ化した Flask テストクライアント"""
+        self.release = threading.Event()
+
+        def fake_iter(tickers, period="1y", max_workers=None):
+            for ticker in tickers:
+                if ticker == "SLOW.T":
+                    self.release.wait(5)
+                if ticker == "BOOM.T":
+                    raise RuntimeError("analysis crashed")
+                yield ticker, (None if ticker == "FAIL.T" else {"ticker": ticker, "signal": "BUY"})
+
+        monkeypatch.setattr(app_module.TechnicalAnalyzer, "iter_analyze_stocks", staticmethod(fake_iter))
+        return app_module.app.test_client()
+
+    def stream(self, client, tickers):
+        """ストリーミングでリクエストし、レスポンスを返します"""
+        return client.post(
+            "/analyze/batch",
+            json={"tickers": tickers, "save_to_backend": False, "stream": True},
+            buffered=False,
+        )
+
+    def test_lines_are_emitted_before_batch_completes(self, client):
+        """遅い銘柄の完了前に、完了済みの銘柄の行が返されることを確認"""
+        response = self.stream(client, ["1000.T", "SLOW.T"])
+        lines = iter(response.response)
+
+        first = json.loads(next(lines))
+        assert first["type"] == "result"
+        assert first["ticker"] == "1000.T"
+        assert (first["processed"], first["total"]) == (1, 2)
+
+        self.release.set()
+        rest = [json.loads(line) for line in lines]
+        assert [line["type"] for line in rest] == ["result", "summary"]
+        response.close()
+
+    def test_trailer_holds_counts_and_failures(self, client):
+        """最終行に件数と失敗銘柄が含まれることを確認"""
+        self.release.set()
+        response = self.stream(client, ["1000.T", "FAIL.T", "1001.T"])
+
+        assert response.mimetype == "application/x-ndjson"
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert [line["type"] for line in lines] == ["result", "error", "result", "summary"]
+        summary = lines[-1]
+        assert summary["status"] == "completed"
+        assert (summary["total"], summary["processed"]) == (3, 3)
+        assert summary["analyzed_count"] == 2
+        assert summary["failed_tickers"] == ["FAIL.T"]
+
+    def test_error_mid_stream_is_reported_in_trailer(self, client):
+        """ストリーム途中の例外が最終行で通知されることを確認"""
+        response = self.stream(client, ["1000.T", "BOOM.T"])
+
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert lines[-1]["type"] == "summary"
+        assert lines[-1]["status"] == "failed"
+        assert lines[-1]["error"] == "analysis crashed"
+        assert lines[-1]["processed"] == 1
+
+
+def test_batch_rejects_invalid_concurrency(monkeypatch):
+    """/analyze/batch が不正な concurrency を 400 で拒否し、上限内の値は受け付けることを確認"""
+    calls = []
+
+    def fake_iter(tickers, period="1y", max_workers=None):
+        calls.append(max_workers)
+        for ticker in tickers:
+            yield ticker, {"ticker": ticker}
+
+    monkeypatch.setattr(app_module.TechnicalAnalyzer, "iter_analyze_stocks", staticmethod(fake_iter))
+    client = app_module.app.test_client()
+
+    for concurrency in (0, -1, "4", 2.5, True, app_module.ANALYSIS_MAX_CONCURRENCY + 1):
+        response = client.post(
+            "/analyze/batch",
+            json={"tickers": ["1000.T"], "save_to_backend": False, "concurrency": concurrency},
+        )
+        assert response.status_code == 400, concurrency
+    assert calls == []
+
+    response = client.post(
+        "/analyze/batch", json={"tickers": ["1000.T"], "save_to_backend": False, "concurrency": 2}
+    )
+    assert response.status_code == 200
+    assert calls == [2]
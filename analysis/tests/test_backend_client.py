@@ -0,0 +1,127 @@
+"""
+バックエンド HTTP クライアントのユニットテスト
+
+backend_client.py のテストケースを実装します。
+バックエンドはローカルのスタブ HTTP サーバーで代替します。
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from backend_client import BackendClient
+
+
+class StubServer:
+    """応答するステータスと接続元ポートを記録するスタブサーバー"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.client_ports = set()
+        # パスごとに返すステータスのリスト（先頭から順に使用、空になると 200）
+        self.statuses = {}
+
+
+def make_handler(state: StubServer):
+    """スタブサーバーのリクエストハンドラーを作成します"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            with state.lock:
+                state.hits[self.path] = state.hits.get(self.path, 0) + 1
+                state.client_ports.add(self.client_address[1])
+                statuses = state.statuses.get(self.path, [])
+                status = statuses.pop(0) if statuses else 200
+
+            data = json.dumps({"path": self.path}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = _handle
+        do_POST = _handle
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def server():
+    """スタブサーバーを起動し、(状態, ベース URL) を返します"""
+    state = StubServer()
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield state, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class TestBackendClient:
+    """BackendClient のテストクラス"""
+
+    def test_connections_are_reused(self, server):
+        """連続したリクエストで同じ接続が使い回されることを確認"""
+        state, url = server
+        client = BackendClient(url)
+
+        for _ in range(5):
+            assert client.get("/api/stocks").status_code == 200
+
+        assert state.hits["/api/stocks"] == 5
+        assert len(state.client_ports) == 1
+
+    def test_idempotent_request_is_retried(self, server):
+        """GET は 503 を受けた場合に再試行されることを確認"""
+        state, url = server
+        state.statuses["/api/stocks"] = [503, 503]
+        client = BackendClient(url, retries=3, backoff=0)
+
+        response = client.get("/api/stocks")
+
+        assert response.status_code == 200
+        assert state.hits["/api/stocks"] == 3
+
+    def test_post_is_not_retried(self, server):
+        """POST は再試行されず、最初のレスポンスが返されることを確認"""
+        state, url = server
+        state.statuses["/api/analysis/save"] = [503]
+        client = BackendClient(url, retries=3, backoff=0)
+
+        response = client.post("/api/analysis/save", json={"ticker": "1000.T"})
+
+        assert response.status_code == 503
+        assert state.hits["/api/analysis/save"] == 1
+
+    def test_metrics_are_recorded_per_endpoint(self, server):
+        """エンドポイントごとのリクエスト数とエラー数が記録されることを確認"""
+        state, url = server
+        state.statuses["/api/analysis/save"] = [500]
+        client = BackendClient(url, retries=0)
+
+        client.get("/api/stocks", params={"limit": 10})
+        client.post("/api/analysis/save", json={})
+        client.post("/api/analysis/save", json={})
+        with pytest.raises(requests.RequestException):
+            client.get("http://127.0.0.1:1/unreachable", timeout=1)
+
+        stats = client.get_stats()
+        assert stats["endpoints"]["GET /api/stocks"]["requests"] == 1
+        assert stats["endpoints"]["POST /api/analysis/save"]["requests"] == 2
+        assert stats["endpoints"]["POST /api/analysis/save"]["errors"] == 1
+        assert stats["endpoints"]["GET /unreachable"]["errors"] == 1
+        assert stats["requests"] == 4
+        assert stats["errors"] == 2
@@ -0,0 +1,192 @@
+"""
+バックテストのユニットテスト
+
+backtest.py と TechnicalAnalyzer.compute_signal_series のテストケースを実装します。
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from analyzer import TechnicalAnalyzer, Signal
+import app as app_module
+import backtest
+from backtest import Backtester, WARMUP_BARS
+
+
+def make_trending_ohlcv(periods: int = 300, seed: int = 3) -> pd.DataFrame:
+    """上昇・下降トレンドを繰り返すテスト用の OHLCV データを作成します"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start="2020-01-01", periods=periods, freq="B")
+    trend = 200 * np.sin(np.linspace(0, 6 * np.pi, periods))
+    close = 1000 + trend + rng.normal(0, 8, periods).cumsum()
+    return pd.DataFrame(
+        {
+            "open": close,
+            "high": close + rng.uniform(1, 10, periods),
+            "low": close - rng.uniform(1, 10, periods),
+            "close": close,
+            "volume": rng.integers(1000, 5000, periods).astype(float),
+        },
+        index=dates,
+    )
+
+
+def reference_backtest(df: pd.DataFrame):
+    """従来の1本ずつ分析するバックテスト（比較用）"""
+    trades = []
+    total_trades = 0
+    position = None
+    entry_price = 0.0
+
+    for i in range(WARMUP_BARS, len(df)):
+        analysis = TechnicalAnalyzer.analyze_dataframe("TEST", df.iloc[:i])
+        signal = Signal(analysis["signal"])
+        current_price = df["close"].iloc[i]
+
+        if signal == Signal.BUY and position is None:
+            position = "long"
+            entry_price = current_price
+            total_trades += 1
+        elif signal == Signal.SELL and position == "long":
+            trades.append((entry_price, current_price))
+            position = None
+
+    return total_trades, trades
+
+
+class TestSignalSeries:
+    """compute_signal_series のテストクラス"""
+
+    def test_signals_are_point_in_time(self):
+        """各時点の判定がその時点までのデータによる分析結果と一致することを確認"""
+        df = make_trending_ohlcv(160)
+
+        series = TechnicalAnalyzer.compute_signal_series(df)
+
+        codes = {1: "BUY", -1: "SELL", 0: "HOLD"}
+        for i in range(10, len(df)):
+            analysis = TechnicalAnalyzer.analyze_dataframe("TEST", df.iloc[: i + 1])
+            assert codes[series["signal"].iloc[i]] == analysis["signal"]
+            assert series["score"].iloc[i] == pytest.approx(analysis["score"])
+
+    def test_no_look_ahead(self):
+        """将来のデータを変更しても過去の判定が変わらないことを確認"""
+        df = make_trending_ohlcv(200)
+        modified = df.copy()
+        modified.iloc[150:, :] *= 2
+
+        original = TechnicalAnalyzer.compute_signal_series(df)
+        changed = TechnicalAnalyzer.compute_signal_series(modified)
+
+        pd.testing.assert_frame_equal(original.iloc[:150], changed.iloc[:150])
+
+
+class TestBacktester:
+    """Backtester のテストクラス"""
+
+    def test_matches_bar_by_bar_reference(self):
+        """ベクトル化したシミュレーションが1本ずつの分析結果と一致することを確認"""
+        df = make_trending_ohlcv(300)
+
+        result = Backtester().run_backtest_on_data(df)
+        total_trades, trades = reference_backtest(df)
+
+        assert result.total_trades == total_trades
+        assert len(result.trades) == len(trades)
+        assert len(trades) > 0
+        for trade, (entry_price, exit_price) in zip(result.trades, trades):
+            assert trade["entry_price"] == pytest.approx(entry_price)
+            assert trade["exit_price"] == pytest.approx(exit_price)
+        assert result.winning_trades + result.losing_trades == len(trades)
+
+    def test_insufficient_data_returns_none(self):
+        """データが不足している場合は None を返すことを確認"""
+        assert Backtester().run_backtest_on_data(make_trending_ohlcv(WARMUP_BARS - 1)) is None
+
+
+class TestMonteCarlo:
+    """モンテカルロシミュレーションのテストクラス"""
+
+    @pytest.fixture
+    def returns(self):
+        """テスト用の日次リターンを作成します"""
+        return np.random.default_rng(11).normal(0.0005, 0.02, 250)
+
+    def test_seed_makes_results_reproducible(self, returns):
+        """同じシードで同じ結果が得られることを確認"""
+        first = Backtester.simulate_returns(returns, num_simulations=500, seed=42)
+        second = Backtester.simulate_returns(returns, num_simulations=500, seed=42)
+
+        assert first == second
+
+    def test_chunked_run_matches_single_chunk(self, returns):
+        """チャンク分割しても同じシードで同じ結果になることを確認"""
+        single = Backtester.simulate_returns(returns, num_simulations=1000, seed=1, chunk_size=1000)
+        chunked = Backtester.simulate_returns(returns, num_simulations=1000, seed=1, chunk_size=64)
+
+        assert chunked["mean"] == pytest.approx(single["mean"])
+        assert chunked["percentile_5"] == pytest.approx(single["percentile_5"])
+
+    def test_terminal_wealth_uses_compounded_returns(self):
+        """一定リターンの場合、最終資産が複利計算の値になることを確認"""
+        result = Backtester.simulate_returns(np.full(10, 0.01), num_simulations=20, seed=0)
+
+        assert result["min"] == pytest.approx(1000000.0 * 1.01 ** 10)
+        assert result["max"] == pytest.approx(1000000.0 * 1.01 ** 10)
+
+    def test_block_bootstrap_keeps_consecutive_returns(self):
+        """ブロックブートストラップで連続したリターンが抽出されることを確認"""
+        rng = np.random.default_rng(0)
+
+        indices = Backtester._bootstrap_indices(rng, size=50, horizon=12, n=100, block_size=5)
+
+        assert indices.shape == (50, 12)
+        steps = np.diff(indices[:, :5], axis=1) % 100
+        assert (steps == 1).all()
+
+    def test_block_longer_than_horizon_is_clipped(self):
+        """ブロック長が日数を超える場合に日数で打ち切られ、配列が日数分に収まることを確認"""
+        rng = np.random.default_rng(0)
+
+        indices = Backtester._bootstrap_indices(rng, size=4, horizon=10, n=100, block_size=10 ** 9)
+        result = Backtester.simulate_returns(np.full(10, 0.01), num_simulations=5, seed=0, block_size=10 ** 9)
+
+        assert indices.shape == (4, 10)
+        assert result["block_size"] == 10
+
+    @pytest.mark.parametrize("query", [
+        "horizon=100000000",
+        "horizon=0",
+        "block_size=0",
+        "percentiles=5,x",
+        "percentiles=150",
+        "percentiles=" + ",".join(["50"] * 21),
+    ])
+    def test_endpoint_rejects_unbounded_parameters(self, query):
+        """/monte-carlo が上限を超える日数や不正なパーセンタイルを 400 で拒否することを確認"""
+        response = app_module.app.test_client().get(f"/monte-carlo/7203.T?{query}")
+
+        assert response.status_code == 400
+
+    def test_path_percentiles(self, returns):
+        """日ごとのパーセンタイルが日数分返され、順序関係が保たれることを確認"""
+        result = Backtester.simulate_returns(
+            returns, num_simulations=2000, horizon=30, seed=5, chunk_size=300,
+            path_percentiles=[5, 50, 95],
+        )
+
+        paths = result["path_percentiles"]
+        low, mid, high = (np.array(paths[q]) for q in ("5", "50", "95"))
+        assert len(low) == 30
+        assert (low <= mid).all() and (mid <= high).all()
+
+    def test_path_samples_shrink_with_horizon(self, returns, monkeypatch):
+        """パーセンタイル用に保持するパス数が要素数の上限に収まるよう、日数に応じて減ることを確認"""
+        monkeypatch.setattr(backtest, "MONTE_CARLO_CHUNK_ELEMENTS", 3000)
+
+        short = Backtester.simulate_returns(returns, num_simulations=500, horizon=10, seed=5, path_percentiles=[50])
+        long = Backtester.simulate_returns(returns, num_simulations=500, horizon=60, seed=5, path_percentiles=[50])
+
+        assert short["path_samples"] == 300
+        assert long["path_samples"] == 50
+        assert len(long["path_percentiles"]["50"]) == 60
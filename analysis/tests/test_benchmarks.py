@@ -0,0 +1,61 @@
+"""
+ベンチマークスイートのユニットテスト
+
+benchmarks/ のデータ生成と実行・比較処理が動作することを確認します
+（計測値そのものは検証しません）。
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import run_benchmarks  # noqa: E402
+from data_fetch import DataFetcher  # noqa: E402
+from synthetic import make_ohlcv, make_universe  # noqa: E402
+
+
+class TestSynthetic:
+    """合成データ生成のテストクラス"""
+
+    def test_ohlcv_is_consistent_and_reproducible(self):
+        """高値・安値が始値・終値を包含し、同じシードで同じデータになることを確認"""
+        df = make_ohlcv(500, seed=1)
+
+        assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+        assert (df["high"] >= df[["open", "close"]].max(axis=1)).all()
+        assert (df["low"] <= df[["open", "close"]].min(axis=1)).all()
+        assert df.equals(make_ohlcv(500, seed=1))
+        assert list(make_universe(3, periods=10)) == ["1000.T", "1001.T", "1002.T"]
+
+
+class TestRunBenchmarks:
+    """ベンチマーク実行のテストクラス"""
+
+    def test_run_emits_results_and_restores_fetcher(self):
+        """結果が JSON 形式の項目を持ち、実行後に DataFetcher が元に戻ることを確認"""
+        original = DataFetcher.fetch_stock_data
+
+        report = run_benchmarks.run(
+            groups=["indicators", "analyzer"], name_filter="analyze_stock", quick=True, repeat=1, min_time=0
+        )
+
+        assert report["schema_version"] == run_benchmarks.SCHEMA_VERSION
+        assert [r["name"] for r in report["results"]] == ["analyzer.analyze_stock"] * 2
+        assert all(r["best_s"] > 0 for r in report["results"])
+        assert DataFetcher.fetch_stock_data is original
+
+    def test_compare_reports_regressions(self):
+        """基準より threshold 倍以上遅いケースのみが回帰として返ることを確認"""
+        def report(**times):
+            return {"results": [
+                {"name": name, "params": {"bars": 250}, "best_s": t} for name, t in times.items()
+            ]}
+
+        regressions = run_benchmarks.compare(
+            report(fast=1.0, slow=2.0, new=1.0), report(fast=1.0, slow=1.0), threshold=1.25
+        )
+
+        assert regressions == [{"name": "slow", "params": {"bars": 250}, "ratio": pytest.approx(2.0)}]
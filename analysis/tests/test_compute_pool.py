@@ -0,0 +1,145 @@
+"""
+CPU 計算プールのユニットテスト
+
+compute_pool.py のテストケースを実装します。
+ワーカープロセスで計算した結果が、呼び出し元のプロセスで1銘柄ずつ計算した結果と
+一致することを確認します。
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analyzer
+import backtest
+from analyzer import TechnicalAnalyzer
+from backtest import Backtester
+from compute_pool import ComputePool, SharedFrames, unpack_frames
+
+
+@pytest.fixture(scope="module")
+def pool():
+    """2ワーカーの計算プール（テストモジュール内で共有）"""
+    pool = ComputePool(max_workers=2, chunk_size=3)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def frames(make_ohlcv):
+    """銘柄コードから OHLCV データへの辞書（データ不足・取得失敗の銘柄、整数の出来高を含む）"""
+    frames = {f"{1000 + i}.T": make_ohlcv(i).astype({"volume": np.int64}) for i in range(7)}
+    frames["1100.T"] = make_ohlcv(100, periods=30)
+    frames["FAIL.T"] = None
+    return frames
+
+
+class TestSharedFrames:
+    """共有メモリへの格納と復元のテストクラス"""
+
+    def test_round_trip_preserves_index_and_dtypes(self, frames):
+        """復元したデータが元のデータ（時刻・タイムゾーン・dtype）と一致することを確認"""
+        source = {ticker: df for ticker, df in frames.items() if df is not None}
+        block = SharedFrames.pack(source)
+        try:
+            restored = unpack_frames(block.spec)
+        finally:
+            block.release()
+
+        assert list(restored) == list(source)
+        for ticker, df in source.items():
+            pd.testing.assert_frame_equal(restored[ticker], df, check_freq=False)
+
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=block.spec["name"])
+
+
+class TestComputePool:
+    """ワーカープロセスでの計算のテストクラス"""
+
+    def test_analysis_matches_serial_path(self, pool, frames):
+        """分析結果が analyze_dataframe の結果と一致することを確認"""
+        results = pool.map_frames("analyze", frames)
+
+        assert list(results) == list(frames)
+        for ticker, df in frames.items():
+            if df is None:
+                continue
+            assert results[ticker] == TechnicalAnalyzer.analyze_dataframe(ticker, df)
+        assert results["FAIL.T"]["ticker"] == "FAIL.T"
+        assert pool.get_stats()["active_blocks"] == 0
+        assert pool.get_stats()["shared_tickers"] >= 8
+
+    def test_backtest_matches_serial_path(self, pool, frames):
+        """バックテスト結果（取引履歴を含む）が run_backtest_on_data の結果と一致することを確認"""
+        results = pool.map_frames("backtest", frames, initial_capital=500000.0)
+
+        for ticker, df in frames.items():
+            expected = Backtester(initial_capital=500000.0).run_backtest_on_data(df)
+            if expected is None:
+                assert results[ticker] is None
+                continue
+            assert results[ticker].to_dict() == expected.to_dict()
+            assert results[ticker].trades == expected.trades
+
+    def test_serial_pool_runs_in_process(self, frames):
+        """ワーカー数1ではプロセスを起動せずに計算することを確認"""
+        serial = ComputePool(max_workers=1)
+
+        results = serial.map_frames("analyze", {"1000.T": frames["1000.T"]})
+
+        assert results["1000.T"] == TechnicalAnalyzer.analyze_dataframe("1000.T", frames["1000.T"])
+        assert serial.get_stats()["started"] is False
+
+    def test_unknown_task_is_rejected(self, pool):
+        """未知のタスク名でエラーになることを確認"""
+        with pytest.raises(ValueError):
+            pool.submit("optimize", {})
+
+
+class TestIntegration:
+    """アナライザー・バックテスターからの利用のテストクラス"""
+
+    @pytest.fixture(autouse=True)
+    def stub_fetcher(self, monkeypatch, pool, frames):
+        """DataFetcher をスタブ化し、計算プールを有効にします"""
+        class StubFetcher:
+            def fetch_stock_data(self, ticker, period="1y", interval="1d"):
+                if frames.get(ticker) is None:
+                    raise ValueError(f"Empty data for {ticker}")
+                return frames[ticker]
+
+            def fetch_multiple_stocks(self, tickers, period="1y", interval="1d", batch_size=None):
+                return {ticker: frames.get(ticker) for ticker in tickers}
+
+        monkeypatch.setattr(analyzer, "DataFetcher", StubFetcher)
+        monkeypatch.setattr(backtest, "DataFetcher", StubFetcher)
+        monkeypatch.setattr(analyzer, "DEMO_MODE", False)
+        monkeypatch.setattr(analyzer, "get_compute_pool", lambda: pool)
+        monkeypatch.setattr(backtest, "get_compute_pool", lambda: pool)
+
+    def test_pipeline_matches_serial_analysis(self, frames):
+        """パイプラインの結果が1銘柄ずつの分析結果と一致し、失敗した銘柄が None になることを確認"""
+        tickers = list(frames)
+
+        pairs = list(TechnicalAnalyzer.iter_analyze_stocks(tickers, max_workers=2))
+
+        assert sorted(ticker for ticker, _ in pairs) == sorted(tickers)
+        results = dict(pairs)
+        assert results["FAIL.T"] is None
+        for ticker in tickers[:-1]:
+            assert results[ticker] == TechnicalAnalyzer.analyze_dataframe(ticker, frames[ticker])
+
+    def test_multiple_backtests_match_serial_runs(self, frames):
+        """複数銘柄のバックテストが1銘柄ずつ実行した結果と一致することを確認"""
+        tickers = ["1000.T", "1001.T", "1100.T", "FAIL.T"]
+
+        results = Backtester().run_multiple_backtests(tickers)
+
+        assert list(results) == tickers
+        assert results["1100.T"] is None
+        assert results["FAIL.T"] is None
+        for ticker in ["1000.T", "1001.T"]:
+            assert results[ticker].to_dict() == Backtester().run_backtest_on_data(frames[ticker]).to_dict()
@@ -0,0 +1,165 @@
+"""
+データ取得のユニットテスト
+
+data_fetch.py の一括取得のテストケースを実装します。
+ネットワークを使用しないよう、yf.Ticker はスタブに置き換えます。
+"""
+
+import pytest
+import pandas as pd
+import data_providers
+from data_fetch import DataFetcher
+from frame_cache import FrameCache
+from rate_limiter import TokenBucketRateLimiter
+
+
+def yfinance_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """OHLCV データを yfinance と同じ大文字の列名に変換します"""
+    return df.rename(columns=str.capitalize)
+
+
+@pytest.fixture(scope="module")
+def universe(make_ohlcv):
+    """yfinance と同じ列名の7銘柄分のデータ"""
+    return {f"{1000 + i}.T": yfinance_frame(make_ohlcv(i, periods=30)) for i in range(7)}
+
+
+class StubTicker:
+    """yf.Ticker のスタブ（failures に登録した結果を先頭から順に返します）"""
+
+    requested = []
+    # 銘柄ごとの呼び出し結果のリスト（None: データなし、例外: 送出）。空になると universe のデータを返す
+    failures = {}
+    # 銘柄コードから返すデータへの辞書と、universe にない銘柄に返すデータ
+    universe = {}
+    fallback = None
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period=None, start=None, end=None, interval="1d", **kwargs):
+        StubTicker.requested.append(self.ticker)
+        outcomes = StubTicker.failures.get(self.ticker)
+        if outcomes:
+            outcome = outcomes.pop(0)
+            if outcome is None:
+                return StubTicker.fallback.iloc[:0]
+            raise outcome
+        return StubTicker.universe.get(self.ticker, StubTicker.fallback).copy()
+
+
+class TestFetchMultipleStocks:
+    """fetch_multiple_stocks の一括取得のテストクラス"""
+
+    @pytest.fixture
+    def downloads(self, monkeypatch, universe, make_ohlcv):
+        """yfinance をスタブ化し、一括取得で要求された銘柄のリストを記録します"""
+        StubTicker.requested = []
+        StubTicker.failures = {}
+        StubTicker.universe = universe
+        StubTicker.fallback = yfinance_frame(make_ohlcv(99, periods=30))
+        monkeypatch.setattr(data_providers.yf, "Ticker", StubTicker)
+        calls = []
+        download = data_providers.YFinanceProvider.download
+
+        def recording_download(provider, tickers, **kwargs):
+            calls.append(list(tickers))
+            return download(provider, tickers, **kwargs)
+
+        monkeypatch.setattr(data_providers.YFinanceProvider, "download", recording_download)
+        return calls
+
+    @pytest.fixture
+    def fetcher(self):
+        """遅延なし・永続キャッシュなしの DataFetcher"""
+        fetcher = DataFetcher(
+            rate_limiter=TokenBucketRateLimiter(rate=1000, burst=1000),
+            frame_cache=FrameCache(max_bytes=0),
+            provider=data_providers.YFinanceProvider(),
+        )
+        fetcher.price_store = None
+        return fetcher
+
+    def test_chunks_are_fetched_with_grouped_requests(self, fetcher, downloads, universe):
+        """チャンクごとに1回の一括取得で取得されることを確認"""
+        tickers = list(universe)
+
+        results = fetcher.fetch_multiple_stocks(tickers, batch_size=3)
+
+        assert downloads == [tickers[0:3], tickers[3:6], tickers[6:7]]
+        assert StubTicker.requested == tickers
+        assert list(results) == tickers
+
+    def test_frames_have_lowercase_columns(self, fetcher, downloads, universe):
+        """銘柄ごとの結果が小文字列名の DataFrame になることを確認"""
+        results = fetcher.fetch_multiple_stocks(list(universe)[:2], batch_size=10)
+
+        for ticker, df in results.items():
+            expected = universe[ticker].copy()
+            expected.columns = expected.columns.str.lower()
+            pd.testing.assert_frame_equal(df, expected)
+
+    def test_missing_symbols_fall_back_to_single_fetch(self, fetcher, downloads):
+        """チャンクでデータが得られなかった銘柄のみ個別取得にフォールバックすることを確認"""
+        StubTicker.failures = {"DELISTED.T": [None]}
+        tickers = ["1000.T", "DELISTED.T", "1001.T"]
+
+        results = fetcher.fetch_multiple_stocks(tickers, batch_size=10)
+
+        assert len(downloads) == 1
+        assert StubTicker.requested == tickers + ["DELISTED.T"]
+        assert results["DELISTED.T"] is not None
+        assert "close" in results["DELISTED.T"].columns
+
+    def test_failed_symbols_fall_back_to_single_fetch(self, fetcher, downloads):
+        """チャンク内で例外になった銘柄が、他の銘柄を止めずに個別取得されることを確認"""
+        StubTicker.failures = {"1000.T": [RuntimeError("429 Client Error: Too Many Requests")]}
+        tickers = ["1000.T", "1001.T"]
+
+        results = fetcher.fetch_multiple_stocks(tickers, batch_size=10)
+
+        assert StubTicker.requested == tickers + ["1000.T"]
+        assert all(results[ticker] is not None for ticker in tickers)
+
+    def test_chunks_are_capped_at_burst(self, fetcher, downloads, universe):
+        """チャンクサイズがトークンバケットの容量を超えないことを確認"""
+        fetcher.rate_limiter = TokenBucketRateLimiter(rate=1000, burst=2)
+        tickers = list(universe)[:5]
+
+        fetcher.fetch_multiple_stocks(tickers, batch_size=10)
+
+        assert downloads == [tickers[0:2], tickers[2:4], tickers[4:5]]
+
+    def test_rate_limited_symbol_in_chunk_reduces_rate(self, fetcher, downloads):
+        """チャンク内の銘柄ごとの429でレートが下がることを確認"""
+        StubTicker.failures = {"1001.T": [RuntimeError("429 Client Error: Too Many Requests")]}
+
+        fetcher.fetch_multiple_stocks(["1000.T", "1001.T"], batch_size=10)
+
+        assert fetcher.rate_limiter.get_stats()["rate_limited"] == 1
+
+    def test_batch_size_one_uses_per_ticker_fetch(self, fetcher, downloads):
+        """batch_size=1 の場合は従来通り1銘柄ずつ取得することを確認"""
+        fetcher.fetch_multiple_stocks(["1000.T", "1001.T"], batch_size=1)
+
+        assert downloads == []
+        assert StubTicker.requested == ["1000.T", "1001.T"]
+
+    def test_cache_is_checked_once_per_ticker(self, downloads):
+        """キャッシュにない銘柄のミスが1回だけ数えられ、2回目の取得はキャッシュから返されることを確認"""
+        fetcher = DataFetcher(
+            rate_limiter=TokenBucketRateLimiter(rate=1000, burst=1000),
+            frame_cache=FrameCache(max_bytes=10 * 1024 * 1024),
+            provider=data_providers.YFinanceProvider(),
+        )
+        fetcher.price_store = None
+        tickers = ["1000.T", "1001.T"]
+
+        fetcher.fetch_multiple_stocks(tickers, batch_size=1)
+        stats = fetcher.frame_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (0, 2)
+
+        fetcher.fetch_multiple_stocks(tickers, batch_size=1)
+        stats = fetcher.frame_cache.get_stats()
+        assert (stats["hits"], stats["misses"]) == (2, 2)
+        assert StubTicker.requested == tickers
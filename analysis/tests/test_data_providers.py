@@ -0,0 +1,182 @@
+"""
+株価データプロバイダーのユニットテスト
+
+data_providers.py と DataFetcher のプロバイダー切り替えのテストケースを実装します。
+"""
+
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analyzer import TechnicalAnalyzer
+from data_fetch import DataFetcher
+from data_providers import (
+    JST,
+    DataProvider,
+    DataUnavailableError,
+    LocalFileProvider,
+    SyntheticProvider,
+    create_provider,
+)
+from frame_cache import FrameCache
+from price_store import PriceStore
+
+
+class NoNetworkRateLimiter:
+    """ネットワークを使わないプロバイダーでは呼ばれないことを確認するレート制限のスタブ"""
+
+    def acquire(self, tokens=1.0):
+        raise AssertionError("rate limiter must not be used for offline providers")
+
+
+def make_fetcher(provider):
+    """永続キャッシュ・インメモリキャッシュなしの DataFetcher を作成します"""
+    fetcher = DataFetcher(
+        rate_limiter=NoNetworkRateLimiter(),
+        frame_cache=FrameCache(max_bytes=0),
+        provider=provider,
+    )
+    fetcher.price_store = None
+    return fetcher
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    """日足の CSV を2銘柄分配置したディレクトリ"""
+    dates = pd.date_range("2023-01-02", periods=300, freq="B")
+    (tmp_path / "1d").mkdir()
+    for i, ticker in enumerate(["1000.T", "1001.T"]):
+        close = np.linspace(100, 200, 300) + i
+        pd.DataFrame(
+            {"Date": dates, "Open": close, "High": close + 1, "Low": close - 1, "Close": close, "Volume": 1000},
+        ).to_csv(tmp_path / "1d" / f"{ticker}.csv", index=False)
+    return tmp_path
+
+
+class TestLocalFileProvider:
+    """LocalFileProvider のテストクラス"""
+
+    def test_period_is_sliced_from_last_recorded_bar(self, data_dir):
+        """period が記録済みデータの最終バーを基準に切り出されることを確認"""
+        fetcher = make_fetcher(LocalFileProvider(str(data_dir)))
+
+        df = fetcher.fetch_stock_data("1000.T", period="1mo")
+
+        assert list(df.columns) == ["open", "high", "low", "close", "volume"]
+        assert str(df.index.tz) == "Asia/Tokyo"
+        assert df.index[-1] == pd.Timestamp("2024-02-23", tz="Asia/Tokyo")
+        assert df.index[0] > df.index[-1] - pd.Timedelta(days=30)
+
+    def test_date_range_and_batch_fetch(self, data_dir):
+        """日付範囲指定と一括取得がローカルファイルから行えることを確認"""
+        fetcher = make_fetcher(LocalFileProvider(str(data_dir)))
+
+        ranged = fetcher.fetch_date_range("1001.T", "2023-03-01", "2023-03-31")
+        results = fetcher.fetch_multiple_stocks(["1000.T", "MISSING.T", "1001.T"], period="max", batch_size=10)
+
+        assert ranged.index[0].date().isoformat() == "2023-03-01"
+        assert ranged.index[-1].date().isoformat() == "2023-03-31"
+        assert len(results["1000.T"]) == 300
+        assert results["MISSING.T"] is None
+        assert results["1001.T"]["close"].iloc[0] == 101
+
+    def test_price_store_does_not_empty_recorded_data(self, data_dir, tmp_path):
+        """永続キャッシュが有効でも、過去に記録したデータが現在時刻で切り捨てられないことを確認"""
+        fetcher = DataFetcher(
+            price_store=PriceStore(str(tmp_path / "store")),
+            rate_limiter=NoNetworkRateLimiter(),
+            frame_cache=FrameCache(max_bytes=0),
+            provider=LocalFileProvider(str(data_dir)),
+        )
+
+        df = fetcher.fetch_stock_data("1000.T", period="1y")
+        again = fetcher.fetch_stock_data("1000.T", period="1y")
+
+        assert 250 <= len(df) <= 262
+        assert df.index[-1] == pd.Timestamp("2024-02-23", tz="Asia/Tokyo")
+        pd.testing.assert_frame_equal(df, again)
+
+    def test_missing_file_is_not_retried(self, data_dir):
+        """ファイルがない銘柄は再試行せずにすぐ失敗することを確認"""
+        fetcher = make_fetcher(LocalFileProvider(str(data_dir)))
+
+        started = time.monotonic()
+        with pytest.raises(DataUnavailableError):
+            fetcher.fetch_stock_data("MISSING.T")
+
+        assert time.monotonic() - started < 1
+
+
+class TestSyntheticProvider:
+    """SyntheticProvider のテストクラス"""
+
+    def test_series_is_deterministic_per_ticker(self):
+        """同じ銘柄は同じ系列、異なる銘柄は異なる系列になることを確認"""
+        provider = SyntheticProvider(seed=1, end_date="2024-06-28")
+
+        first = provider.history("1000.T", period="1y")
+        again = SyntheticProvider(seed=1, end_date="2024-06-28").history("1000.T", period="1y")
+        other = provider.history("1001.T", period="1y")
+
+        pd.testing.assert_frame_equal(first, again)
+        assert not np.allclose(first["close"], other["close"])
+        assert 250 <= len(first) <= 262
+        assert (first["high"] >= first[["open", "close"]].max(axis=1)).all()
+
+    def test_intraday_bars_are_within_sessions(self):
+        """分足が東証の取引時間内のみで生成されることを確認"""
+        df = SyntheticProvider(end_date="2024-06-28").history("1000.T", interval="5m", period="5d")
+
+        minutes = df.index.hour * 60 + df.index.minute
+        in_morning = (minutes >= 9 * 60) & (minutes < 11 * 60 + 30)
+        in_afternoon = (minutes >= 12 * 60 + 30) & (minutes < 15 * 60 + 30)
+        assert (in_morning | in_afternoon).all()
+        assert len(df) > 0
+
+    def test_past_bars_do_not_change_across_days(self):
+        """日付が変わっても、過去の日足・分足の価格が変わらないことを確認"""
+        earlier = SyntheticProvider(seed=1, clock=lambda: JST.localize(datetime(2024, 6, 28, 16, 0)))
+        later = SyntheticProvider(seed=1, clock=lambda: JST.localize(datetime(2024, 7, 10, 16, 0)))
+
+        daily = earlier.history("1000.T", period="1y")
+        pd.testing.assert_frame_equal(daily, later.history("1000.T", period="2y").loc[daily.index])
+
+        intraday = earlier.history("1000.T", interval="5m", period="5d")
+        day = intraday[intraday.index.date == date(2024, 6, 27)]
+        pd.testing.assert_frame_equal(day, later.history("1000.T", interval="5m", period="1mo").loc[day.index])
+
+    def test_intraday_bars_stop_at_current_time(self):
+        """end_date を省略した場合、現在時刻より後の分足が含まれないことを確認"""
+        now = JST.localize(datetime(2024, 6, 28, 10, 2))
+        df = SyntheticProvider(clock=lambda: now).history("1000.T", interval="5m", period="5d")
+
+        assert df.index[-1] == pd.Timestamp("2024-06-28 10:00", tz=JST)
+
+    def test_full_analysis_runs_offline(self):
+        """合成データで取得から分析・バックテストまでが実行できることを確認"""
+        fetcher = make_fetcher(SyntheticProvider(end_date="2024-06-28"))
+        df = fetcher.fetch_stock_data("7203.T", period="2y")
+
+        result = TechnicalAnalyzer.analyze_dataframe("7203.T", df)
+
+        assert result["ticker"] == "7203.T"
+        assert result["indicators"]["ma_50"] is not None
+        assert fetcher.get_stock_info("7203.T")["symbol"] == "7203.T"
+
+
+def test_unknown_provider_is_rejected():
+    """未知のプロバイダー名でエラーになることを確認"""
+    with pytest.raises(ValueError):
+        create_provider("bloomberg")
+
+
+def test_provider_without_history_cannot_be_created():
+    """history を実装していないプロバイダーは作成時に TypeError になることを確認"""
+    class IncompleteProvider(DataProvider):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        IncompleteProvider()
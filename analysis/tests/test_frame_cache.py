@@ -0,0 +1,193 @@
+"""
+インメモリキャッシュのユニットテスト
+
+frame_cache.py と market_hours.py のテストケースを実装します。
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_cache import FrameCache, market_cache_expiry
+from market_hours import JST, is_session_open, next_session_open
+
+
+def make_frame(rows: int = 100) -> pd.DataFrame:
+    """テスト用の DataFrame を作成します"""
+    return pd.DataFrame({"close": np.arange(rows, dtype=float)})
+
+
+def frame_size(df: pd.DataFrame) -> int:
+    """キャッシュが計上する DataFrame のサイズを返します"""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class FakeClock:
+    """手動で進める時計"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class TestFrameCache:
+    """FrameCache のテストクラス"""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(JST.localize(datetime(2024, 1, 10, 10, 0)))
+
+    @pytest.fixture
+    def cache(self, clock):
+        return FrameCache(
+            max_bytes=10 * frame_size(make_frame()),
+            expiry=lambda now: now + timedelta(minutes=5),
+            clock=clock,
+        )
+
+    def test_hit_returns_copy(self, cache):
+        """ヒット時に格納データのコピーが返されることを確認"""
+        cache.put("a", make_frame())
+
+        df = cache.get("a")
+        df.loc[0, "close"] = -1.0
+
+        assert cache.get("a").loc[0, "close"] == 0.0
+        assert cache.get_stats()["hits"] == 2
+
+    def test_least_recently_used_is_evicted(self, cache):
+        """上限を超えると最も長く参照されていないエントリが削除されることを確認"""
+        small = make_frame()
+        cache.max_bytes = 3 * frame_size(small)
+        for key in ["a", "b", "c"]:
+            cache.put(key, small)
+        cache.get("a")
+
+        cache.put("d", small)
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.get_stats()["evictions"] == 1
+        assert cache.get_stats()["bytes"] == 3 * frame_size(small)
+
+    def test_eviction_is_size_aware(self, cache):
+        """大きなエントリの格納で複数の小さなエントリが削除されることを確認"""
+        small, large = make_frame(100), make_frame(250)
+        cache.max_bytes = frame_size(large) + frame_size(small)
+        for key in ["a", "b", "c"]:
+            cache.put(key, small)
+
+        cache.put("big", large)
+
+        assert cache.get("big") is not None
+        assert cache.get_stats()["entries"] == 2
+        assert cache.get_stats()["bytes"] <= cache.max_bytes
+
+    def test_entry_expires(self, cache, clock):
+        """有効期限を過ぎたエントリがミスになることを確認"""
+        cache.put("a", make_frame())
+        clock.now += timedelta(minutes=5)
+
+        assert cache.get("a") is None
+        assert cache.get_stats()["expirations"] == 1
+
+    def test_concurrent_loads_are_coalesced(self, cache):
+        """同じキーへの同時リクエストで loader が1回だけ呼ばれることを確認"""
+        calls = []
+        started = threading.Event()
+
+        def loader():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return make_frame()
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("a", loader)))
+            for _ in range(5)
+        ]
+        threads[0].start()
+        started.wait()
+        for t in threads[1:]:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(calls) == 1
+        assert len(results) == 5
+        assert cache.get_stats()["coalesced"] == 4
+
+    def test_loader_error_propagates_to_waiters(self, cache):
+        """loader の例外が待機中の呼び出し元にも送出され、キャッシュされないことを確認"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def loader():
+            started.set()
+            release.wait()
+            raise ValueError("boom")
+
+        errors = []
+
+        def call():
+            try:
+                cache.get_or_load("a", loader)
+            except ValueError as e:
+                errors.append(str(e))
+
+        owner = threading.Thread(target=call)
+        owner.start()
+        started.wait()
+        waiter = threading.Thread(target=call)
+        waiter.start()
+        while cache.get_stats()["coalesced"] == 0:
+            time.sleep(0.001)
+        release.set()
+        owner.join()
+        waiter.join()
+
+        assert errors == ["boom", "boom"]
+        assert cache.get("a") is None
+
+    def test_disabled_cache_always_loads(self):
+        """上限0のキャッシュは毎回 loader を呼ぶことを確認"""
+        cache = FrameCache(max_bytes=0)
+        calls = []
+
+        for _ in range(2):
+            cache.get_or_load("a", lambda: calls.append(1) or make_frame())
+
+        assert len(calls) == 2
+        assert cache.get_stats()["entries"] == 0
+
+
+class TestMarketHours:
+    """取引時間判定とキャッシュ有効期限のテストクラス"""
+
+    def test_session_boundaries(self):
+        """前場・昼休み・後場・週末の判定を確認"""
+        assert is_session_open(JST.localize(datetime(2024, 1, 10, 9, 0)))
+        assert not is_session_open(JST.localize(datetime(2024, 1, 10, 12, 0)))
+        assert is_session_open(JST.localize(datetime(2024, 1, 10, 15, 0)))
+        assert not is_session_open(JST.localize(datetime(2024, 1, 13, 10, 0)))
+
+    def test_next_session_open_skips_weekend(self):
+        """金曜引け後の次のセッションが月曜の寄り付きであることを確認"""
+        friday_evening = JST.localize(datetime(2024, 1, 12, 18, 0))
+
+        assert next_session_open(friday_evening) == JST.localize(datetime(2024, 1, 15, 9, 0))
+
+    def test_expiry_is_short_during_session(self):
+        """取引時間中の有効期限が短く、時間外は次の寄り付きまでであることを確認"""
+        during = JST.localize(datetime(2024, 1, 10, 10, 0))
+        night = JST.localize(datetime(2024, 1, 10, 22, 0))
+
+        assert market_cache_expiry(during) - during <= timedelta(minutes=30)
+        assert market_cache_expiry(night) == JST.localize(datetime(2024, 1, 11, 9, 0))
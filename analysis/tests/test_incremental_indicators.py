@@ -0,0 +1,144 @@
+"""
+逐次更新型テクニカル指標のユニットテスト
+
+incremental_indicators.py のテストケースを実装します。
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from incremental_indicators import (
+    IncrementalATR,
+    IncrementalBollingerBands,
+    IncrementalEMA,
+    IncrementalIndicator,
+    IncrementalMA,
+    IncrementalMACD,
+    IncrementalOBV,
+    IncrementalRSI,
+    IncrementalStochastic,
+    IndicatorSet,
+    restore_indicator,
+)
+from indicators import TechnicalIndicators
+from price_store import PriceStore
+
+
+@pytest.fixture
+def ohlcv():
+    """テスト用の OHLCV データを作成します"""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range(start="2024-01-01", periods=400, freq="B")
+    close = 1000 + rng.normal(0, 10, 400).cumsum()
+    # 同値が続く区間（RSI の損失 0 や出来高方向 0 の扱いを確認するため）
+    close[100:120] = close[100]
+    return pd.DataFrame(
+        {
+            "High": close + rng.uniform(1, 10, 400),
+            "Low": close - rng.uniform(1, 10, 400),
+            "Close": close,
+            "Volume": rng.uniform(1000, 5000, 400),
+        },
+        index=dates,
+    )
+
+
+def stream(indicator, *columns):
+    """全バーを順に追加し、各時点の値を返します"""
+    results = [indicator.update(*values) for values in zip(*columns)]
+    if isinstance(results[0], dict):
+        return {key: np.array([r[key] for r in results]) for key in results[0]}
+    return np.array(results)
+
+
+def assert_matches(streamed, full):
+    """逐次計算の結果が全系列モードの結果と一致することを確認します"""
+    if isinstance(full, dict):
+        for key in full:
+            assert_matches(streamed[key], full[key])
+        return
+    np.testing.assert_allclose(streamed, full.to_numpy(dtype=float), rtol=1e-9, atol=1e-9)
+
+
+class TestIncrementalIndicators:
+    """各指標クラスのテストクラス"""
+
+    def test_values_match_full_series(self, ohlcv):
+        """全指標で各時点の値が全系列モードと一致することを確認"""
+        high, low, close, volume = ohlcv["High"], ohlcv["Low"], ohlcv["Close"], ohlcv["Volume"]
+        ti = TechnicalIndicators
+
+        cases = [
+            (IncrementalMA(20), (close,), ti.calculate_ma(close, 20)),
+            (IncrementalEMA(20), (close,), ti.calculate_ema(close, 20)),
+            (IncrementalRSI(14), (close,), ti.calculate_rsi(close, 14)),
+            (IncrementalMACD(12, 26, 9), (close,), ti.calculate_macd(close, 12, 26, 9)),
+            (IncrementalBollingerBands(20), (close,), ti.calculate_bollinger_bands(close, 20)),
+            (IncrementalATR(14), (high, low, close), ti.calculate_atr(high, low, close, 14)),
+            (IncrementalStochastic(14), (high, low, close), ti.calculate_stochastic(high, low, close, 14)),
+            (IncrementalOBV(), (close, volume), ti.calculate_obv(close, volume)),
+        ]
+
+        for indicator, columns, expected in cases:
+            assert_matches(stream(indicator, *columns), expected)
+
+    def test_state_round_trip_continues_identically(self, ohlcv):
+        """途中で JSON 経由で保存・復元しても、続きの値が変わらないことを確認"""
+        high, low, close = ohlcv["High"], ohlcv["Low"], ohlcv["Close"]
+        original = IncrementalStochastic(14)
+        for values in zip(high[:200], low[:200], close[:200]):
+            original.update(*values)
+
+        restored = restore_indicator(json.loads(json.dumps(original.to_state())))
+
+        for values in zip(high[200:], low[200:], close[200:]):
+            assert restored.update(*values) == pytest.approx(original.update(*values), rel=1e-12)
+
+    def test_from_state_rejects_other_type(self):
+        """別の指標の状態から復元しようとするとエラーになることを確認"""
+        with pytest.raises(ValueError):
+            IncrementalEMA.from_state(IncrementalMA(5).to_state())
+
+    def test_indicator_without_state_methods_cannot_be_created(self):
+        """_dump / _load を実装していない指標は作成時に TypeError になることを確認"""
+        class NoStateIndicator(IncrementalIndicator):
+            pass
+
+        with pytest.raises(TypeError):
+            NoStateIndicator(period=5)
+
+
+class TestIndicatorSet:
+    """IndicatorSet のテストクラス"""
+
+    def test_update_frame_only_consumes_new_bars(self, ohlcv, tmp_path):
+        """保存した状態から新しいバーのみを取り込み、全件計算と同じ値になることを確認"""
+        store = PriceStore(str(tmp_path))
+        full = IndicatorSet()
+        full.update_frame(ohlcv)
+
+        partial = IndicatorSet()
+        partial.update_frame(ohlcv.iloc[:300])
+        store.save_indicator_state("1000.T", "1d", partial.to_state())
+
+        resumed = IndicatorSet.from_state(store.load_indicator_state("1000.T", "1d"))
+        # 取り込み済みのバーを含めて渡しても、新しいバーのみが追加される
+        values = resumed.update_frame(ohlcv.iloc[250:])
+
+        assert resumed.last_timestamp == ohlcv.index[-1]
+        assert values.keys() == full.values().keys()
+        for key, value in full.values().items():
+            assert values[key] == pytest.approx(value, rel=1e-9)
+
+    def test_values_use_analyzer_keys(self, ohlcv):
+        """最新値が分析結果の indicators と同じ値になることを確認"""
+        from analyzer import TechnicalAnalyzer
+
+        values = IndicatorSet().update_frame(ohlcv)
+        expected = TechnicalAnalyzer._calculate_indicators(ohlcv)
+
+        for key, value in expected.items():
+            assert values[key] == pytest.approx(value, rel=1e-9)
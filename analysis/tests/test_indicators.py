@@ -158,3 +158,80 @@ class TestTechnicalIndicators:
 
         # 最初の値は0であることを確認
         assert obv.iloc[0] == 0
+
+    def test_calculate_obv_values(self):
+        """OBVが前日比の方向に応じて出来高を加減算することを確認"""
+        close = pd.Series([100, 102, 101, 101, 104, 102, 105])
+        volume = pd.Series([1000, 1500, 1200, 1800, 2000, 1500, 2200])
+
+        obv = TechnicalIndicators.calculate_obv(close, volume)
+
+        assert obv.tolist() == [0, 1500, 300, 300, 2300, 800, 3000]
+
+    def test_calculate_atr_first_value_uses_high_low_range(self):
+        """前日終値がない初日のTRが高値-安値になることを確認"""
+        high = pd.Series([110.0, 112.0, 111.0])
+        low = pd.Series([100.0, 108.0, 105.0])
+        close = pd.Series([105.0, 109.0, 106.0])
+
+        atr = TechnicalIndicators.calculate_atr(high, low, close, period=1)
+
+        assert atr.tolist() == [10.0, 7.0, 6.0]
+
+
+class TestTailMode:
+    """tail モード（末尾のみ計算）のテストクラス"""
+
+    @pytest.fixture
+    def ohlcv(self):
+        """テスト用の OHLCV データを作成します"""
+        rng = np.random.default_rng(42)
+        dates = pd.date_range(start="2024-01-01", periods=300)
+        close = pd.Series(1000 + rng.normal(0, 10, 300).cumsum(), index=dates)
+        high = close + rng.uniform(1, 10, 300)
+        low = close - rng.uniform(1, 10, 300)
+        volume = pd.Series(rng.uniform(1000, 5000, 300), index=dates)
+        return high, low, close, volume
+
+    @staticmethod
+    def assert_tail_equal(full, tail_result, tail):
+        """tail モードの結果が全系列の末尾と一致することを確認します"""
+        if isinstance(full, dict):
+            assert full.keys() == tail_result.keys()
+            for key in full:
+                TestTailMode.assert_tail_equal(full[key], tail_result[key], tail)
+            return
+        assert len(tail_result) == tail
+        pd.testing.assert_series_equal(tail_result, full.iloc[-tail:], rtol=1e-10)
+
+    @pytest.mark.parametrize("tail", [1, 5])
+    def test_tail_matches_full_series(self, ohlcv, tail):
+        """全指標で tail モードと全系列モードの結果が一致することを確認"""
+        high, low, close, volume = ohlcv
+        ti = TechnicalIndicators
+
+        cases = [
+            (lambda **kw: ti.calculate_ma(close, 50, **kw)),
+            (lambda **kw: ti.calculate_ema(close, 20, **kw)),
+            (lambda **kw: ti.calculate_rsi(close, 14, **kw)),
+            (lambda **kw: ti.calculate_macd(close, 12, 26, 9, **kw)),
+            (lambda **kw: ti.calculate_bollinger_bands(close, 20, **kw)),
+            (lambda **kw: ti.calculate_atr(high, low, close, 14, **kw)),
+            (lambda **kw: ti.calculate_stochastic(high, low, close, 14, **kw)),
+            (lambda **kw: ti.calculate_volume_ma(volume, 20, **kw)),
+            (lambda **kw: ti.calculate_obv(close, volume, **kw)),
+        ]
+
+        for case in cases:
+            self.assert_tail_equal(case(), case(tail=tail), tail)
+
+    def test_tail_with_short_series(self, ohlcv):
+        """データが計算期間より短い場合も全系列モードと一致することを確認"""
+        _, _, close, _ = ohlcv
+        short = close.iloc[:10]
+
+        self.assert_tail_equal(
+            TechnicalIndicators.calculate_ma(short, 20),
+            TechnicalIndicators.calculate_ma(short, 20, tail=3),
+            3,
+        )
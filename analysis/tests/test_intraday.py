@@ -0,0 +1,131 @@
+"""
+日中スキャンのユニットテスト
+
+intraday.py のテストケースを実装します。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from intraday import BarRingBuffer, IntradayScanner, replay
+from market_hours import JST
+
+
+def make_bars(start: str, closes) -> pd.DataFrame:
+    """テスト用の5分足を作成します"""
+    closes = np.asarray(closes, dtype=float)
+    index = pd.date_range(start=start, periods=len(closes), freq="5min", tz=JST).as_unit("ns")
+    return pd.DataFrame(
+        {
+            "Open": closes,
+            "High": closes + 1,
+            "Low": closes - 1,
+            "Close": closes,
+            "Volume": np.full(len(closes), 1000.0),
+        },
+        index=index,
+    )
+
+
+class StubFetcher:
+    """指定した DataFrame を返し、呼び出し内容を記録する DataFetcher のスタブ"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def fetch_multiple_stocks(self, tickers, period="1y", interval="1d", batch_size=None):
+        self.calls.append((tuple(tickers), period, interval))
+        return {ticker: self.frames.get(ticker) for ticker in tickers}
+
+
+class TestBarRingBuffer:
+    """BarRingBuffer のテストクラス"""
+
+    def test_keeps_only_latest_bars_in_order(self):
+        """容量を超えると古いバーが上書きされ、古い順に取り出せることを確認"""
+        buffer = BarRingBuffer(capacity=3)
+        bars = make_bars("2024-06-03 09:00", [100, 101, 102, 103, 104])
+        for ts, row in zip(bars.index, bars.to_numpy()):
+            buffer.append(ts, row)
+
+        frame = buffer.to_frame()
+
+        assert len(buffer) == 3
+        assert frame["close"].tolist() == [102.0, 103.0, 104.0]
+        assert list(frame.index) == list(bars.index[-3:])
+        assert buffer.to_frame(last=2)["close"].tolist() == [103.0, 104.0]
+        assert buffer.last_timestamp == bars.index[-1]
+
+
+class TestIntradayScanner:
+    """IntradayScanner のテストクラス"""
+
+    def test_forming_bar_is_not_ingested_until_closed(self):
+        """形成中の最新バーは確定するまで取り込まれないことを確認"""
+        scanner = IntradayScanner(fetcher=StubFetcher({}), interval="5m", sink=lambda results: None)
+        bars = make_bars("2024-06-03 09:00", [100, 101, 102])
+
+        scanner.process("1000.T", bars, now=pd.Timestamp("2024-06-03 09:12", tz=JST))
+        assert scanner.get_stats()["bars_ingested"] == 2
+
+        scanner.process("1000.T", bars, now=pd.Timestamp("2024-06-03 09:15", tz=JST))
+        assert scanner.get_stats()["bars_ingested"] == 3
+
+    def test_scan_pushes_only_changed_signals(self):
+        """シグナルが変化した銘柄のみが送信され、2回目以降は当日分のみ取得することを確認"""
+        # 上昇トレンドが続く銘柄と、値動きのない銘柄
+        frames = {
+            "UP.T": make_bars("2024-06-03 09:00", np.linspace(100, 160, 60)),
+            "FLAT.T": make_bars("2024-06-03 09:00", np.full(60, 100.0)),
+        }
+        fetcher = StubFetcher(frames)
+        pushed = []
+        scanner = IntradayScanner(fetcher=fetcher, interval="5m", sink=pushed.append)
+        now = pd.Timestamp("2024-06-03 14:00", tz=JST)
+
+        first = scanner.scan(["UP.T", "FLAT.T"], now)
+        second = scanner.scan(["UP.T", "FLAT.T"], now)
+
+        assert [result["ticker"] for result in first] == ["UP.T", "FLAT.T"]
+        assert first[0]["signal"] == "BUY"
+        assert first[0]["previous_signal"] is None
+        assert second == []
+        assert pushed == [first]
+        assert fetcher.calls[0][1] == "5d"
+        assert fetcher.calls[1][1] == "1d"
+
+
+class TestReplay:
+    """replay のテストクラス"""
+
+    def test_replay_reports_signal_transitions_with_bounded_memory(self):
+        """記録済みのバーからシグナルの変化のみが発生順に再現されることを確認"""
+        closes = np.concatenate([np.linspace(100, 150, 80), np.linspace(150, 90, 80)])
+        frames = {"1000.T": make_bars("2024-06-03 09:00", closes)}
+        scanner = IntradayScanner(fetcher=StubFetcher({}), interval="5m", buffer_bars=50)
+
+        changes = replay(scanner, frames)
+
+        signals = [result["signal"] for result in changes]
+        assert "BUY" in signals and signals[-1] == "SELL"
+        # 連続して同じシグナルが送信されない
+        assert all(a != b for a, b in zip(signals, signals[1:]))
+        assert all(result["previous_signal"] == prev for result, prev in zip(changes, [None] + signals))
+        assert scanner.get_stats()["bars_ingested"] == 160
+        assert len(scanner._states["1000.T"].bars) == 50
+
+    def test_replay_matches_batch_indicators(self):
+        """再生後の指標値が全バーを一括で計算した値と一致することを確認"""
+        from analyzer import TechnicalAnalyzer
+
+        rng = np.random.default_rng(3)
+        bars = make_bars("2024-06-03 09:00", 1000 + rng.normal(0, 2, 120).cumsum())
+        scanner = IntradayScanner(fetcher=StubFetcher({}), interval="5m")
+
+        replay(scanner, {"1000.T": bars})
+
+        values = scanner._states["1000.T"].indicators.values()
+        for key, value in TechnicalAnalyzer._calculate_indicators(bars).items():
+            assert values[key] == pytest.approx(value, rel=1e-9)
@@ -0,0 +1,140 @@
+"""
+非同期ジョブのユニットテスト
+
+jobs.py と app.py のジョブ API のテストケースを実装します。
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as app_module
+from jobs import JobManager, JobStatus
+
+
+def wait_until_finished(manager: JobManager, job_id: str, timeout: float = 5.0):
+    """ジョブが終了するまで待機します"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job.finished:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestJobManager:
+    """JobManager のテストクラス"""
+
+    def test_partial_results_are_visible_while_running(self):
+        """実行中のジョブの進捗と途中結果が参照できることを確認"""
+        manager = JobManager(max_workers=1)
+        release = threading.Event()
+
+        def work(job):
+            job.record("1000.T", {"signal": "BUY"})
+            job.record("1001.T", None)
+            release.wait()
+            job.record("1002.T", {"signal": "SELL"})
+            return {"analyzed_count": 2}
+
+        job = manager.submit("analyze_batch", ["1000.T", "1001.T", "1002.T"], work)
+        while job.to_dict()["progress"]["processed"] < 2:
+            time.sleep(0.01)
+
+        running = job.to_dict(since=0)
+        assert running["status"] == JobStatus.RUNNING
+        assert running["progress"] == {"total": 3, "processed": 2, "succeeded": 1, "failed": 1}
+        assert running["results"] == {"1000.T": {"signal": "BUY"}}
+        assert running["failed_tickers"] == ["1001.T"]
+
+        release.set()
+        finished = wait_until_finished(manager, job.id).to_dict(since=running["next_cursor"])
+        assert finished["status"] == JobStatus.COMPLETED
+        assert finished["results"] == {"1002.T": {"signal": "SELL"}}
+        assert finished["summary"] == {"analyzed_count": 2}
+
+    def test_exception_marks_job_failed(self):
+        """ジョブ本体の例外でジョブが失敗状態になることを確認"""
+        manager = JobManager(max_workers=1)
+
+        def work(job):
+            raise ValueError("boom")
+
+        job = wait_until_finished(manager, manager.submit("analyze_batch", ["1000.T"], work).id)
+
+        assert job.status == JobStatus.FAILED
+        assert job.error == "boom"
+
+    def test_negative_cursor_is_rejected(self):
+        """負の since でエラーになることを確認"""
+        manager = JobManager(max_workers=1)
+        job = wait_until_finished(manager, manager.submit("analyze_batch", ["1000.T"], lambda job: None).id)
+
+        with pytest.raises(ValueError):
+            job.to_dict(since=-1)
+
+    def test_finished_jobs_are_pruned_after_retention(self):
+        """保持期限を過ぎた終了済みジョブが削除されることを確認"""
+        manager = JobManager(max_workers=1, retention_seconds=60)
+        job = wait_until_finished(manager, manager.submit("analyze_batch", [], lambda job: None).id)
+
+        job.finished_at = datetime.now() - timedelta(seconds=61)
+
+        assert manager.get(job.id) is None
+
+
+class TestJobApi:
+    """ジョブ API のテストクラス"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        """分析をスタブ化した Flask テストクライアント"""
+
+        def fake_iter(tickers, period="1y", max_workers=None):
+            for ticker in tickers:
+                yield ticker, (None if ticker == "FAIL.T" else {"ticker": ticker})
+
+        manager = JobManager(max_workers=1)
+        monkeypatch.setattr(app_module.TechnicalAnalyzer, "iter_analyze_stocks", staticmethod(fake_iter))
+        monkeypatch.setattr(app_module, "get_job_manager", lambda: manager)
+        return app_module.app.test_client()
+
+    def test_async_batch_returns_job_and_results(self, client):
+        """async 指定でジョブIDが即座に返り、/jobs/<id> で結果が取得できることを確認"""
+        response = client.post(
+            "/analyze/batch",
+            json={"tickers": ["1000.T", "FAIL.T", "1001.T"], "save_to_backend": False, "async": True},
+        )
+        assert response.status_code == 202
+        job_id = response.get_json()["job_id"]
+
+        deadline = time.monotonic() + 5
+        while True:
+            status = client.get(f"/jobs/{job_id}?since=0").get_json()
+            if status["status"] == JobStatus.COMPLETED or time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+
+        assert status["status"] == JobStatus.COMPLETED
+        assert list(status["results"]) == ["1000.T", "1001.T"]
+        assert status["failed_tickers"] == ["FAIL.T"]
+        assert status["summary"]["analyzed_count"] == 2
+        assert status["summary"]["saved_count"] == 0
+
+    def test_unknown_job_returns_404(self, client):
+        """存在しないジョブIDに 404 が返ることを確認"""
+        assert client.get("/jobs/unknown").status_code == 404
+
+    def test_invalid_cursor_returns_400(self, client):
+        """負または整数でない since に 400 が返ることを確認"""
+        response = client.post(
+            "/analyze/batch", json={"tickers": ["1000.T"], "save_to_backend": False, "async": True}
+        )
+        job_id = response.get_json()["job_id"]
+
+        for since in ("-1", "abc"):
+            assert client.get(f"/jobs/{job_id}?since={since}").status_code == 400
+        assert client.get(f"/jobs/{job_id}?since=0").status_code == 200
@@ -0,0 +1,290 @@
+"""
+パラメーター最適化のユニットテスト
+
+optimizer.py のテストケースを実装します。
+組み合わせごとの一括計算が、TechnicalAnalyzer と Backtester を
+その設定値で1回ずつ実行した結果と一致することを確認します。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from analyzer import TechnicalAnalyzer
+from backtest import WARMUP_BARS, Backtester
+from compute_pool import ComputePool
+from optimizer import (
+    SeriesCache,
+    default_parameters,
+    evaluate_frame,
+    grid_search_space,
+    grid_size,
+    random_search_space,
+    run_sweep,
+    signal_matrix,
+    simulate_window,
+)
+
+
+# 全パラメーターを既定値から変えた組み合わせ
+CUSTOM = {
+    "ma_periods": (3, 10, 30),
+    "rsi_period": 10,
+    "rsi_oversold": 35,
+    "rsi_overbought": 65,
+    "macd": (8, 17, 5),
+    "weights": (0.2, 0.4, 0.4),
+    "threshold": 0.2,
+}
+
+SMALL_GRID = {
+    "ma_periods": [(5, 20, 50), (3, 10, 30)],
+    "rsi_oversold": [25, 30],
+    "rsi_overbought": [70],
+    "macd": [(12, 26, 9), (8, 17, 5)],
+    "weights": [(0.4, 0.3, 0.3)],
+    "threshold": [0.2, 0.3],
+}
+
+
+def apply_parameters(monkeypatch, params):
+    """TechnicalAnalyzer の設定値を組み合わせの値に置き換えます"""
+    monkeypatch.setattr(TechnicalAnalyzer, "MA_PERIODS", list(params["ma_periods"]))
+    monkeypatch.setattr(TechnicalAnalyzer, "RSI_PERIOD", params["rsi_period"])
+    monkeypatch.setattr(TechnicalAnalyzer, "RSI_OVERSOLD", params["rsi_oversold"])
+    monkeypatch.setattr(TechnicalAnalyzer, "RSI_OVERBOUGHT", params["rsi_overbought"])
+    for name, value in zip(("MACD_FAST", "MACD_SLOW", "MACD_SIGNAL"), params["macd"]):
+        monkeypatch.setattr(TechnicalAnalyzer, name, value)
+    for name, value in zip(("MA_WEIGHT", "RSI_WEIGHT", "MACD_WEIGHT"), params["weights"]):
+        monkeypatch.setattr(TechnicalAnalyzer, name, value)
+    monkeypatch.setattr(TechnicalAnalyzer, "SIGNAL_THRESHOLD", params["threshold"])
+
+
+class TestSearchSpace:
+    """探索空間のテストクラス"""
+
+    def test_grid_skips_invalid_combinations(self):
+        """期間や閾値の大小関係が不正な組み合わせが除かれることを確認"""
+        combos = grid_search_space({**SMALL_GRID, "ma_periods": [(5, 20, 50), (20, 5, 50)], "rsi_overbought": [20, 70]})
+
+        assert len(combos) == 2 * 2 * 2
+        assert all(c["ma_periods"] == (5, 20, 50) and c["rsi_overbought"] == 70 for c in combos)
+        assert len(grid_search_space()) >= 1000
+
+    def test_random_search_is_reproducible_subset(self):
+        """ランダムサーチが乱数シードで再現でき、グリッドの部分集合になることを確認"""
+        grid = grid_search_space()
+        sample = random_search_space(samples=50, seed=3)
+
+        assert sample == random_search_space(samples=50, seed=3)
+        assert len(sample) == 50
+        assert all(combo in grid for combo in sample)
+
+
+    def test_oversized_grid_is_rejected_before_enumeration(self):
+        """上限を超えるグリッドが組み合わせを作る前にエラーになることを確認"""
+        huge = {"rsi_oversold": list(range(1, 201)), "rsi_overbought": list(range(201, 401)),
+                "threshold": [i / 1000 for i in range(300)]}
+
+        assert grid_size(huge) == 4 * 1 * 200 * 200 * 3 * 4 * 300
+        with pytest.raises(ValueError):
+            grid_search_space(huge, max_combinations=20000)
+
+        sample = random_search_space(huge, samples=100, seed=1)
+        assert len(sample) == 100
+        assert len({tuple(sorted(combo.items())) for combo in sample}) == 100
+        assert all(combo["rsi_oversold"] in huge["rsi_oversold"] for combo in sample)
+
+    @pytest.mark.parametrize("grid", [
+        {"ma_periods": [[5, 20]]},
+        {"threshold": 0.3},
+        {"thresholds": [0.3]},
+        {"weights": [["a", 0.3, 0.3]]},
+        {"rsi_period": []},
+    ])
+    def test_malformed_grid_is_rejected(self, grid):
+        """不正なグリッドが ValueError になることを確認"""
+        with pytest.raises(ValueError):
+            grid_search_space(grid)
+
+
+class TestEvaluation:
+    """組み合わせの一括評価のテストクラス"""
+
+    @pytest.mark.parametrize("params", [default_parameters(), CUSTOM])
+    def test_signals_match_analyzer(self, monkeypatch, params, make_ohlcv):
+        """判定が、同じ設定値の compute_signal_series の結果と一致することを確認"""
+        df = make_ohlcv(1, periods=400)
+        signals = signal_matrix(SeriesCache(df["close"]), [default_parameters(), params])
+
+        apply_parameters(monkeypatch, params)
+        expected = TechnicalAnalyzer.compute_signal_series(df)["signal"].to_numpy()
+
+        np.testing.assert_array_equal(signals[1], expected)
+
+    @pytest.mark.parametrize("params", [default_parameters(), CUSTOM])
+    def test_simulation_matches_backtester(self, monkeypatch, params, make_ohlcv):
+        """ウォームアップ以降の全期間の成績が Backtester の結果と一致することを確認"""
+        df = make_ohlcv(2, periods=400)
+        signals = signal_matrix(SeriesCache(df["close"]), [params])
+        trades, wins, returns, compound = simulate_window(df["close"].to_numpy(), signals, WARMUP_BARS, len(df))[0]
+
+        apply_parameters(monkeypatch, params)
+        result = Backtester().run_backtest_on_data(df)
+
+        assert trades == result.total_trades
+        assert wins == result.winning_trades
+        assert returns == pytest.approx(result.total_return)
+        assert compound == pytest.approx(result.compound_return)
+
+    def test_compound_column_can_be_skipped(self, make_ohlcv):
+        """compound=False の場合に複利リターンの列を除いた同じ成績が返ることを確認"""
+        df = make_ohlcv(2, periods=400)
+        signals = signal_matrix(SeriesCache(df["close"]), grid_search_space(SMALL_GRID))
+        prices = df["close"].to_numpy()
+
+        full = simulate_window(prices, signals, WARMUP_BARS, len(df))
+        skipped = simulate_window(prices, signals, WARMUP_BARS, len(df), compound=False)
+
+        np.testing.assert_array_equal(skipped, full[:, :3])
+
+    def test_intermediate_series_are_shared(self, make_ohlcv):
+        """移動平均・EMA・RSI が期間ごとに1回だけ計算されることを確認"""
+        df = make_ohlcv(3, periods=400)
+        combos = grid_search_space(SMALL_GRID)
+        cache = SeriesCache(df["close"])
+
+        signal_matrix(cache, combos)
+
+        computed = [key for key in cache._cache if key[0] in ("ma", "ema", "rsi")]
+        assert sorted(k for k in computed if k[0] == "ma") == [
+            ("ma", p) for p in sorted({3, 5, 10, 20, 30, 50})
+        ]
+        assert sorted(k for k in computed if k[0] == "ema") == [("ema", s) for s in (8, 12, 17, 26)]
+        assert [k for k in computed if k[0] == "rsi"] == [("rsi", 14)]
+
+    def test_short_data_is_skipped(self, make_ohlcv):
+        """インサンプル期間がウォームアップより短いデータは評価しないことを確認"""
+        assert evaluate_frame(make_ohlcv(4, periods=60), [default_parameters()]) is None
+
+
+@pytest.fixture(scope="module")
+def frames(make_ohlcv):
+    """5銘柄分のデータ（評価できない短いデータを含む）"""
+    frames = {f"{1000 + i}.T": make_ohlcv(10 + i, periods=400) for i in range(5)}
+    frames["SHORT.T"] = make_ohlcv(99, periods=40)
+    frames["FAIL.T"] = None
+    return frames
+
+
+class TestRunSweep:
+    """ユニバース全体の評価のテストクラス"""
+
+    def test_table_is_ranked_by_out_of_sample_metric(self, frames):
+        """表が指定した列の降順で順位付けされ、評価できた銘柄で平均されることを確認"""
+        combos = grid_search_space(SMALL_GRID)
+
+        table = run_sweep(frames, combos, pool=ComputePool(max_workers=1))
+
+        assert len(table) == len(combos)
+        assert list(table["rank"]) == list(range(1, len(combos) + 1))
+        assert table["oos_mean_return"].is_monotonic_decreasing
+
+        default = table[
+            (table["ma_periods"] == (5, 20, 50)) & (table["rsi_oversold"] == 30)
+            & (table["macd"] == (12, 26, 9)) & (table["threshold"] == 0.3)
+        ].iloc[0]
+        expected = [evaluate_frame(frames[f"{1000 + i}.T"], [default_parameters()])[0] for i in range(5)]
+        assert default["oos_mean_return"] == pytest.approx(np.mean([stats[5] for stats in expected]))
+        assert default["is_trades"] == sum(stats[0] for stats in expected)
+
+    def test_parallel_sweep_matches_serial(self, frames):
+        """ワーカープロセスでの評価結果が呼び出し元での評価結果と一致することを確認"""
+        combos = random_search_space(SMALL_GRID, samples=6, seed=0)
+        pool = ComputePool(max_workers=2, chunk_size=2)
+        try:
+            parallel = run_sweep(frames, combos, pool=pool, top=4)
+        finally:
+            pool.shutdown()
+
+        serial = run_sweep(frames, combos, pool=ComputePool(max_workers=1), top=4)
+
+        pd.testing.assert_frame_equal(parallel, serial)
+
+    def test_no_evaluable_ticker_raises(self, frames):
+        """評価できる銘柄がない場合に NaN の表ではなく ValueError になることを確認"""
+        short = {"SHORT.T": frames["SHORT.T"], "FAIL.T": None}
+
+        with pytest.raises(ValueError):
+            run_sweep(short, [default_parameters()], pool=ComputePool(max_workers=1))
+
+
+class TestOptimizeEndpoint:
+    """/optimize エンドポイントのテストクラス"""
+
+    @pytest.fixture
+    def client(self, monkeypatch, make_ohlcv):
+        """データ取得をスタブ化したテストクライアント"""
+        class StubFetcher:
+            def fetch_multiple_stocks(self, tickers, period="2y", interval="1d", batch_size=None):
+                return {ticker: make_ohlcv(int(ticker.split(".")[0]), periods=400) for ticker in tickers}
+
+        monkeypatch.setattr(app_module, "DataFetcher", StubFetcher)
+        return app_module.app.test_client()
+
+    def test_returns_top_rows(self, client):
+        """上位の組み合わせがパラメーターと成績を含めて返ることを確認"""
+        response = client.post("/optimize", json={
+            "tickers": ["1.T", "2.T"], "grid": SMALL_GRID, "top": 3
+        })
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body["combinations"] == 16
+        assert body["tickers"] == 2
+        assert [row["rank"] for row in body["results"]] == [1, 2, 3]
+        assert body["results"][0]["ma_periods"] in ([5, 20, 50], [3, 10, 30])
+
+    @pytest.mark.parametrize("body", [
+        {"grid": {"ma_periods": [[5, 20]]}},
+        {"grid": {"threshold": 0.3}},
+        {"grid": {"rsi_oversold": list(range(1, 1001))}},
+        {"search": "random", "samples": 0},
+    ])
+    def test_rejects_invalid_search_space(self, client, body):
+        """不正なグリッドや上限を超えるグリッドが 400 になることを確認"""
+        response = client.post("/optimize", json={"tickers": ["1.T"], **body})
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("body", [
+        {"top": 0},
+        {"top": "many"},
+        {"train_fraction": "half"},
+        {"train_fraction": None},
+    ])
+    def test_rejects_invalid_options(self, client, body):
+        """不正な top / train_fraction が 500 ではなく 400 になることを確認"""
+        response = client.post("/optimize", json={"tickers": ["1.T"], "grid": SMALL_GRID, **body})
+
+        assert response.status_code == 400
+
+    def test_no_evaluable_ticker_is_rejected(self, client, monkeypatch):
+        """評価できる銘柄がない場合に NaN を含む結果ではなく 400 になることを確認"""
+        class EmptyFetcher:
+            def fetch_multiple_stocks(self, tickers, period="2y", interval="1d", batch_size=None):
+                return {ticker: None for ticker in tickers}
+
+        monkeypatch.setattr(app_module, "DataFetcher", EmptyFetcher)
+
+        response = client.post("/optimize", json={"tickers": ["1.T"], "grid": SMALL_GRID})
+
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+    def test_rejects_unknown_sort_column(self, client):
+        """未知の並べ替え列でエラーになることを確認"""
+        response = client.post("/optimize", json={"tickers": ["1.T"], "sort_by": "profit"})
+
+        assert response.status_code == 400
@@ -0,0 +1,95 @@
+"""
+パネル指標計算のユニットテスト
+
+panel.py と TechnicalAnalyzer.analyze_panel のテストケースを実装します。
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+from indicators import TechnicalIndicators
+from panel import PanelIndicators, build_panel
+from analyzer import TechnicalAnalyzer
+
+
+@pytest.fixture
+def frames():
+    """5銘柄分のテスト用 OHLCV データを作成します"""
+    rng = np.random.default_rng(7)
+    dates = pd.date_range(start="2024-01-01", periods=200, freq="B")
+    result = {}
+    for i in range(5):
+        close = 1000 + rng.normal(0, 10, 200).cumsum()
+        result[f"{1000 + i}.T"] = pd.DataFrame(
+            {
+                "high": close + rng.uniform(1, 10, 200),
+                "low": close - rng.uniform(1, 10, 200),
+                "close": close,
+            },
+            index=dates,
+        )
+    return result
+
+
+class TestPanelIndicators:
+    """PanelIndicators のテストクラス"""
+
+    def test_columns_match_single_series_functions(self, frames):
+        """各列の結果が単一銘柄の関数の結果と一致することを確認"""
+        close, high, low = (build_panel(frames, f) for f in ("close", "high", "low"))
+
+        panel_results = {
+            "ma": PanelIndicators.calculate_ma(close, 20),
+            "ema": PanelIndicators.calculate_ema(close, 20),
+            "rsi": PanelIndicators.calculate_rsi(close, 14),
+            "macd": PanelIndicators.calculate_macd(close)["histogram"],
+            "bb": PanelIndicators.calculate_bollinger_bands(close)["lower"],
+            "atr": PanelIndicators.calculate_atr(high, low, close),
+            "stoch": PanelIndicators.calculate_stochastic(high, low, close)["d_percent"],
+        }
+
+        for ticker, df in frames.items():
+            expected = {
+                "ma": TechnicalIndicators.calculate_ma(df["close"], 20),
+                "ema": TechnicalIndicators.calculate_ema(df["close"], 20),
+                "rsi": TechnicalIndicators.calculate_rsi(df["close"], 14),
+                "macd": TechnicalIndicators.calculate_macd(df["close"])["histogram"],
+                "bb": TechnicalIndicators.calculate_bollinger_bands(df["close"])["lower"],
+                "atr": TechnicalIndicators.calculate_atr(df["high"], df["low"], df["close"]),
+                "stoch": TechnicalIndicators.calculate_stochastic(
+                    df["high"], df["low"], df["close"]
+                )["d_percent"],
+            }
+            for name, series in expected.items():
+                pd.testing.assert_series_equal(
+                    panel_results[name][ticker], series, check_names=False
+                )
+
+    def test_numpy_input_returns_numpy(self, frames):
+        """NumPy 配列を渡した場合は NumPy 配列で結果が返ることを確認"""
+        close = build_panel(frames, "close")
+
+        result = PanelIndicators.calculate_rsi(close.to_numpy(), 14)
+
+        assert isinstance(result, np.ndarray)
+        assert result.shape == close.shape
+        np.testing.assert_array_equal(result, PanelIndicators.calculate_rsi(close, 14).to_numpy())
+
+    def test_rejects_non_2d_array(self):
+        """2次元以外の配列はエラーになることを確認"""
+        with pytest.raises(ValueError):
+            PanelIndicators.calculate_ma(np.arange(10.0), 5)
+
+
+class TestAnalyzePanel:
+    """TechnicalAnalyzer.analyze_panel のテストクラス"""
+
+    def test_matches_per_ticker_analysis(self, frames):
+        """パネル分析の結果が銘柄ごとの分析結果と一致することを確認"""
+        results = TechnicalAnalyzer.analyze_panel(
+            build_panel(frames, "close"), build_panel(frames, "high"), build_panel(frames, "low")
+        )
+
+        assert list(results) == list(frames)
+        for ticker, df in frames.items():
+            assert results[ticker] == TechnicalAnalyzer.analyze_dataframe(ticker, df)
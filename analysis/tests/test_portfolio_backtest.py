@@ -0,0 +1,114 @@
+"""
+ポートフォリオバックテストのユニットテスト
+
+portfolio_backtest.py のテストケースを実装します。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+from analyzer import TechnicalAnalyzer
+from backtest import Backtester
+from portfolio_backtest import PortfolioBacktester
+
+
+@pytest.fixture(scope="module")
+def frames(make_ohlcv):
+    """10銘柄分のデータ"""
+    return {f"{1000 + i}.T": make_ohlcv(i, periods=500) for i in range(10)}
+
+
+def test_signal_panel_matches_signal_series(frames):
+    """パネルの各列が、銘柄ごとの compute_signal_series の結果と一致することを確認"""
+    close = pd.DataFrame({ticker: df["close"] for ticker, df in frames.items()})
+
+    panels = TechnicalAnalyzer.compute_signal_panel(close)
+
+    for ticker, df in frames.items():
+        expected = TechnicalAnalyzer.compute_signal_series(df)
+        np.testing.assert_array_equal(panels["signal"][ticker].to_numpy(), expected["signal"].to_numpy())
+        np.testing.assert_allclose(panels["score"][ticker].to_numpy(), expected["score"].to_numpy())
+
+
+class TestPortfolioBacktester:
+    """PortfolioBacktester のテストクラス"""
+
+    def test_single_ticker_without_costs_matches_backtester(self, make_ohlcv):
+        """1銘柄・コストなしの資産推移が Backtester の複利リターンと一致することを確認"""
+        df = make_ohlcv(3, periods=500)
+
+        result = PortfolioBacktester(max_positions=1, commission_rate=0, slippage_rate=0).run({"3.T": df})
+        expected = Backtester().run_backtest_on_data(df)
+
+        last_exit = pd.Timestamp(expected.trades[-1]["exit_date"])
+        assert result.equity_curve[last_exit] / result.initial_capital - 1 == pytest.approx(
+            expected.compound_return / 100
+        )
+        assert result.total_trades == expected.total_trades
+
+    def test_attribution_adds_up_to_portfolio_return(self, frames):
+        """銘柄ごとの損益の合計が資産の増減と一致し、現金が負にならないことを確認"""
+        result = PortfolioBacktester(max_positions=4).run(frames)
+
+        assert result.attribution["pnl"].sum() == pytest.approx(result.final_equity - result.initial_capital)
+        assert result.attribution["contribution"].sum() == pytest.approx(result.total_return)
+        assert result.attribution["trades"].sum() == result.total_trades
+        assert result.positions.max() <= 4
+        assert result.cash.min() >= -1e-6
+        assert result.max_drawdown <= 0
+
+    def test_costs_reduce_equity(self, frames):
+        """手数料とスリッページの分だけ最終資産が減ることを確認"""
+        free = PortfolioBacktester(commission_rate=0, slippage_rate=0).run(frames)
+        costly = PortfolioBacktester(commission_rate=0.001, slippage_rate=0.001).run(frames)
+
+        assert free.total_fees == 0
+        assert costly.total_fees > 0
+        assert costly.final_equity < free.final_equity
+
+    def test_atr_sizing_limits_position_size(self, frames):
+        """ATR による数量決定では保有額が等金額の配分より小さくなり、現金が残ることを確認"""
+        result = PortfolioBacktester(
+            sizing="atr", risk_per_trade=0.001, atr_multiplier=2.0, commission_rate=0, slippage_rate=0
+        ).run(frames)
+
+        assert result.total_trades > 0
+        assert (result.cash > 0).all()
+
+    def test_lot_size_prevents_unaffordable_orders(self, frames):
+        """売買単位の代金が配分額を上回る場合は発注しないことを確認"""
+        fractional = PortfolioBacktester(initial_capital=50000.0).run(frames)
+        lots = PortfolioBacktester(initial_capital=50000.0, lot_size=100).run(frames)
+
+        assert fractional.total_trades > 0
+        assert lots.total_trades == 0
+        assert (lots.equity_curve == 50000.0).all()
+
+    def test_invalid_options_are_rejected(self):
+        """不正な設定値でエラーになることを確認"""
+        with pytest.raises(ValueError):
+            PortfolioBacktester(sizing="kelly")
+        with pytest.raises(ValueError):
+            PortfolioBacktester(max_positions=0)
+
+
+def test_endpoint_returns_curve_and_attribution(monkeypatch, make_ohlcv):
+    """/backtest/portfolio が資産推移と銘柄ごとの内訳を返すことを確認"""
+    class StubFetcher:
+        def fetch_multiple_stocks(self, tickers, period="1y", interval="1d", batch_size=None):
+            return {ticker: make_ohlcv(int(ticker.split(".")[0]), periods=500) for ticker in tickers}
+
+    monkeypatch.setattr(app_module, "DataFetcher", StubFetcher)
+    client = app_module.app.test_client()
+
+    response = client.post("/backtest/portfolio", json={"tickers": ["1.T", "2.T"], "max_positions": 2})
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert set(body["attribution"]) == {"1.T", "2.T"}
+    assert len(body["equity_curve"]["equity"]) == 500
+
+    response = client.post("/backtest/portfolio", json={"tickers": ["1.T"], "sizing": "kelly"})
+    assert response.status_code == 400
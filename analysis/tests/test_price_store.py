@@ -0,0 +1,163 @@
+"""
+株価データ永続キャッシュのユニットテスト
+
+price_store.py と DataFetcher の差分取得のテストケースを実装します。
+"""
+
+import pytest
+import pandas as pd
+import numpy as np
+import data_providers
+from data_fetch import DataFetcher
+from price_store import PriceStore
+from frame_cache import FrameCache
+from rate_limiter import TokenBucketRateLimiter
+
+
+def make_ohlcv(start: str, periods: int) -> pd.DataFrame:
+    """テスト用の OHLCV データを作成します"""
+    dates = pd.date_range(start=start, periods=periods, freq="B", tz="Asia/Tokyo", name="Date").as_unit("ns")
+    close = np.linspace(100, 100 + periods - 1, periods)
+    return pd.DataFrame(
+        {
+            "Open": close - 1,
+            "High": close + 2,
+            "Low": close - 2,
+            "Close": close,
+            "Volume": np.arange(periods, dtype=np.int64) * 1000,
+        },
+        index=dates,
+    )
+
+
+class FakeTicker:
+    """yf.Ticker のスタブ（呼び出し履歴を記録します）"""
+
+    calls = []
+    frame = None
+    # 例外を送出する残りの呼び出し回数
+    failures = 0
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+
+    def history(self, period=None, start=None, end=None, interval="1d"):
+        FakeTicker.calls.append({"period": period, "start": start, "interval": interval})
+        if FakeTicker.failures > 0:
+            FakeTicker.failures -= 1
+            raise RuntimeError("429 Client Error: Too Many Requests")
+        df = FakeTicker.frame.copy()
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start, tz=df.index.tz)]
+        return df
+
+
+class TestPriceStore:
+    """PriceStore のテストクラス"""
+
+    def test_save_and_load_roundtrip(self, tmp_path):
+        """保存したデータが同じ値・タイムゾーンで読み込めることを確認"""
+        store = PriceStore(str(tmp_path))
+        df = make_ohlcv("2024-01-01", 30)
+        df.columns = df.columns.str.lower()
+
+        store.save("9984.T", "1d", df, covered_since="max")
+        loaded = store.load("9984.T", "1d")
+
+        pd.testing.assert_frame_equal(loaded, df, check_freq=False)
+        assert store.last_timestamp("9984.T", "1d") == df.index[-1]
+        assert store.load_meta("9984.T", "1d")["covered_since"] == "max"
+
+    def test_merge_overwrites_duplicate_bars(self, tmp_path):
+        """同一タイムスタンプのバーが新しいデータで上書きされることを確認"""
+        store = PriceStore(str(tmp_path))
+        df = make_ohlcv("2024-01-01", 10)
+        store.save("7203.T", "1d", df)
+
+        update = df.iloc[-1:].copy()
+        update["Close"] = 999.0
+        update = pd.concat([update, make_ohlcv("2024-01-15", 1)])
+
+        merged = store.merge("7203.T", "1d", update)
+
+        assert len(merged) == 11
+        assert merged["Close"].iloc[-2] == 999.0
+        assert merged.index.is_monotonic_increasing
+
+
+class TestIncrementalFetch:
+    """DataFetcher の差分取得のテストクラス"""
+
+    @pytest.fixture
+    def fetcher(self, tmp_path, monkeypatch):
+        """スタブ化した yfinance と一時ディレクトリの PriceStore を使う DataFetcher"""
+        FakeTicker.calls = []
+        FakeTicker.failures = 0
+        monkeypatch.setattr(data_providers.yf, "Ticker", FakeTicker)
+        fetcher = DataFetcher(
+            price_store=PriceStore(str(tmp_path)),
+            rate_limiter=TokenBucketRateLimiter(rate=1000, burst=1000),
+            frame_cache=FrameCache(max_bytes=0),
+        )
+        return fetcher
+
+    def test_second_fetch_requests_only_delta(self, fetcher):
+        """2回目の取得が最終保存バー以降の差分のみを要求することを確認"""
+        end = pd.Timestamp.now(tz="Asia/Tokyo").normalize()
+        history = make_ohlcv((end - pd.Timedelta(days=120)).strftime("%Y-%m-%d"), 80)
+
+        FakeTicker.frame = history.iloc[:-1]
+        first = fetcher.fetch_stock_data("9984.T", period="3mo")
+        assert FakeTicker.calls[-1]["period"] == "3mo"
+
+        FakeTicker.frame = history
+        second = fetcher.fetch_stock_data("9984.T", period="3mo")
+
+        assert FakeTicker.calls[-1]["period"] is None
+        assert FakeTicker.calls[-1]["start"] == history.index[-2].strftime("%Y-%m-%d")
+        assert len(second) == len(first) + 1
+        assert second.index[-1] == history.index[-1]
+        assert "close" in second.columns
+
+    def test_uncovered_period_triggers_full_fetch(self, fetcher):
+        """保存済みデータが要求期間をカバーしない場合は全期間を取得することを確認"""
+        end = pd.Timestamp.now(tz="Asia/Tokyo").normalize()
+        FakeTicker.frame = make_ohlcv((end - pd.Timedelta(days=60)).strftime("%Y-%m-%d"), 40)
+
+        fetcher.fetch_stock_data("6758.T", period="1mo")
+        fetcher.fetch_stock_data("6758.T", period="1y")
+
+        assert FakeTicker.calls[-1]["period"] == "1y"
+
+    def test_failed_delta_chunk_falls_back_to_single_fetch(self, fetcher):
+        """差分の一括取得が失敗した場合、保存済みデータのみを返さず個別取得することを確認"""
+        end = pd.Timestamp.now(tz="Asia/Tokyo").normalize()
+        history = make_ohlcv((end - pd.Timedelta(days=120)).strftime("%Y-%m-%d"), 80)
+
+        FakeTicker.frame = history.iloc[:-1]
+        fetcher.fetch_stock_data("9984.T", period="3mo")
+
+        def failing_download(tickers, **kwargs):
+            raise ConnectionError("chunk failed")
+
+        fetcher._download_batch = failing_download
+        FakeTicker.frame = history
+        results = fetcher.fetch_multiple_stocks(["9984.T"], period="3mo", batch_size=10)
+
+        assert FakeTicker.calls[-1]["start"] == history.index[-2].strftime("%Y-%m-%d")
+        assert results["9984.T"].index[-1] == history.index[-1]
+
+    def test_failed_ticker_in_delta_chunk_is_not_served_stale(self, fetcher):
+        """差分の一括取得で失敗した銘柄を「新しいバーなし」として扱わず、個別取得することを確認"""
+        end = pd.Timestamp.now(tz="Asia/Tokyo").normalize()
+        history = make_ohlcv((end - pd.Timedelta(days=120)).strftime("%Y-%m-%d"), 80)
+
+        FakeTicker.frame = history.iloc[:-1]
+        fetcher.fetch_stock_data("9984.T", period="3mo")
+
+        FakeTicker.frame = history
+        FakeTicker.failures = 1
+        results = fetcher.fetch_multiple_stocks(["9984.T"], period="3mo", batch_size=10)
+
+        assert [call["start"] for call in FakeTicker.calls[-2:]] == [history.index[-2].strftime("%Y-%m-%d")] * 2
+        assert results["9984.T"].index[-1] == history.index[-1]
@@ -0,0 +1,71 @@
+"""
+レート制限のユニットテスト
+
+rate_limiter.py のテストケースを実装します。
+"""
+
+import threading
+import time
+from rate_limiter import TokenBucketRateLimiter, is_rate_limit_error
+
+
+class TestTokenBucketRateLimiter:
+    """TokenBucketRateLimiter のテストクラス"""
+
+    def test_burst_is_granted_without_waiting(self):
+        """バケット容量までは待機せずに取得できることを確認"""
+        limiter = TokenBucketRateLimiter(rate=1, burst=5)
+
+        waits = [limiter.acquire() for _ in range(5)]
+
+        assert all(w == 0 for w in waits)
+
+    def test_waits_when_bucket_is_empty(self):
+        """トークン不足時はレートに応じて待機することを確認"""
+        limiter = TokenBucketRateLimiter(rate=50, burst=1)
+        limiter.acquire()
+
+        start = time.monotonic()
+        limiter.acquire()
+        elapsed = time.monotonic() - start
+
+        assert elapsed >= 0.015
+
+    def test_rate_is_shared_across_threads(self):
+        """複数スレッドからの取得でも全体のレートが上限を超えないことを確認"""
+        limiter = TokenBucketRateLimiter(rate=100, burst=1)
+        limiter.acquire()
+
+        start = time.monotonic()
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.monotonic() - start
+
+        # 10トークン / 100 per sec = 0.1秒以上かかる
+        assert elapsed >= 0.09
+        assert limiter.get_stats()["acquired"] == 11
+
+    def test_rate_limited_reduces_and_success_restores_rate(self):
+        """429でレートが下がり、成功が続くと最大レートまで戻ることを確認"""
+        limiter = TokenBucketRateLimiter(rate=1.0, burst=1, min_rate=0.1, increase_step=0.25)
+
+        limiter.on_rate_limited()
+        assert limiter.rate == 0.5
+        limiter.on_rate_limited()
+        limiter.on_rate_limited()
+        limiter.on_rate_limited()
+        assert limiter.rate == 0.1
+
+        for _ in range(10):
+            limiter.on_success()
+        assert limiter.rate == 1.0
+        assert limiter.get_stats()["rate_limited"] == 4
+
+    def test_is_rate_limit_error(self):
+        """429エラーの判定を確認"""
+        assert is_rate_limit_error(Exception("429 Client Error"))
+        assert is_rate_limit_error(Exception("Too Many Requests. Rate limited. Try after a while."))
+        assert not is_rate_limit_error(ValueError("Empty data for 9984.T"))
@@ -0,0 +1,190 @@
+"""
+分析結果の一括保存のユニットテスト
+
+result_writer.py のテストケースを実装します。
+バックエンドはローカルのスタブ HTTP サーバーで代替します。
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backend_client import BackendClient
+from result_writer import BatchResultWriter
+
+
+class StubBackend:
+    """受信したリクエストを記録するスタブバックエンド"""
+
+    def __init__(self):
+        self.requests = []
+        self.lock = threading.Lock()
+        # 銘柄ごとに返すステータスのリスト（先頭から順に使用、空になると 201）
+        self.item_statuses = {}
+        self.batch_supported = True
+        # JSON でない応答を返す一括保存リクエストの残り回数
+        self.invalid_batch_responses = 0
+
+
+def make_handler(backend: StubBackend):
+    """スタブバックエンドのリクエストハンドラーを作成します"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with backend.lock:
+                backend.requests.append((self.path, body))
+
+            with backend.lock:
+                invalid = self.path == "/api/analysis/save-batch" and backend.invalid_batch_responses > 0
+                if invalid:
+                    backend.invalid_batch_responses -= 1
+
+            if invalid:
+                self._reply_raw(200, b"<html>proxy error</html>")
+            elif self.path == "/api/analysis/save-batch" and backend.batch_supported:
+                results = []
+                for item in body["results"]:
+                    status = self._next_status(item["ticker"])
+                    results.append({"ticker": item["ticker"], "success": status == 201, "status": status})
+                self._reply(200, {"success": True, "data": {"results": results}})
+            elif self.path == "/api/analysis/save":
+                self._reply(self._next_status(body["ticker"]), {"success": True})
+            else:
+                self._reply(404, {"success": False})
+
+        def _next_status(self, ticker):
+            with backend.lock:
+                statuses = backend.item_statuses.get(ticker, [])
+                return statuses.pop(0) if statuses else 201
+
+        def _reply(self, status, payload):
+            self._reply_raw(status, json.dumps(payload).encode())
+
+        def _reply_raw(self, status, data):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def backend():
+    """スタブバックエンドを起動し、(状態, クライアント) を返します"""
+    state = StubBackend()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = BackendClient(f"http://127.0.0.1:{server.server_address[1]}", retries=0)
+    yield state, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+def analysis(ticker: str) -> dict:
+    """テスト用の分析結果を作成します"""
+    return {"ticker": ticker, "signal": "BUY", "score": 0.5}
+
+
+class TestBatchResultWriter:
+    """BatchResultWriter のテストクラス"""
+
+    def test_results_are_sent_in_batches(self, backend):
+        """結果が batch_size 件ずつまとめて送信されることを確認"""
+        state, client = backend
+        tickers = [f"{1000 + i}.T" for i in range(7)]
+
+        with BatchResultWriter(client, batch_size=3, flush_interval=10) as writer:
+            for ticker in tickers:
+                writer.add(ticker, analysis(ticker))
+
+        sizes = [len(body["results"]) for path, body in state.requests]
+        assert sizes == [3, 3, 1]
+        assert writer.get_stats() == {"saved": 7, "failed": {}, "requests": 3}
+
+    def test_only_failed_items_are_retried(self, backend):
+        """一時的に失敗した銘柄のみ再送され、恒久的な失敗は再送されないことを確認"""
+        state, client = backend
+        state.item_statuses = {"1001.T": [500], "1002.T": [404]}
+
+        writer = BatchResultWriter(client, batch_size=3, flush_interval=10, retry_delay=0)
+        for ticker in ["1000.T", "1001.T", "1002.T"]:
+            writer.add(ticker, analysis(ticker))
+        stats = writer.close()
+
+        sent = [[item["ticker"] for item in body["results"]] for _, body in state.requests]
+        assert sent == [["1000.T", "1001.T", "1002.T"], ["1001.T"]]
+        assert stats["saved"] == 2
+        assert list(stats["failed"]) == ["1002.T"]
+
+    def test_buffer_is_flushed_after_interval(self, backend):
+        """batch_size に満たなくても flush_interval 経過後に送信されることを確認"""
+        state, client = backend
+
+        writer = BatchResultWriter(client, batch_size=100, flush_interval=0.05)
+        writer.add("1000.T", analysis("1000.T"))
+        deadline = time.monotonic() + 2
+        while not state.requests and time.monotonic() < deadline:
+            time.sleep(0.01)
+        sent_before_close = len(state.requests)
+        writer.close()
+
+        assert sent_before_close == 1
+
+    def test_falls_back_to_single_save(self, backend):
+        """一括保存 API がない場合に銘柄ごとの保存にフォールバックすることを確認"""
+        state, client = backend
+        state.batch_supported = False
+
+        with BatchResultWriter(client, batch_size=2, flush_interval=10) as writer:
+            for ticker in ["1000.T", "1001.T", "1002.T"]:
+                writer.add(ticker, analysis(ticker))
+
+        paths = [path for path, _ in state.requests]
+        assert paths == ["/api/analysis/save-batch"] + ["/api/analysis/save"] * 3
+        assert writer.get_stats()["saved"] == 3
+
+    def test_invalid_batch_response_is_retried(self, backend):
+        """一括保存の応答が JSON でない場合にバッチ全体が再送されることを確認"""
+        state, client = backend
+        state.invalid_batch_responses = 1
+
+        with BatchResultWriter(client, batch_size=2, flush_interval=10, retry_delay=0) as writer:
+            for ticker in ["1000.T", "1001.T"]:
+                writer.add(ticker, analysis(ticker))
+
+        assert [path for path, _ in state.requests] == ["/api/analysis/save-batch"] * 2
+        assert writer.get_stats() == {"saved": 2, "failed": {}, "requests": 2}
+
+    def test_writer_survives_unexpected_flush_error(self, backend):
+        """送信中の予期しない例外の後も送信スレッドが継続することを確認"""
+        state, client = backend
+        writer = BatchResultWriter(client, batch_size=1, flush_interval=10)
+        send = writer._send
+        calls = []
+
+        def flaky_send(items):
+            calls.append(items)
+            if len(calls) == 1:
+                raise KeyError("unexpected")
+            return send(items)
+
+        writer._send = flaky_send
+        for ticker in ["1000.T", "1001.T"]:
+            writer.add(ticker, analysis(ticker))
+        stats = writer.close()
+
+        assert stats["saved"] == 1
+        assert list(stats["failed"]) == ["1000.T"]
@@ -0,0 +1,189 @@
+"""
+リスク指標のユニットテスト
+
+risk_metrics.py のテストケースを実装します。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+import risk_metrics
+from backtest import Backtester
+from risk_metrics import (
+    RiskMetricsCache,
+    compute_panel_risk_metrics,
+    compute_risk_metrics,
+    rolling_risk_metrics,
+)
+
+
+def make_prices(seed: int, periods: int = 300) -> pd.Series:
+    """テスト用の終値を作成します"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-02", periods=periods, freq="B", tz="Asia/Tokyo")
+    return pd.Series(1000 * np.exp(np.cumsum(rng.normal(0, 0.015, periods))), index=dates)
+
+
+class TestComputeRiskMetrics:
+    """compute_risk_metrics のテストクラス"""
+
+    def test_matches_reference_formulas(self):
+        """各指標が pandas / NumPy で個別に計算した値と一致することを確認"""
+        close = make_prices(1)
+        returns = close.pct_change().dropna()
+
+        metrics = compute_risk_metrics(close, risk_free_rate=0.02)
+
+        sharpe = (returns.mean() * 252 - 0.02) / (returns.std() * 252 ** 0.5)
+        drawdown = (close - close.cummax()) / close.cummax()
+        excess = returns - 0.02 / 252
+        sortino = excess.mean() * 252 / (np.sqrt((excess.clip(upper=0) ** 2).mean()) * 252 ** 0.5)
+        var = np.percentile(returns, 5)
+        annual = (close.iloc[-1] / close.iloc[0]) ** (252 / len(returns)) - 1
+
+        assert metrics["observations"] == len(returns)
+        assert metrics["sharpe_ratio"] == pytest.approx(sharpe)
+        assert metrics["sortino_ratio"] == pytest.approx(sortino)
+        assert metrics["volatility"] == pytest.approx(returns.std() * 252 ** 0.5 * 100)
+        assert metrics["max_drawdown"] == pytest.approx(drawdown.min() * 100)
+        assert metrics["calmar_ratio"] == pytest.approx(annual * 100 / abs(drawdown.min() * 100))
+        assert metrics["value_at_risk"] == pytest.approx(var * 100)
+        assert metrics["conditional_value_at_risk"] == pytest.approx(returns[returns <= var].mean() * 100)
+
+    def test_drawdown_duration_and_dates(self):
+        """最大ドローダウンの期間・開始日・底の日付を確認"""
+        dates = pd.date_range("2024-01-01", periods=8, freq="D")
+        close = pd.Series([100, 110, 99, 88, 95, 111, 105, 106], index=dates, dtype=float)
+
+        metrics = compute_risk_metrics(close)
+
+        assert metrics["max_drawdown"] == pytest.approx(-20.0)
+        assert metrics["max_drawdown_peak"] == str(dates[1])
+        assert metrics["max_drawdown_trough"] == str(dates[3])
+        # 2日目の高値から6日目に回復するまでの3本が最長（末尾の未回復期間は2本）
+        assert metrics["max_drawdown_duration"] == 3
+
+    def test_monotonic_series_has_no_drawdown(self):
+        """下落のない系列ではドローダウンが0、カルマーレシオが None になることを確認"""
+        metrics = compute_risk_metrics(np.linspace(100, 200, 50))
+
+        assert metrics["max_drawdown"] == 0
+        assert metrics["max_drawdown_duration"] == 0
+        assert metrics["calmar_ratio"] is None
+
+
+class TestPanelAndRolling:
+    """パネル・ローリング計算のテストクラス"""
+
+    def test_panel_rows_match_single_series(self):
+        """パネルの各行が、銘柄ごとの計算結果と一致することを確認（開始日が異なる銘柄を含む）"""
+        panel = pd.DataFrame({f"{i}.T": make_prices(i) for i in range(3)})
+        panel.iloc[:40, 2] = np.nan
+
+        table = compute_panel_risk_metrics(panel)
+
+        for ticker in panel.columns:
+            expected = compute_risk_metrics(panel[ticker].dropna())
+            for name, value in table.loc[ticker].items():
+                assert value == pytest.approx(expected[name]), name
+
+    def test_rolling_matches_trailing_window(self):
+        """各時点の値が、直近の窓で切り出したデータでの計算結果と一致することを確認"""
+        close = make_prices(5)
+        window = 40
+
+        rolling = rolling_risk_metrics(close, window=window, risk_free_rate=0.01)
+
+        assert rolling.iloc[:window].isna().all().all()
+        for end in (window, 120, len(close) - 1):
+            expected = compute_risk_metrics(close.iloc[end - window:end + 1], risk_free_rate=0.01)
+            row = rolling.iloc[end]
+            for name in ("volatility", "sharpe_ratio", "sortino_ratio", "max_drawdown",
+                         "value_at_risk", "conditional_value_at_risk"):
+                assert row[name] == pytest.approx(expected[name]), name
+
+    def test_rolling_panel_is_chunked_consistently(self, monkeypatch):
+        """パネルのローリング計算がチャンクの大きさによらず同じ結果になることを確認"""
+        panel = pd.DataFrame({f"{i}.T": make_prices(10 + i) for i in range(4)})
+        whole = rolling_risk_metrics(panel, window=30)
+
+        monkeypatch.setattr(risk_metrics, "RISK_ROLLING_CHUNK_ELEMENTS", 500)
+        chunked = rolling_risk_metrics(panel, window=30)
+
+        assert set(whole) == {"volatility", "sharpe_ratio", "sortino_ratio", "calmar_ratio",
+                              "max_drawdown", "value_at_risk", "conditional_value_at_risk"}
+        for name in whole:
+            pd.testing.assert_frame_equal(whole[name], chunked[name])
+
+
+def test_backtest_result_has_max_drawdown(make_ohlcv):
+    """バックテスト結果に保有期間の資産推移から計算した最大ドローダウンが入ることを確認"""
+    result = Backtester().run_backtest_on_data(make_ohlcv(7, periods=500))
+
+    assert result.total_trades > 0
+    assert result.max_drawdown < 0
+    assert result.to_dict()["max_drawdown"] == result.max_drawdown
+
+
+class TestEndpoints:
+    """リスク指標エンドポイントのテストクラス"""
+
+    @pytest.fixture
+    def fetch_calls(self, monkeypatch, make_ohlcv):
+        """データ取得をスタブ化し、空のキャッシュに差し替えて取得回数を記録します"""
+        calls = []
+
+        class StubFetcher:
+            def fetch_stock_data(self, ticker, period="1y", interval="1d"):
+                calls.append(ticker)
+                if ticker.startswith("FAIL"):
+                    raise RuntimeError("Too Many Requests")
+                return make_ohlcv(int(ticker.split(".")[0]), periods=300)
+
+            def fetch_multiple_stocks(self, tickers, period="1y", interval="1d", batch_size=None):
+                return {ticker: self.fetch_stock_data(ticker, period) for ticker in tickers}
+
+        monkeypatch.setattr(risk_metrics, "DataFetcher", StubFetcher)
+        monkeypatch.setattr(app_module, "DataFetcher", StubFetcher)
+        monkeypatch.setattr(risk_metrics, "_cache", RiskMetricsCache(max_entries=16))
+        return calls
+
+    def test_views_share_one_computation(self, fetch_calls):
+        """/sharpe-ratio と /max-drawdown が同じ計算結果を参照することを確認"""
+        client = app_module.app.test_client()
+
+        sharpe = client.get("/sharpe-ratio/1.T").get_json()
+        drawdown = client.get("/max-drawdown/1.T").get_json()
+        metrics = client.get("/risk-metrics/1.T").get_json()
+
+        assert sharpe["sharpe_ratio"] == metrics["sharpe_ratio"]
+        assert drawdown["max_drawdown"] == metrics["max_drawdown"]
+        assert drawdown["max_drawdown_duration"] == metrics["max_drawdown_duration"]
+        stats = risk_metrics.get_risk_metrics_cache().get_stats()
+        assert (stats["misses"], stats["hits"]) == (1, 2)
+        assert len(fetch_calls) == 3
+
+    @pytest.mark.parametrize("path", ["/risk-metrics", "/sharpe-ratio", "/max-drawdown"])
+    def test_fetch_error_is_bad_request(self, fetch_calls, path):
+        """データ取得に失敗した場合に 500 ではなく 400 になることを確認"""
+        client = app_module.app.test_client()
+
+        response = client.get(f"{path}/FAIL.T")
+
+        assert response.status_code == 400
+        assert response.get_json()["ticker"] == "FAIL.T"
+
+    def test_batch_returns_panel_rows(self, fetch_calls, make_ohlcv):
+        """/risk-metrics/batch が銘柄ごとの指標とローリングの最新値を返すことを確認"""
+        client = app_module.app.test_client()
+
+        response = client.post("/risk-metrics/batch", json={"tickers": ["1.T", "2.T"], "rolling_window": 20})
+
+        body = response.get_json()
+        assert response.status_code == 200
+        assert body["1.T"]["sharpe_ratio"] == pytest.approx(
+            compute_risk_metrics(make_ohlcv(1, periods=300)["close"])["sharpe_ratio"]
+        )
+        assert body["2.T"]["rolling_max_drawdown"] <= 0
@@ -0,0 +1,103 @@
+"""
+リクエスト集約のユニットテスト
+
+single_flight.py のテストケースを実装します。
+"""
+
+import threading
+import time
+
+from single_flight import SingleFlight
+
+
+def run_concurrently(flight: SingleFlight, fn, count: int, timeout=None):
+    """先行する呼び出しの開始後に残りを同時に呼び出し、結果または例外を返します"""
+    started = threading.Event()
+    outcomes = []
+    lock = threading.Lock()
+
+    def owner_fn():
+        started.set()
+        return fn()
+
+    def call(target):
+        try:
+            value = flight.do("key", target, timeout=timeout)
+        except Exception as e:
+            value = e
+        with lock:
+            outcomes.append(value)
+
+    threads = [threading.Thread(target=call, args=(owner_fn,))]
+    threads[0].start()
+    started.wait()
+    threads += [threading.Thread(target=call, args=(fn,)) for _ in range(count - 1)]
+    for t in threads[1:]:
+        t.start()
+    while flight.get_stats()["calls"] < count:
+        time.sleep(0.001)
+    for t in threads:
+        t.join()
+    return outcomes
+
+
+class TestSingleFlight:
+    """SingleFlight のテストクラス"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """同時呼び出しで処理が1回だけ実行され、結果が共有されることを確認"""
+        flight = SingleFlight()
+        calls = []
+
+        def fn():
+            calls.append(1)
+            time.sleep(0.05)
+            return {"value": 42}
+
+        outcomes = run_concurrently(flight, fn, 5)
+
+        assert len(calls) == 1
+        assert outcomes == [{"value": 42}] * 5
+        stats = flight.get_stats()
+        assert stats["executions"] == 1
+        assert stats["suppressed"] == 4
+        assert stats["in_flight"] == 0
+
+    def test_error_propagates_to_every_waiter(self):
+        """例外が全ての呼び出し元に送出されることを確認"""
+        flight = SingleFlight()
+
+        def fn():
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        outcomes = run_concurrently(flight, fn, 3)
+
+        assert [type(e) for e in outcomes] == [ValueError] * 3
+        assert flight.get_stats()["errors"] == 1
+
+    def test_waiter_times_out_while_owner_completes(self):
+        """待機側はタイムアウトし、先行する処理は完了することを確認"""
+        flight = SingleFlight()
+
+        def fn():
+            time.sleep(0.2)
+            return "done"
+
+        outcomes = run_concurrently(flight, fn, 2, timeout=0.01)
+
+        assert sorted(map(str, outcomes)) == sorted(
+            ["done", "Timed out waiting for in-flight request: key"]
+        )
+        assert flight.get_stats()["timeouts"] == 1
+
+    def test_sequential_calls_execute_again(self):
+        """完了後の呼び出しでは処理が再実行されることを確認"""
+        flight = SingleFlight()
+        calls = []
+
+        for _ in range(2):
+            flight.do("key", lambda: calls.append(1))
+
+        assert len(calls) == 2
+        assert flight.get_stats()["suppressed"] == 0
@@ -0,0 +1,155 @@
+"""
+銘柄索引のユニットテスト
+
+symbol_index.py のテストケースを実装します。
+バックエンドはローカルのスタブ HTTP サーバーで代替します。
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from backend_client import BackendClient
+from symbol_index import SymbolIndex
+
+
+class StubStocks:
+    """ページ分割と ETag に対応した銘柄一覧のスタブ"""
+
+    def __init__(self, count: int):
+        self.lock = threading.Lock()
+        self.stocks = {i: f"{1000 + i}.T" for i in range(1, count + 1)}
+        # 一覧には含まれず、個別取得でのみ見つかる銘柄
+        self.hidden = {}
+        self.requests = []
+
+    def etag(self) -> str:
+        return f'W/"{len(self.stocks)}"'
+
+
+def make_handler(state: StubStocks):
+    """スタブバックエンドのリクエストハンドラーを作成します"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            with state.lock:
+                state.requests.append(self.path)
+
+            if url.path == "/api/stocks":
+                if self.headers.get("If-None-Match") == state.etag():
+                    return self._reply(304, None)
+                page, limit = int(query["page"][0]), int(query["limit"][0])
+                ids = sorted(state.stocks)
+                chunk = ids[(page - 1) * limit:page * limit]
+                return self._reply(200, {
+                    "success": True,
+                    "data": [{"id": i, "symbol": state.stocks[i]} for i in chunk],
+                    "pagination": {"page": page, "limit": limit, "total": len(ids),
+                                   "pages": -(-len(ids) // limit)},
+                })
+
+            stock_id = int(url.path.rsplit("/", 1)[-1])
+            symbol = state.stocks.get(stock_id) or state.hidden.get(stock_id)
+            if symbol is None:
+                return self._reply(404, {"success": False})
+            return self._reply(200, {"success": True, "data": {"id": stock_id, "symbol": symbol}})
+
+        def _reply(self, status, payload):
+            data = json.dumps(payload).encode() if payload is not None else b""
+            self.send_response(status)
+            self.send_header("ETag", state.etag())
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def backend():
+    """250銘柄のスタブバックエンドを起動し、(状態, クライアント) を返します"""
+    state = StubStocks(250)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = BackendClient(f"http://127.0.0.1:{server.server_address[1]}", retries=0)
+    yield state, client
+    client.close()
+    server.shutdown()
+    server.server_close()
+
+
+class TestSymbolIndex:
+    """SymbolIndex のテストクラス"""
+
+    def test_all_pages_are_indexed_once(self, backend):
+        """全ページが索引化され、2回目以降の解決でリクエストが発生しないことを確認"""
+        state, client = backend
+        index = SymbolIndex(client)
+
+        first = index.resolve([250, 1, 120])
+        requests_after_load = len(state.requests)
+        second = index.resolve([5, 250])
+
+        assert first == {250: "1250.T", 1: "1001.T", 120: "1120.T"}
+        assert second == {5: "1005.T", 250: "1250.T"}
+        assert requests_after_load == 3
+        assert len(state.requests) == 3
+        assert index.get_stats()["size"] == 250
+
+    def test_unknown_ids_are_looked_up_individually(self, backend):
+        """索引にない ID のみ個別に問い合わせ、見つからない ID は除外されることを確認"""
+        state, client = backend
+        state.hidden[999] = "9999.T"
+        index = SymbolIndex(client)
+        index.refresh()
+        state.requests.clear()
+
+        resolved = index.resolve([1, 999, 12345])
+
+        assert resolved == {1: "1001.T", 999: "9999.T"}
+        assert state.requests == ["/api/stocks/999", "/api/stocks/12345"]
+        assert index.get_stats()["targeted_lookups"] == 2
+
+    def test_refresh_uses_etag(self, backend):
+        """一覧に変更がない場合は1ページ目の 304 のみで更新が完了することを確認"""
+        state, client = backend
+        index = SymbolIndex(client)
+        index.refresh()
+        state.requests.clear()
+
+        assert index.refresh() is False
+        assert len(state.requests) == 1
+
+        state.stocks[251] = "1251.T"
+        assert index.refresh() is True
+        assert index.resolve([251]) == {251: "1251.T"}
+        stats = index.get_stats()
+        assert stats["not_modified"] == 1
+        assert stats["refreshes"] == 2
+
+    def test_stale_index_is_refreshed_in_background(self, backend):
+        """古くなった索引は現在の内容で解決しつつ、バックグラウンドで更新されることを確認"""
+        state, client = backend
+        index = SymbolIndex(client, refresh_seconds=0)
+        index.resolve([1])
+        state.stocks[251] = "1251.T"
+
+        index.resolve([1])
+        deadline = time.monotonic() + 2
+        while index.get_stats()["refreshes"] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert index.get_stats()["refreshes"] == 2
+        assert index.get_stats()["age_seconds"] < 2
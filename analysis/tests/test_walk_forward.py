@@ -0,0 +1,177 @@
+"""
+ウォークフォワード検証のユニットテスト
+
+walk_forward.py のテストケースを実装します。
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app as app_module
+import walk_forward
+from backtest import WARMUP_BARS
+from compute_pool import ComputePool
+from optimizer import grid_search_space
+from walk_forward import make_folds, merge_parts, run_walk_forward, walk_forward_frame
+
+
+GRID = {
+    "ma_periods": [(5, 20, 50), (3, 10, 30)],
+    "rsi_oversold": [30],
+    "rsi_overbought": [70],
+    "macd": [(12, 26, 9), (8, 17, 5)],
+    "weights": [(0.4, 0.3, 0.3)],
+    "threshold": [0.2, 0.3],
+}
+
+
+class TestFolds:
+    """窓の作成のテストクラス"""
+
+    def test_rolling_and_anchored_windows(self):
+        """ローリングでは学習期間がずれ、アンカー付きでは開始位置が固定されることを確認"""
+        rolling = make_folds(500, train_bars=200, test_bars=100)
+        anchored = make_folds(500, train_bars=200, test_bars=100, anchored=True)
+
+        assert rolling == [(WARMUP_BARS, 250, 350), (150, 350, 450)]
+        assert anchored == [(WARMUP_BARS, 250, 350), (WARMUP_BARS, 350, 450)]
+
+    def test_overlapping_test_windows_are_rejected(self):
+        """検証期間が重なる step はエラーになることを確認"""
+        with pytest.raises(ValueError):
+            make_folds(500, train_bars=200, test_bars=100, step=50)
+
+
+class TestWalkForwardFrame:
+    """1銘柄のウォークフォワード検証のテストクラス"""
+
+    def test_folds_do_not_look_ahead(self, make_ohlcv):
+        """各フォールドの結果が、検証期間の終わりで切ったデータでの結果と一致することを確認"""
+        df = make_ohlcv(1, periods=900)
+        combos = grid_search_space(GRID)
+
+        folds = walk_forward_frame(df, combos, train_bars=250, test_bars=100)
+
+        assert len(folds) == len(make_folds(len(df), 250, 100))
+        for fold in folds:
+            end = df.index.get_loc(pd.Timestamp(fold["test_end"])) + 1
+            truncated = walk_forward_frame(df.iloc[:end], combos, train_bars=250, test_bars=100)
+            assert truncated[-1] == fold
+
+    def test_best_training_combination_is_chosen(self, make_ohlcv):
+        """学習期間のリターン合計が最大の組み合わせが選ばれることを確認"""
+        df = make_ohlcv(2, periods=900)
+        combos = grid_search_space(GRID)
+
+        folds = walk_forward_frame(df, combos, train_bars=250, test_bars=100)
+        single = [walk_forward_frame(df, [combo], train_bars=250, test_bars=100) for combo in combos]
+
+        for i, fold in enumerate(folds):
+            best = max(runs[i]["train_return"] for runs in single)
+            assert fold["train_return"] == pytest.approx(best)
+            assert any(runs[i] == fold for runs in single)
+
+    def test_combination_blocks_merge_to_full_run(self, make_ohlcv):
+        """組み合わせをブロックに分けて評価し、統合した結果がまとめて評価した結果と一致することを確認"""
+        df = make_ohlcv(6, periods=900)
+        combos = grid_search_space(GRID)
+
+        full = walk_forward_frame(df, combos, train_bars=250, test_bars=100)
+        parts = [walk_forward_frame(df, combos, train_bars=250, test_bars=100, part=i, parts=3) for i in range(3)]
+
+        assert merge_parts(parts) == full
+        assert merge_parts(parts[:2] + [None]) == []
+
+
+class TestRunWalkForward:
+    """複数銘柄のウォークフォワード検証のテストクラス"""
+
+    def test_combination_blocks_in_workers_match_serial_run(self, monkeypatch, make_ohlcv):
+        """1銘柄の組み合わせを複数ワーカーで分担した結果が、まとめて実行した結果と一致することを確認"""
+        frames = {"1000.T": make_ohlcv(3, periods=900), "FAIL.T": None}
+        combos = grid_search_space(GRID)
+        monkeypatch.setattr(walk_forward, "OPTIMIZER_COMBO_BLOCK", 2)
+        pool = ComputePool(max_workers=2)
+        calls = []
+        map_frames = pool.map_frames
+
+        def recording_map_frames(task, frames, **options):
+            calls.append(list(frames))
+            return map_frames(task, frames, **options)
+
+        pool.map_frames = recording_map_frames
+        try:
+            parallel = run_walk_forward(frames, combos, train_bars=250, test_bars=100, pool=pool)
+        finally:
+            pool.shutdown()
+
+        serial = run_walk_forward(frames, combos, train_bars=250, test_bars=100, pool=ComputePool(max_workers=1))
+
+        assert calls == [[("1000.T", 0, 2), ("1000.T", 1, 2)]]
+        assert parallel == serial
+        assert list(parallel["tickers"]) == ["1000.T"]
+        folds = parallel["tickers"]["1000.T"]["folds"]
+        assert [fold["fold"] for fold in folds] == list(range(len(folds)))
+
+    def test_summary_chains_test_windows(self, make_ohlcv):
+        """集計の複利リターンが検証期間の複利リターンを連結した値になることを確認"""
+        result = run_walk_forward(
+            {"1000.T": make_ohlcv(4, periods=900), "1001.T": make_ohlcv(5, periods=900)},
+            train_bars=250,
+            test_bars=100,
+            pool=ComputePool(max_workers=1),
+        )
+
+        entry = result["tickers"]["1000.T"]
+        expected = np.prod([1 + fold["test_compound_return"] / 100 for fold in entry["folds"]]) - 1
+        assert entry["summary"]["test_compound_return"] == pytest.approx(expected * 100)
+        assert entry["summary"]["most_chosen_ratio"] == 1.0
+        assert result["summary"]["tickers"] == 2
+        assert result["summary"]["folds"] == 2 * len(entry["folds"])
+
+
+def test_endpoint_returns_summaries(monkeypatch, make_ohlcv):
+    """/walk-forward が銘柄ごとの集計と全体の集計を返すことを確認"""
+    class StubFetcher:
+        def fetch_multiple_stocks(self, tickers, period="10y", interval="1d", batch_size=None):
+            return {ticker: make_ohlcv(int(ticker.split(".")[0]), periods=900) for ticker in tickers}
+
+    monkeypatch.setattr(app_module, "DataFetcher", StubFetcher)
+    client = app_module.app.test_client()
+
+    response = client.post("/walk-forward", json={
+        "tickers": ["1.T", "2.T"], "train_bars": 250, "test_bars": 100, "include_folds": False
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body["combinations"] == 1
+    assert body["tickers"]["1.T"]["folds"] == len(make_folds(900, 250, 100))
+    assert body["summary"]["tickers"] == 2
+
+
+def test_endpoint_rejects_unknown_search():
+    """/walk-forward と /optimize が不明な search を 400 で拒否することを確認"""
+    client = app_module.app.test_client()
+
+    for path in ("/walk-forward", "/optimize"):
+        response = client.post(path, json={"tickers": ["1.T"], "search": "bayesian"})
+        assert response.status_code == 400
+        assert "Unknown search" in response.get_json()["error"]
+
+
+@pytest.mark.parametrize("body", [
+    {"train_bars": "long"},
+    {"test_bars": None},
+    {"step": "weekly"},
+    {"step": [126]},
+])
+def test_endpoint_rejects_non_integer_windows(body):
+    """整数に変換できない train_bars / test_bars / step が 500 ではなく 400 になることを確認"""
+    client = app_module.app.test_client()
+
+    response = client.post("/walk-forward", json={"tickers": ["1.T"], **body})
+
+    assert response.status_code == 400
+    assert "integers" in response.get_json()["error"]
@@ -9,6 +9,11 @@ import * as analysisJobService from '../services/analysisJobService';
 import { asyncHandler, AppError } from '../middleware/errorHandler';
 import logger from '../utils/logger';
 import axios from 'axios';
+import { StringDecoder } from 'string_decoder';
+import type { Readable } from 'stream';
+
+// 分析ストリームがこの時間（ミリ秒）データを返さない場合はジョブを失敗として扱う
+const ANALYSIS_STREAM_IDLE_TIMEOUT_MS = parseInt(process.env.ANALYSIS_STREAM_IDLE_TIMEOUT_MS || '300000', 10);
 
 /**
  * GET /api/analysis/:stockId
@@ -80,6 +85,34 @@ export const saveAnalysisResult = asyncHandler(async (req: Request, res: Respons
   }
 });
 
+/**
+ * POST /api/analysis/save-batch
+ * Python から送られてきた複数の分析結果を一括で DB に保存
+ * （銘柄ごとの保存結果を返し、失敗した銘柄のみ再送できるようにする）
+ */
+export const saveAnalysisResultsBatch = asyncHandler(async (req: Request, res: Response) => {
+  const { results } = req.body;
+
+  if (!Array.isArray(results) || results.length === 0) {
+    throw new AppError('results は必須で、非空の配列である必要があります。', 400);
+  }
+  if (results.some((item: any) => !item || !item.ticker || !item.analysis)) {
+    throw new AppError('results の各要素には ticker と analysis が必須です。', 400);
+  }
+
+  const itemResults = await analysisService.saveAnalysisResultsBatchFromPython(results);
+  const savedCount = itemResults.filter((result) => result.success).length;
+
+  res.status(200).json({
+    success: savedCount === itemResults.length,
+    data: {
+      saved: savedCount,
+      failed: itemResults.length - savedCount,
+      results: itemResults,
+    },
+  });
+});
+
 /**
  * POST /api/analysis/trigger
  * Python 分析エンジンに分析を実行させる（非同期バックグラウンド処理）
@@ -122,63 +155,103 @@ export const triggerAnalysis = asyncHandler(async (req: Request, res: Response)
 
     // バックグラウンドで分析を実行（レスポンス後に実行）
     setImmediate(async () => {
+      // Python サービスが途中で停止してもジョブが processing のまま残らないよう、
+      // データを受信するたびにリセットする無通信タイマーでリクエストを中断する
+      const controller = new AbortController();
+      let analysisStream: Readable | undefined;
+      let idleTimer: NodeJS.Timeout | undefined;
+      const resetIdleTimer = () => {
+        clearTimeout(idleTimer);
+        idleTimer = setTimeout(() => {
+          const timeoutError = new Error(
+            `分析ストリームが ${ANALYSIS_STREAM_IDLE_TIMEOUT_MS / 1000} 秒間応答しなかったため中断しました。`
+          );
+          controller.abort(timeoutError);
+          analysisStream?.destroy(timeoutError);
+        }, ANALYSIS_STREAM_IDLE_TIMEOUT_MS);
+      };
+
       try {
         // ジョブステータスを processing に更新
         await analysisJobService.updateAnalysisJobStatus(jobId, 'processing');
         
         logger.info(`バックグラウンド分析開始: ${tickers.join(', ')} (Job: ${jobId})`);
         
+        // 分析結果を NDJSON ストリームで受け取り、完了した銘柄から順に保存・進捗更新する
+        resetIdleTimer();
         const analysisResponse = await axios.post(
           `${pythonServiceUrl}/analyze/batch`,
           {
             tickers: tickers,
             period: '1y',
+            stream: true,
+            save_to_backend: false, // 保存はこちらで行う（二重保存を防ぐ）
           },
-          { timeout: 300000 } // 5分タイムアウト（複数銘柄対応）
+          // ストリームのため全体のタイムアウトは設定せず、無通信タイマーで中断する
+          { timeout: 0, responseType: 'stream', signal: controller.signal }
         );
+        analysisStream = analysisResponse.data as Readable;
 
-        logger.info(`バックグラウンド分析完了: ${tickers.length}銘柄 (Job: ${jobId})`);
-        
-        // 分析結果をデータベースに並列保存（パフォーマンス改善）
-        const results = analysisResponse.data;
-        
-        // デバッグ: 返される結果の形式を確認
-        logger.info(`📊 Python から返された結果の型: ${Array.isArray(results) ? 'Array' : typeof results}`);
-        logger.info(`📊 結果の内容: ${JSON.stringify(results).substring(0, 200)}...`);
-        
-        // 結果がリストの場合は辞書に変換
-        let resultsDict = results;
-        if (Array.isArray(results)) {
-          logger.warn(`⚠️  結果がリスト形式で返されています。辞書に変換します。`);
-          // 配列をティッカー: 結果の辞書に変換
-          resultsDict = {};
-          results.forEach((item: any, index: number) => {
-            if (item && item.ticker) {
-              resultsDict[item.ticker] = item;
-            } else {
-              logger.warn(`⚠️  インデックス ${index} の結果にティッカー情報がありません: ${JSON.stringify(item).substring(0, 100)}`);
+        let processedCount = 0;
+        let successCount = 0;
+        let summary: any = null;
+        let lastProgressUpdate = 0;
+
+        const handleLine = async (line: string) => {
+          if (!line.trim()) return;
+          const message = JSON.parse(line);
+
+          if (message.type === 'summary') {
+            summary = message;
+            return;
+          }
+
+          processedCount += 1;
+          if (message.type === 'result') {
+            try {
+              await analysisService.saveAnalysisResultFromPython(message.ticker, message.analysis);
+              successCount += 1;
+              logger.info(`分析結果を保存: ${message.ticker} (Job: ${jobId})`);
+            } catch (saveError) {
+              logger.error(`分析結果保存エラー (${message.ticker}, Job: ${jobId}):`, saveError);
             }
-          });
-        }
-        
-        const savePromises = Object.keys(resultsDict).map(async (ticker) => {
-          try {
-            await analysisService.saveAnalysisResultFromPython(ticker, resultsDict[ticker]);
-            logger.info(`分析結果を保存: ${ticker} (Job: ${jobId})`);
-            return { ticker, success: true };
-          } catch (saveError) {
-            logger.error(`分析結果保存エラー (${ticker}, Job: ${jobId}):`, saveError);
-            return { ticker, success: false, error: saveError };
+          } else {
+            logger.warn(`分析失敗: ${message.ticker} (Job: ${jobId})`);
           }
-        });
-        
-        // すべての保存処理を並列実行（失敗しても他の保存は継続）
-        const saveResults = await Promise.allSettled(savePromises);
-        const successCount = saveResults.filter(r => r.status === 'fulfilled' && r.value.success).length;
+
+          // 進捗の更新は1秒に1回までに抑える
+          const now = Date.now();
+          if (now - lastProgressUpdate >= 1000) {
+            lastProgressUpdate = now;
+            await analysisJobService.updateAnalysisJobProgress(
+              jobId, processedCount, successCount, processedCount - successCount
+            );
+          }
+        };
+
+        // チャンク境界で分割されたマルチバイト文字を正しく復元する
+        const decoder = new StringDecoder('utf8');
+        let buffer = '';
+        for await (const chunk of analysisStream) {
+          resetIdleTimer();
+          buffer += decoder.write(chunk);
+          let newline: number;
+          while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline);
+            buffer = buffer.slice(newline + 1);
+            await handleLine(line);
+          }
+        }
+        clearTimeout(idleTimer);
+        await handleLine(buffer + decoder.end());
+
+        if (!summary || summary.status === 'failed') {
+          throw new Error(summary?.error || '分析ストリームが途中で終了しました。');
+        }
+
         const failedCount = tickers.length - successCount;
-        
-        logger.info(`分析結果保存完了: ${successCount}/${tickers.length}銘柄 (Job: ${jobId})`);
-        
+        logger.info(`バックグラウンド分析完了: ${successCount}/${tickers.length}銘柄を保存 (Job: ${jobId})`);
+
         // ジョブステータスを completed に更新
         await analysisJobService.updateAnalysisJobStatus(jobId, 'completed', {
           processedCount: tickers.length,
@@ -186,13 +259,17 @@ export const triggerAnalysis = asyncHandler(async (req: Request, res: Response)
           failedCount,
         });
         
-      } catch (error) {
+      } catch (caught) {
+        // 無通信タイマーで中断した場合は、axios のキャンセルエラーではなくタイムアウトとして記録する
+        const error = controller.signal.aborted ? controller.signal.reason : caught;
         logger.error(`バックグラウンド分析エラー (Job: ${jobId}):`, error);
         
         // ジョブステータスを failed に更新
         await analysisJobService.updateAnalysisJobStatus(jobId, 'failed', {
           errorMessage: error instanceof Error ? error.message : String(error),
         });
+      } finally {
+        clearTimeout(idleTimer);
       }
     });
 
@@ -225,6 +302,7 @@ export default {
   getLatestAnalysis,
   getAnalysisHistory,
   saveAnalysisResult,
+  saveAnalysisResultsBatch,
   triggerAnalysis,
   getAnalysisJobStatus,
 };
@@ -4,6 +4,7 @@
  * GET /api/analysis/:stockId/history
  * GET /api/analysis/job/:jobId
  * POST /api/analysis/save
+ * POST /api/analysis/save-batch
  * POST /api/analysis/trigger
  */
 
@@ -24,6 +25,12 @@ router.post('/trigger', analysisController.triggerAnalysis);
  */
 router.post('/save', analysisController.saveAnalysisResult);
 
+/**
+ * POST /api/analysis/save-batch
+ * Python 分析エンジンから複数の分析結果を受け取って一括保存
+ */
+router.post('/save-batch', analysisController.saveAnalysisResultsBatch);
+
 /**
  * GET /api/analysis/job/:jobId
  * 分析ジョブのステータスを取得
@@ -241,6 +241,30 @@ export async function upsertAnalysisResult(stockId: number, input: AnalysisResul
   }
 }
 
+/**
+ * Python の分析結果を analysisResult の保存データに変換
+ */
+function toAnalysisResultData(stockId: number, analysis: any) {
+  // Python から返されたデータの形式を確認し、適切なフィールドをマッピング
+  const indicators = analysis.indicators || {};
+
+  return {
+    stock_id: stockId,
+    signal: (analysis.signal || 'hold').toUpperCase(),
+    score: Math.round((analysis.score || 0.5) * 100), // スコアを0-100の範囲に変換
+    confidence: analysis.confidence || 0.5,
+    reason: analysis.reason || null,
+    ma_5: indicators.ma_5 || null,
+    ma_20: indicators.ma_20 || null,
+    ma_50: indicators.ma_50 || null,
+    rsi_14: indicators.rsi || null,
+    macd: indicators.macd || null,
+    macd_signal: indicators.macd_signal || null,
+    current_price: analysis.current_price || 0,
+    analysis_date: new Date(),
+  };
+}
+
 /**
  * Python から送られた分析結果を保存
  * （銘柄コードから銘柄 ID を検索して保存）
@@ -258,26 +282,9 @@ export async function saveAnalysisResultFromPython(ticker: string, analysis: any
 
     logger.info(`📊 Python分析結果: ${JSON.stringify(analysis).substring(0, 300)}...`);
 
-    // Python から返されたデータの形式を確認し、適切なフィールドをマッピング
-    const indicators = analysis.indicators || {};
-    
     // 分析結果を保存
     const result = await prisma.analysisResult.create({
-      data: {
-        stock_id: stock.id,
-        signal: (analysis.signal || 'hold').toUpperCase(),
-        score: Math.round((analysis.score || 0.5) * 100), // スコアを0-100の範囲に変換
-        confidence: analysis.confidence || 0.5,
-        reason: analysis.reason || null,
-        ma_5: indicators.ma_5 || null,
-        ma_20: indicators.ma_20 || null,
-        ma_50: indicators.ma_50 || null,
-        rsi_14: indicators.rsi || null,
-        macd: indicators.macd || null,
-        macd_signal: indicators.macd_signal || null,
-        current_price: analysis.current_price || 0,
-        analysis_date: new Date(),
-      },
+      data: toAnalysisResultData(stock.id, analysis),
     });
 
     logger.info(`✅ 分析結果を保存しました (Ticker: ${ticker}, Stock ID: ${stock.id}, Signal: ${result.signal}, Score: ${result.score})`);
@@ -289,6 +296,54 @@ export async function saveAnalysisResultFromPython(ticker: string, analysis: any
   }
 }
 
+export interface BatchSaveItemResult {
+  ticker: string;
+  success: boolean;
+  status: number;
+  error?: string;
+}
+
+/**
+ * Python から送られた複数の分析結果を一括保存
+ * （銘柄の検索と保存をそれぞれ1回のクエリで行い、銘柄ごとの結果を返す）
+ */
+export async function saveAnalysisResultsBatchFromPython(
+  items: { ticker: string; analysis: any }[]
+): Promise<BatchSaveItemResult[]> {
+  const tickers = Array.from(new Set(items.map((item) => item.ticker)));
+  const stocks = await prisma.stock.findMany({
+    where: { symbol: { in: tickers } },
+  });
+  const stockIdBySymbol = new Map(stocks.map((stock: any) => [stock.symbol, stock.id]));
+
+  const results: BatchSaveItemResult[] = [];
+  const rows = [];
+  for (const { ticker, analysis } of items) {
+    const stockId = stockIdBySymbol.get(ticker);
+    if (stockId === undefined) {
+      results.push({ ticker, success: false, status: 404, error: `銘柄シンボル ${ticker} が見つかりません。` });
+      continue;
+    }
+    rows.push({ ticker, data: toAnalysisResultData(stockId, analysis) });
+  }
+
+  if (rows.length > 0) {
+    try {
+      await prisma.analysisResult.createMany({ data: rows.map((row) => row.data) });
+      results.push(...rows.map(({ ticker }) => ({ ticker, success: true, status: 201 })));
+    } catch (error) {
+      logger.error(`❌ 分析結果一括保存失敗 (${rows.length}件): ${error instanceof Error ? error.message : error}`);
+      results.push(
+        ...rows.map(({ ticker }) => ({ ticker, success: false, status: 500, error: '分析結果の保存に失敗しました。' }))
+      );
+    }
+  }
+
+  const savedCount = results.filter((result) => result.success).length;
+  logger.info(`✅ 分析結果を一括保存しました (${savedCount}/${items.length}件)`);
+  return results;
+}
+
 /**
  * 複数の銘柄 ID から銘柄情報を取得
  */
@@ -321,5 +376,6 @@ export default {
   getAnalysisHistory,
   upsertAnalysisResult,
   saveAnalysisResultFromPython,
+  saveAnalysisResultsBatchFromPython,
   getStocksByIds,
 };